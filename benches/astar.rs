@@ -0,0 +1,25 @@
+//! Benchmarks of the A* search of the edge router with a shared and with a fresh search workspace.
+//!
+//! Run with `cargo bench --features bench`. The crate links against Python, see `cargo-test.sh` for the
+//! environment needed to find the Python library.
+
+use criterion::{black_box, criterion_group, criterion_main, BenchmarkId, Criterion};
+use netext_core::routing_bench::AstarFixture;
+
+fn astar_workspace(c: &mut Criterion) {
+    let mut group = c.benchmark_group("astar_workspace");
+    for (width, height) in [(155, 104), (273, 175), (394, 206)] {
+        let fixture = AstarFixture::new(width, height, 50);
+        for (name, reuse_workspace) in [("fresh", false), ("reused", true)] {
+            group.bench_with_input(
+                BenchmarkId::new(name, format!("{width}x{height}")),
+                &reuse_workspace,
+                |b, &reuse_workspace| b.iter(|| black_box(fixture.route(reuse_workspace))),
+            );
+        }
+    }
+    group.finish();
+}
+
+criterion_group!(benches, astar_workspace);
+criterion_main!(benches);
@@ -3,6 +3,7 @@ Renders networkx graphs to the terminal.
 """
 
 from netext.console_graph import ConsoleGraph, AutoZoom, ZoomSpec
+from netext.graph_mutations import AddNode, AddEdge, UpdateNode, UpdateEdge, RemoveNode, RemoveEdge
 from netext.properties.node import NodeProperties, Port
 from netext.properties.shape import ShapeProperties, JustContent, Box
 from netext.properties.edge import EdgeProperties
@@ -16,6 +17,12 @@ __all__ = [
     "ConsoleGraph",
     "AutoZoom",
     "ZoomSpec",
+    "AddNode",
+    "AddEdge",
+    "UpdateNode",
+    "UpdateEdge",
+    "RemoveNode",
+    "RemoveEdge",
     "NodeProperties",
     "Port",
     "ShapeProperties",
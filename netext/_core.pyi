@@ -75,6 +75,8 @@ class EdgeRoutingsResult:
     def __init__(self, paths: list[list[DirectedPoint]], trace: Optional[RoutingTrace]) -> None: ...
 
 class EdgeRouter:
+    threads: int
+    def __init__(self, threads: int = 1) -> None: ...
     def add_node(self, node: Hashable, placed_node: PlacedRectangularNode) -> None: ...
     def add_edge(self, u: Hashable, v: Hashable, line: list[Point]) -> None: ...
     def remove_node(self, node: Hashable) -> None: ...
@@ -121,16 +123,54 @@ class LayoutDirection(Enum):
     TOP_DOWN = 0
     LEFT_RIGHT = 1
 
+class LayeringMethod(Enum):
+    LONGEST_PATH = 0
+    NETWORK_SIMPLEX = 1
+
 class LayoutEngine:
     layout_direction: LayoutDirection
 
     def layout(self, graph: CoreGraph) -> Iterable[tuple[Hashable, Point]]: ...
 
 class SugiyamaLayout(LayoutEngine):
-    def __init__(self, direction: LayoutDirection) -> None: ...
+    def __init__(
+        self,
+        direction: LayoutDirection,
+        layering: LayeringMethod = LayeringMethod.LONGEST_PATH,
+        ordering_starts: int = 1,
+        pack_components: bool = False,
+        warm_start: bool = False,
+    ) -> None: ...
+    @property
+    def layers(self) -> Optional[list[list[Hashable]]]: ...
+    @layers.setter
+    def layers(self, layers: Optional[list[list[Hashable]]]) -> None: ...
+    def layout_incremental(
+        self, graph: CoreGraph, positions: list[tuple[Hashable, Point]]
+    ) -> Iterable[tuple[Hashable, Point]]: ...
 
 class StaticLayout(LayoutEngine):
     def __init__(self) -> None: ...
 
 class ForceDirectedLayout(LayoutEngine):
-    def __init__(self) -> None: ...
+    def __init__(self, theta: float = 0.8, pack_components: bool = False) -> None: ...
+    def layout_incremental(
+        self, graph: CoreGraph, positions: list[tuple[Hashable, Point]]
+    ) -> Iterable[tuple[Hashable, Point]]: ...
+
+class MultilevelForceLayout(LayoutEngine):
+    def __init__(self, theta: float = 0.8, pack_components: bool = False) -> None: ...
+    def layout_incremental(
+        self, graph: CoreGraph, positions: list[tuple[Hashable, Point]]
+    ) -> Iterable[tuple[Hashable, Point]]: ...
+
+class TreeLayout(LayoutEngine):
+    def __init__(self, direction: LayoutDirection, pack_components: bool = False) -> None: ...
+
+class StressLayout(LayoutEngine):
+    def __init__(self, pivots: int = 50, iterations: int = 30, pack_components: bool = False) -> None: ...
+
+def composite_buffers(
+    buffers: list[tuple[int, int, int, int, int, int, float, list[list[tuple[str | None, int, int]]]]],
+    viewport: tuple[int, int, int, int],
+) -> tuple[int, list[list[tuple[str, int, int]]]]: ...
@@ -1,10 +1,12 @@
 from collections import defaultdict
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 from heapq import merge
 from typing import Any
 
 from rich.segment import Segment
+from rich.style import Style
 from netext.geometry import Region
+import netext._core as core
 
 from netext.rendering.segment_buffer import Reference, StripBuffer, Spacer
 
@@ -21,22 +23,62 @@ def flatten_strips(strips: list[list[Segment]], *reverse_map: Any) -> list[Segme
 
 
 def render_buffers(
-    buffers: Iterable[StripBuffer], viewport: Region
+    buffers: Iterable[StripBuffer], viewport: Region, build_reverse_map: bool = False
 ) -> tuple[list[list[Segment]], dict[tuple[int, int], Reference]]:
-    full_width = viewport.x + viewport.width
-    full_height = viewport.y + viewport.height
+    """Composite the buffers within the viewport into strips of segments.
 
+    Args:
+        buffers (Iterable[StripBuffer]): The buffers to composite.
+        viewport (Region): The region to composite.
+        build_reverse_map (bool, optional): Whether to map each visible cell to the reference of its buffer.
+            Defaults to False, in which case the returned map is empty.
+
+    Returns:
+        tuple[list[list[Segment]], dict[tuple[int, int], Reference]]: The strips and the reverse map.
+    """
     reverse_buffer_map: dict[tuple[int, int], Reference] = {}
+    strips = list(iter_render_buffers(buffers, viewport, reverse_buffer_map if build_reverse_map else None))
+    return strips, reverse_buffer_map
+
+
+def iter_render_buffers(
+    buffers: Iterable[StripBuffer],
+    viewport: Region,
+    reverse_buffer_map: dict[tuple[int, int], Reference] | None = None,
+) -> Iterator[list[Segment]]:
+    """Composite the buffers within the viewport, yielding each strip as soon as it is final.
+
+    Only the buffers intersecting the current row are kept active, so the strips can be streamed
+    without holding the whole composited viewport in memory. The strips are the same as the ones
+    returned by [render_buffers][netext.buffer_renderer.render_buffers], i.e. the first strip is
+    the first row of the viewport covered by any buffer.
+
+    Args:
+        buffers (Iterable[StripBuffer]): The buffers to composite.
+        viewport (Region): The region to composite.
+        reverse_buffer_map (dict[tuple[int, int], Reference] | None, optional): If given, each visible cell
+            is mapped to the reference of its buffer in this dictionary. Defaults to None.
+
+    Yields:
+        list[Segment]: The strip of each row.
+    """
+    full_width = viewport.x + viewport.width
+    full_height = viewport.y + viewport.height
 
-    buffers_by_row: dict[int, list[StripBuffer]] = defaultdict(list)
+    # Buffers starting above the viewport are activated at the first row of the viewport
+    # (with their first visible strip) so that rows above the viewport are never walked.
+    buffers_by_row: dict[int, list[tuple[int, StripBuffer]]] = defaultdict(list)
     for buffer in buffers:
         if buffer.bottom_y >= viewport.y and buffer.top_y < full_height:
-            buffers_by_row[buffer.top_y] = sorted(buffers_by_row[buffer.top_y] + [buffer])
-
-    result_strips = []
+            first_row = max(buffer.top_y, viewport.y)
+            buffers_by_row[first_row].append((first_row - buffer.top_y, buffer))
 
     if not buffers_by_row:
-        return ([], dict())
+        return
+
+    # Buffers that started on an earlier row precede buffers starting on the current row.
+    for row_buffers in buffers_by_row.values():
+        row_buffers.sort(key=lambda row_buffer: (row_buffer[1].left_x, row_buffer[1].top_y))
 
     active_buffers: list[tuple[int, list[Segment | Spacer], int, StripBuffer]] = []
     for row in range(min(buffers_by_row.keys()), full_height):
@@ -61,25 +103,23 @@ def render_buffers(
             [
                 (
                     buffer.left_x,
-                    buffer.strips[0].segments,
-                    0,
+                    buffer.strips[buffer_row].segments,
+                    buffer_row,
                     buffer,
                 )
-                for buffer in buffers_by_row[row]
+                for buffer_row, buffer in buffers_by_row[row]
             ],
             key=lambda buffer: buffer[0],
         )
 
         active_buffers = list(merge(active_buffers, new_active_buffers, key=lambda buffer: buffer[0]))
-
-        if row < viewport.y:
-            continue
-
-        result_strips.append(current_strip)
+        # Only the buckets of upcoming rows are kept (the lookup above creates empty buckets).
+        del buffers_by_row[row]
 
         if not active_buffers:
-            segment_content = " " * full_width
+            segment_content = " " * viewport.width
             current_strip.append(Segment(segment_content))
+            yield current_strip
             continue
 
         current_x = viewport.x
@@ -176,9 +216,11 @@ def render_buffers(
                         out_segment = Segment(" " * segment.cell_length)
                         current_strip.append(out_segment)
                     else:
-                        for x in range(current_x, current_x + segment.cell_length):
-                            if buffer.reference is not None:
-                                reverse_buffer_map[x, row] = buffer.reference
+                        if reverse_buffer_map is not None:
+                            reference = buffer.reference
+                            if reference is not None:
+                                for x in range(current_x, current_x + segment.cell_length):
+                                    reverse_buffer_map[x, row] = reference
                         current_strip.append(segment)
                     current_x += segment.cell_length
                 segment_left_x += full_segment_cell_length
@@ -187,4 +229,71 @@ def render_buffers(
             segment = Segment(" " * (full_width - current_x))
             current_strip.append(segment)
 
+        yield current_strip
+
+
+def render_buffers_native(
+    buffers: Iterable[StripBuffer], viewport: Region, build_reverse_map: bool = False
+) -> tuple[list[list[Segment]], dict[tuple[int, int], Reference]]:
+    """Render the buffers with the compositor of the core module.
+
+    The result is identical to [render_buffers][netext.buffer_renderer.render_buffers]. Buffers containing
+    segments with control codes or characters that are not exactly one cell wide are not supported by the
+    native compositor, in this case the buffers are rendered by `render_buffers` instead.
+    """
+    buffers = list(buffers)
+    styles: list[Style | None] = [None]
+    style_ids: dict[Style, int] = {}
+
+    native_buffers = []
+    for buffer in buffers:
+        strips = []
+        for strip in buffer.strips:
+            native_segments = []
+            for segment in strip.segments:
+                if isinstance(segment, Spacer):
+                    native_segments.append((None, segment.width, 0))
+                    continue
+                if segment.control or segment.cell_length != len(segment.text):
+                    return render_buffers(buffers, viewport, build_reverse_map)
+                style_id = 0
+                if segment.style is not None:
+                    style_id = style_ids.setdefault(segment.style, len(styles))
+                    if style_id == len(styles):
+                        styles.append(segment.style)
+                native_segments.append((segment.text, segment.cell_length, style_id))
+            strips.append(native_segments)
+        native_buffers.append(
+            (
+                buffer.left_x,
+                buffer.right_x,
+                buffer.top_y,
+                buffer.bottom_y,
+                buffer.height,
+                buffer.z_index.layer.value,
+                float(buffer.z_index.layer_index),
+                strips,
+            )
+        )
+
+    first_row, rows = core.composite_buffers(native_buffers, (viewport.x, viewport.y, viewport.width, viewport.height))
+
+    references: dict[int, Reference | None] = {}
+    reverse_buffer_map: dict[tuple[int, int], Reference] = {}
+    result_strips = []
+    for row, runs in enumerate(rows, start=first_row):
+        current_strip = []
+        x = viewport.x
+        for text, style_id, buffer_index in runs:
+            current_strip.append(Segment(text, styles[style_id]))
+            if build_reverse_map and buffer_index >= 0:
+                if buffer_index not in references:
+                    references[buffer_index] = buffers[buffer_index].reference
+                reference = references[buffer_index]
+                if reference is not None:
+                    for cell_x in range(x, x + len(text)):
+                        reverse_buffer_map[cell_x, row] = reference
+            x += len(text)
+        result_strips.append(current_strip)
+
     return result_strips, reverse_buffer_map
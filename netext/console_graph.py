@@ -1,14 +1,14 @@
 from collections.abc import Hashable
+from contextlib import contextmanager
 from dataclasses import dataclass
 from enum import Enum
-from itertools import chain
-import itertools
-from typing import Any, Iterable, cast
+from typing import Any, Callable, Iterable, Iterator, cast
 from networkx import DiGraph  # type: ignore
 
 import networkx as nx  # type: ignore
 from rich.console import Console, ConsoleOptions, RenderResult
 from rich.measure import Measurement
+from rich.segment import Segment
 
 from netext.geometry import Region
 
@@ -19,25 +19,38 @@ from netext.properties.node import NodeProperties
 import netext._core as core
 from netext._core import Point
 
-from netext.rendering.segment_buffer import StripBuffer
+from netext.rendering.buffer_index import BufferGroup, StripBufferIndex
+from netext.rendering.segment_buffer import Reference, StripBuffer
+from netext.rendering.tile_cache import TileCache
 
-from netext.buffer_renderer import render_buffers
+from netext.buffer_renderer import iter_render_buffers, render_buffers, render_buffers_native
 from netext.node_rasterizer import NodeBuffer, rasterize_node
 
 from netext.graph_transitions import (
     render_node_buffers_for_layout,
     compute_node_layout,
+    compute_incremental_node_layout,
+    supports_incremental_layout,
     compute_zoom,
     render_node_buffers_at_zoom,
     render_all_edges,
     register_node_with_router,
 )
 from netext.graph_mutations import (
+    AddEdge,
+    AddNode,
+    DeferredRendering,
+    GraphMutation,
+    RemoveEdge,
+    RemoveNode,
+    UpdateEdge,
+    UpdateNode,
     compute_node_view_position,
     rasterize_node_for_layout,
     rasterize_node_at_lod,
     check_zoom_recomputation,
     rasterize_and_store_edge,
+    rasterize_and_store_edges,
     remove_existing_edge_buffers,
     rerender_connected_edges,
 )
@@ -46,6 +59,9 @@ from rich.traceback import install
 
 install(show_locals=False)
 
+MAX_CACHED_VIEWPORT_ROWS = 1024
+"""Composited rows of viewports up to this height are cached between renders, taller viewports are only streamed."""
+
 
 class RenderState(Enum):
     INITIAL = "initial"
@@ -66,6 +82,12 @@ class RenderState(Enum):
     EDGES_RENDERED = "edges_rendered"
     """The edges have been rendered for the current lod."""
 
+    NODES_PLACED = "nodes_placed"
+    """The nodes added without a position since the last layout have been placed incrementally."""
+
+    VIEWPORT_RENDERED = "viewport_rendered"
+    """The buffers within the current viewport have been composited."""
+
 
 transition_graph = nx.DiGraph()
 
@@ -96,6 +118,21 @@ transition_graph.add_edge(
     transition="render_edges",
 )
 
+transition_graph.add_edge(
+    RenderState.EDGES_RENDERED,
+    RenderState.NODES_PLACED,
+    transition="place_nodes",
+)
+
+transition_graph.add_edge(
+    RenderState.NODES_PLACED,
+    RenderState.VIEWPORT_RENDERED,
+    transition="render_viewport",
+)
+
+# The states that still have to be reached from each state, looked up on every access to rendered output.
+_pending_states = {state: frozenset(nx.descendants(transition_graph, state)) for state in transition_graph}
+
 
 class AutoZoom(Enum):
     FIT = "fit"
@@ -122,6 +159,10 @@ class ConsoleGraph:
         max_width: int | None = None,
         max_height: int | None = None,
         zoom: float | tuple[float, float] | ZoomSpec | AutoZoom = 1.0,
+        native_compositor: bool = False,
+        tile_budget: int = 256,
+        routing_threads: int = 1,
+        incremental_layout: bool = False,
     ):
         """
         A console representation of a networkx graph.
@@ -142,9 +183,21 @@ class ConsoleGraph:
             viewport (Region, optional): The viewport to render. Defaults to the whole graph.
             zoom (float | tuple[float, float] | ZoomSpec | AutoZoom, optional): The zoom level, either a float, a
                 tuple of zoom in x and y direction or a zoom spec / auto zoom mode. Defaults to 1.0.
+            native_compositor (bool, optional): Whether to composite the buffers with the compositor of the
+                core module instead of the Python compositor. Defaults to False.
+            tile_budget (int, optional): The maximum number of composited tiles that are cached for rendering
+                regions of the graph. Defaults to 256.
+            routing_threads (int, optional): The number of threads used to route edges whose surroundings do not
+                overlap concurrently. Edges routed in parallel search a window around their endpoints only.
+                Defaults to 1, which routes all edges one after another.
+            incremental_layout (bool, optional): Whether nodes added without a position are placed by
+                continuing from the current layout instead of laying out the whole graph again, if the layout
+                engine supports it. Nodes are placed on the next render, and only the nodes that moved and their
+                edges are rendered again. Defaults to False.
         """
         self._viewport = viewport
         self._render_state = RenderState.INITIAL
+        self._native_compositor = native_compositor
 
         if isinstance(zoom, float) or isinstance(zoom, int):
             zoom = ZoomSpec(zoom, zoom)
@@ -159,7 +212,9 @@ class ConsoleGraph:
         self._max_height = max_height
 
         self._layout_engine = layout_engine
-        self._edge_router = core.EdgeRouter()
+        self._incremental_layout = incremental_layout
+        self._routing_threads = routing_threads
+        self._edge_router = self._create_edge_router()
 
         # Move efficient transformation into the core graph
         self._core_graph = core.CoreGraph.from_edges(
@@ -183,21 +238,48 @@ class ConsoleGraph:
         self.edge_buffers: dict[tuple[Hashable, Hashable], EdgeBuffer] = dict()
         self.edge_label_buffers: dict[tuple[Hashable, Hashable], list[StripBuffer]] = dict()
 
-    def _require(self, required_state: RenderState):
-        if required_state in nx.descendants(transition_graph, self._render_state):
-            self._transition_to(required_state)
-
-    def _transition_to(self, target_state: RenderState):
-        path = nx.shortest_path(transition_graph, self._render_state, target_state)
-        for u, v in zip(path, path[1:]):
+        self._buffer_index = StripBufferIndex()
+
+        # Composited output is cached at two granularities: full rows of the viewport for console output and
+        # tiles for the regions requested by the textual widget. Both are evicted together by
+        # _flush_dirty_rows from the rows the buffer index reports as changed, so they never disagree. The
+        # changed rows are also collected for the widget, which keeps the lines it assembled from the tiles.
+        self._viewport_rows = range(0)
+        self._row_cache: dict[int, list[Segment]] = dict()
+        self._row_cache_columns: tuple[int, int] | None = None
+        self._tile_cache = TileCache(max_tiles=tile_budget)
+        self._view_dirty_rows: list[tuple[int, int]] | None = None
+
+        self._pending_mutations: list[GraphMutation] | None = None
+        self._deferred_rendering: DeferredRendering | None = None
+        # Nodes added without a position that are placed incrementally on the next render.
+        self._unplaced_nodes: dict[Hashable, None] = dict()
+
+    def _require(self, required_state: RenderState, cancelled: Callable[[], bool] | None = None):
+        if required_state in _pending_states[self._render_state]:
+            self._transition_to(required_state, cancelled)
+
+    def _is_rendered(self, state: RenderState) -> bool:
+        return state not in _pending_states[self._render_state]
+
+    def _transition_to(self, target_state: RenderState, cancelled: Callable[[], bool] | None = None):
+        while self._render_state != target_state:
+            # The render state is consistent between transitions, so rendering can stop here and
+            # continue from this state later on.
+            if cancelled is not None and cancelled():
+                return
+            u, v = nx.shortest_path(transition_graph, self._render_state, target_state)[:2]
             el = transition_graph.edges[u, v]
             transition = el["transition"]
             transition_func = getattr(self, f"_transition_{transition}")
             transition_func()
-            self._render_state = v
+            # Placing nodes can change the zoom and reset the render state, rendering then
+            # continues from there.
+            if self._render_state == u:
+                self._render_state = v
 
     def _reset_render_state(self, new_state: RenderState) -> None:
-        if self._render_state in nx.descendants(transition_graph, new_state):
+        if self._render_state in _pending_states[new_state]:
             self._render_state = new_state
 
     @property
@@ -259,10 +341,13 @@ class ConsoleGraph:
     @viewport.setter
     def viewport(self, value: Region) -> None:
         self._viewport = value
-        self._reset_render_state(RenderState.ZOOMED_POSITIONS_COMPUTED)
+        # Moving the viewport does not change any buffer, so only the composition
+        # of the buffers has to be redone.
+        self._reset_render_state(RenderState.EDGES_RENDERED)
 
     def reset_viewport(self) -> None:
         self._viewport = None
+        self._reset_render_state(RenderState.EDGES_RENDERED)
 
     def add_node(
         self,
@@ -278,36 +363,23 @@ class ConsoleGraph:
                 space coordinates.
             data (dict[str, Any] | None): The data and attributes of the node.
         """
+        if self._queue_mutation(AddNode(node, position, data)):
+            return
+
         self._require(RenderState.EDGES_RENDERED)
+        self._reset_render_state(RenderState.EDGES_RENDERED)
 
         if data is None:
             data = dict()
 
         properties = NodeProperties.from_data_dict(data)
 
-        layout_buffer = rasterize_node_for_layout(
-            self.console,
-            node,
-            data,
-            self._layout_engine.layout_direction,
-        )
-        self.node_buffers_for_layout[node] = layout_buffer
-
-        display_buffer = rasterize_node_at_lod(
-            self.console,
-            node,
-            data,
-            self._zoom_factor,
-            layout_buffer.node_anchors,
-        )
-        display_buffer.determine_edge_positions()
+        display_buffer = self._rasterize_added_node(node, data)
 
         self._core_graph.add_node(
             node, dict(data, **{"$properties": properties}), core.Size(display_buffer.width, display_buffer.height)
         )
 
-        self.node_buffers[node] = display_buffer
-
         if position is not None:
             node_position = cast(FloatPoint, position)
             node_position += self.offset
@@ -326,10 +398,36 @@ class ConsoleGraph:
 
             self.node_buffers[node].center = compute_node_view_position(node_position, self.zoom_x, self.zoom_y)
             register_node_with_router(self._edge_router, node, self.node_buffers[node])
-            self._render_port_buffer_for_node(node)
+            self._render_port_buffers_for_nodes(node)
+        elif self._places_nodes_incrementally():
+            # The node is placed on the next render, once the edges added along with it are known.
+            self._unplaced_nodes[node] = None
         else:
             self._reset_render_state(RenderState.NODE_BUFFERS_RENDERED_FOR_LAYOUT)
 
+    def _rasterize_added_node(self, node: Hashable, data: dict[str, Any]) -> NodeBuffer:
+        layout_buffer = rasterize_node_for_layout(
+            self.console,
+            node,
+            data,
+            self._layout_engine.layout_direction,
+        )
+        self.node_buffers_for_layout[node] = layout_buffer
+
+        display_buffer = rasterize_node_at_lod(
+            self.console,
+            node,
+            data,
+            self._zoom_factor,
+            layout_buffer.node_anchors,
+        )
+        display_buffer.determine_edge_positions()
+        self.node_buffers[node] = display_buffer
+        return display_buffer
+
+    def _places_nodes_incrementally(self) -> bool:
+        return self._incremental_layout and supports_incremental_layout(self._layout_engine)
+
     def add_edge(self, u: Hashable, v: Hashable, data: dict[str, Any] | None = None) -> None:
         """Add an edge between existing nodes in the graph.
 
@@ -341,8 +439,11 @@ class ConsoleGraph:
         Raises:
             ValueError: Raised if one of the edges does not exist in the graph.
         """
+        if self._queue_mutation(AddEdge(u, v, data)):
+            return
 
         self._require(RenderState.EDGES_RENDERED)
+        self._reset_render_state(RenderState.EDGES_RENDERED)
 
         assert self._zoom_factor is not None, (
             "You tried to add an edge without a computed zoom factor. This should never happen."
@@ -361,6 +462,14 @@ class ConsoleGraph:
         properties = EdgeProperties.from_data_dict(data)
         self._core_graph.add_edge(u, v, dict(data, **{"$properties": properties}))
 
+        if u in self._unplaced_nodes or v in self._unplaced_nodes:
+            # The edge is rendered once its nodes are placed.
+            return
+
+        if self._deferred_rendering is not None:
+            self._deferred_rendering.add_edge(u, v)
+            return
+
         rasterize_and_store_edge(
             self.console,
             self._edge_router,
@@ -374,6 +483,7 @@ class ConsoleGraph:
             len(self.edge_buffers),
             self._layout_engine.layout_direction,
         )
+        self._index_edge(u, v)
 
         self._render_port_buffer_for_node(u)
         self._render_port_buffer_for_node(v)
@@ -387,19 +497,24 @@ class ConsoleGraph:
         Returns:
             None
         """
+        if self._queue_mutation(RemoveNode(node)):
+            return
 
         self._require(RenderState.EDGES_RENDERED)
+        self._reset_render_state(RenderState.EDGES_RENDERED)
 
         edges = list(self._core_graph.all_edges())
         for u, v in edges:
             if u == node or v == node:
                 self.remove_edge(u, v)
 
-        self.node_positions.pop(node)
+        self.node_positions.pop(node, None)
+        self._unplaced_nodes.pop(node, None)
         self.node_buffers_for_layout.pop(node)
         self.node_buffers.pop(node)
 
         self.port_buffers.pop(node, None)
+        self._index_node(node)
         self._core_graph.remove_node(node)
         self._edge_router.remove_node(node)
 
@@ -413,7 +528,11 @@ class ConsoleGraph:
         Returns:
             None
         """
+        if self._queue_mutation(RemoveEdge(u, v)):
+            return
+
         self._require(RenderState.EDGES_RENDERED)
+        self._reset_render_state(RenderState.EDGES_RENDERED)
 
         self.node_buffers[v].disconnect(u)
         self.node_buffers[u].disconnect(v)
@@ -421,11 +540,14 @@ class ConsoleGraph:
         self._core_graph.remove_edge(u, v)
         self._edge_router.remove_edge(u, v)
 
-        self.edge_buffers.pop((u, v))
-        self.edge_label_buffers.pop((u, v))
+        # Edges added in a batch have no buffers until the batch is rendered.
+        self.edge_buffers.pop((u, v), None)
+        self.edge_label_buffers.pop((u, v), None)
+        if self._deferred_rendering is not None:
+            self._deferred_rendering.edges.pop((u, v), None)
+        self._index_edge(u, v)
 
-        self._render_port_buffer_for_node(u)
-        self._render_port_buffer_for_node(v)
+        self._render_port_buffers_for_nodes(u, v)
 
     def update_node(
         self,
@@ -445,12 +567,36 @@ class ConsoleGraph:
         Returns:
             None
         """
+        if self._queue_mutation(UpdateNode(node, position, data, update_data)):
+            return
+
         self._require(RenderState.EDGES_RENDERED)
+        self._reset_render_state(RenderState.EDGES_RENDERED)
         force_edge_rerender = False
 
         if data is None and position is None:
             return
 
+        if node in self._unplaced_nodes:
+            if position is None:
+                # The node is only rendered once it is placed, until then its buffers are kept up to date.
+                data = cast(dict[str, Any], data)
+                new_data = (
+                    dict(self._core_graph.node_data_or_default(node, dict()), **data) if update_data else dict(data)
+                )
+                new_data.pop("$properties", None)
+                self._core_graph.update_node_data(
+                    node, dict(new_data, **{"$properties": NodeProperties.from_data_dict(new_data)})
+                )
+                display_buffer = self._rasterize_added_node(node, new_data)
+                self._core_graph.update_node_size(node, core.Size(display_buffer.width, display_buffer.height))
+                return
+            if self._deferred_rendering is None:
+                # The edges of the node have not been rendered yet, they are rendered like in a batch.
+                self.apply_mutations([UpdateNode(node, position, data, update_data)])
+                return
+            del self._unplaced_nodes[node]
+
         connected_ports = self.node_buffers[node].connected_ports
         properties = NodeProperties.from_data_dict({})
         if data is not None:
@@ -519,14 +665,21 @@ class ConsoleGraph:
         # TODO also ports could have changed with data update needs some proper treatment
         self.node_buffers[node].connected_ports = connected_ports
 
-        self._render_port_buffer_for_node(node)
+        self._render_port_buffers_for_nodes(node)
 
         self.node_buffers[node].center = compute_node_view_position(node_position, self.zoom_x, self.zoom_y)
         self._core_graph.update_node_data(node, dict(data, **{"$properties": properties}))
 
         register_node_with_router(self._edge_router, node, self.node_buffers[node])
-
-        if force_edge_rerender:
+        self._index_node(node)
+
+        if force_edge_rerender and self._deferred_rendering is not None:
+            for v in self._core_graph.neighbors(node):
+                if self._core_graph.contains_edge(node, v):
+                    self._deferred_rendering.add_edge(node, v)
+                if self._core_graph.contains_edge(v, node):
+                    self._deferred_rendering.add_edge(v, node)
+        elif force_edge_rerender:
             rerender_connected_edges(
                 self.console,
                 self._core_graph,
@@ -540,6 +693,9 @@ class ConsoleGraph:
                 self.port_buffers,
                 self._render_port_buffer_for_node,
             )
+            for v in self._core_graph.neighbors(node):
+                self._index_edge(node, v)
+                self._index_edge(v, node)
 
     def to_graph_coordinates(self, p: Point) -> FloatPoint:
         """Converts a point from view coordinates to graph coordinates.
@@ -594,7 +750,11 @@ class ConsoleGraph:
             None
 
         """
+        if self._queue_mutation(UpdateEdge(u, v, data, update_data)):
+            return
+
         self._require(RenderState.EDGES_RENDERED)
+        self._reset_render_state(RenderState.EDGES_RENDERED)
         if self._zoom_factor is None:
             raise RuntimeError("You can only update edges once the zoom factor has been computed")
 
@@ -607,6 +767,10 @@ class ConsoleGraph:
         properties = EdgeProperties.from_data_dict(data)
         self._core_graph.update_edge_data(u, v, dict(data, **{"$properties": properties}))
 
+        if self._deferred_rendering is not None:
+            self._deferred_rendering.add_edge(u, v)
+            return
+
         old_z_index = remove_existing_edge_buffers(
             self._edge_router,
             u,
@@ -629,28 +793,245 @@ class ConsoleGraph:
             old_z_index,
             self._layout_engine.layout_direction,
         )
+        self._index_edge(u, v)
 
         self._render_port_buffer_for_node(u)
         self._render_port_buffer_for_node(v)
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Queue all mutations made within the context and apply them at once when the context is left.
+
+        See [apply_mutations][netext.console_graph.ConsoleGraph.apply_mutations] for how the mutations are
+        applied. Mutations are validated when they are applied, if the context is left with an exception
+        the queued mutations are discarded. Nested batches are applied with the outermost batch.
+
+        Example:
+            ```python
+            with console_graph.batch():
+                console_graph.add_node("a", position=FloatPoint(0, 0))
+                console_graph.add_edge("a", "b")
+            ```
+        """
+        if self._pending_mutations is not None:
+            yield
+            return
+
+        self._pending_mutations = []
+        try:
+            yield
+            mutations = self._pending_mutations
+        finally:
+            self._pending_mutations = None
+        self.apply_mutations(mutations)
+
+    def apply_mutations(self, mutations: Iterable[GraphMutation]) -> None:
+        """Apply a sequence of mutations to the graph at once.
+
+        The mutations are applied in order and lead to the same graph as the corresponding calls of the
+        mutation methods, but the expensive parts are shared: All edges affected by any of the mutations are
+        routed with a single call to the edge router and the ports of every touched node are rendered once.
+        If a mutation requires a new layout or zoom, the remaining mutations only update the graph and the
+        layout is computed once on the next render.
+
+        Args:
+            mutations (Iterable[GraphMutation]): The mutations to apply.
+        """
+        mutations = list(mutations)
+        if self._pending_mutations is not None:
+            self._pending_mutations.extend(mutations)
+            return
+        if not mutations:
+            return
+
+        self._require(RenderState.EDGES_RENDERED)
+        self._reset_render_state(RenderState.EDGES_RENDERED)
+
+        self._deferred_rendering = DeferredRendering()
+        try:
+            for mutation in mutations:
+                if self._render_state == RenderState.EDGES_RENDERED:
+                    self._apply_mutation(mutation)
+                else:
+                    self._apply_mutation_before_layout(mutation)
+        finally:
+            deferred_rendering = self._deferred_rendering
+            self._deferred_rendering = None
+            if self._render_state == RenderState.EDGES_RENDERED:
+                self._render_deferred(deferred_rendering)
+
+    def _queue_mutation(self, mutation: GraphMutation) -> bool:
+        if self._pending_mutations is None:
+            return False
+        self._pending_mutations.append(mutation)
+        return True
+
+    def _apply_mutation(self, mutation: GraphMutation) -> None:
+        match mutation:
+            case AddNode(node, position, data):
+                self.add_node(node, position, data)
+            case AddEdge(u, v, data):
+                self.add_edge(u, v, data)
+            case UpdateNode(node, position, data, update_data):
+                self.update_node(node, position, data, update_data)
+            case UpdateEdge(u, v, data, update_data):
+                self.update_edge(u, v, data, update_data)
+            case RemoveNode(node):
+                self.remove_node(node)
+            case RemoveEdge(u, v):
+                self.remove_edge(u, v)
+
+    def _apply_mutation_before_layout(self, mutation: GraphMutation) -> None:
+        # A previous mutation of the batch invalidated the layout or the zoom, all buffers are rendered
+        # again on the next render, so only the graph and the inputs of the layout are updated.
+        layout_computed = self._render_state == RenderState.NODE_LAYOUT_COMPUTED
+
+        match mutation:
+            case AddNode(node, position, data):
+                data = data if data is not None else dict()
+                layout_buffer = rasterize_node_for_layout(
+                    self.console, node, data, self._layout_engine.layout_direction
+                )
+                self.node_buffers_for_layout[node] = layout_buffer
+                self._core_graph.add_node(
+                    node,
+                    dict(data, **{"$properties": NodeProperties.from_data_dict(data)}),
+                    core.Size(layout_buffer.width, layout_buffer.height),
+                )
+                if position is None:
+                    if layout_computed and self._places_nodes_incrementally():
+                        self._unplaced_nodes[node] = None
+                    else:
+                        self._reset_render_state(RenderState.NODE_BUFFERS_RENDERED_FOR_LAYOUT)
+                elif layout_computed:
+                    self.node_positions[node] = cast(FloatPoint, position) + self.offset
+            case AddEdge(u, v, data):
+                if not self._core_graph.contains_node(u):
+                    raise ValueError(f"Node {u} does not exist in graph")
+                if not self._core_graph.contains_node(v):
+                    raise ValueError(f"Node {v} does not exist in graph")
+                if not self._core_graph.contains_edge(u, v):
+                    data = dict(data) if data is not None else dict()
+                    self._core_graph.add_edge(u, v, dict(data, **{"$properties": EdgeProperties.from_data_dict(data)}))
+            case UpdateNode(node, position, data, update_data):
+                if data is not None:
+                    new_data = (
+                        dict(self._core_graph.node_data_or_default(node, dict()), **data) if update_data else dict(data)
+                    )
+                    new_data.pop("$properties", None)
+                    new_data = dict(new_data, **{"$properties": NodeProperties.from_data_dict(new_data)})
+                    self._core_graph.update_node_data(node, new_data)
+                    if layout_computed:
+                        self.node_buffers_for_layout[node] = rasterize_node_for_layout(
+                            self.console, node, new_data, self._layout_engine.layout_direction
+                        )
+                if position is not None and layout_computed:
+                    self.node_positions[node] = cast(FloatPoint, position) + self.offset
+                    self._unplaced_nodes.pop(node, None)
+            case UpdateEdge(u, v, data, update_data):
+                new_data = dict(self._core_graph.edge_data(u, v), **data) if update_data else dict(data)
+                new_data.pop("$properties", None)
+                self._core_graph.update_edge_data(
+                    u, v, dict(new_data, **{"$properties": EdgeProperties.from_data_dict(new_data)})
+                )
+            case RemoveNode(node):
+                for u, v in list(self._core_graph.all_edges()):
+                    if u == node or v == node:
+                        self._core_graph.remove_edge(u, v)
+                self._core_graph.remove_node(node)
+                self.node_positions.pop(node, None)
+                self._unplaced_nodes.pop(node, None)
+                self.node_buffers_for_layout.pop(node, None)
+                self.node_buffers.pop(node, None)
+                self.port_buffers.pop(node, None)
+            case RemoveEdge(u, v):
+                self._core_graph.remove_edge(u, v)
+
+    def _render_deferred(self, deferred_rendering: DeferredRendering) -> None:
+        assert self._zoom_factor is not None, "Deferred edges can only be rendered with a computed zoom factor."
+
+        edges = [
+            (u, v)
+            for u, v in deferred_rendering.edges
+            if self._core_graph.contains_edge(u, v) and u not in self._unplaced_nodes and v not in self._unplaced_nodes
+        ]
+        if edges:
+            next_edge_index = len(self.edge_buffers)
+            edge_indices: dict[tuple[Hashable, Hashable], int] = dict()
+            for u, v in edges:
+                if (u, v) in self.edge_buffers:
+                    edge_indices[(u, v)] = remove_existing_edge_buffers(
+                        self._edge_router,
+                        u,
+                        v,
+                        self.node_buffers,
+                        self.edge_buffers,
+                        self.edge_label_buffers,
+                    )
+                else:
+                    self.edge_label_buffers.pop((u, v), None)
+                    edge_indices[(u, v)] = next_edge_index
+                    next_edge_index += 1
+
+            rasterize_and_store_edges(
+                self.console,
+                self._core_graph,
+                self._edge_router,
+                edge_indices,
+                self.node_buffers,
+                self.edge_buffers,
+                self.edge_label_buffers,
+                self._zoom_factor,
+                self._layout_engine.layout_direction,
+            )
+            for u, v in edges:
+                self._index_edge(u, v)
+
+        for node in deferred_rendering.nodes:
+            if node in self.node_buffers:
+                self._render_port_buffer_for_node(node)
+
     def layout(self) -> None:
         self._reset_render_state(RenderState.NODE_BUFFERS_RENDERED_FOR_LAYOUT)
 
     def _transition_render_node_buffers_for_layout(self) -> None:
         self.node_buffers_for_layout = render_node_buffers_for_layout(self.console, self._core_graph)
 
+    def _create_edge_router(self) -> core.EdgeRouter:
+        return core.EdgeRouter(threads=self._routing_threads)
+
     def _transition_compute_node_layout(self) -> None:
         self.node_positions, self.offset = compute_node_layout(
             self._layout_engine, self._core_graph, self.node_buffers_for_layout
         )
+        self._unplaced_nodes = dict()
 
     def _transition_compute_zoomed_positions(self) -> None:
-        self._edge_router = core.EdgeRouter()
+        if self._unplaced_nodes:
+            # All buffers are rendered again anyway, so every node can take its new position.
+            self.node_positions = self._compute_incremental_node_layout()
+        self._edge_router = self._create_edge_router()
         zoom_x, zoom_y = self._compute_current_zoom()
         self.zoom_x = zoom_x
         self.zoom_y = zoom_y
         self._zoom_factor = min([zoom_x, zoom_y])
 
+    def _compute_incremental_node_layout(self) -> dict[Hashable, FloatPoint]:
+        self._unplaced_nodes = dict()
+        return compute_incremental_node_layout(self._layout_engine, self._core_graph, self.node_positions)
+
+    def _transition_place_nodes(self) -> None:
+        if not self._unplaced_nodes:
+            return
+        unplaced = self._unplaced_nodes
+        positions = self._compute_incremental_node_layout()
+        # Only the placed nodes and the nodes that moved are rendered again, along with their edges.
+        self.apply_mutations(
+            UpdateNode(node, position - self.offset)
+            for node, position in positions.items()
+            if node in unplaced or position != self.node_positions[node]
+        )
+
     def _compute_current_zoom(self) -> tuple[float, float]:
         return compute_zoom(
             self._zoom,
@@ -688,57 +1069,196 @@ class ConsoleGraph:
             self._layout_engine.layout_direction,
         )
 
+        self._buffer_index.clear()
         for node in self._core_graph.all_nodes():
             self._render_port_buffer_for_node(node)
+        for u, v in self.edge_buffers:
+            self._index_edge(u, v)
 
     def _render_port_buffer_for_node(self, node):
         if self._zoom_factor is None:
             raise RuntimeError("Invalid transition, lod buffers can only be rendered once zoom is computed.")
 
+        if node in self._unplaced_nodes:
+            return
+
         node_buffer = self.node_buffers[node]
         self.port_buffers[node] = node_buffer.get_port_buffers(
             self.console,
         )
+        self._index_node(node)
 
-    def _all_buffers(self) -> Iterable[StripBuffer]:
-        self._require(RenderState.EDGES_RENDERED)
-        # Get graph subview
-        visible_nodes = [
-            node
-            for node in self._core_graph.all_nodes()
-            if self._core_graph.node_data_or_default(node, dict()).get("$show", True)
-        ]
+    def _render_port_buffers_for_nodes(self, *nodes: Hashable) -> None:
+        # Within a batch of mutations ports are rendered once at the end of the batch.
+        if self._deferred_rendering is not None:
+            self._deferred_rendering.nodes.update(dict.fromkeys(nodes))
+            return
+        for node in nodes:
+            self._render_port_buffer_for_node(node)
+
+    def _index_node(self, node: Hashable) -> None:
+        node_buffer = self.node_buffers.get(node)
+        if node_buffer is None or not self._core_graph.node_data_or_default(node, dict()).get("$show", True):
+            self._buffer_index.remove(BufferGroup.NODES, node)
+            self._buffer_index.remove(BufferGroup.PORTS, node)
+            return
+        self._buffer_index.set(BufferGroup.NODES, node, [node_buffer])
+        self._buffer_index.set(BufferGroup.PORTS, node, self.port_buffers.get(node, []))
+
+    def _index_edge(self, u: Hashable, v: Hashable) -> None:
+        # Edge buffers are replaced by removing and reinserting them, so the edge moves to
+        # the end of the query order just as in the edge buffer dictionaries.
+        self._buffer_index.remove(BufferGroup.EDGES, (u, v))
+        self._buffer_index.remove(BufferGroup.EDGE_LABELS, (u, v))
+        edge_buffer = self.edge_buffers.get((u, v))
+        if edge_buffer is not None:
+            self._buffer_index.set(BufferGroup.EDGES, (u, v), [edge_buffer])
+            self._buffer_index.set(BufferGroup.EDGE_LABELS, (u, v), self.edge_label_buffers.get((u, v), []))
+
+    def _transition_render_viewport(self) -> None:
+        viewport = self.viewport
+        last_row = viewport.y + viewport.height - 1
+
+        # Composited rows stay valid as long as the columns of the viewport are the same and
+        # none of the buffers covering the row changed.
+        self._flush_dirty_rows()
+        if self._row_cache_columns != (viewport.x, viewport.width):
+            self._row_cache = dict()
+            self._row_cache_columns = (viewport.x, viewport.width)
+
+        # Very tall viewports are streamed without keeping their rows around.
+        if viewport.height > MAX_CACHED_VIEWPORT_ROWS:
+            self._row_cache = dict()
+
+        visible_buffers = self._buffer_index.query_rows(viewport.y, last_row)
+        if not visible_buffers:
+            self._viewport_rows = range(0)
+            return
 
-        node_buffers = [node_buffer for node, node_buffer in self.node_buffers.items() if node in visible_nodes]
+        # The composited output starts at the first row covered by a buffer. Rows are only
+        # composited once they are requested.
+        first_row = max(viewport.y, min(buffer.top_y for buffer in visible_buffers))
+        self._viewport_rows = range(first_row, last_row + 1)
+
+    def _flush_dirty_rows(self) -> None:
+        """Evict the cached rows and tiles covering buffers that changed since the last call."""
+        dirty_rows = self._buffer_index.take_dirty_rows()
+        if dirty_rows is None:
+            self._row_cache = dict()
+            self._tile_cache.clear()
+            self._view_dirty_rows = None
+            return
 
-        port_buffers = [port_buffers for node, port_buffers in self.port_buffers.items() if node in visible_nodes]
-        return chain(
-            node_buffers,
-            self.edge_buffers.values(),
-            itertools.chain(*self.edge_label_buffers.values()),
-            itertools.chain(*port_buffers),
-        )
+        for top_y, bottom_y in dirty_rows:
+            for row in range(top_y, bottom_y + 1):
+                self._row_cache.pop(row, None)
+        self._tile_cache.invalidate_rows(dirty_rows)
+        if self._view_dirty_rows is not None:
+            self._view_dirty_rows.extend(dirty_rows)
+
+    def _iter_viewport_rows(self) -> Iterator[list[Segment]]:
+        self._require(RenderState.VIEWPORT_RENDERED)
+        viewport = self.viewport
+        rows = self._viewport_rows
+        row_cache = self._row_cache
+        generation = self._buffer_index.generation
+        cache_rows = viewport.height <= MAX_CACHED_VIEWPORT_ROWS
+
+        row = rows.start
+        while row < rows.stop:
+            strip = row_cache.get(row)
+            if strip is not None:
+                yield strip
+                row += 1
+                continue
+
+            bottom_y = row
+            while bottom_y + 1 < rows.stop and bottom_y + 1 not in row_cache:
+                bottom_y += 1
+            for strip in self._iter_composited_rows(viewport, row, bottom_y):
+                # Rows composited before a mutation that happened while streaming are not cached.
+                if cache_rows and generation == self._buffer_index.generation:
+                    row_cache[row] = strip
+                yield strip
+                row += 1
+
+    def _iter_composited_rows(self, viewport: Region, top_y: int, bottom_y: int) -> Iterator[list[Segment]]:
+        region = Region(viewport.x, top_y, viewport.width, bottom_y - top_y + 1)
+        buffers = self._buffer_index.query_rows(top_y, bottom_y)
+
+        # Rows before the first row covered by a buffer are left out by the compositor.
+        first_row = max(top_y, min((buffer.top_y for buffer in buffers), default=bottom_y + 1))
+        for _ in range(top_y, first_row):
+            yield [Segment(" " * viewport.width)]
+        if not buffers:
+            return
+
+        if self._native_compositor:
+            strips, _ = render_buffers_native(buffers, region)
+            yield from strips
+        else:
+            yield from iter_render_buffers(buffers, region)
+
+    def _composite_region(self, region: Region) -> list[list[Segment]]:
+        compositor = render_buffers_native if self._native_compositor else render_buffers
+        strips, _ = compositor(self._buffer_index.query_rows(region.y, region.y + region.height - 1), region)
+        return strips
+
+    def _composited_region(self, region: Region) -> list[list[Segment]]:
+        self._require(RenderState.NODES_PLACED)
+        self._flush_dirty_rows()
+        return self._tile_cache.render(region, self._composite_region)
+
+    def _take_view_dirty_rows(self) -> list[tuple[int, int]] | None:
+        """Return the rows changed since the last call and reset them.
+
+        Returns:
+            list[tuple[int, int]] | None: The changed rows as `(top_y, bottom_y)` spans in view coordinates
+                (both inclusive), or None if all rows have to be considered changed.
+        """
+        self._require(RenderState.NODES_PLACED)
+        self._flush_dirty_rows()
+        dirty_rows = self._view_dirty_rows
+        self._view_dirty_rows = []
+        return dirty_rows
+
+    def _composited_viewport(self) -> list[list[Segment]]:
+        return list(self._iter_viewport_rows())
+
+    def element_at(self, point: Point) -> Reference | None:
+        """Return the element that is visible at a point in view coordinates.
+
+        Args:
+            point (Point): The point in view coordinates.
+
+        Returns:
+            Reference | None: A reference to the visible node, edge or port, or None if there is no element
+                or the element cannot be referenced.
+        """
+        self._require(RenderState.NODES_PLACED)
+        buffer = self._buffer_index.buffer_at(point.x, point.y)
+        if buffer is None:
+            return None
+        return buffer.reference
 
     def _unconstrained_viewport(self) -> Region:
-        regions = [buffer.region for buffer in self._all_buffers()]
+        self._require(RenderState.NODES_PLACED)
+        bounding_box = self._buffer_index.bounding_box()
 
-        if not regions:
+        if bounding_box is None:
             return Region(0, 0, 0, 0)
 
-        return Region.union(regions)
+        left_x, top_y, right_x, bottom_y = bounding_box
+        return Region.from_points(Point(left_x, top_y), Point(right_x, bottom_y))
 
     def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
         self.max_width = options.max_width
         self.max_height = options.max_height
 
-        self._require(RenderState.EDGES_RENDERED)
-
-        strips, _ = render_buffers(
-            self._all_buffers(),
-            self.viewport,
-        )
-
-        yield from itertools.chain(*[strip + [""] for strip in strips])
+        # Rows are streamed as soon as they are composited.
+        for strip in self._iter_viewport_rows():
+            yield from strip
+            yield ""
 
     def __rich_measure__(self, console: Console, options: ConsoleOptions) -> Measurement:
         self.max_width = options.max_width
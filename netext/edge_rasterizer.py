@@ -27,6 +27,7 @@ class EdgeRoutingRequest:
     v_buffer: NodeBuffer
     properties: EdgeProperties
     lod: int = 1
+    edge_index: int | None = None
 
 
 def rasterize_edges(
@@ -38,6 +39,7 @@ def rasterize_edges(
     dict[tuple[Hashable, Hashable], EdgeBuffer],
     dict[tuple[Hashable, Hashable], list[StripBuffer]],
 ]:
+    routed_requests = []
     edge_inputs = []
     edge_anchors = []
 
@@ -58,6 +60,7 @@ def rasterize_edges(
             routing_mode=request.properties.routing_mode,
             edge_segment_drawing_mode=request.properties.segment_drawing_mode,
         )
+        routed_requests.append(request)
         edge_inputs.append(edge_input)
         edge_anchors.append((request.u, request.v, start, end, request.properties.routing_mode))
 
@@ -66,7 +69,7 @@ def rasterize_edges(
     edge_buffers = dict()
     label_buffers = dict()
 
-    for edge_index, (request, edge_input, edge_path) in enumerate(zip(edge_route_requests, edge_inputs, edge_paths)):
+    for edge_index, (request, edge_input, edge_path) in enumerate(zip(routed_requests, edge_inputs, edge_paths)):
         if not edge_path.directed_points or edge_path.start == edge_path.end:
             continue
 
@@ -77,6 +80,8 @@ def rasterize_edges(
         if boundary_1 == boundary_2:
             continue
 
+        if request.edge_index is not None:
+            edge_index = request.edge_index
         z_index = ZIndex(layer=Layer.EDGES, layer_index=edge_index)
 
         edge_buffer = EdgeBuffer(
@@ -6,7 +6,7 @@ from netext.edge_rendering.modes import EdgeSegmentDrawingMode
 from netext.edge_rendering.buffer import EdgeBuffer
 from netext.edge_routing.edge import EdgePath
 from netext.properties.arrow_tips import ARROW_TIPS, ArrowDirections, ArrowTip
-from netext.rendering.segment_buffer import Layer, Strip, StripBuffer, ZIndex
+from netext.rendering.segment_buffer import Layer, Strip, StripBuffer, ZIndex, intern_style
 
 
 def render_arrow_tip_buffer(
@@ -44,7 +44,7 @@ def render_arrow_tip_buffer(
         z_index=ZIndex(layer=Layer.EDGE_DECORATIONS),
         boundary_1=arrow_tip_position,
         boundary_2=arrow_tip_position,
-        strips=[Strip([Segment(text=tip_character, style=style)])],
+        strips=[Strip([Segment(text=tip_character, style=intern_style(style))])],
     )
 
 
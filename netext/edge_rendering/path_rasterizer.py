@@ -3,7 +3,7 @@ import sys
 from netext.edge_rendering.modes import EdgeSegmentDrawingMode
 from netext.edge_routing.edge import EdgePath
 from netext._core import Direction
-from netext.rendering.segment_buffer import Spacer, Strip
+from netext.rendering.segment_buffer import Spacer, Strip, coalesce_segments
 from rich.segment import Segment
 from rich.style import Style
 
@@ -203,5 +203,5 @@ def rasterize_edge_path(
             last_x = x
         if x < max_x and x - last_x > 0:
             segments.append(Spacer(max_x - x - 1))
-        strips.append(Strip(segments=segments))
+        strips.append(Strip(segments=coalesce_segments(segments)))
     return strips
@@ -5,13 +5,14 @@ ConsoleGraph remains the state owner and orchestrates calls.
 """
 
 from collections.abc import Hashable
+from dataclasses import dataclass, field
 from typing import Any, cast
 
 from rich.console import Console
 
 import netext._core as core
 from netext._core import Point
-from netext.edge_rasterizer import rasterize_edge
+from netext.edge_rasterizer import EdgeRoutingRequest, rasterize_edge, rasterize_edges
 from netext.edge_rendering.buffer import EdgeBuffer
 from netext.geometry.point import FloatPoint
 from netext.graph_transitions import register_edge_with_router
@@ -21,6 +22,76 @@ from netext.properties.node import NodeProperties
 from netext.rendering.segment_buffer import StripBuffer
 
 
+@dataclass
+class AddNode:
+    """Add a node, see [ConsoleGraph.add_node][netext.console_graph.ConsoleGraph.add_node]."""
+
+    node: Hashable
+    position: FloatPoint | None = None
+    data: dict[str, Any] | None = None
+
+
+@dataclass
+class AddEdge:
+    """Add an edge, see [ConsoleGraph.add_edge][netext.console_graph.ConsoleGraph.add_edge]."""
+
+    u: Hashable
+    v: Hashable
+    data: dict[str, Any] | None = None
+
+
+@dataclass
+class UpdateNode:
+    """Update a node, see [ConsoleGraph.update_node][netext.console_graph.ConsoleGraph.update_node]."""
+
+    node: Hashable
+    position: FloatPoint | None = None
+    data: dict[str, Any] | None = None
+    update_data: bool = True
+
+
+@dataclass
+class UpdateEdge:
+    """Update an edge, see [ConsoleGraph.update_edge][netext.console_graph.ConsoleGraph.update_edge]."""
+
+    u: Hashable
+    v: Hashable
+    data: dict[str, Any]
+    update_data: bool = True
+
+
+@dataclass
+class RemoveNode:
+    """Remove a node, see [ConsoleGraph.remove_node][netext.console_graph.ConsoleGraph.remove_node]."""
+
+    node: Hashable
+
+
+@dataclass
+class RemoveEdge:
+    """Remove an edge, see [ConsoleGraph.remove_edge][netext.console_graph.ConsoleGraph.remove_edge]."""
+
+    u: Hashable
+    v: Hashable
+
+
+GraphMutation = AddNode | AddEdge | UpdateNode | UpdateEdge | RemoveNode | RemoveEdge
+"""A mutation that can be applied with [ConsoleGraph.apply_mutations][netext.console_graph.ConsoleGraph.apply_mutations]."""
+
+
+@dataclass
+class DeferredRendering:
+    """The edges and nodes whose buffers have to be rendered at the end of a batch of mutations."""
+
+    edges: dict[tuple[Hashable, Hashable], None] = field(default_factory=dict)
+    nodes: dict[Hashable, None] = field(default_factory=dict)
+
+    def add_edge(self, u: Hashable, v: Hashable) -> None:
+        self.edges[(u, v)] = None
+        self.nodes[u] = None
+        self.nodes[v] = None
+
+
 def compute_node_view_position(position: FloatPoint, zoom_x: float, zoom_y: float) -> Point:
     """Convert a node position from graph space to view space."""
     return Point(round(position.x * zoom_x), round(position.y * zoom_y))
@@ -122,6 +193,52 @@ def rasterize_and_store_edge(
         edge_label_buffers[(u, v)] = label_nodes
 
 
+def rasterize_and_store_edges(
+    console: Console,
+    core_graph: core.CoreGraph,
+    edge_router: core.EdgeRouter,
+    edge_indices: dict[tuple[Hashable, Hashable], int],
+    node_buffers: dict[Hashable, NodeBuffer],
+    edge_buffers: dict[tuple[Hashable, Hashable], EdgeBuffer],
+    edge_label_buffers: dict[tuple[Hashable, Hashable], list[StripBuffer]],
+    zoom_factor: float,
+    layout_direction: core.LayoutDirection,
+) -> None:
+    """Route several edges at once and store the results in edge_buffers/edge_label_buffers.
+
+    The edges are routed with a single call to the edge router, so that they are ripped up and rerouted
+    together. The edges must not be registered with the edge router.
+    """
+    edge_routing_requests = []
+    for (u, v), edge_index in edge_indices.items():
+        properties = EdgeProperties.from_data_dict(core_graph.edge_data_or_default(u, v, dict()))
+        edge_routing_requests.append(
+            EdgeRoutingRequest(
+                u=u,
+                v=v,
+                u_buffer=node_buffers[u],
+                v_buffer=node_buffers[v],
+                properties=properties,
+                lod=properties.lod_map(zoom_factor),
+                edge_index=edge_index,
+            )
+        )
+
+    edge_buffers_result, label_buffers_result = rasterize_edges(
+        console,
+        edge_router,
+        edge_routing_requests,
+        layout_direction=layout_direction,
+    )
+
+    for (u, v), edge_buffer in edge_buffers_result.items():
+        edge_buffers[(u, v)] = edge_buffer
+        register_edge_with_router(edge_router, u, v, edge_buffer)
+
+    for (u, v), label_nodes in label_buffers_result.items():
+        edge_label_buffers[(u, v)] = label_nodes
+
+
 def remove_existing_edge_buffers(
     edge_router: core.EdgeRouter,
     u: Hashable,
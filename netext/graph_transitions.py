@@ -5,6 +5,7 @@ transition methods. ConsoleGraph remains the state owner and calls these
 functions, storing the results.
 """
 
+from collections import Counter
 from collections.abc import Hashable
 from typing import Any, cast
 
@@ -92,6 +93,47 @@ def compute_node_layout(
     return node_positions, offset
 
 
+def supports_incremental_layout(layout_engine: core.LayoutEngine) -> bool:
+    """Whether the layout engine can continue from the positions of a previous layout."""
+    return hasattr(layout_engine, "layout_incremental")
+
+
+def compute_incremental_node_layout(
+    layout_engine: core.LayoutEngine,
+    core_graph: core.CoreGraph,
+    node_positions: dict[Hashable, FloatPoint],
+) -> dict[Hashable, FloatPoint]:
+    """Run the layout engine warm-started from the current node positions.
+
+    Nodes of the core graph without a position are placed by the engine. The engine gets the rounded
+    positions and may return the layout in a different frame, so it is translated by the most common
+    displacement between the rounded previous positions and the returned positions. Nodes that come back
+    at their rounded previous position keep their exact previous position, even if it is fractional.
+
+    Returns the positions of all nodes.
+    """
+    previous = {node: Point(round(pos.x), round(pos.y)) for node, pos in node_positions.items()}
+    positions = {
+        node: FloatPoint(p.x, p.y)
+        for node, p in cast(Any, layout_engine).layout_incremental(core_graph, list(previous.items()))
+    }
+
+    shifts = Counter(
+        (previous[node].x - pos.x, previous[node].y - pos.y) for node, pos in positions.items() if node in previous
+    )
+    shift_x, shift_y = shifts.most_common(1)[0][0] if shifts else (0.0, 0.0)
+    shift = FloatPoint(shift_x, shift_y)
+
+    return {
+        node: (
+            node_positions[node]
+            if node in previous and (pos.x + shift.x, pos.y + shift.y) == (previous[node].x, previous[node].y)
+            else pos + shift
+        )
+        for node, pos in positions.items()
+    }
+
+
 def _compute_layout_density(
     node_buffers_for_layout: dict[Hashable, NodeBuffer],
     layout_direction: core.LayoutDirection,
@@ -1,8 +1,21 @@
-from netext._core import StaticLayout, SugiyamaLayout, LayoutDirection, ForceDirectedLayout
+from netext._core import (
+    StaticLayout,
+    SugiyamaLayout,
+    LayoutDirection,
+    LayeringMethod,
+    ForceDirectedLayout,
+    MultilevelForceLayout,
+    TreeLayout,
+    StressLayout,
+)
 
 __all__ = [
     "StaticLayout",
     "SugiyamaLayout",
     "LayoutDirection",
+    "LayeringMethod",
     "ForceDirectedLayout",
+    "MultilevelForceLayout",
+    "TreeLayout",
+    "StressLayout",
 ]
@@ -0,0 +1,285 @@
+from collections import defaultdict
+from collections.abc import Hashable, Iterable
+from enum import IntEnum
+from heapq import heapify, heappop, heappush
+
+from netext.rendering.segment_buffer import Spacer, StripBuffer
+
+
+class BufferGroup(IntEnum):
+    """The groups of buffers kept in a [StripBufferIndex][netext.rendering.buffer_index.StripBufferIndex].
+
+    The value determines the order in which buffers of different groups are returned from a query.
+    """
+
+    NODES = 0
+    EDGES = 1
+    EDGE_LABELS = 2
+    PORTS = 3
+
+
+class MinMaxCounter:
+    """A multiset of integers with cheap insertion, removal and lookup of the smallest and largest value.
+
+    Removed values are only dropped from the heaps once they surface at the top, so all operations
+    run in amortized logarithmic time.
+    """
+
+    def __init__(self) -> None:
+        self._counts: dict[int, int] = dict()
+        self._min_heap: list[int] = []
+        self._max_heap: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, value: int) -> None:
+        count = self._counts.get(value, 0)
+        self._counts[value] = count + 1
+        if count == 0:
+            heappush(self._min_heap, value)
+            heappush(self._max_heap, -value)
+
+    def remove(self, value: int) -> None:
+        count = self._counts[value] - 1
+        if count > 0:
+            self._counts[value] = count
+            return
+
+        del self._counts[value]
+        # Values removed and added again leave duplicates behind, rebuild the heaps before they grow too much.
+        if len(self._min_heap) > 2 * len(self._counts) + 16:
+            self._min_heap = list(self._counts)
+            self._max_heap = [-value for value in self._counts]
+            heapify(self._min_heap)
+            heapify(self._max_heap)
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._min_heap.clear()
+        self._max_heap.clear()
+
+    def min(self) -> int:
+        while self._min_heap[0] not in self._counts:
+            heappop(self._min_heap)
+        return self._min_heap[0]
+
+    def max(self) -> int:
+        while -self._max_heap[0] not in self._counts:
+            heappop(self._max_heap)
+        return -self._max_heap[0]
+
+
+class StripBufferIndex:
+    """A row bucket index over strip buffers.
+
+    Buffers are stored in groups under a key and bucketed into blocks of rows by their bounding box,
+    so that a query for a range of rows only needs to look at the buffers intersecting these rows.
+    Buffers are returned ordered by group and then by the order in which their key was first set,
+    which mirrors the insertion order of the dictionaries the buffers are kept in.
+
+    The index also records the rows covered by buffers before and after each change, which can be
+    retrieved with [take_dirty_rows][netext.rendering.buffer_index.StripBufferIndex.take_dirty_rows],
+    counts the changes in its `generation` and maintains the bounding box of all buffers.
+    """
+
+    def __init__(self, block_height: int = 16) -> None:
+        self._block_height = block_height
+        self._entries: dict[
+            tuple[BufferGroup, Hashable], tuple[int, list[StripBuffer], list[int], list[tuple[int, int, int, int]]]
+        ] = dict()
+        self._left_x = MinMaxCounter()
+        self._top_y = MinMaxCounter()
+        self._right_x = MinMaxCounter()
+        self._bottom_y = MinMaxCounter()
+        self._blocks: dict[int, set[tuple[BufferGroup, Hashable]]] = defaultdict(set)
+        self._sequence = 0
+        self._dirty_rows: list[tuple[int, int]] | None = None
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return sum(len(buffers) for _, buffers, _, _ in self._entries.values())
+
+    def __contains__(self, key: tuple[BufferGroup, Hashable]) -> bool:
+        return key in self._entries
+
+    def clear(self) -> None:
+        """Remove all buffers from the index and mark all rows as dirty."""
+        self._entries.clear()
+        self._blocks.clear()
+        for counter in (self._left_x, self._top_y, self._right_x, self._bottom_y):
+            counter.clear()
+        self._sequence = 0
+        self._dirty_rows = None
+        self.generation += 1
+
+    def take_dirty_rows(self) -> list[tuple[int, int]] | None:
+        """Return the row spans changed since the last call and reset them.
+
+        Returns:
+            list[tuple[int, int]] | None: The changed rows as `(top_y, bottom_y)` spans (both inclusive),
+                or None if all rows have to be considered changed.
+        """
+        dirty_rows = self._dirty_rows
+        self._dirty_rows = []
+        return dirty_rows
+
+    def set(self, group: BufferGroup, ref: Hashable, buffers: Iterable[StripBuffer]) -> None:
+        """Add or replace the buffers stored under a key.
+
+        Replacing the buffers of an existing key keeps the key's position in the query order.
+
+        Args:
+            group (BufferGroup): The group the buffers belong to.
+            ref (Hashable): The node or edge the buffers belong to.
+            buffers (Iterable[StripBuffer]): The buffers to store, an empty iterable removes the key.
+        """
+        key = (group, ref)
+        buffers = list(buffers)
+        if not buffers:
+            self.remove(group, ref)
+            return
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            sequence = entry[0]
+            self._unlink(key, entry)
+        else:
+            sequence = self._sequence
+            self._sequence += 1
+
+        # Buffers might be moved in place later on, so the bounding boxes are kept to be able to mark
+        # the previously covered rows as dirty and update the bounds when the key is updated.
+        boxes = [buffer.bounding_box for buffer in buffers]
+        blocks = sorted(
+            {
+                block
+                for _, top_y, _, bottom_y in boxes
+                for block in range(top_y // self._block_height, bottom_y // self._block_height + 1)
+            }
+        )
+        for block in blocks:
+            self._blocks[block].add(key)
+        for left_x, top_y, right_x, bottom_y in boxes:
+            self._left_x.add(left_x)
+            self._top_y.add(top_y)
+            self._right_x.add(right_x)
+            self._bottom_y.add(bottom_y)
+        self._entries[key] = (sequence, buffers, blocks, boxes)
+        self.generation += 1
+        if self._dirty_rows is not None:
+            self._dirty_rows.extend((top_y, bottom_y) for _, top_y, _, bottom_y in boxes)
+
+    def remove(self, group: BufferGroup, ref: Hashable) -> None:
+        """Remove the buffers stored under a key, if any.
+
+        Args:
+            group (BufferGroup): The group the buffers belong to.
+            ref (Hashable): The node or edge the buffers belong to.
+        """
+        key = (group, ref)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._unlink(key, entry)
+            self.generation += 1
+
+    def _unlink(
+        self,
+        key: tuple[BufferGroup, Hashable],
+        entry: tuple[int, list[StripBuffer], list[int], list[tuple[int, int, int, int]]],
+    ) -> None:
+        _, _, blocks, boxes = entry
+        if self._dirty_rows is not None:
+            self._dirty_rows.extend((top_y, bottom_y) for _, top_y, _, bottom_y in boxes)
+        for left_x, top_y, right_x, bottom_y in boxes:
+            self._left_x.remove(left_x)
+            self._top_y.remove(top_y)
+            self._right_x.remove(right_x)
+            self._bottom_y.remove(bottom_y)
+        for block in blocks:
+            keys = self._blocks[block]
+            keys.discard(key)
+            if not keys:
+                del self._blocks[block]
+
+    def query_rows(self, top_y: int, bottom_y: int) -> list[StripBuffer]:
+        """Return all buffers intersecting the rows from `top_y` to `bottom_y` (both inclusive).
+
+        Args:
+            top_y (int): The first row.
+            bottom_y (int): The last row.
+
+        Returns:
+            list[StripBuffer]: The intersecting buffers, ordered by group and insertion order.
+        """
+        if bottom_y < top_y:
+            return []
+
+        keys: set[tuple[BufferGroup, Hashable]] = set()
+        first_block = top_y // self._block_height
+        last_block = bottom_y // self._block_height
+        if last_block - first_block + 1 > len(self._blocks):
+            for block, block_keys in self._blocks.items():
+                if first_block <= block <= last_block:
+                    keys.update(block_keys)
+        else:
+            for block in range(first_block, last_block + 1):
+                block_keys = self._blocks.get(block)
+                if block_keys:
+                    keys.update(block_keys)
+
+        entries = sorted((key[0], self._entries[key][0], key) for key in keys)
+        return [
+            buffer
+            for _, _, key in entries
+            for buffer, (_, buffer_top_y, _, buffer_bottom_y) in zip(self._entries[key][1], self._entries[key][3])
+            if buffer_bottom_y >= top_y and buffer_top_y <= bottom_y
+        ]
+
+    def bounding_box(self) -> tuple[int, int, int, int] | None:
+        """Return the bounding box of all buffers in the index.
+
+        Returns:
+            tuple[int, int, int, int] | None: The bounding box as `(left_x, top_y, right_x, bottom_y)`,
+                or None if the index is empty.
+        """
+        if not self._entries:
+            return None
+        return self._left_x.min(), self._top_y.min(), self._right_x.max(), self._bottom_y.max()
+
+    def buffer_at(self, x: int, y: int) -> StripBuffer | None:
+        """Return the buffer that is visible at a cell.
+
+        A buffer covers a cell if a segment that is not a spacer is drawn at the cell. Of all covering buffers the
+        one with the lowest z-index is visible, ties are resolved in the same way as in the compositor, i.e. the
+        buffer starting further left and then further up is drawn on top.
+
+        Args:
+            x (int): The column of the cell.
+            y (int): The row of the cell.
+
+        Returns:
+            StripBuffer | None: The visible buffer or None if no buffer covers the cell.
+        """
+        visible: StripBuffer | None = None
+        visible_key: tuple[int, float, int, int] | None = None
+        for buffer in self.query_rows(y, y):
+            if not (buffer.left_x <= x <= buffer.right_x) or not _covers(buffer, x, y):
+                continue
+            key = (buffer.z_index.layer.value, buffer.z_index.layer_index, buffer.left_x, buffer.top_y)
+            if visible_key is None or key < visible_key:
+                visible, visible_key = buffer, key
+        return visible
+
+
+def _covers(buffer: StripBuffer, x: int, y: int) -> bool:
+    row = y - buffer.top_y
+    if row >= len(buffer.strips):
+        return False
+    segment_left_x = buffer.left_x
+    for segment in buffer.strips[row].segments:
+        segment_right_x = segment_left_x + segment.cell_length
+        if segment_left_x <= x < segment_right_x:
+            return not isinstance(segment, Spacer)
+        segment_left_x = segment_right_x
+    return False
@@ -1,8 +1,11 @@
+from collections.abc import Iterable
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Hashable, Tuple
 
+from cachetools import LRUCache
 from rich.segment import Segment
+from rich.style import Style
 from netext.geometry import Region
 from netext._core import Point
 
@@ -25,6 +28,75 @@ class Strip:
     segments: list[Segment | Spacer]
 
 
+# Styles use slots and can't be referenced weakly, so the interned styles are kept in a bounded cache instead.
+_interned_styles: LRUCache[Style, Style] = LRUCache(maxsize=4096)
+
+
+def intern_style(style: Style | None) -> Style | None:
+    """Return a canonical instance for a style, so that equal styles across buffers share a single object.
+
+    Args:
+        style (Style | None): The style to intern.
+
+    Returns:
+        Style | None: The interned style, equal to the given style.
+    """
+    if style is None:
+        return None
+    interned = _interned_styles.get(style)
+    if interned is None:
+        _interned_styles[style] = interned = style
+    return interned
+
+
+def intern_segment_styles(segments: Iterable[Segment]) -> list[Segment | Spacer]:
+    """Return the segments with their styles interned, keeping the segments as they are otherwise.
+
+    Args:
+        segments (Iterable[Segment]): The segments of a strip.
+
+    Returns:
+        list[Segment | Spacer]: The segments with interned styles.
+    """
+    return [Segment(text, intern_style(style), control) for text, style, control in segments]
+
+
+def coalesce_segments(segments: Iterable[Segment | Spacer]) -> list[Segment | Spacer]:
+    """Merge runs of adjacent segments with the same style and runs of adjacent spacers.
+
+    Control segments are kept as they are and empty segments are dropped. The styles of the
+    resulting segments are interned.
+
+    Args:
+        segments (Iterable[Segment | Spacer]): The segments of a strip.
+
+    Returns:
+        list[Segment | Spacer]: The coalesced segments, covering the same cells as the input.
+    """
+    result: list[Segment | Spacer] = []
+    for segment in segments:
+        if isinstance(segment, Spacer):
+            if segment.width == 0:
+                continue
+            if result and isinstance(result[-1], Spacer):
+                result[-1] = Spacer(result[-1].width + segment.width)
+            else:
+                result.append(Spacer(segment.width))
+            continue
+
+        text, style, control = segment
+        if control is None:
+            if not text:
+                continue
+            style = intern_style(style)
+            previous = result[-1] if result else None
+            if isinstance(previous, Segment) and previous.control is None and previous.style is style:
+                result[-1] = Segment(previous.text + text, previous.style)
+                continue
+        result.append(Segment(text, style, control))
+    return result
+
+
 @dataclass
 class Reference:
     type: str
@@ -0,0 +1,118 @@
+from collections.abc import Callable, Iterable
+
+from cachetools import LRUCache
+from rich.segment import Segment
+
+from netext.geometry import Region
+
+
+class TileCache:
+    """A least recently used cache of composited tiles.
+
+    The view is split into tiles of a fixed size that are composited independently. A region is assembled from the
+    tiles intersecting it, so that revisiting an area only needs a lookup as long as the buffers covering the area
+    did not change. Changed rows are reported with
+    [invalidate_rows][netext.rendering.tile_cache.TileCache.invalidate_rows], which only drops the tiles
+    intersecting them.
+    """
+
+    def __init__(self, tile_width: int = 64, tile_height: int = 32, max_tiles: int = 256) -> None:
+        """Create a tile cache.
+
+        Args:
+            tile_width (int): The width of a tile in cells.
+            tile_height (int): The height of a tile in cells.
+            max_tiles (int): The maximum number of tiles kept in the cache.
+        """
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self._tiles: LRUCache[tuple[int, int], list[list[Segment]]] = LRUCache(maxsize=max_tiles)
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def clear(self) -> None:
+        self._tiles.clear()
+
+    def invalidate_rows(self, rows: Iterable[tuple[int, int]]) -> None:
+        """Drop the tiles intersecting the given rows.
+
+        Args:
+            rows (Iterable[tuple[int, int]]): The changed rows as `(top_y, bottom_y)` spans (both inclusive).
+        """
+        tile_rows = {
+            tile_row
+            for top_y, bottom_y in rows
+            for tile_row in range(top_y // self.tile_height, bottom_y // self.tile_height + 1)
+        }
+        if not tile_rows:
+            return
+        for key in [key for key in self._tiles if key[1] in tile_rows]:
+            del self._tiles[key]
+
+    def render(
+        self,
+        region: Region,
+        composite: Callable[[Region], list[list[Segment]]],
+    ) -> list[list[Segment]]:
+        """Assemble the strips for a region from cached tiles.
+
+        Args:
+            region (Region): The region to render.
+            composite (Callable): Composites the strips of a region, see
+                [render_buffers][netext.buffer_renderer.render_buffers].
+
+        Returns:
+            list[list[Segment]]: One strip per row of the region, each exactly as wide as the region.
+        """
+        if region.width <= 0 or region.height <= 0:
+            return []
+
+        first_column = region.x // self.tile_width
+        last_column = (region.x + region.width - 1) // self.tile_width
+        first_row = region.y // self.tile_height
+        last_row = (region.y + region.height - 1) // self.tile_height
+
+        strips: list[list[Segment]] = [[] for _ in range(region.height)]
+        for tile_row in range(first_row, last_row + 1):
+            tile_y = tile_row * self.tile_height
+            rows = range(max(region.y, tile_y), min(region.y + region.height, tile_y + self.tile_height))
+            for tile_column in range(first_column, last_column + 1):
+                tile_x = tile_column * self.tile_width
+                tile_strips = self._tile(tile_column, tile_row, composite)
+
+                crop_left = max(region.x, tile_x) - tile_x
+                crop_right = min(region.x + region.width, tile_x + self.tile_width) - tile_x
+                for row in rows:
+                    tile_strip = tile_strips[row - tile_y]
+                    if crop_left == 0 and crop_right == self.tile_width:
+                        strips[row - region.y].extend(tile_strip)
+                    else:
+                        strips[row - region.y].extend(list(Segment.divide(tile_strip, [crop_left, crop_right]))[1])
+
+        return strips
+
+    def _tile(
+        self,
+        tile_column: int,
+        tile_row: int,
+        composite: Callable[[Region], list[list[Segment]]],
+    ) -> list[list[Segment]]:
+        key = (tile_column, tile_row)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._composite_tile(tile_column, tile_row, composite)
+            self._tiles[key] = tile
+        return tile
+
+    def _composite_tile(
+        self,
+        tile_column: int,
+        tile_row: int,
+        composite: Callable[[Region], list[list[Segment]]],
+    ) -> list[list[Segment]]:
+        region = Region(tile_column * self.tile_width, tile_row * self.tile_height, self.tile_width, self.tile_height)
+        strips = composite(region)
+
+        # Rows before the first row covered by a buffer are left out by the compositor.
+        return [[Segment(" " * self.tile_width)]] * (self.tile_height - len(strips)) + strips
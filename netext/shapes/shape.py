@@ -1,8 +1,7 @@
-from typing import Protocol, cast
+from typing import Protocol
 
 from rich.console import Console, RenderableType
 from rich.padding import PaddingDimensions
-from rich.segment import Segment
 from rich.style import Style
 
 from netext._core import DirectedPoint, Direction
@@ -10,7 +9,7 @@ from netext.geometry import Point
 from netext.geometry.magnet import ShapeSide
 from netext.properties.shape import ShapeProperties
 
-from netext.rendering.segment_buffer import Strip, Spacer
+from netext.rendering.segment_buffer import Strip, intern_segment_styles
 import math
 from dataclasses import dataclass
 from netext.rendering.segment_buffer import StripBuffer
@@ -44,7 +43,7 @@ class Shape(Protocol):
 class RectangularShapeMixin:
     def _renderable_type_to_strips(self, console: Console, node_renderable: RenderableType) -> list[Strip]:
         segment_lists = list(console.render_lines(node_renderable, pad=False))
-        return [Strip(segments=cast(list[Segment | Spacer], segments)) for segments in segment_lists]
+        return [Strip(segments=intern_segment_styles(segments)) for segments in segment_lists]
 
     def get_closest_side(
         self,
@@ -0,0 +1,26 @@
+from collections.abc import Iterable
+from itertools import chain
+
+from netext.console_graph import ConsoleGraph, RenderState
+from netext.rendering.segment_buffer import StripBuffer
+
+
+def all_buffers(console_graph: ConsoleGraph) -> Iterable[StripBuffer]:
+    """Collect the buffers of the visible elements from the buffer dictionaries of a console graph.
+
+    This is the reference for the buffers the buffer index of the console graph is expected to hold.
+    """
+    console_graph._require(RenderState.NODES_PLACED)
+    core_graph = console_graph._core_graph
+    visible_nodes = {
+        node for node in core_graph.all_nodes() if core_graph.node_data_or_default(node, dict()).get("$show", True)
+    }
+
+    return chain(
+        (node_buffer for node, node_buffer in console_graph.node_buffers.items() if node in visible_nodes),
+        console_graph.edge_buffers.values(),
+        chain.from_iterable(console_graph.edge_label_buffers.values()),
+        chain.from_iterable(
+            port_buffers for node, port_buffers in console_graph.port_buffers.items() if node in visible_nodes
+        ),
+    )
@@ -1,4 +1,6 @@
-from typing import Any, Hashable, cast
+from functools import partial
+from threading import Event
+from typing import Any, Callable, Hashable, cast
 
 from networkx import DiGraph
 from textual.events import Resize
@@ -8,10 +10,10 @@ from textual.scroll_view import ScrollView
 from textual.geometry import Region, Size, Offset
 from textual.strip import Strip
 from textual.widget import Widget
+from textual.worker import Worker, WorkerState
 
 from netext import ConsoleGraph
-from netext.buffer_renderer import render_buffers
-from netext.console_graph import AutoZoom, ZoomSpec
+from netext.console_graph import AutoZoom, RenderState, ZoomSpec
 from rich.segment import Segment
 from netext.geometry.region import Region as NetextRegion
 from netext.geometry.point import FloatPoint
@@ -64,6 +66,7 @@ class GraphView(ScrollView):
         disabled: bool = False,
         zoom: float | tuple[float, float] | ZoomSpec | AutoZoom = 1.0,
         scroll_via_viewport: bool = False,
+        background_rendering: bool = False,
         **console_graph_kwargs,
     ):
         """Initializes a new instance of the Widget class.
@@ -76,6 +79,9 @@ class GraphView(ScrollView):
             disabled: A boolean indicating whether the widget is disabled (optional).
             zoom: A float or tuple of floats representing the zoom level of the widget (optional).
             scroll_via_viewport: A boolean indicating whether the widget should scroll via the viewport (optional).
+            background_rendering: A boolean indicating whether the layout and rendering of the graph should run in a
+                worker thread (optional). The widget shows the previous frame until the new one is ready, changes
+                made in the meantime cancel the stale frame and are rendered in the next one.
             console_graph_kwargs: Additional keyword arguments to be passed to the ConsoleGraph constructor.
 
         Raises:
@@ -83,7 +89,6 @@ class GraphView(ScrollView):
 
         """
 
-        self._reverse_click_map: dict[tuple[int, int], Reference] = dict()
         self._last_hover: Reference | None = None
         self._console_graph_kwargs = console_graph_kwargs
         self._console_graph: ConsoleGraph = ConsoleGraph(
@@ -98,7 +103,13 @@ class GraphView(ScrollView):
         self._attached_widgets: dict[Hashable, tuple[Widget, bool]] = dict()
         self._attached_widgets_lookup: dict[Widget, Hashable] = dict()
         self._graph: DiGraph = graph
-        self._strip_segments: list[list[Segment]] = list()
+        self._lines: dict[int, Strip] = dict()
+        self._lines_key: tuple[Hashable, ...] | None = None
+
+        self._background_rendering = background_rendering
+        self._pending_updates: list[Callable[[], None]] = []
+        self._render_worker: Worker[None] | None = None
+        self._render_cancelled = Event()
 
         super().__init__(name=name, id=id, classes=classes, disabled=disabled)
 
@@ -109,14 +120,71 @@ class GraphView(ScrollView):
 
     def _reset_console_graph(self):
         if self.size.width != 0 and self.size.height != 0:
-            self._console_graph = ConsoleGraph(
-                self._graph,
-                console=self.app.console,
-                max_width=self.size.width,
-                max_height=self.size.height,
-                zoom=self.zoom,
-                **self._console_graph_kwargs,
+            # The render worker must not see changes to the graph that are made while it renders.
+            graph = self._graph.copy() if self._background_rendering else self._graph
+            max_width = self.size.width
+            max_height = self.size.height
+            zoom = self.zoom
+
+            def reset() -> None:
+                self._console_graph = ConsoleGraph(
+                    graph,
+                    console=self.app.console,
+                    max_width=max_width,
+                    max_height=max_height,
+                    zoom=zoom,
+                    **self._console_graph_kwargs,
+                )
+
+            # Earlier updates would only be applied to the console graph that is replaced.
+            self._pending_updates.clear()
+            self._update_console_graph(reset)
+
+    def _update_console_graph(self, update: Callable[[], None]) -> None:
+        # With background rendering the console graph is only changed by the render worker, so
+        # updates are collected until the next worker runs.
+        if self._background_rendering:
+            self._pending_updates.append(update)
+        else:
+            update()
+
+    def _console_graph_ready(self) -> bool:
+        # Whether the console graph can be read without rendering it, which must not happen
+        # while a render worker is running.
+        if not self._background_rendering:
+            return True
+        return self._render_worker is None and self._console_graph._is_rendered(RenderState.NODES_PLACED)
+
+    def _render_in_background(self) -> None:
+        if self._render_worker is not None:
+            # Pending updates make the frame of the running worker stale. It stops at the next state
+            # transition and the updates are picked up by a new worker once it is done.
+            if self._pending_updates:
+                self._render_cancelled.set()
+        elif self._pending_updates or not self._console_graph._is_rendered(RenderState.NODES_PLACED):
+            updates, self._pending_updates = self._pending_updates, []
+            self._render_cancelled = Event()
+            self._render_worker = self.run_worker(
+                partial(self._render_frame, updates, self._render_cancelled),
+                name="render",
+                group="netext-render",
+                thread=True,
             )
+        self.refresh()
+
+    def _render_frame(self, updates: list[Callable[[], None]], cancelled: Event) -> None:
+        for update in updates:
+            update()
+        self._console_graph._require(RenderState.NODES_PLACED, cancelled=cancelled.is_set)
+
+    def on_worker_state_changed(self, event: Worker.StateChanged) -> None:
+        if event.worker is self._render_worker and event.state in (
+            WorkerState.SUCCESS,
+            WorkerState.ERROR,
+            WorkerState.CANCELLED,
+        ):
+            self._render_worker = None
+            self._render_in_background()
 
     @property
     def graph(self) -> DiGraph:
@@ -174,17 +242,18 @@ class GraphView(ScrollView):
         self._attached_widgets_lookup[widget] = node
         self.mount(widget)
 
-        node_buffer = self._console_graph.node_buffers[node]
-
-        if size is None:
-            widget.styles.width = node_buffer.width
-            widget.styles.height = node_buffer.height
-        else:
+        if size is not None:
             widget.styles.width = size.width
             widget.styles.height = size.height
-
         widget.styles.dock = "left"
-        widget.styles.offset = self.view_to_widget_coordinates(Point(node_buffer.left_x, node_buffer.top_y))
+
+        # Otherwise the widget is placed once the frame rendered in the background is ready.
+        if self._console_graph_ready():
+            node_buffer = self._console_graph.node_buffers[node]
+            if size is None:
+                widget.styles.width = node_buffer.width
+                widget.styles.height = node_buffer.height
+            widget.styles.offset = self.view_to_widget_coordinates(Point(node_buffer.left_x, node_buffer.top_y))
 
     def detach_widget_from_node(self, node: Hashable) -> None:
         """Detach a widget from a node.
@@ -221,7 +290,7 @@ class GraphView(ScrollView):
             None
         """
 
-        self._console_graph.add_node(node, position, data)
+        self._update_console_graph(lambda: self._console_graph.add_node(node, position, data))
         self._graph.add_node(node, **(data or {}))
         self._graph_was_updated()
 
@@ -244,7 +313,7 @@ class GraphView(ScrollView):
             None
         """
 
-        self._console_graph.add_edge(u, v, data)
+        self._update_console_graph(lambda: self._console_graph.add_edge(u, v, data))
         self._graph.add_edge(u, v, **(data or {}))
         self._graph_was_updated()
 
@@ -257,7 +326,7 @@ class GraphView(ScrollView):
         Returns:
             None
         """
-        self._console_graph.remove_node(node)
+        self._update_console_graph(lambda: self._console_graph.remove_node(node))
         self._graph.remove_node(node)
         self._graph_was_updated()
 
@@ -272,7 +341,7 @@ class GraphView(ScrollView):
         Returns:
             None
         """
-        self._console_graph.remove_edge(u, v)
+        self._update_console_graph(lambda: self._console_graph.remove_edge(u, v))
         self._graph.remove_edge(u, v)
         self._graph_was_updated()
 
@@ -295,11 +364,15 @@ class GraphView(ScrollView):
             update_data (bool, optional): Whether to merge the data associated with the node. Defaults to True.
         """
 
-        if position is not None:
-            node_position: FloatPoint | None = self.to_graph_coordinates(position)
-        else:
-            node_position = None
-        self._console_graph.update_node(node, node_position, data, update_data=update_data)
+        def update() -> None:
+            # The position is converted when the update is applied, as it refers to the graph at that time.
+            if position is not None:
+                node_position: FloatPoint | None = self.to_graph_coordinates(position)
+            else:
+                node_position = None
+            self._console_graph.update_node(node, node_position, data, update_data=update_data)
+
+        self._update_console_graph(update)
         self._graph.nodes[node].update(data or {})
         self._graph_was_updated()
 
@@ -326,15 +399,22 @@ class GraphView(ScrollView):
         Returns:
             None
         """
-        self._console_graph.update_edge(u, v, data, update_data=update_data, update_layout=update_layout)
+        self._update_console_graph(
+            lambda: self._console_graph.update_edge(u, v, data, update_data=update_data, update_layout=update_layout)
+        )
         self._graph.edges[u, v].update(data)
         self._graph_was_updated()
 
     def _resized(self):
-        self._console_graph.max_width = self.size.width
-        self._console_graph.max_height = self.size.height
-        self._strip_segments = self.pre_render_strips()
-        self.refresh()
+        max_width = self.size.width
+        max_height = self.size.height
+
+        def update() -> None:
+            self._console_graph.max_width = max_width
+            self._console_graph.max_height = max_height
+
+        self._update_console_graph(update)
+        self._graph_was_updated()
 
     def watch_zoom(
         self,
@@ -343,7 +423,11 @@ class GraphView(ScrollView):
     ) -> None:
         # TODO check why mypy gets the setter wrong
         if new_zoom != old_zoom:
-            self._console_graph.zoom = new_zoom  # type: ignore
+
+            def update() -> None:
+                self._console_graph.zoom = new_zoom  # type: ignore
+
+            self._update_console_graph(update)
             self._graph_was_updated()
 
     # Check if this would work with scrolling via viewport
@@ -416,27 +500,38 @@ class GraphView(ScrollView):
     ) -> None:
         if new_viewport != old_viewport:
             if new_viewport is None:
-                self._console_graph.reset_viewport()
+                self._update_console_graph(self._console_graph_reset_viewport)
             else:
                 if self._scroll_via_viewport:
                     raise ValueError("Cannot specify both viewport and scroll_via_viewport=True")
 
-                full_viewport = self._console_graph.full_viewport
-                self._console_graph.viewport = NetextRegion(
-                    x=full_viewport.x + new_viewport.x,
-                    y=full_viewport.y + new_viewport.y,
-                    width=new_viewport.width,
-                    height=new_viewport.height,
-                )
+                self._update_console_graph(partial(self._set_console_graph_viewport, new_viewport))
             self._graph_was_updated()
 
+    def _console_graph_reset_viewport(self) -> None:
+        self._console_graph.reset_viewport()
+
+    def _set_console_graph_viewport(self, viewport: Region) -> None:
+        full_viewport = self._console_graph.full_viewport
+        self._console_graph.viewport = NetextRegion(
+            x=full_viewport.x + viewport.x,
+            y=full_viewport.y + viewport.y,
+            width=viewport.width,
+            height=viewport.height,
+        )
+
     def _graph_was_updated(self):
-        self._strip_segments = self.pre_render_strips()
-        self.refresh()
+        if self._background_rendering:
+            self._render_in_background()
+        else:
+            self.refresh()
 
     def refresh(
         self, *regions: Region, repaint: bool = True, layout: bool = False, recompose: bool = False
     ) -> "GraphView":
+        if not self._console_graph_ready():
+            return super().refresh(*regions, repaint=repaint, layout=layout)
+
         if not self._scroll_via_viewport:
             new_size = Size(*self._console_graph.viewport.size.as_tuple())
         else:
@@ -454,24 +549,19 @@ class GraphView(ScrollView):
             widget.styles.offset = self.view_to_widget_coordinates(Point(node_buffer.left_x, node_buffer.top_y))
         return super().refresh(*regions, repaint=repaint, layout=layout)
 
-    def pre_render_strips(self) -> list[list[Segment]]:
-        all_buffers = list(self._console_graph._all_buffers())
-        strips, self._reverse_click_map = render_buffers(all_buffers, self._console_graph.viewport)
-        return strips
-
     def watch_scroll_x(self, old_value: float, new_value: float) -> None:
         if self.show_horizontal_scrollbar and round(old_value) != round(new_value):
             self.horizontal_scrollbar.position = round(new_value)
         if self._scroll_via_viewport:
-            self._update_scroll_viewport()
-        self.refresh()
+            self._update_console_graph(self._update_scroll_viewport)
+        self._graph_was_updated()
 
     def watch_scroll_y(self, old_value: float, new_value: float) -> None:
         if self.show_vertical_scrollbar and round(old_value) != round(new_value):
             self.vertical_scrollbar.position = round(new_value)
         if self._scroll_via_viewport:
-            self._update_scroll_viewport()
-        self.refresh()
+            self._update_console_graph(self._update_scroll_viewport)
+        self._graph_was_updated()
 
     def _update_scroll_viewport(self) -> None:
         scroll_x, scroll_y = self.scroll_offset
@@ -482,7 +572,6 @@ class GraphView(ScrollView):
             width=self.size.width,
             height=self.size.height,
         )
-        self._strip_segments = self.pre_render_strips()
 
     def render_line(self, y: int) -> Strip:
         scroll_x, scroll_y = self.scroll_offset  # The current scroll position
@@ -492,13 +581,47 @@ class GraphView(ScrollView):
 
         y += scroll_y
 
-        if y < 0 or y >= len(self._strip_segments):
+        if not self._console_graph_ready():
+            # Keep showing the lines of the previous frame until the new frame has been rendered.
+            if self._lines_key is not None and self._lines_key[1:] == (scroll_x, self.size.width):
+                return self._lines.get(y, Strip.blank(self.size.width))
             return Strip.blank(self.size.width)
 
-        return Strip(self._strip_segments[y]).crop(scroll_x, scroll_x + self.size.width)
+        viewport = self._console_graph.viewport
+        if y < 0 or y >= viewport.height or viewport.width <= 0:
+            return Strip.blank(self.size.width)
+
+        # Lines are only composited once requested and are cached until the viewport or the visible
+        # columns change, or until a buffer covering the line changes.
+        lines_key = (viewport, scroll_x, self.size.width)
+        dirty_rows = self._console_graph._take_view_dirty_rows()
+        if dirty_rows is None or lines_key != self._lines_key:
+            self._lines = dict()
+            self._lines_key = lines_key
+        else:
+            for top_y, bottom_y in dirty_rows:
+                for line_y in range(max(top_y - viewport.y, 0), min(bottom_y - viewport.y, viewport.height - 1) + 1):
+                    self._lines.pop(line_y, None)
+
+        line = self._lines.get(y)
+        if line is None:
+            left_x = viewport.x + scroll_x
+            right_x = min(viewport.x + viewport.width, left_x + self.size.width)
+            segments: list[Segment] = []
+            if right_x > left_x:
+                [segments] = self._console_graph._composited_region(
+                    NetextRegion(x=left_x, y=viewport.y + y, width=right_x - left_x, height=1)
+                )
+            line = self._lines[y] = Strip(segments)
+        return line
+
+    def _element_at(self, x: int, y: int) -> Reference | None:
+        if not self._console_graph_ready():
+            return None
+        return self._console_graph.element_at(self.widget_to_view_coordinates(Offset(x, y)))
 
     def on_mouse_move(self, event: events.MouseMove) -> None:
-        ref = self._reverse_click_map.get(self.widget_to_view_coordinates(Offset(event.x, event.y)).as_tuple())
+        ref = self._element_at(event.x, event.y)
 
         if ref != self._last_hover and self._last_hover is not None:
             event.stop()
@@ -515,21 +638,21 @@ class GraphView(ScrollView):
             self._last_hover = ref
 
     def on_click(self, event: events.Click) -> None:
-        ref = self._reverse_click_map.get(self.widget_to_view_coordinates(Offset(event.x, event.y)).as_tuple())
+        ref = self._element_at(event.x, event.y)
 
         if ref is not None:
             event.stop()
             self.post_message(GraphView.ElementClick(ref, event))
 
     def on_mouse_down(self, event: events.MouseDown) -> None:
-        ref = self._reverse_click_map.get(self.widget_to_view_coordinates(Offset(event.x, event.y)).as_tuple())
+        ref = self._element_at(event.x, event.y)
 
         if ref is not None:
             event.stop()
             self.post_message(GraphView.ElementMouseDown(ref, event))
 
     def on_mouse_up(self, event: events.MouseDown) -> None:
-        ref = self._reverse_click_map.get(self.widget_to_view_coordinates(Offset(event.x, event.y)).as_tuple())
+        ref = self._element_at(event.x, event.y)
 
         if ref is not None:
             event.stop()
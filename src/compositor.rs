@@ -0,0 +1,522 @@
+use std::cmp::{max, min};
+use std::collections::{BTreeMap, VecDeque};
+
+use pyo3::prelude::*;
+
+/// A segment of a buffer strip. Text segments are required to consist of
+/// characters that are exactly one cell wide, so that cell and character
+/// positions coincide.
+#[derive(Clone, Debug, PartialEq)]
+pub enum Segment {
+    Text {
+        text: String,
+        cells: i32,
+        style: u32,
+    },
+    Spacer {
+        width: i32,
+    },
+}
+
+impl Segment {
+    pub fn text(text: &str, style: u32) -> Self {
+        Segment::Text {
+            text: text.to_string(),
+            cells: text.chars().count() as i32,
+            style,
+        }
+    }
+
+    fn cell_length(&self) -> i32 {
+        match self {
+            Segment::Text { cells, .. } => *cells,
+            Segment::Spacer { width } => *width,
+        }
+    }
+
+    fn is_spacer(&self) -> bool {
+        matches!(self, Segment::Spacer { .. })
+    }
+
+    /// Split the segment at the given cell, mirroring `Segment.split_cells` and `Spacer.split_cells`.
+    fn split_cells(&self, at: i32) -> (Segment, Segment) {
+        match self {
+            Segment::Text { text, cells, style } => {
+                let at = max(0, at);
+                if at >= *cells {
+                    return (
+                        self.clone(),
+                        Segment::Text {
+                            text: String::new(),
+                            cells: 0,
+                            style: *style,
+                        },
+                    );
+                }
+                let byte_index = text
+                    .char_indices()
+                    .nth(at as usize)
+                    .map(|(index, _)| index)
+                    .unwrap_or(text.len());
+                (
+                    Segment::Text {
+                        text: text[..byte_index].to_string(),
+                        cells: at,
+                        style: *style,
+                    },
+                    Segment::Text {
+                        text: text[byte_index..].to_string(),
+                        cells: cells - at,
+                        style: *style,
+                    },
+                )
+            }
+            Segment::Spacer { width } => {
+                let at = min(max(0, at), *width);
+                (
+                    Segment::Spacer { width: at },
+                    Segment::Spacer { width: width - at },
+                )
+            }
+        }
+    }
+}
+
+/// A buffer to composite, the equivalent of a `StripBuffer` with its geometry resolved.
+#[derive(Clone, Debug)]
+pub struct CompositorBuffer {
+    pub left_x: i32,
+    pub right_x: i32,
+    pub top_y: i32,
+    pub bottom_y: i32,
+    pub height: usize,
+    pub layer: i32,
+    pub layer_index: f64,
+    pub strips: Vec<Vec<Segment>>,
+}
+
+impl CompositorBuffer {
+    /// Whether this buffer is drawn on top of the other buffer (lower z-index is on top).
+    fn is_above(&self, other: &CompositorBuffer) -> bool {
+        self.layer < other.layer
+            || (self.layer == other.layer && self.layer_index < other.layer_index)
+    }
+}
+
+/// A composited run of text. Runs that do not originate from a buffer
+/// (padding and transparent spacers) have the style id 0 and no buffer.
+#[derive(Clone, Debug, PartialEq)]
+pub struct Run {
+    pub text: String,
+    pub style: u32,
+    pub buffer: Option<usize>,
+}
+
+impl Run {
+    fn blank(width: i32) -> Self {
+        Run {
+            text: " ".repeat(max(0, width) as usize),
+            style: 0,
+            buffer: None,
+        }
+    }
+}
+
+/// A buffer intersecting the current row, with the segments that are still to be drawn.
+///
+/// The remaining segments are an optional split off `head` followed by the
+/// strip's segments starting at `rest`.
+#[derive(Clone, Debug)]
+struct ActiveBuffer {
+    left_x: i32,
+    head: Option<Segment>,
+    rest: usize,
+    row: usize,
+    buffer: usize,
+}
+
+/// Stable merge of two lists sorted by left x, entries of `first` win ties.
+fn merge(first: VecDeque<ActiveBuffer>, second: Vec<ActiveBuffer>) -> VecDeque<ActiveBuffer> {
+    let mut merged = VecDeque::with_capacity(first.len() + second.len());
+    let mut first = first.into_iter().peekable();
+    let mut second = second.into_iter().peekable();
+    loop {
+        let take_first = match (first.peek(), second.peek()) {
+            (Some(a), Some(b)) => a.left_x <= b.left_x,
+            (Some(_), None) => true,
+            (None, Some(_)) => false,
+            (None, None) => break,
+        };
+        if take_first {
+            merged.extend(first.next());
+        } else {
+            merged.extend(second.next());
+        }
+    }
+    merged
+}
+
+/// Composite the buffers within the viewport `(x, y, width, height)` into rows of runs.
+///
+/// This follows the compositing of `render_buffers` step by step, so that
+/// the produced runs are identical to the produced segments. Returns the
+/// first composited row and the rows.
+pub fn composite(
+    buffers: &[CompositorBuffer],
+    viewport: (i32, i32, i32, i32),
+) -> Result<(i32, Vec<Vec<Run>>), String> {
+    let (viewport_x, viewport_y, viewport_width, viewport_height) = viewport;
+    let full_width = viewport_x + viewport_width;
+    let full_height = viewport_y + viewport_height;
+
+    let mut buffers_by_row: BTreeMap<i32, Vec<(usize, usize)>> = BTreeMap::new();
+    for (index, buffer) in buffers.iter().enumerate() {
+        if buffer.bottom_y >= viewport_y && buffer.top_y < full_height {
+            let first_row = max(buffer.top_y, viewport_y);
+            buffers_by_row
+                .entry(first_row)
+                .or_default()
+                .push(((first_row - buffer.top_y) as usize, index));
+        }
+    }
+
+    let first_row = match buffers_by_row.keys().next() {
+        Some(row) => *row,
+        None => return Ok((viewport_y, Vec::new())),
+    };
+
+    for row_buffers in buffers_by_row.values_mut() {
+        row_buffers.sort_by_key(|(_, index)| (buffers[*index].left_x, buffers[*index].top_y));
+    }
+
+    let mut result = Vec::new();
+    let mut active_buffers: Vec<ActiveBuffer> = Vec::new();
+
+    for row in first_row..full_height {
+        let mut continued: Vec<ActiveBuffer> = active_buffers
+            .iter()
+            .filter(|active| active.row + 1 < buffers[active.buffer].height)
+            .map(|active| ActiveBuffer {
+                left_x: buffers[active.buffer].left_x,
+                head: None,
+                rest: 0,
+                row: active.row + 1,
+                buffer: active.buffer,
+            })
+            .collect();
+        continued.sort_by_key(|active| active.left_x);
+
+        let starting: Vec<ActiveBuffer> = buffers_by_row
+            .get(&row)
+            .map(|row_buffers| {
+                row_buffers
+                    .iter()
+                    .map(|(buffer_row, index)| ActiveBuffer {
+                        left_x: buffers[*index].left_x,
+                        head: None,
+                        rest: 0,
+                        row: *buffer_row,
+                        buffer: *index,
+                    })
+                    .collect()
+            })
+            .unwrap_or_default();
+
+        active_buffers = merge(continued.into(), starting).into();
+
+        let mut strip = Vec::new();
+
+        if active_buffers.is_empty() {
+            strip.push(Run::blank(viewport_width));
+            result.push(strip);
+            continue;
+        }
+
+        let mut current_x = viewport_x;
+        let mut working_buffers: VecDeque<ActiveBuffer> = active_buffers.iter().cloned().collect();
+
+        while let Some(active) = working_buffers.pop_front() {
+            let buffer = &buffers[active.buffer];
+            let strip_segments = buffer.strips.get(active.row).ok_or_else(|| {
+                format!(
+                    "Buffer {} has no strip for row {}",
+                    active.buffer, active.row
+                )
+            })?;
+            let head_offset = active.head.is_some() as usize;
+            let segments: Vec<&Segment> = active
+                .head
+                .iter()
+                .chain(strip_segments[min(active.rest, strip_segments.len())..].iter())
+                .collect();
+
+            let full_segments_cell_length: i32 =
+                segments.iter().map(|segment| segment.cell_length()).sum();
+            if active.left_x + full_segments_cell_length > buffer.right_x + 1 {
+                return Err(format!(
+                    "Segment overflow in buffer {} at {} + {} > {}",
+                    active.buffer,
+                    active.left_x,
+                    full_segments_cell_length,
+                    buffer.right_x + 1
+                ));
+            }
+
+            let mut segment_left_x = active.left_x;
+
+            for (j, original) in segments.iter().enumerate() {
+                let full_segment_cell_length = original.cell_length();
+                if full_segment_cell_length == 0 {
+                    continue;
+                }
+
+                let mut segment = (*original).clone();
+                if current_x > segment_left_x {
+                    segment = segment.split_cells(current_x - segment_left_x).1;
+                } else if current_x < segment_left_x {
+                    let next_x = min(full_width, segment_left_x);
+                    strip.push(Run::blank(next_x - current_x));
+                    current_x = next_x;
+                }
+
+                // Look ahead whether a buffer drawn on top starts within this segment, if so
+                // the segment is cut there and the remainder is drawn again after that buffer.
+                let mut overlapped = None;
+                for next in working_buffers.iter() {
+                    if next.left_x < segment_left_x + full_segment_cell_length
+                        && (buffers[next.buffer].is_above(buffer) || segment.is_spacer())
+                        && segment.cell_length() > 0
+                    {
+                        let (visible, overflow) =
+                            segment.split_cells(max(0, next.left_x - current_x));
+                        let left_x = next.left_x - min(0, next.left_x - current_x);
+                        let rest = active.rest + j + 1 - head_offset;
+                        overlapped = Some(if visible.is_spacer() {
+                            ActiveBuffer {
+                                left_x: left_x + overflow.cell_length(),
+                                head: None,
+                                rest,
+                                row: active.row,
+                                buffer: active.buffer,
+                            }
+                        } else {
+                            ActiveBuffer {
+                                left_x,
+                                head: Some(overflow),
+                                rest,
+                                row: active.row,
+                                buffer: active.buffer,
+                            }
+                        });
+                        segment = visible;
+                        break;
+                    }
+                }
+
+                let skip_remaining_segments = overlapped.is_some();
+                if let Some(overlapped) = overlapped {
+                    working_buffers = merge(working_buffers, vec![overlapped]);
+                }
+
+                if current_x > full_width {
+                    return Err(format!("{} already past {}", current_x, full_width));
+                }
+                if current_x + segment.cell_length() > full_width {
+                    segment = segment.split_cells(full_width - current_x).0;
+                }
+
+                let cell_length = segment.cell_length();
+                if cell_length > 0 {
+                    match segment {
+                        Segment::Spacer { width } => strip.push(Run::blank(width)),
+                        Segment::Text { text, style, .. } => strip.push(Run {
+                            text,
+                            style,
+                            buffer: Some(active.buffer),
+                        }),
+                    }
+                    current_x += cell_length;
+                }
+                segment_left_x += full_segment_cell_length;
+
+                if skip_remaining_segments {
+                    break;
+                }
+            }
+        }
+
+        if current_x < full_width {
+            strip.push(Run::blank(full_width - current_x));
+        }
+
+        result.push(strip);
+    }
+
+    Ok((first_row, result))
+}
+
+type PySegment = (Option<String>, i32, u32);
+type PyCompositorBuffer = (i32, i32, i32, i32, usize, i32, f64, Vec<Vec<PySegment>>);
+
+/// Composite buffers into rows of `(text, style id, buffer index)` runs.
+///
+/// Buffers are passed as `(left_x, right_x, top_y, bottom_y, height, layer,
+/// layer_index, strips)` where each strip is a list of `(text, cell length,
+/// style id)` segments and a text of `None` denotes a transparent spacer.
+/// Padding and spacers are returned with style id 0 and buffer index -1.
+#[pyfunction]
+pub fn composite_buffers(
+    py: Python<'_>,
+    buffers: Vec<PyCompositorBuffer>,
+    viewport: (i32, i32, i32, i32),
+) -> PyResult<(i32, Vec<Vec<(String, u32, i64)>>)> {
+    let buffers: Vec<CompositorBuffer> = buffers
+        .into_iter()
+        .map(
+            |(left_x, right_x, top_y, bottom_y, height, layer, layer_index, strips)| {
+                CompositorBuffer {
+                    left_x,
+                    right_x,
+                    top_y,
+                    bottom_y,
+                    height,
+                    layer,
+                    layer_index,
+                    strips: strips
+                        .into_iter()
+                        .map(|segments| {
+                            segments
+                                .into_iter()
+                                .map(|(text, cells, style)| match text {
+                                    Some(text) => Segment::Text { text, cells, style },
+                                    None => Segment::Spacer { width: cells },
+                                })
+                                .collect()
+                        })
+                        .collect(),
+                }
+            },
+        )
+        .collect();
+
+    let (first_row, rows) = py
+        .allow_threads(|| composite(&buffers, viewport))
+        .map_err(PyErr::new::<pyo3::exceptions::PyRuntimeError, _>)?;
+
+    Ok((
+        first_row,
+        rows.into_iter()
+            .map(|runs| {
+                runs.into_iter()
+                    .map(|run| {
+                        (
+                            run.text,
+                            run.style,
+                            run.buffer.map_or(-1, |buffer| buffer as i64),
+                        )
+                    })
+                    .collect()
+            })
+            .collect(),
+    ))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn line(left_x: i32, y: i32, layer: i32, segments: Vec<Segment>) -> CompositorBuffer {
+        let width: i32 = segments.iter().map(|segment| segment.cell_length()).sum();
+        CompositorBuffer {
+            left_x,
+            right_x: left_x + width - 1,
+            top_y: y,
+            bottom_y: y,
+            height: 1,
+            layer,
+            layer_index: 0.0,
+            strips: vec![segments],
+        }
+    }
+
+    fn texts(rows: &[Vec<Run>]) -> Vec<String> {
+        rows.iter()
+            .map(|runs| runs.iter().map(|run| run.text.as_str()).collect())
+            .collect()
+    }
+
+    #[test]
+    fn test_composite_single_buffer() {
+        let buffers = vec![line(2, 0, 0, vec![Segment::text("XXX", 1)])];
+        let (first_row, rows) = composite(&buffers, (0, 0, 6, 1)).unwrap();
+        assert_eq!(first_row, 0);
+        assert_eq!(texts(&rows), vec!["  XXX "]);
+        assert_eq!(rows[0][1].buffer, Some(0));
+        assert_eq!(rows[0][1].style, 1);
+    }
+
+    #[test]
+    fn test_composite_overlap_respects_z_index() {
+        let buffers = vec![
+            line(0, 0, 0, vec![Segment::text("AAAAAA", 1)]),
+            line(2, 0, -1, vec![Segment::text("BB", 2)]),
+        ];
+        let (_, rows) = composite(&buffers, (0, 0, 6, 1)).unwrap();
+        assert_eq!(texts(&rows), vec!["AABBAA"]);
+
+        let buffers = vec![
+            line(0, 0, -1, vec![Segment::text("AAAAAA", 1)]),
+            line(2, 0, 0, vec![Segment::text("BB", 2)]),
+        ];
+        let (_, rows) = composite(&buffers, (0, 0, 6, 1)).unwrap();
+        assert_eq!(texts(&rows), vec!["AAAAAA"]);
+    }
+
+    #[test]
+    fn test_composite_spacer_is_transparent() {
+        let buffers = vec![
+            line(
+                0,
+                0,
+                -1,
+                vec![
+                    Segment::text("A", 1),
+                    Segment::Spacer { width: 4 },
+                    Segment::text("A", 1),
+                ],
+            ),
+            line(1, 0, 0, vec![Segment::text("BBBB", 2)]),
+        ];
+        let (_, rows) = composite(&buffers, (0, 0, 6, 1)).unwrap();
+        assert_eq!(texts(&rows), vec!["ABBBBA"]);
+    }
+
+    #[test]
+    fn test_composite_skips_rows_above_viewport() {
+        let buffer = CompositorBuffer {
+            left_x: 0,
+            right_x: 1,
+            top_y: -2,
+            bottom_y: 1,
+            height: 4,
+            layer: 0,
+            layer_index: 0.0,
+            strips: vec![
+                vec![Segment::text("ab", 1)],
+                vec![Segment::text("cd", 1)],
+                vec![Segment::text("ef", 1)],
+                vec![Segment::text("gh", 1)],
+            ],
+        };
+        let (first_row, rows) = composite(&[buffer], (0, 0, 3, 3)).unwrap();
+        assert_eq!(first_row, 0);
+        assert_eq!(texts(&rows), vec!["ef ", "gh ", "   "]);
+    }
+
+    #[test]
+    fn test_composite_overflow_is_an_error() {
+        let mut buffer = line(0, 0, 0, vec![Segment::text("XXX", 1)]);
+        buffer.right_x = 0;
+        assert!(composite(&[buffer], (0, 0, 3, 1)).is_err());
+    }
+}
@@ -5,6 +5,7 @@ use pyo3::{prelude::*, IntoPyObjectExt};
 use std::collections::HashMap;
 
 use crate::geometry::Size;
+use crate::layout::LayoutGraph;
 use crate::pyindexset::PyIndexSet;
 
 #[pyclass]
@@ -20,6 +21,11 @@ impl CoreGraph {
     pub fn size_by_index(&self, index: NodeIndex) -> Option<&Size> {
         self.size_map.get(&index)
     }
+
+    /// Copy the structure and node sizes of the graph, e.g. to compute a layout without the GIL.
+    pub fn layout_graph(&self) -> LayoutGraph {
+        LayoutGraph::new(self.graph.clone(), self.size_map.clone())
+    }
 }
 
 #[pymethods]
@@ -0,0 +1,435 @@
+//! Independent layout and packing of the weakly connected components of a graph.
+//!
+//! Graphs consisting of many small components are laid out faster component by component, as most
+//! layout algorithms scale superlinearly, and the components can be laid out concurrently. The
+//! bounding boxes of the resulting layouts are then packed with a skyline packer, which also
+//! keeps the canvas (and with it the routing grid) much smaller than laying out all components
+//! in a single coordinate space.
+
+use std::cmp::Reverse;
+use std::collections::HashMap;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::thread;
+
+use petgraph::graph::NodeIndex;
+use petgraph::graphmap::DiGraphMap;
+use petgraph::unionfind::UnionFind;
+use petgraph::visit::{EdgeRef, IntoEdgeReferences, NodeIndexable};
+
+use crate::geometry::Point;
+
+use super::LayoutGraph;
+
+/// Free space kept around packed components.
+const COMPONENT_SPACING: i32 = 2;
+
+/// Ratio of the width to the height of the packed area. Terminal cells are about twice as high as
+/// wide, so this packs components into a roughly square area on screen.
+const PACKING_ASPECT_RATIO: f64 = 2.0;
+
+/// Graphs with fewer nodes are laid out on the calling thread, as spawning threads costs more
+/// than laying out their components.
+const PARALLEL_COMPONENTS_MIN_NODES: usize = 256;
+
+/// A weakly connected component of a layout graph.
+///
+/// The nodes of the component graph are numbered densely from 0 like the nodes of a graph copied
+/// out of a core graph, which the layout engines rely on.
+pub(crate) struct Component {
+    /// The nodes of the original graph by their index in the component.
+    pub nodes: Vec<NodeIndex>,
+    pub graph: LayoutGraph,
+}
+
+/// Split a layout graph into its weakly connected components, ordered by their lowest node.
+pub(crate) fn connected_components(graph: &LayoutGraph) -> Vec<Component> {
+    let raw_graph = &graph.graph;
+    let mut vertex_sets = UnionFind::new(raw_graph.node_bound());
+    for edge in raw_graph.edge_references() {
+        vertex_sets.union(
+            raw_graph.to_index(edge.source()),
+            raw_graph.to_index(edge.target()),
+        );
+    }
+    let labels = vertex_sets.into_labeling();
+
+    let mut nodes: Vec<NodeIndex> = raw_graph.nodes().collect();
+    nodes.sort_unstable();
+    let mut component_of_label = HashMap::new();
+    let mut local_index = HashMap::new();
+    let mut components: Vec<(Vec<NodeIndex>, DiGraphMap<_, ()>, HashMap<_, _>)> = Vec::new();
+    for node in nodes {
+        let label = labels[raw_graph.to_index(node)];
+        let component = *component_of_label.entry(label).or_insert_with(|| {
+            components.push((Vec::new(), DiGraphMap::new(), HashMap::new()));
+            components.len() - 1
+        });
+        let (component_nodes, subgraph, sizes) = &mut components[component];
+        let local = NodeIndex::new(component_nodes.len());
+        component_nodes.push(node);
+        local_index.insert(node, local);
+        subgraph.add_node(local);
+        if let Some(size) = graph.size_by_index(node) {
+            sizes.insert(local, *size);
+        }
+    }
+    for edge in raw_graph.edge_references() {
+        let component = component_of_label[&labels[raw_graph.to_index(edge.source())]];
+        components[component].1.add_edge(
+            local_index[&edge.source()],
+            local_index[&edge.target()],
+            (),
+        );
+    }
+
+    components
+        .into_iter()
+        .map(|(nodes, subgraph, sizes)| Component {
+            nodes,
+            graph: LayoutGraph::new(subgraph, sizes),
+        })
+        .collect()
+}
+
+/// Lay out every connected component of `graph` separately and pack the layouts.
+///
+/// The components are laid out by `layout` concurrently on scoped threads. Positions returned for
+/// indices that are not nodes of the component, such as dummy nodes, are dropped, as they could
+/// not be told apart from nodes of other components. A graph with a single component is laid out
+/// as is.
+pub(crate) fn layout_components<F>(graph: &LayoutGraph, layout: F) -> Vec<(usize, Point)>
+where
+    F: Fn(&LayoutGraph) -> Vec<(usize, Point)> + Sync,
+{
+    layout_components_with(graph, |component, _| (layout(component), ())).0
+}
+
+/// Lay out and pack the connected components of `graph` like [layout_components], for layouts
+/// that need to know which nodes of `graph` a component consists of.
+///
+/// Next to the component graph, `layout` is given the indices in `graph` of the nodes of the
+/// component by their index in the component, or `None` if `graph` is laid out as is. Besides
+/// the positions it returns a further result for the component, which are collected in the
+/// order of the components.
+pub(crate) fn layout_components_with<F, T>(
+    graph: &LayoutGraph,
+    layout: F,
+) -> (Vec<(usize, Point)>, Vec<T>)
+where
+    F: Fn(&LayoutGraph, Option<&[NodeIndex]>) -> (Vec<(usize, Point)>, T) + Sync,
+    T: Send,
+{
+    let components = connected_components(graph);
+    if components.len() <= 1 {
+        let (positions, result) = layout(graph, None);
+        return (positions, vec![result]);
+    }
+
+    let layout_component = |component: &Component| -> (Vec<(usize, Point)>, T) {
+        let (positions, result) = layout(&component.graph, Some(&component.nodes));
+        let positions = positions
+            .into_iter()
+            .filter_map(|(node, point)| {
+                let node = component.nodes.get(node)?;
+                Some((node.index(), point))
+            })
+            .collect();
+        (positions, result)
+    };
+
+    let node_count = graph.graph.node_count();
+    let threads = thread::available_parallelism()
+        .map_or(1, |threads| threads.get())
+        .min(components.len());
+    let layouts: Vec<(Vec<(usize, Point)>, T)> = if threads <= 1
+        || node_count < PARALLEL_COMPONENTS_MIN_NODES
+    {
+        components.iter().map(layout_component).collect()
+    } else {
+        // Large components first, so that they do not end up last on a busy thread.
+        let mut order: Vec<usize> = (0..components.len()).collect();
+        order.sort_by_key(|component| Reverse(components[*component].nodes.len()));
+        let next = AtomicUsize::new(0);
+        let mut layouts: Vec<Option<_>> = (0..components.len()).map(|_| None).collect();
+        thread::scope(|scope| {
+            let handles: Vec<_> = (0..threads)
+                .map(|_| {
+                    scope.spawn(|| {
+                        let mut done = Vec::new();
+                        loop {
+                            let index = next.fetch_add(1, Ordering::Relaxed);
+                            let Some(&component) = order.get(index) else {
+                                break done;
+                            };
+                            done.push((component, layout_component(&components[component])));
+                        }
+                    })
+                })
+                .collect();
+            for handle in handles {
+                for (component, layout) in handle.join().expect("Component layout thread panicked")
+                {
+                    layouts[component] = Some(layout);
+                }
+            }
+        });
+        layouts
+            .into_iter()
+            .map(|layout| layout.expect("Every component is laid out"))
+            .collect()
+    };
+
+    let (layouts, results): (Vec<_>, Vec<_>) = layouts.into_iter().unzip();
+    let boxes: Vec<BoundingBox> = layouts
+        .iter()
+        .map(|positions| BoundingBox::of(graph, positions))
+        .collect();
+    let offsets = pack(
+        &boxes
+            .iter()
+            .map(|bounds| {
+                (
+                    bounds.width() + COMPONENT_SPACING,
+                    bounds.height() + COMPONENT_SPACING,
+                )
+            })
+            .collect::<Vec<_>>(),
+    );
+
+    let positions = layouts
+        .into_iter()
+        .zip(boxes.iter().zip(offsets))
+        .flat_map(|(positions, (bounds, (x, y)))| {
+            positions.into_iter().map(move |(node, point)| {
+                (
+                    node,
+                    Point::new(point.x - bounds.min_x + x, point.y - bounds.min_y + y),
+                )
+            })
+        })
+        .collect();
+    (positions, results)
+}
+
+/// The area covered by the nodes of a layout, given by their centers and sizes.
+struct BoundingBox {
+    min_x: i32,
+    min_y: i32,
+    max_x: i32,
+    max_y: i32,
+}
+
+impl BoundingBox {
+    fn of(graph: &LayoutGraph, positions: &[(usize, Point)]) -> Self {
+        let mut bounds = BoundingBox {
+            min_x: i32::MAX,
+            min_y: i32::MAX,
+            max_x: i32::MIN,
+            max_y: i32::MIN,
+        };
+        for (node, point) in positions {
+            let (width, height) = graph
+                .size_by_index(NodeIndex::new(*node))
+                .map_or((1, 1), |size| (size.width.max(1), size.height.max(1)));
+            bounds.min_x = bounds.min_x.min(point.x - width / 2);
+            bounds.min_y = bounds.min_y.min(point.y - height / 2);
+            bounds.max_x = bounds.max_x.max(point.x - width / 2 + width);
+            bounds.max_y = bounds.max_y.max(point.y - height / 2 + height);
+        }
+        if positions.is_empty() {
+            bounds = BoundingBox {
+                min_x: 0,
+                min_y: 0,
+                max_x: 0,
+                max_y: 0,
+            };
+        }
+        bounds
+    }
+
+    fn width(&self) -> i32 {
+        self.max_x - self.min_x
+    }
+
+    fn height(&self) -> i32 {
+        self.max_y - self.min_y
+    }
+}
+
+/// Pack rectangles of the given `(width, height)` without overlaps, returning the position of
+/// the top left corner of each.
+///
+/// Rectangles are placed from the highest to the lowest, each at the lowest and then leftmost
+/// position on the skyline, the upper contour of the rectangles placed so far. The width of the
+/// packing is chosen for an area with `PACKING_ASPECT_RATIO`, but at least as wide as the widest
+/// rectangle.
+pub(crate) fn pack(rectangles: &[(i32, i32)]) -> Vec<(i32, i32)> {
+    let area: f64 = rectangles
+        .iter()
+        .map(|(width, height)| *width as f64 * *height as f64)
+        .sum();
+    let widest = rectangles
+        .iter()
+        .map(|(width, _)| *width)
+        .max()
+        .unwrap_or(0);
+    let packing_width = widest.max((area * PACKING_ASPECT_RATIO).sqrt().ceil() as i32);
+
+    let mut order: Vec<usize> = (0..rectangles.len()).collect();
+    order.sort_by_key(|index| {
+        let (width, height) = rectangles[*index];
+        (Reverse(height), Reverse(width), *index)
+    });
+
+    // Segments of the skyline as `(x, y, width)`, covering the packing width from left to right.
+    let mut skyline = vec![(0, 0, packing_width)];
+    let mut positions = vec![(0, 0); rectangles.len()];
+    for index in order {
+        let (width, height) = rectangles[index];
+        let mut best: Option<(i32, i32, usize)> = None;
+        for start in 0..skyline.len() {
+            let x = skyline[start].0;
+            if x + width > packing_width {
+                break;
+            }
+            let y = skyline[start..]
+                .iter()
+                .take_while(|(segment_x, _, _)| *segment_x < x + width)
+                .map(|(_, y, _)| *y)
+                .max()
+                .unwrap_or(0);
+            if best.map_or(true, |(best_x, best_y, _)| (y, x) < (best_y, best_x)) {
+                best = Some((x, y, start));
+            }
+        }
+        let (x, y, start) = best.expect("Rectangle wider than the packing");
+        positions[index] = (x, y);
+
+        // Replace the covered part of the skyline by the top of the rectangle.
+        let mut end = start;
+        while end < skyline.len() && skyline[end].0 < x + width {
+            end += 1;
+        }
+        let (last_x, last_y, last_width) = skyline[end - 1];
+        let mut replacement = vec![(x, y + height, width)];
+        if last_x + last_width > x + width {
+            replacement.push((x + width, last_y, last_x + last_width - x - width));
+        }
+        skyline.splice(start..end, replacement);
+    }
+    positions
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::geometry::Size;
+
+    fn graph(count: usize, edges: &[(usize, usize)]) -> LayoutGraph {
+        let mut graph = DiGraphMap::new();
+        let mut sizes = HashMap::new();
+        for node in 0..count {
+            graph.add_node(NodeIndex::new(node));
+            sizes.insert(NodeIndex::new(node), Size::new(3, 1));
+        }
+        for &(u, v) in edges {
+            graph.add_edge(NodeIndex::new(u), NodeIndex::new(v), ());
+        }
+        LayoutGraph::new(graph, sizes)
+    }
+
+    fn overlap(a: (i32, i32, i32, i32), b: (i32, i32, i32, i32)) -> bool {
+        a.0 < b.0 + b.2 && b.0 < a.0 + a.2 && a.1 < b.1 + b.3 && b.1 < a.1 + a.3
+    }
+
+    #[test]
+    fn test_components_keep_their_nodes() {
+        let components = connected_components(&graph(6, &[(0, 3), (3, 5), (4, 1)]));
+        let nodes: Vec<Vec<usize>> = components
+            .iter()
+            .map(|component| component.nodes.iter().map(|node| node.index()).collect())
+            .collect();
+        assert_eq!(nodes, vec![vec![0, 3, 5], vec![1, 4], vec![2]]);
+        // Nodes are renumbered within their component.
+        let edges: Vec<_> = components[0]
+            .graph
+            .graph
+            .all_edges()
+            .map(|(u, v, _)| (u.index(), v.index()))
+            .collect();
+        assert_eq!(edges, vec![(0, 1), (1, 2)]);
+        assert_eq!(
+            components[1].graph.size_by_index(NodeIndex::new(1)),
+            Some(&Size::new(3, 1))
+        );
+    }
+
+    #[test]
+    fn test_packed_rectangles_do_not_overlap() {
+        let rectangles: Vec<(i32, i32)> = (0..200)
+            .map(|index| (1 + index * 7 % 13, 1 + index * 5 % 11))
+            .collect();
+        let positions = pack(&rectangles);
+        let placed: Vec<_> = positions
+            .iter()
+            .zip(&rectangles)
+            .map(|((x, y), (width, height))| (*x, *y, *width, *height))
+            .collect();
+        for (index, a) in placed.iter().enumerate() {
+            assert!(a.0 >= 0 && a.1 >= 0);
+            for b in &placed[..index] {
+                assert!(!overlap(*a, *b));
+            }
+        }
+        // The packing wastes less than half of its area.
+        let area: i32 = rectangles
+            .iter()
+            .map(|(width, height)| width * height)
+            .sum();
+        let width = placed.iter().map(|(x, _, w, _)| x + w).max().unwrap();
+        let height = placed.iter().map(|(_, y, _, h)| y + h).max().unwrap();
+        assert!(2 * area > width * height);
+    }
+
+    #[test]
+    fn test_component_layouts_are_packed() {
+        // Every component is laid out as a row of nodes at the origin, with a dummy node.
+        let row = |component: &LayoutGraph| -> Vec<(usize, Point)> {
+            let mut positions: Vec<(usize, Point)> = component
+                .graph
+                .nodes()
+                .enumerate()
+                .map(|(index, node)| (node.index(), Point::new(4 * index as i32, 0)))
+                .collect();
+            positions.push((1000, Point::new(0, 0)));
+            positions
+        };
+        let graph = graph(
+            300,
+            &(0..150).map(|i| (2 * i, 2 * i + 1)).collect::<Vec<_>>(),
+        );
+        let positions = layout_components(&graph, row);
+        assert_eq!(positions.len(), 300);
+        let boxes: Vec<_> = positions
+            .iter()
+            .map(|(_, point)| (point.x - 1, point.y, 3, 1))
+            .collect();
+        for (index, a) in boxes.iter().enumerate() {
+            for b in &boxes[..index] {
+                assert!(!overlap(*a, *b));
+            }
+        }
+    }
+
+    #[test]
+    fn test_single_component_is_laid_out_as_is() {
+        let graph = graph(3, &[(0, 1), (1, 2)]);
+        let positions = layout_components(&graph, |_| {
+            vec![(0, Point::new(-5, 7)), (7, Point::new(1, 1))]
+        });
+        assert_eq!(
+            positions,
+            vec![(0, Point::new(-5, 7)), (7, Point::new(1, 1))]
+        );
+    }
+}
@@ -1,14 +1,13 @@
 use petgraph::graph::NodeIndex;
-use std::{cmp, collections::HashMap};
+use std::collections::HashMap;
 
 use pyo3::prelude::*;
 
-use crate::{
-    geometry::{Point, Size},
-    graph::CoreGraph,
-};
+use crate::{geometry::Point, graph::CoreGraph};
 
-use super::LayoutEngine;
+use super::components::layout_components;
+use super::quadtree::{QuadTree, Repulsion};
+use super::{objects_to_positions, positions_to_objects, LayoutEngine, LayoutGraph};
 
 #[pyclass(extends=LayoutEngine, subclass)]
 pub struct ForceDirectedLayout {
@@ -17,12 +16,18 @@ pub struct ForceDirectedLayout {
     iterations: i32,
     optimal_distance: i32,
     force_constant: f64,
+    /// Opening angle of the Barnes–Hut approximation of the repulsive forces, 0 computes them
+    /// exactly.
+    theta: f64,
+    /// Lay out the connected components separately and pack them next to each other.
+    pack_components: bool,
 }
 
 #[pymethods]
 impl ForceDirectedLayout {
     #[new]
-    fn new() -> (Self, LayoutEngine) {
+    #[pyo3(signature = (theta = 0.8, pack_components = false))]
+    fn new(theta: f64, pack_components: bool) -> (Self, LayoutEngine) {
         (
             ForceDirectedLayout {
                 width: 120,
@@ -30,94 +35,410 @@ impl ForceDirectedLayout {
                 iterations: 50,
                 optimal_distance: 3,
                 force_constant: 0.005,
+                theta,
+                pack_components,
             },
             LayoutEngine {},
         )
     }
 
     fn layout(&self, py: Python<'_>, graph: &CoreGraph) -> PyResult<Vec<(PyObject, Point)>> {
-        let mut positions: HashMap<NodeIndex, Point> = graph
+        let layout_graph = graph.layout_graph();
+        let positions = py.allow_threads(|| {
+            if self.pack_components {
+                layout_components(&layout_graph, |component| self.compute_positions(component))
+            } else {
+                self.compute_positions(&layout_graph)
+            }
+        });
+        Ok(positions_to_objects(py, graph, positions))
+    }
+
+    /// Lay out the graph again, continuing from the `positions` of a previous layout of it.
+    ///
+    /// Only nodes without a previous position and their neighbors move, see [warm_start].
+    fn layout_incremental(
+        &self,
+        py: Python<'_>,
+        graph: &CoreGraph,
+        positions: Vec<(Bound<'_, PyAny>, Point)>,
+    ) -> PyResult<Vec<(PyObject, Point)>> {
+        let previous = objects_to_positions(graph, &positions)?;
+        let layout_graph = graph.layout_graph();
+        let positions = py.allow_threads(|| {
+            let graph = DenseGraph::new(&layout_graph);
+            let repulsion = self.repulsion();
+            let area = layout_area(
+                &graph.sizes,
+                repulsion.optimal_distance,
+                (self.width as f64, self.height as f64),
+            );
+            warm_start(
+                &graph,
+                &previous,
+                repulsion,
+                self.theta,
+                area,
+                self.iterations,
+            )
+        });
+        Ok(positions_to_objects(py, graph, positions))
+    }
+}
+
+impl ForceDirectedLayout {
+    fn repulsion(&self) -> Repulsion {
+        Repulsion {
+            optimal_distance: self.optimal_distance as f64,
+            force_constant: self.force_constant,
+        }
+    }
+
+    fn compute_positions(&self, graph: &LayoutGraph) -> Vec<(usize, Point)> {
+        let graph = DenseGraph::new(graph);
+        let repulsion = self.repulsion();
+        let bounds = layout_area(
+            &graph.sizes,
+            repulsion.optimal_distance,
+            (self.width as f64, self.height as f64),
+        );
+        let positions = random_positions(graph.nodes.len(), bounds);
+
+        let mut simulation = ForceSimulation::new(
+            &graph.sizes,
+            &graph.edges,
+            positions,
+            repulsion,
+            self.theta,
+            bounds,
+        );
+        simulation.run(self.iterations, bounds.0.max(bounds.1) / 10.0);
+        graph.points(&simulation.positions)
+    }
+}
+
+/// A layout graph with nodes numbered densely from 0, as used by force simulations.
+pub(crate) struct DenseGraph {
+    pub nodes: Vec<NodeIndex>,
+    pub sizes: Vec<(f64, f64)>,
+    pub edges: Vec<(usize, usize)>,
+}
+
+impl DenseGraph {
+    pub fn new(graph: &LayoutGraph) -> Self {
+        let nodes: Vec<NodeIndex> = graph.graph.nodes().collect();
+        let indices: HashMap<NodeIndex, usize> = nodes
+            .iter()
+            .enumerate()
+            .map(|(index, node)| (*node, index))
+            .collect();
+        let edges = graph
             .graph
-            .nodes()
+            .all_edges()
+            .map(|(u, v, _)| (indices[&u], indices[&v]))
+            .collect();
+        let sizes = nodes
+            .iter()
             .map(|node| {
-                (
-                    node,
-                    Point {
-                        x: (rand::random::<f64>() * self.width as f64).round() as i32,
-                        y: (rand::random::<f64>() * self.height as f64).round() as i32,
-                    },
-                )
+                graph
+                    .size_by_index(*node)
+                    .map_or((0.0, 0.0), |size| (size.width as f64, size.height as f64))
             })
             .collect();
+        DenseGraph {
+            nodes,
+            sizes,
+            edges,
+        }
+    }
+
+    /// Round positions given by dense index to the points of the nodes.
+    pub fn points(&self, positions: &[(f64, f64)]) -> Vec<(usize, Point)> {
+        self.nodes
+            .iter()
+            .zip(positions)
+            .map(|(node, (x, y))| (node.index(), Point::new(x.round() as i32, y.round() as i32)))
+            .collect()
+    }
+}
+
+/// The area to lay out nodes of the given sizes in, at least `(width, height)`.
+///
+/// The area grows for large graphs so that the density of nodes stays bounded, nodes would
+/// otherwise pile up at the bounds, which also defeats the approximation of the repulsion.
+pub(crate) fn layout_area(
+    sizes: &[(f64, f64)],
+    spacing: f64,
+    (width, height): (f64, f64),
+) -> (f64, f64) {
+    let node_area: f64 = sizes
+        .iter()
+        .map(|(width, height)| (width + spacing) * (height + spacing))
+        .sum();
+    let scale = (2.0 * node_area / (width * height)).sqrt().max(1.0);
+    (width * scale, height * scale)
+}
+
+pub(crate) fn random_positions(count: usize, (width, height): (f64, f64)) -> Vec<(f64, f64)> {
+    (0..count)
+        .map(|_| {
+            (
+                (rand::random::<f64>() * width).round(),
+                (rand::random::<f64>() * height).round(),
+            )
+        })
+        .collect()
+}
+
+/// Continue a force directed layout from the `previous` positions of the nodes, keyed by node
+/// index.
+///
+/// Nodes without a previous position start next to the mean of their placed neighbors, or at a
+/// random position if they have none. Only these nodes and their neighbors move, all other nodes
+/// keep their previous positions, and the temperature is kept low so that the moving nodes stay
+/// close to where they start. The positions are returned in the frame of the previous positions.
+pub(crate) fn warm_start(
+    graph: &DenseGraph,
+    previous: &HashMap<usize, Point>,
+    repulsion: Repulsion,
+    theta: f64,
+    area: (f64, f64),
+    iterations: i32,
+) -> Vec<(usize, Point)> {
+    let placed: Vec<Option<Point>> = graph
+        .nodes
+        .iter()
+        .map(|node| previous.get(&node.index()).copied())
+        .collect();
 
-        for _ in 0..self.iterations {
-            let mut displacements: HashMap<NodeIndex, Point> = HashMap::new();
-
-            // Calculate repulsive forces
-            for u in graph.graph.nodes() {
-                displacements.insert(u, Point { x: 0, y: 0 });
-                for v in graph.graph.nodes() {
-                    if u != v {
-                        let delta = positions[&u] - positions[&v];
-                        let distance = delta.length_as_vector();
-
-                        let origin = Size::new(0, 0);
-                        let size_u = graph.size_by_index(u).unwrap_or(&origin);
-                        let size_v = graph.size_by_index(v).unwrap_or(&origin);
-
-                        let min_distance =
-                            cmp::max(size_u.height + size_v.height, size_u.width + size_v.width);
-
-                        if distance > 0.0 {
-                            let repulsive_force =
-                                (self.optimal_distance.pow(2) as f64) / (distance as f64);
-                            let adjustment =
-                                delta * (repulsive_force / distance * self.force_constant);
-                            let adjustment_min = delta * (repulsive_force / distance);
-                            if distance < min_distance as f64 {
-                                displacements.get_mut(&u).unwrap().x += adjustment_min.x;
-                                displacements.get_mut(&u).unwrap().y += adjustment_min.y;
-                            } else {
-                                displacements.get_mut(&u).unwrap().x += adjustment.x;
-                                displacements.get_mut(&u).unwrap().y += adjustment.y;
-                            }
-                        }
-                    }
+    // The simulation keeps nodes within [0, bounds], so the previous layout is translated to
+    // start at the origin and the bounds grow to contain it.
+    let origin = placed
+        .iter()
+        .flatten()
+        .copied()
+        .reduce(|a, b| Point::new(a.x.min(b.x), a.y.min(b.y)))
+        .unwrap_or(Point::new(0, 0));
+    let mut positions: Vec<Option<(f64, f64)>> = placed
+        .iter()
+        .map(|point| point.map(|p| ((p.x - origin.x) as f64, (p.y - origin.y) as f64)))
+        .collect();
+    let bounds = positions
+        .iter()
+        .flatten()
+        .fold(area, |(width, height), (x, y)| {
+            (width.max(*x), height.max(*y))
+        });
+
+    let mut fixed: Vec<bool> = placed.iter().map(Option::is_some).collect();
+    let mut neighbor_sums = vec![(0.0, 0.0, 0usize); graph.nodes.len()];
+    for &(u, v) in &graph.edges {
+        for (node, neighbor) in [(u, v), (v, u)] {
+            match positions[neighbor] {
+                Some((x, y)) => {
+                    let sum = &mut neighbor_sums[node];
+                    *sum = (sum.0 + x, sum.1 + y, sum.2 + 1);
                 }
+                None => fixed[node] = false,
             }
+        }
+    }
+    if fixed.iter().all(|&fixed| fixed) {
+        return graph
+            .nodes
+            .iter()
+            .zip(placed)
+            .filter_map(|(node, point)| Some((node.index(), point?)))
+            .collect();
+    }
 
-            for (u, v, _) in graph.graph.all_edges() {
-                let delta = positions[&u] - positions[&v];
-                let distance = delta.distance(&Point { x: 0, y: 0 });
-                if distance > 0.0 {
-                    let attractive_force =
-                        ((distance.powi(2)) as f64) / (self.optimal_distance as f64);
-                    let adjustment = delta * (attractive_force / distance * self.force_constant);
-                    displacements.get_mut(&u).unwrap().x -= adjustment.x;
-                    displacements.get_mut(&u).unwrap().y -= adjustment.y;
-                    displacements.get_mut(&v).unwrap().x += adjustment.x;
-                    displacements.get_mut(&v).unwrap().y += adjustment.y;
-                }
+    let spacing = repulsion.optimal_distance;
+    for (position, (x, y, count)) in positions.iter_mut().zip(neighbor_sums) {
+        if position.is_none() {
+            *position = Some(if count > 0 {
+                // Nodes placed at the same point would not repel each other.
+                (
+                    (x / count as f64 + (rand::random::<f64>() - 0.5) * spacing)
+                        .clamp(0.0, bounds.0),
+                    (y / count as f64 + (rand::random::<f64>() - 0.5) * spacing)
+                        .clamp(0.0, bounds.1),
+                )
+            } else {
+                random_positions(1, bounds)[0]
+            });
+        }
+    }
+
+    let positions = positions.into_iter().flatten().collect();
+    let mut simulation = ForceSimulation::new(
+        &graph.sizes,
+        &graph.edges,
+        positions,
+        repulsion,
+        theta,
+        bounds,
+    )
+    .with_fixed(fixed);
+    simulation.run(iterations, 4.0 * spacing);
+    graph
+        .points(&simulation.positions)
+        .into_iter()
+        .map(|(node, point)| (node, Point::new(point.x + origin.x, point.y + origin.y)))
+        .collect()
+}
+
+/// A force directed simulation, keeping its buffers between iterations.
+pub(crate) struct ForceSimulation<'a> {
+    sizes: &'a [(f64, f64)],
+    edges: &'a [(usize, usize)],
+    pub positions: Vec<(f64, f64)>,
+    displacements: Vec<(f64, f64)>,
+    tree: QuadTree,
+    repulsion: Repulsion,
+    theta: f64,
+    bounds: (f64, f64),
+    /// Nodes that keep their positions, by dense index. Empty if all nodes move.
+    fixed: Vec<bool>,
+}
+
+impl<'a> ForceSimulation<'a> {
+    pub fn new(
+        sizes: &'a [(f64, f64)],
+        edges: &'a [(usize, usize)],
+        positions: Vec<(f64, f64)>,
+        repulsion: Repulsion,
+        theta: f64,
+        bounds: (f64, f64),
+    ) -> Self {
+        ForceSimulation {
+            sizes,
+            edges,
+            displacements: vec![(0.0, 0.0); positions.len()],
+            positions,
+            tree: QuadTree::new(),
+            repulsion,
+            theta,
+            bounds,
+            fixed: Vec::new(),
+        }
+    }
+
+    /// Keep the nodes marked in `fixed` at their positions, they still act on the other nodes.
+    pub fn with_fixed(mut self, fixed: Vec<bool>) -> Self {
+        self.fixed = fixed;
+        self
+    }
+
+    /// Run the simulation with a temperature cooling down from `temperature` over the iterations.
+    ///
+    /// The temperature limits the displacement of nodes in an iteration, so that the strong
+    /// attraction between distant nodes of large graphs does not fling nodes across the layout.
+    pub fn run(&mut self, iterations: i32, temperature: f64) {
+        for iteration in 0..iterations {
+            self.step(temperature * (1.0 - iteration as f64 / iterations as f64) + 1.0);
+        }
+    }
+
+    fn step(&mut self, temperature: f64) {
+        let positions = &mut self.positions;
+        let displacements = &mut self.displacements;
+
+        // Calculate repulsive forces
+        self.tree.build(positions, self.sizes);
+        for (node, displacement) in displacements.iter_mut().enumerate() {
+            if self.fixed.get(node) == Some(&true) {
+                continue;
             }
+            *displacement =
+                self.tree
+                    .repulsion(node, positions, self.sizes, self.theta, &self.repulsion);
+        }
 
-            // Update positions
-            for node in graph.graph.nodes() {
-                let displacement = displacements[&node];
-                positions.get_mut(&node).unwrap().x += displacement.x;
-                positions.get_mut(&node).unwrap().y += displacement.y;
+        // Calculate attractive forces
+        for &(u, v) in self.edges {
+            let delta = (
+                positions[u].0 - positions[v].0,
+                positions[u].1 - positions[v].1,
+            );
+            let distance = (delta.0 * delta.0 + delta.1 * delta.1).sqrt();
+            if distance > 0.0 {
+                let factor =
+                    distance / self.repulsion.optimal_distance * self.repulsion.force_constant;
+                displacements[u].0 -= delta.0 * factor;
+                displacements[u].1 -= delta.1 * factor;
+                displacements[v].0 += delta.0 * factor;
+                displacements[v].1 += delta.1 * factor;
+            }
+        }
 
-                // Keep nodes within bounds
-                positions.get_mut(&node).unwrap().x = positions[&node].x.clamp(0, self.width);
-                positions.get_mut(&node).unwrap().y = positions[&node].y.clamp(0, self.height);
+        // Update positions, keeping nodes within bounds
+        let (width, height) = self.bounds;
+        for (node, (position, displacement)) in
+            positions.iter_mut().zip(displacements.iter()).enumerate()
+        {
+            if self.fixed.get(node) == Some(&true) {
+                continue;
             }
+            let length = (displacement.0 * displacement.0 + displacement.1 * displacement.1).sqrt();
+            let factor = if length > temperature {
+                temperature / length
+            } else {
+                1.0
+            };
+            position.0 = (position.0 + displacement.0 * factor).clamp(0.0, width);
+            position.1 = (position.1 + displacement.1 * factor).clamp(0.0, height);
         }
+    }
+}
 
-        Ok(positions
-            .into_iter()
-            .filter_map(|(node, point)| {
-                let object = graph.object_map.get_index(node.index());
-                object.map(|object| (object.clone_ref(py), point))
-            })
-            .collect())
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn path(count: usize) -> DenseGraph {
+        DenseGraph {
+            nodes: (0..count).map(NodeIndex::new).collect(),
+            sizes: vec![(3.0, 1.0); count],
+            edges: (1..count).map(|i| (i - 1, i)).collect(),
+        }
+    }
+
+    fn repulsion() -> Repulsion {
+        Repulsion {
+            optimal_distance: 3.0,
+            force_constant: 0.005,
+        }
+    }
+
+    #[test]
+    fn test_warm_start_moves_only_new_nodes_and_neighbors() {
+        // The previous layout of all but the last node of a path, outside the layout area.
+        let graph = path(11);
+        let previous: HashMap<usize, Point> = (0..10)
+            .map(|i| (i, Point::new(-50 + 6 * i as i32, 200)))
+            .collect();
+        let positions: HashMap<usize, Point> =
+            warm_start(&graph, &previous, repulsion(), 0.8, (120.0, 40.0), 50)
+                .into_iter()
+                .collect();
+        assert_eq!(positions.len(), 11);
+        for node in 0..9 {
+            assert_eq!(positions[&node], previous[&node]);
+        }
+        let (new, neighbor) = (positions[&10], positions[&9]);
+        assert!((new.x - neighbor.x).abs() + (new.y - neighbor.y).abs() < 20);
+    }
+
+    #[test]
+    fn test_warm_start_without_new_nodes_keeps_layout() {
+        let graph = path(5);
+        let previous: HashMap<usize, Point> = (0..5)
+            .map(|i| (i, Point::new(3 * i as i32, -(i as i32))))
+            .collect();
+        let positions = warm_start(&graph, &previous, repulsion(), 0.8, (120.0, 40.0), 50);
+        assert_eq!(positions.len(), 5);
+        assert!(positions
+            .iter()
+            .all(|(node, point)| previous[node] == *point));
     }
 }
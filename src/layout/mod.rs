@@ -1,9 +1,75 @@
+mod components;
 pub mod force_directed;
+pub mod multilevel;
+mod network_simplex;
+mod quadtree;
 pub mod static_;
+pub mod stress;
 pub mod sugiyama;
+pub mod tree;
+use std::collections::HashMap;
+
+use petgraph::graph::NodeIndex;
+use petgraph::graphmap::DiGraphMap;
 use pyo3::prelude::*;
 
-use crate::{geometry::Point, graph::CoreGraph};
+use crate::{
+    geometry::{Point, Size},
+    graph::CoreGraph,
+};
+
+/// The structure of a graph and the sizes of its nodes without any Python objects.
+///
+/// Layout engines copy this out of a [CoreGraph] so that the layout itself can be computed while
+/// the GIL is released. Nodes keep the indices they have in the core graph.
+pub struct LayoutGraph {
+    pub graph: DiGraphMap<NodeIndex, ()>,
+    sizes: HashMap<NodeIndex, Size>,
+}
+
+impl LayoutGraph {
+    pub fn new(graph: DiGraphMap<NodeIndex, ()>, sizes: HashMap<NodeIndex, Size>) -> Self {
+        LayoutGraph { graph, sizes }
+    }
+
+    pub fn size_by_index(&self, index: NodeIndex) -> Option<&Size> {
+        self.sizes.get(&index)
+    }
+}
+
+/// Map the node indices of computed positions back to the node objects of the core graph.
+///
+/// Positions of indices without a node object, e.g. dummy nodes added by a layout, are dropped.
+pub(crate) fn positions_to_objects(
+    py: Python<'_>,
+    graph: &CoreGraph,
+    positions: impl IntoIterator<Item = (usize, Point)>,
+) -> Vec<(PyObject, Point)> {
+    positions
+        .into_iter()
+        .filter_map(|(node, point)| {
+            let object = graph.object_map.get_index(node);
+            object.map(|object| (object.clone_ref(py), point))
+        })
+        .collect()
+}
+
+/// Map the node objects of positions to the node indices of the core graph, the inverse of
+/// [positions_to_objects].
+///
+/// Positions of objects that are not nodes of the graph are dropped.
+pub(crate) fn objects_to_positions(
+    graph: &CoreGraph,
+    positions: &[(Bound<'_, PyAny>, Point)],
+) -> PyResult<HashMap<usize, Point>> {
+    let mut indexed = HashMap::with_capacity(positions.len());
+    for (object, point) in positions {
+        if let Some((index, _)) = graph.object_map.get_full(object)? {
+            indexed.insert(index, *point);
+        }
+    }
+    Ok(indexed)
+}
 
 #[pyclass(eq, eq_int)]
 #[derive(Clone, Copy, Eq, PartialEq, Hash, Debug)]
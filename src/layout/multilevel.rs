@@ -0,0 +1,381 @@
+use pyo3::prelude::*;
+
+use crate::{geometry::Point, graph::CoreGraph};
+
+use super::components::layout_components;
+use super::force_directed::{
+    layout_area, random_positions, warm_start, DenseGraph, ForceSimulation,
+};
+use super::quadtree::Repulsion;
+use super::{objects_to_positions, positions_to_objects, LayoutEngine, LayoutGraph};
+
+/// Graphs with at most this many nodes are not coarsened any further.
+const COARSEST_SIZE: usize = 32;
+
+/// Coarsening stops once a level keeps more than this fraction of the nodes of the finer level.
+const MIN_REDUCTION: f64 = 0.8;
+
+#[pyclass(extends=LayoutEngine, subclass)]
+pub struct MultilevelForceLayout {
+    width: i32,
+    height: i32,
+    iterations: i32,
+    refinement_iterations: i32,
+    optimal_distance: i32,
+    force_constant: f64,
+    theta: f64,
+    pack_components: bool,
+}
+
+#[pymethods]
+impl MultilevelForceLayout {
+    #[new]
+    #[pyo3(signature = (theta = 0.8, pack_components = false))]
+    fn new(theta: f64, pack_components: bool) -> (Self, LayoutEngine) {
+        (
+            MultilevelForceLayout {
+                width: 120,
+                height: 40,
+                iterations: 50,
+                refinement_iterations: 20,
+                optimal_distance: 3,
+                force_constant: 0.005,
+                theta,
+                pack_components,
+            },
+            LayoutEngine {},
+        )
+    }
+
+    fn layout(&self, py: Python<'_>, graph: &CoreGraph) -> PyResult<Vec<(PyObject, Point)>> {
+        let layout_graph = graph.layout_graph();
+        let positions = py.allow_threads(|| {
+            if self.pack_components {
+                layout_components(&layout_graph, |component| self.compute_positions(component))
+            } else {
+                self.compute_positions(&layout_graph)
+            }
+        });
+        Ok(positions_to_objects(py, graph, positions))
+    }
+
+    /// Lay out the graph again, continuing from the `positions` of a previous layout of it.
+    ///
+    /// The previous layout already is a good initial layout, so no coarsening is needed: only
+    /// nodes without a previous position and their neighbors are refined on the finest level.
+    fn layout_incremental(
+        &self,
+        py: Python<'_>,
+        graph: &CoreGraph,
+        positions: Vec<(Bound<'_, PyAny>, Point)>,
+    ) -> PyResult<Vec<(PyObject, Point)>> {
+        let previous = objects_to_positions(graph, &positions)?;
+        let layout_graph = graph.layout_graph();
+        let positions = py.allow_threads(|| {
+            let graph = DenseGraph::new(&layout_graph);
+            let repulsion = Repulsion {
+                optimal_distance: self.optimal_distance as f64,
+                force_constant: self.force_constant,
+            };
+            let area = layout_area(
+                &graph.sizes,
+                repulsion.optimal_distance,
+                (self.width as f64, self.height as f64),
+            );
+            warm_start(
+                &graph,
+                &previous,
+                repulsion,
+                self.theta,
+                area,
+                self.refinement_iterations,
+            )
+        });
+        Ok(positions_to_objects(py, graph, positions))
+    }
+}
+
+impl MultilevelForceLayout {
+    fn compute_positions(&self, graph: &LayoutGraph) -> Vec<(usize, Point)> {
+        let graph = DenseGraph::new(graph);
+        let positions = self.layout_levels(&graph);
+        graph.points(&positions)
+    }
+
+    fn layout_levels(&self, graph: &DenseGraph) -> Vec<(f64, f64)> {
+        let spacing = self.optimal_distance as f64;
+        let bounds = layout_area(
+            &graph.sizes,
+            spacing,
+            (self.width as f64, self.height as f64),
+        );
+
+        let mut levels = vec![Level::new(graph, spacing)];
+        let mut parents: Vec<Vec<usize>> = Vec::new();
+        while let Some((level, parent)) = levels[levels.len() - 1].coarsen(spacing) {
+            levels.push(level);
+            parents.push(parent);
+        }
+
+        // Lay out the coarsest level from scratch and use each level as the initial layout of
+        // the next finer one, which then only needs to be refined locally.
+        let coarsest = &levels[levels.len() - 1];
+        let mut simulation = coarsest.simulation(
+            random_positions(coarsest.sizes.len(), bounds),
+            self.repulsion(coarsest),
+            self.theta,
+            bounds,
+        );
+        simulation.run(self.iterations, bounds.0.max(bounds.1) / 10.0);
+        let mut positions = simulation.positions;
+
+        for (level, parent) in levels.iter().zip(&parents).rev() {
+            let repulsion = self.repulsion(level);
+            let fine_positions = level.interpolate(&positions, parent, bounds);
+            let mut simulation = level.simulation(fine_positions, repulsion, self.theta, bounds);
+            simulation.run(self.refinement_iterations, 4.0 * repulsion.optimal_distance);
+            positions = simulation.positions;
+        }
+
+        positions
+    }
+
+    /// The repulsion of a level, whose edges are longer the more nodes are merged into a node.
+    fn repulsion(&self, level: &Level) -> Repulsion {
+        Repulsion {
+            optimal_distance: self.optimal_distance as f64 * level.mean_mass().sqrt(),
+            force_constant: self.force_constant,
+        }
+    }
+}
+
+/// A level of the coarsening hierarchy of a graph.
+///
+/// Each node of a coarse level stands for a cluster of nodes of the original graph. Its mass is
+/// the number of these nodes and its size is chosen such that it covers the area of the nodes.
+struct Level {
+    sizes: Vec<(f64, f64)>,
+    areas: Vec<f64>,
+    masses: Vec<f64>,
+    edges: Vec<(usize, usize)>,
+}
+
+impl Level {
+    fn new(graph: &DenseGraph, spacing: f64) -> Self {
+        Level {
+            sizes: graph.sizes.clone(),
+            areas: graph
+                .sizes
+                .iter()
+                .map(|(width, height)| (width + spacing) * (height + spacing))
+                .collect(),
+            masses: vec![1.0; graph.sizes.len()],
+            edges: graph.edges.clone(),
+        }
+    }
+
+    fn mean_mass(&self) -> f64 {
+        if self.masses.is_empty() {
+            return 1.0;
+        }
+        self.masses.iter().sum::<f64>() / self.masses.len() as f64
+    }
+
+    fn simulation(
+        &self,
+        positions: Vec<(f64, f64)>,
+        repulsion: Repulsion,
+        theta: f64,
+        bounds: (f64, f64),
+    ) -> ForceSimulation<'_> {
+        ForceSimulation::new(
+            &self.sizes,
+            &self.edges,
+            positions,
+            repulsion,
+            theta,
+            bounds,
+        )
+    }
+
+    /// Merge the nodes of this level into clusters, returning the coarser level and the cluster
+    /// of every node, or None if the level cannot be reduced substantially.
+    ///
+    /// Nodes are first matched with their lightest unmatched neighbor, nodes that remain unmatched
+    /// are then collapsed into the lightest cluster of a neighbor. Collapsing ensures that stars
+    /// and other graphs without large matchings still shrink quickly.
+    fn coarsen(&self, spacing: f64) -> Option<(Level, Vec<usize>)> {
+        let count = self.masses.len();
+        if count <= COARSEST_SIZE {
+            return None;
+        }
+
+        let mut neighbors: Vec<Vec<usize>> = vec![Vec::new(); count];
+        for &(u, v) in &self.edges {
+            if u != v {
+                neighbors[u].push(v);
+                neighbors[v].push(u);
+            }
+        }
+        let mut order: Vec<usize> = (0..count).collect();
+        order.sort_by_key(|node| neighbors[*node].len());
+
+        const UNASSIGNED: usize = usize::MAX;
+        let mut parent = vec![UNASSIGNED; count];
+        let mut masses: Vec<f64> = Vec::new();
+        for &node in &order {
+            if parent[node] != UNASSIGNED {
+                continue;
+            }
+            let partner = neighbors[node]
+                .iter()
+                .filter(|neighbor| parent[**neighbor] == UNASSIGNED && **neighbor != node)
+                .min_by(|a, b| self.masses[**a].total_cmp(&self.masses[**b]));
+            if let Some(&partner) = partner {
+                parent[node] = masses.len();
+                parent[partner] = masses.len();
+                masses.push(self.masses[node] + self.masses[partner]);
+            }
+        }
+        for &node in &order {
+            if parent[node] != UNASSIGNED {
+                continue;
+            }
+            let cluster = neighbors[node]
+                .iter()
+                .map(|neighbor| parent[*neighbor])
+                .filter(|cluster| *cluster != UNASSIGNED)
+                .min_by(|a, b| masses[*a].total_cmp(&masses[*b]));
+            parent[node] = match cluster {
+                Some(cluster) => {
+                    masses[cluster] += self.masses[node];
+                    cluster
+                }
+                None => {
+                    masses.push(self.masses[node]);
+                    masses.len() - 1
+                }
+            };
+        }
+
+        let coarse_count = masses.len();
+        if coarse_count as f64 > MIN_REDUCTION * count as f64 {
+            return None;
+        }
+
+        let mut areas = vec![0.0; coarse_count];
+        for (node, cluster) in parent.iter().enumerate() {
+            areas[*cluster] += self.areas[node];
+        }
+        let sizes = areas
+            .iter()
+            .map(|area| {
+                let side = (area.sqrt() - spacing).max(0.0);
+                (side, side)
+            })
+            .collect();
+        let mut edges: Vec<(usize, usize)> = self
+            .edges
+            .iter()
+            .map(|(u, v)| (parent[*u], parent[*v]))
+            .filter(|(u, v)| u != v)
+            .map(|(u, v)| (u.min(v), u.max(v)))
+            .collect();
+        edges.sort_unstable();
+        edges.dedup();
+
+        Some((
+            Level {
+                sizes,
+                areas,
+                masses,
+                edges,
+            },
+            parent,
+        ))
+    }
+
+    /// Initial positions of the nodes of this level from the positions of their clusters.
+    ///
+    /// Nodes are scattered around the position of their cluster within its size, so that nodes of
+    /// the same cluster do not coincide and repel each other during the refinement.
+    fn interpolate(
+        &self,
+        coarse_positions: &[(f64, f64)],
+        parent: &[usize],
+        (width, height): (f64, f64),
+    ) -> Vec<(f64, f64)> {
+        let mut extents = vec![0.0f64; coarse_positions.len()];
+        for (node, cluster) in parent.iter().enumerate() {
+            extents[*cluster] += self.areas[node];
+        }
+        parent
+            .iter()
+            .map(|cluster| {
+                let (x, y) = coarse_positions[*cluster];
+                let extent = extents[*cluster].sqrt();
+                (
+                    (x + (rand::random::<f64>() - 0.5) * extent).clamp(0.0, width),
+                    (y + (rand::random::<f64>() - 0.5) * extent).clamp(0.0, height),
+                )
+            })
+            .collect()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn level(count: usize, edges: Vec<(usize, usize)>) -> Level {
+        Level {
+            sizes: vec![(1.0, 1.0); count],
+            areas: vec![16.0; count],
+            masses: vec![1.0; count],
+            edges,
+        }
+    }
+
+    #[test]
+    fn test_matching_halves_a_path() {
+        let path = level(100, (1..100).map(|i| (i - 1, i)).collect());
+        let (coarse, parent) = path.coarsen(3.0).unwrap();
+        assert_eq!(coarse.masses.len(), 50);
+        assert_eq!(coarse.edges.len(), 49);
+        assert_eq!(coarse.masses.iter().sum::<f64>(), 100.0);
+        assert!(parent.iter().all(|cluster| *cluster < 50));
+    }
+
+    #[test]
+    fn test_stars_collapse() {
+        let star = level(100, (1..100).map(|i| (0, i)).collect());
+        let (coarse, _) = star.coarsen(3.0).unwrap();
+        assert_eq!(coarse.masses, vec![100.0]);
+        assert!(coarse.edges.is_empty());
+        assert_eq!(coarse.sizes, vec![(37.0, 37.0)]);
+    }
+
+    #[test]
+    fn test_isolated_nodes_stop_coarsening() {
+        let isolated = level(100, vec![(0, 1)]);
+        assert!(isolated.coarsen(3.0).is_none());
+        assert!(level(COARSEST_SIZE, vec![]).coarsen(3.0).is_none());
+    }
+
+    #[test]
+    fn test_layout_keeps_nodes_within_bounds() {
+        let path = level(1000, (1..1000).map(|i| (i - 1, i)).collect());
+        let graph = DenseGraph {
+            nodes: (0..1000).map(petgraph::graph::NodeIndex::new).collect(),
+            sizes: path.sizes.clone(),
+            edges: path.edges.clone(),
+        };
+        let (layout, _) = MultilevelForceLayout::new(0.8, false);
+        let bounds = layout_area(&graph.sizes, 3.0, (120.0, 40.0));
+        let positions = layout.layout_levels(&graph);
+        assert_eq!(positions.len(), 1000);
+        assert!(positions
+            .iter()
+            .all(|(x, y)| (0.0..=bounds.0).contains(x) && (0.0..=bounds.1).contains(y)));
+    }
+}
@@ -0,0 +1,489 @@
+//! Network simplex layering.
+//!
+//! Assigns integer ranks to the nodes of a connected DAG such that every edge points to a higher
+//! rank and the total span of all edges is minimal. Every span beyond the first layer becomes a
+//! dummy node in the Sugiyama layout, so this also minimizes the number of dummy nodes.
+//!
+//! The ranking is improved by pivoting on a spanning tree of tight edges (edges spanning exactly
+//! one layer): a tree edge with a negative cut value is replaced by the non-tree edge of minimal
+//! slack crossing the same cut, until no such tree edge is left.
+//!
+//! Pivots are updated incrementally as described in the paper: only the subtree cut off by the
+//! leaving edge is reranked, only the cut values on the tree path between the endpoints of the
+//! entering edge change, and only the subtree below the lowest common ancestor of these endpoints
+//! is renumbered.
+//!
+//! Reference: Gansner, Koutsofios, North & Vo, *"A Technique for Drawing Directed Graphs"*,
+//! IEEE Transactions on Software Engineering 19(3), 1993.
+
+use std::cmp::Reverse;
+use std::collections::BinaryHeap;
+
+/// Hard cap on pivots. Degenerate pivots can in rare cases cycle, the ranking is feasible after
+/// every pivot so stopping early only gives up on optimality.
+const MAX_PIVOTS_PER_EDGE: usize = 8;
+
+/// Rank the nodes `0..node_count` of a connected DAG, minimizing the total span of the edges.
+///
+/// `initial` has to be a feasible ranking, i.e. every edge `(u, v)` has to satisfy
+/// `initial[v] > initial[u]`, for example a longest path layering. The returned ranks start at 0.
+/// If the graph turns out to be disconnected, the feasible ranking found so far is returned.
+pub(crate) fn network_simplex_ranks(
+    node_count: usize,
+    edges: &[(usize, usize)],
+    initial: Vec<i64>,
+) -> Vec<i64> {
+    let mut simplex = NetworkSimplex::new(node_count, edges, initial);
+    if node_count > 0 && simplex.feasible_tree() {
+        simplex.optimize();
+    }
+    simplex.normalized_ranks()
+}
+
+struct NetworkSimplex<'a> {
+    edges: &'a [(usize, usize)],
+    incident: Vec<Vec<usize>>,
+    rank: Vec<i64>,
+    in_tree: Vec<bool>,
+    cut_value: Vec<i64>,
+    // Postorder numbering of the tree rooted at node 0: `lim` is the number of a node, `low` the
+    // lowest number in its subtree, so `x` lies in the subtree of `t` iff
+    // `low[t] <= lim[x] <= lim[t]`.
+    low: Vec<usize>,
+    lim: Vec<usize>,
+    parent_edge: Vec<Option<usize>>,
+    // The node numbered `lim` is `node_of_lim[lim - 1]`, so a subtree is a range of this vector.
+    node_of_lim: Vec<usize>,
+}
+
+impl<'a> NetworkSimplex<'a> {
+    fn new(node_count: usize, edges: &'a [(usize, usize)], rank: Vec<i64>) -> Self {
+        let mut incident = vec![Vec::new(); node_count];
+        for (edge, &(u, v)) in edges.iter().enumerate() {
+            incident[u].push(edge);
+            incident[v].push(edge);
+        }
+        NetworkSimplex {
+            edges,
+            incident,
+            rank,
+            in_tree: vec![false; edges.len()],
+            cut_value: vec![0; edges.len()],
+            low: vec![0; node_count],
+            lim: vec![0; node_count],
+            parent_edge: vec![None; node_count],
+            node_of_lim: vec![0; node_count],
+        }
+    }
+
+    fn slack(&self, edge: usize) -> i64 {
+        let (u, v) = self.edges[edge];
+        self.rank[v] - self.rank[u] - 1
+    }
+
+    fn other(&self, edge: usize, node: usize) -> usize {
+        let (u, v) = self.edges[edge];
+        if u == node {
+            v
+        } else {
+            u
+        }
+    }
+
+    /// Find a spanning tree of tight edges, shifting the ranks of the tree found so far towards
+    /// the closest node outside of it until it spans the graph.
+    fn feasible_tree(&mut self) -> bool {
+        let node_count = self.rank.len();
+        let mut in_tree = vec![false; node_count];
+        // The tree is shifted as a whole, so the ranks of its nodes are kept relative to `shift`,
+        // which is only applied once the tree is complete. Shifting the tree changes the slack of
+        // every edge leaving it by `-shift` and of every edge entering it by `shift`, so the edges
+        // crossing the cut are kept in two heaps by their slack without the shift.
+        let mut shift = 0;
+        let mut leaving: BinaryHeap<Reverse<(i64, usize)>> = BinaryHeap::new();
+        let mut entering: BinaryHeap<Reverse<(i64, usize)>> = BinaryHeap::new();
+        in_tree[0] = true;
+        let mut size = 1;
+        let mut stack = vec![0];
+
+        loop {
+            while let Some(node) = stack.pop() {
+                for &edge in &self.incident[node] {
+                    let other = self.other(edge, node);
+                    if in_tree[other] {
+                        continue;
+                    }
+                    let (u, _) = self.edges[edge];
+                    let slack = self.slack(edge);
+                    let true_slack = if u == node {
+                        slack - shift
+                    } else {
+                        slack + shift
+                    };
+                    if true_slack == 0 {
+                        in_tree[other] = true;
+                        self.rank[other] -= shift;
+                        self.in_tree[edge] = true;
+                        size += 1;
+                        stack.push(other);
+                    } else if u == node {
+                        leaving.push(Reverse((slack, edge)));
+                    } else {
+                        entering.push(Reverse((slack, edge)));
+                    }
+                }
+            }
+            if size == node_count {
+                break;
+            }
+
+            // Edges that were added to the tree by their other endpoint no longer cross the cut.
+            for heap in [&mut leaving, &mut entering] {
+                while let Some(Reverse((_, edge))) = heap.peek() {
+                    let (u, v) = self.edges[*edge];
+                    if in_tree[u] != in_tree[v] {
+                        break;
+                    }
+                    heap.pop();
+                }
+            }
+            // The outside endpoint of the closest edge, whose slack the tree is shifted by.
+            let closest_leaving = leaving
+                .peek()
+                .map(|Reverse((slack, edge))| (slack - shift, *edge, self.edges[*edge].1));
+            let closest_entering = entering
+                .peek()
+                .map(|Reverse((slack, edge))| (slack + shift, *edge, self.edges[*edge].0));
+            let Some((slack, edge, outside)) =
+                closest_leaving.into_iter().chain(closest_entering).min()
+            else {
+                break;
+            };
+            if Some(edge) == closest_leaving.map(|(_, edge, _)| edge) {
+                leaving.pop();
+                shift += slack;
+            } else {
+                entering.pop();
+                shift -= slack;
+            }
+            in_tree[outside] = true;
+            self.rank[outside] -= shift;
+            self.in_tree[edge] = true;
+            size += 1;
+            stack.push(outside);
+        }
+
+        for node in (0..node_count).filter(|node| in_tree[*node]) {
+            self.rank[node] += shift;
+        }
+        size == node_count
+    }
+
+    fn optimize(&mut self) {
+        self.number_subtree(0, 1);
+        self.compute_cut_values();
+
+        let mut start = 0;
+        for _ in 0..MAX_PIVOTS_PER_EDGE * self.edges.len() {
+            // Search for leaving edges cyclically, which keeps degenerate pivots from always
+            // picking the same edges.
+            let leaving = (start..self.edges.len())
+                .chain(0..start)
+                .find(|edge| self.in_tree[*edge] && self.cut_value[*edge] < 0);
+            let Some(leaving) = leaving else {
+                return;
+            };
+            start = leaving + 1;
+
+            let entering = self.entering_edge(leaving);
+            self.exchange(leaving, entering);
+        }
+    }
+
+    /// Whether `node` lies in the subtree of `root`.
+    fn in_subtree(&self, root: usize, node: usize) -> bool {
+        self.low[root] <= self.lim[node] && self.lim[node] <= self.lim[root]
+    }
+
+    /// The nodes of the subtree of `root`.
+    fn subtree(&self, root: usize) -> &[usize] {
+        &self.node_of_lim[self.low[root] - 1..self.lim[root]]
+    }
+
+    /// The lower endpoint of a tree edge, whose subtree is cut off by removing the edge.
+    fn lower_endpoint(&self, edge: usize) -> usize {
+        let (u, v) = self.edges[edge];
+        if self.lim[u] < self.lim[v] {
+            u
+        } else {
+            v
+        }
+    }
+
+    /// The edge of minimal slack that reconnects the two components the tree falls apart into when
+    /// `leaving` is removed, pointing in the opposite direction of `leaving`.
+    fn entering_edge(&self, leaving: usize) -> usize {
+        // Edges have to go from the component of the head of the leaving edge to the one of its
+        // tail, as those are the edges making its cut value negative. One of these components is
+        // the subtree below the leaving edge, so only the edges of its nodes have to be searched.
+        let subtree = self.lower_endpoint(leaving);
+        let tail_is_subtree = self.edges[leaving].0 == subtree;
+
+        self.subtree(subtree)
+            .iter()
+            .flat_map(|node| &self.incident[*node])
+            .copied()
+            .filter(|edge| {
+                let (a, b) = self.edges[*edge];
+                self.in_subtree(subtree, a) != tail_is_subtree
+                    && self.in_subtree(subtree, b) == tail_is_subtree
+            })
+            .min_by_key(|edge| (self.slack(*edge), *edge))
+            .expect("An edge with a negative cut value has edges crossing its cut backwards")
+    }
+
+    /// Replace the tree edge `leaving` by `entering`.
+    ///
+    /// The subtree cut off by `leaving` is shifted to make `entering` tight. The cut value of
+    /// `leaving` is moved onto the tree path between the endpoints of `entering`, which closes a
+    /// cycle with `leaving`, and the subtree below the top of that path is renumbered.
+    fn exchange(&mut self, leaving: usize, entering: usize) {
+        let subtree = self.lower_endpoint(leaving);
+        let (tail, head) = self.edges[entering];
+        let slack = self.slack(entering);
+        if slack != 0 {
+            let delta = if self.in_subtree(subtree, tail) {
+                slack
+            } else {
+                -slack
+            };
+            for index in self.low[subtree] - 1..self.lim[subtree] {
+                self.rank[self.node_of_lim[index]] += delta;
+            }
+        }
+
+        let cut_value = self.cut_value[leaving];
+        let lca = self.update_path_cut_values(tail, head, cut_value, true);
+        let other_lca = self.update_path_cut_values(head, tail, cut_value, false);
+        debug_assert_eq!(lca, other_lca);
+        self.cut_value[entering] = -cut_value;
+        self.cut_value[leaving] = 0;
+        self.in_tree[leaving] = false;
+        self.in_tree[entering] = true;
+
+        self.number_subtree(lca, self.low[lca]);
+    }
+
+    /// Add `cut_value` to the cut values of the tree edges from `node` up to the lowest common
+    /// ancestor of `node` and `other`, with the sign given by whether the edges point up
+    /// (`up_is_positive`), and return the ancestor.
+    fn update_path_cut_values(
+        &mut self,
+        mut node: usize,
+        other: usize,
+        cut_value: i64,
+        up_is_positive: bool,
+    ) -> usize {
+        while !self.in_subtree(node, other) {
+            let edge = self.parent_edge[node].expect("The root contains every node in its subtree");
+            let points_up = self.edges[edge].0 == node;
+            self.cut_value[edge] += if points_up == up_is_positive {
+                cut_value
+            } else {
+                -cut_value
+            };
+            node = self.other(edge, node);
+        }
+        node
+    }
+
+    /// Number the subtree of `root` in postorder starting from `first`, and set the parent edges
+    /// of the nodes below `root`.
+    fn number_subtree(&mut self, root: usize, first: usize) {
+        self.low[root] = first;
+        let mut next_lim = first;
+        let mut stack: Vec<(usize, usize)> = vec![(root, 0)];
+        while let Some(&(node, next_edge)) = stack.last() {
+            if let Some(&edge) = self.incident[node].get(next_edge) {
+                stack.last_mut().unwrap().1 += 1;
+                if self.in_tree[edge] && self.parent_edge[node] != Some(edge) {
+                    let child = self.other(edge, node);
+                    self.parent_edge[child] = Some(edge);
+                    self.low[child] = next_lim;
+                    stack.push((child, 0));
+                }
+            } else {
+                self.lim[node] = next_lim;
+                self.node_of_lim[next_lim - 1] = node;
+                next_lim += 1;
+                stack.pop();
+            }
+        }
+    }
+
+    /// Compute the cut values of all tree edges bottom up from the cut values of the tree edges
+    /// of the children of their lower endpoint.
+    ///
+    /// The cut value of a tree edge is the number of edges going from the component of its tail
+    /// to the component of its head, minus the number of edges going the other way.
+    fn compute_cut_values(&mut self) {
+        for index in 0..self.node_of_lim.len() {
+            let child = self.node_of_lim[index];
+            let Some(parent_edge) = self.parent_edge[child] else {
+                continue;
+            };
+            let child_is_tail = self.edges[parent_edge].0 == child;
+
+            let mut cut_value = 1;
+            for &edge in &self.incident[child] {
+                if edge == parent_edge {
+                    continue;
+                }
+                let points_to_head = (self.edges[edge].0 == child) == child_is_tail;
+                cut_value += if points_to_head { 1 } else { -1 };
+                if self.in_tree[edge] {
+                    cut_value += if points_to_head {
+                        -self.cut_value[edge]
+                    } else {
+                        self.cut_value[edge]
+                    };
+                }
+            }
+            self.cut_value[parent_edge] = cut_value;
+        }
+    }
+
+    fn normalized_ranks(self) -> Vec<i64> {
+        let min_rank = self.rank.iter().copied().min().unwrap_or(0);
+        self.rank.into_iter().map(|rank| rank - min_rank).collect()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn longest_path(node_count: usize, edges: &[(usize, usize)]) -> Vec<i64> {
+        // Edges of the test graphs always point to higher node ids.
+        let mut rank = vec![0; node_count];
+        for node in 0..node_count {
+            for &(u, v) in edges {
+                if v == node {
+                    rank[v] = rank[v].max(rank[u] + 1);
+                }
+            }
+        }
+        rank
+    }
+
+    fn total_span(rank: &[i64], edges: &[(usize, usize)]) -> i64 {
+        edges.iter().map(|(u, v)| rank[*v] - rank[*u]).sum()
+    }
+
+    fn assert_feasible(rank: &[i64], edges: &[(usize, usize)]) {
+        assert!(edges.iter().all(|(u, v)| rank[*v] > rank[*u]));
+        assert_eq!(rank.iter().min(), Some(&0));
+    }
+
+    #[test]
+    fn test_sources_move_next_to_their_targets() {
+        // A chain 0 -> 1 -> 2 -> 3 -> 4 and a second source 5 pointing at its end.
+        let edges = [(0, 1), (1, 2), (2, 3), (3, 4), (5, 4)];
+        let rank = network_simplex_ranks(6, &edges, longest_path(6, &edges));
+        assert_feasible(&rank, &edges);
+        assert_eq!(rank, vec![0, 1, 2, 3, 4, 3]);
+    }
+
+    /// Random connected DAGs whose edges point to higher node ids.
+    fn random_dags(count: usize, max_nodes: usize) -> Vec<(usize, Vec<(usize, usize)>)> {
+        let mut state: u64 = 7;
+        let mut random = |bound: usize| {
+            state = state
+                .wrapping_mul(6364136223846793005)
+                .wrapping_add(1442695040888963407);
+            (state >> 33) as usize % bound
+        };
+        (0..count)
+            .map(|_| {
+                let node_count = 2 + random(max_nodes - 1);
+                let mut edges: Vec<(usize, usize)> =
+                    (1..node_count).map(|v| (random(v), v)).collect();
+                for _ in 0..random(2 * node_count) {
+                    let (a, b) = (random(node_count), random(node_count));
+                    if a != b && !edges.contains(&(a.min(b), a.max(b))) {
+                        edges.push((a.min(b), a.max(b)));
+                    }
+                }
+                (node_count, edges)
+            })
+            .collect()
+    }
+
+    /// The minimal total span over all rankings with ranks below `node_count`.
+    fn brute_force_span(node_count: usize, edges: &[(usize, usize)]) -> i64 {
+        let mut rank = vec![0i64; node_count];
+        let mut best = i64::MAX;
+        loop {
+            if edges.iter().all(|(u, v)| rank[*v] > rank[*u]) {
+                best = best.min(total_span(&rank, edges));
+            }
+            let Some(position) = rank.iter().position(|r| *r + 1 < node_count as i64) else {
+                return best;
+            };
+            rank[..position].fill(0);
+            rank[position] += 1;
+        }
+    }
+
+    #[test]
+    fn test_optimal_on_small_graphs() {
+        for (node_count, edges) in random_dags(60, 6) {
+            let rank = network_simplex_ranks(node_count, &edges, longest_path(node_count, &edges));
+            assert_feasible(&rank, &edges);
+            assert_eq!(
+                total_span(&rank, &edges),
+                brute_force_span(node_count, &edges)
+            );
+        }
+    }
+
+    #[test]
+    fn test_pivots_match_recomputed_tree() {
+        for (node_count, edges) in random_dags(100, 30) {
+            let mut simplex =
+                NetworkSimplex::new(node_count, &edges, longest_path(node_count, &edges));
+            assert!(simplex.feasible_tree());
+            simplex.number_subtree(0, 1);
+            simplex.compute_cut_values();
+            while let Some(leaving) =
+                (0..edges.len()).find(|edge| simplex.in_tree[*edge] && simplex.cut_value[*edge] < 0)
+            {
+                let entering = simplex.entering_edge(leaving);
+                simplex.exchange(leaving, entering);
+
+                let (low, lim, cut_value) = (
+                    simplex.low.clone(),
+                    simplex.lim.clone(),
+                    simplex.cut_value.clone(),
+                );
+                simplex.number_subtree(0, 1);
+                simplex.compute_cut_values();
+                assert_eq!((low, lim), (simplex.low.clone(), simplex.lim.clone()));
+                for edge in (0..edges.len()).filter(|edge| simplex.in_tree[*edge]) {
+                    assert_eq!(cut_value[edge], simplex.cut_value[edge]);
+                    assert_eq!(simplex.slack(edge), 0);
+                }
+            }
+        }
+    }
+
+    #[test]
+    fn test_never_worse_than_longest_path() {
+        for (node_count, edges) in random_dags(200, 40) {
+            let initial = longest_path(node_count, &edges);
+            let rank = network_simplex_ranks(node_count, &edges, initial.clone());
+            assert_feasible(&rank, &edges);
+            assert!(total_span(&rank, &edges) <= total_span(&initial, &edges));
+        }
+    }
+}
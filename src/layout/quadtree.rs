@@ -0,0 +1,336 @@
+/// Cells holding at most this many bodies are not split any further.
+const LEAF_CAPACITY: usize = 4;
+
+/// Cells are not split beyond this depth, which bounds the tree when many bodies coincide.
+const MAX_DEPTH: u32 = 24;
+
+/// Parameters of the repulsive force between two bodies of a force directed layout.
+#[derive(Clone, Copy, Debug)]
+pub struct Repulsion {
+    pub optimal_distance: f64,
+    pub force_constant: f64,
+}
+
+impl Repulsion {
+    /// The repulsive displacement of a body at `delta` from another body.
+    ///
+    /// Bodies closer than `min_distance`, i.e. bodies that are likely to overlap, repel each other
+    /// without being damped by the force constant.
+    pub fn between(&self, delta: (f64, f64), min_distance: f64) -> (f64, f64) {
+        let distance_squared = delta.0 * delta.0 + delta.1 * delta.1;
+        if distance_squared == 0.0 {
+            return (0.0, 0.0);
+        }
+        let mut factor = self.optimal_distance * self.optimal_distance / distance_squared;
+        if distance_squared >= min_distance * min_distance {
+            factor *= self.force_constant;
+        }
+        (delta.0 * factor, delta.1 * factor)
+    }
+}
+
+/// The minimal distance between two bodies before they are considered to overlap.
+pub fn min_distance(size_u: (f64, f64), size_v: (f64, f64)) -> f64 {
+    (size_u.0 + size_v.0).max(size_u.1 + size_v.1)
+}
+
+#[derive(Clone, Copy, Debug)]
+struct Cell {
+    x: f64,
+    y: f64,
+    size: f64,
+    mass: f64,
+    center_x: f64,
+    center_y: f64,
+    max_width: f64,
+    max_height: f64,
+    /// Index of the first of the four child cells, or 0 for leaves.
+    children: u32,
+    /// Range of the bodies of the cell in the body order of the tree.
+    start: u32,
+    end: u32,
+}
+
+/// A Barnes–Hut quadtree approximating the repulsive forces between the bodies of a force
+/// directed layout.
+///
+/// Cells summarize the bodies they contain by their count, their center of mass and the size of
+/// their largest body. The storage of the tree is kept between builds, so a layout can rebuild
+/// the tree in every iteration without allocating.
+#[derive(Default)]
+pub struct QuadTree {
+    cells: Vec<Cell>,
+    bodies: Vec<u32>,
+    stack: Vec<u32>,
+}
+
+impl QuadTree {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Rebuild the tree over bodies at `positions` with the `(width, height)` given in `sizes`.
+    pub fn build(&mut self, positions: &[(f64, f64)], sizes: &[(f64, f64)]) {
+        self.cells.clear();
+        self.bodies.clear();
+        self.bodies.extend(0..positions.len() as u32);
+        if positions.is_empty() {
+            return;
+        }
+
+        let (mut min_x, mut min_y) = (f64::INFINITY, f64::INFINITY);
+        let (mut max_x, mut max_y) = (f64::NEG_INFINITY, f64::NEG_INFINITY);
+        for &(x, y) in positions {
+            min_x = min_x.min(x);
+            min_y = min_y.min(y);
+            max_x = max_x.max(x);
+            max_y = max_y.max(y);
+        }
+
+        self.cells.push(Cell {
+            x: min_x,
+            y: min_y,
+            size: (max_x - min_x).max(max_y - min_y),
+            mass: 0.0,
+            center_x: 0.0,
+            center_y: 0.0,
+            max_width: 0.0,
+            max_height: 0.0,
+            children: 0,
+            start: 0,
+            end: positions.len() as u32,
+        });
+        self.split(0, 0, positions, sizes);
+    }
+
+    fn split(&mut self, cell: usize, depth: u32, positions: &[(f64, f64)], sizes: &[(f64, f64)]) {
+        let Cell {
+            x,
+            y,
+            size,
+            start,
+            end,
+            ..
+        } = self.cells[cell];
+        let (start, end) = (start as usize, end as usize);
+
+        if end - start <= LEAF_CAPACITY || depth >= MAX_DEPTH {
+            let (mut mass, mut center_x, mut center_y) = (0.0, 0.0, 0.0);
+            let (mut max_width, mut max_height) = (0.0f64, 0.0f64);
+            for &body in &self.bodies[start..end] {
+                let body = body as usize;
+                mass += 1.0;
+                center_x += positions[body].0;
+                center_y += positions[body].1;
+                max_width = max_width.max(sizes[body].0);
+                max_height = max_height.max(sizes[body].1);
+            }
+            let cell = &mut self.cells[cell];
+            cell.mass = mass;
+            cell.center_x = center_x / mass;
+            cell.center_y = center_y / mass;
+            cell.max_width = max_width;
+            cell.max_height = max_height;
+            return;
+        }
+
+        let half = size / 2.0;
+        let (mid_x, mid_y) = (x + half, y + half);
+        let bodies = &mut self.bodies[start..end];
+        let top = partition(bodies, |body| positions[body as usize].1 < mid_y);
+        let top_left = partition(&mut bodies[..top], |body| {
+            positions[body as usize].0 < mid_x
+        });
+        let bottom_left = partition(&mut bodies[top..], |body| {
+            positions[body as usize].0 < mid_x
+        });
+        let bounds = [
+            start,
+            start + top_left,
+            start + top,
+            start + top + bottom_left,
+            end,
+        ];
+
+        let children = self.cells.len();
+        for quadrant in 0..4 {
+            self.cells.push(Cell {
+                x: if quadrant % 2 == 0 { x } else { mid_x },
+                y: if quadrant < 2 { y } else { mid_y },
+                size: half,
+                mass: 0.0,
+                center_x: 0.0,
+                center_y: 0.0,
+                max_width: 0.0,
+                max_height: 0.0,
+                children: 0,
+                start: bounds[quadrant] as u32,
+                end: bounds[quadrant + 1] as u32,
+            });
+        }
+        self.cells[cell].children = children as u32;
+
+        let (mut mass, mut center_x, mut center_y) = (0.0, 0.0, 0.0);
+        let (mut max_width, mut max_height) = (0.0f64, 0.0f64);
+        for child in children..children + 4 {
+            if self.cells[child].start == self.cells[child].end {
+                continue;
+            }
+            self.split(child, depth + 1, positions, sizes);
+            let child = &self.cells[child];
+            mass += child.mass;
+            center_x += child.center_x * child.mass;
+            center_y += child.center_y * child.mass;
+            max_width = max_width.max(child.max_width);
+            max_height = max_height.max(child.max_height);
+        }
+        let cell = &mut self.cells[cell];
+        cell.mass = mass;
+        cell.center_x = center_x / mass;
+        cell.center_y = center_y / mass;
+        cell.max_width = max_width;
+        cell.max_height = max_height;
+    }
+
+    /// The repulsive displacement of `body` by all other bodies of the tree.
+    ///
+    /// A cell is treated as a single body at its center of mass if its size is smaller than
+    /// `theta` times the distance to its center of mass and none of its bodies can be closer to
+    /// `body` than their minimal distance. With a `theta` of 0 all forces are computed exactly.
+    pub fn repulsion(
+        &mut self,
+        body: usize,
+        positions: &[(f64, f64)],
+        sizes: &[(f64, f64)],
+        theta: f64,
+        repulsion: &Repulsion,
+    ) -> (f64, f64) {
+        let (x, y) = positions[body];
+        let (width, height) = sizes[body];
+        let mut displacement = (0.0, 0.0);
+        if self.cells.is_empty() {
+            return displacement;
+        }
+
+        self.stack.clear();
+        self.stack.push(0);
+        while let Some(cell) = self.stack.pop() {
+            let cell = &self.cells[cell as usize];
+            let delta = (x - cell.center_x, y - cell.center_y);
+            let distance = (delta.0 * delta.0 + delta.1 * delta.1).sqrt();
+            let gap_x = (cell.x - x).max(x - (cell.x + cell.size)).max(0.0);
+            let gap_y = (cell.y - y).max(y - (cell.y + cell.size)).max(0.0);
+            let gap = (gap_x * gap_x + gap_y * gap_y).sqrt();
+
+            if gap > 0.0
+                && cell.size < theta * distance
+                && gap >= (width + cell.max_width).max(height + cell.max_height)
+            {
+                let force = repulsion.between(delta, 0.0);
+                displacement.0 += force.0 * cell.mass;
+                displacement.1 += force.1 * cell.mass;
+            } else if cell.children != 0 {
+                self.stack.extend(cell.children..cell.children + 4);
+            } else {
+                for &other in &self.bodies[cell.start as usize..cell.end as usize] {
+                    let other = other as usize;
+                    if other == body {
+                        continue;
+                    }
+                    let delta = (x - positions[other].0, y - positions[other].1);
+                    let force = repulsion.between(delta, min_distance(sizes[body], sizes[other]));
+                    displacement.0 += force.0;
+                    displacement.1 += force.1;
+                }
+            }
+        }
+        displacement
+    }
+}
+
+/// Move all elements matching `predicate` to the front of `slice` and return their count.
+fn partition(slice: &mut [u32], predicate: impl Fn(u32) -> bool) -> usize {
+    let mut matching = 0;
+    for index in 0..slice.len() {
+        if predicate(slice[index]) {
+            slice.swap(matching, index);
+            matching += 1;
+        }
+    }
+    matching
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const REPULSION: Repulsion = Repulsion {
+        optimal_distance: 3.0,
+        force_constant: 0.005,
+    };
+
+    fn bodies(count: usize) -> (Vec<(f64, f64)>, Vec<(f64, f64)>) {
+        // A deterministic scatter of bodies with varying sizes.
+        let positions = (0..count)
+            .map(|i| ((i * 37 % 113) as f64 * 1.7, (i * 53 % 71) as f64 * 0.9))
+            .collect();
+        let sizes = (0..count)
+            .map(|i| ((i % 5 + 1) as f64, (i % 3 + 1) as f64))
+            .collect();
+        (positions, sizes)
+    }
+
+    fn exact(body: usize, positions: &[(f64, f64)], sizes: &[(f64, f64)]) -> (f64, f64) {
+        let mut displacement = (0.0, 0.0);
+        for other in 0..positions.len() {
+            if other != body {
+                let delta = (
+                    positions[body].0 - positions[other].0,
+                    positions[body].1 - positions[other].1,
+                );
+                let force = REPULSION.between(delta, min_distance(sizes[body], sizes[other]));
+                displacement.0 += force.0;
+                displacement.1 += force.1;
+            }
+        }
+        displacement
+    }
+
+    #[test]
+    fn test_zero_theta_is_exact() {
+        let (positions, sizes) = bodies(300);
+        let mut tree = QuadTree::new();
+        tree.build(&positions, &sizes);
+        for body in 0..positions.len() {
+            let (x, y) = tree.repulsion(body, &positions, &sizes, 0.0, &REPULSION);
+            let (expected_x, expected_y) = exact(body, &positions, &sizes);
+            assert!((x - expected_x).abs() < 1e-9 && (y - expected_y).abs() < 1e-9);
+        }
+    }
+
+    #[test]
+    fn test_approximation_is_close() {
+        let (positions, sizes) = bodies(500);
+        let mut tree = QuadTree::new();
+        tree.build(&positions, &sizes);
+        for body in 0..positions.len() {
+            let (x, y) = tree.repulsion(body, &positions, &sizes, 0.5, &REPULSION);
+            let (expected_x, expected_y) = exact(body, &positions, &sizes);
+            let error = ((x - expected_x).powi(2) + (y - expected_y).powi(2)).sqrt();
+            let magnitude = (expected_x.powi(2) + expected_y.powi(2)).sqrt();
+            assert!(error <= 0.05 * magnitude + 1e-6);
+        }
+    }
+
+    #[test]
+    fn test_coincident_bodies() {
+        let positions = vec![(1.0, 1.0); 50];
+        let sizes = vec![(1.0, 1.0); 50];
+        let mut tree = QuadTree::new();
+        tree.build(&positions, &sizes);
+        assert_eq!(
+            tree.repulsion(0, &positions, &sizes, 0.8, &REPULSION),
+            (0.0, 0.0)
+        );
+    }
+}
@@ -0,0 +1,522 @@
+//! Stress layout of large general graphs.
+//!
+//! The layout tries to match the Euclidean distance of every pair of nodes to their graph
+//! theoretic distance. Instead of all pairs, only the distances to a small set of pivots are
+//! computed by breadth-first searches, which are used twice: Pivot-MDS projects the nodes into the
+//! plane to get an initial layout, which is then refined by a bounded number of majorization
+//! sweeps over the sparse stress model, where every node is only attracted to its neighbors and
+//! to the pivots.
+//!
+//! References:
+//!
+//! - Brandes & Pich, *"Eigensolver Methods for Progressive Multidimensional Scaling of Large
+//!   Data"*, Graph Drawing 2006.
+//! - Ortmann, Klimenta & Brandes, *"A Sparse Stress Model"*, Journal of Graph Algorithms and
+//!   Applications 21(5), 2017.
+
+use std::collections::VecDeque;
+
+use pyo3::prelude::*;
+
+use crate::{geometry::Point, graph::CoreGraph};
+
+use super::components::layout_components;
+use super::force_directed::DenseGraph;
+use super::{positions_to_objects, LayoutEngine, LayoutGraph};
+
+/// Iterations of the power iteration computing the eigenvectors for Pivot-MDS.
+const POWER_ITERATIONS: usize = 100;
+
+/// Majorization stops early once no node moves more than this fraction of the edge length.
+const TOLERANCE: f64 = 1e-3;
+
+#[pyclass(extends=LayoutEngine, subclass)]
+pub struct StressLayout {
+    pivots: usize,
+    iterations: usize,
+    optimal_distance: f64,
+    pack_components: bool,
+}
+
+#[pymethods]
+impl StressLayout {
+    #[new]
+    #[pyo3(signature = (pivots = 50, iterations = 30, pack_components = false))]
+    fn new(pivots: usize, iterations: usize, pack_components: bool) -> (Self, LayoutEngine) {
+        (
+            StressLayout {
+                pivots,
+                iterations,
+                optimal_distance: 3.0,
+                pack_components,
+            },
+            LayoutEngine {},
+        )
+    }
+
+    fn layout(&self, py: Python<'_>, graph: &CoreGraph) -> PyResult<Vec<(PyObject, Point)>> {
+        let layout_graph = graph.layout_graph();
+        let positions = py.allow_threads(|| {
+            if self.pack_components {
+                layout_components(&layout_graph, |component| self.compute_positions(component))
+            } else {
+                self.compute_positions(&layout_graph)
+            }
+        });
+        Ok(positions_to_objects(py, graph, positions))
+    }
+}
+
+impl StressLayout {
+    fn compute_positions(&self, graph: &LayoutGraph) -> Vec<(usize, Point)> {
+        let graph = DenseGraph::new(graph);
+        let mut positions = self.layout_dense(&graph);
+
+        // Translate the layout such that the minimum center coordinates are 0.
+        let min_x = positions
+            .iter()
+            .map(|(x, _)| *x)
+            .fold(f64::INFINITY, f64::min);
+        let min_y = positions
+            .iter()
+            .map(|(_, y)| *y)
+            .fold(f64::INFINITY, f64::min);
+        for (x, y) in positions.iter_mut() {
+            *x -= min_x;
+            *y -= min_y;
+        }
+        graph.points(&positions)
+    }
+
+    fn layout_dense(&self, graph: &DenseGraph) -> Vec<(f64, f64)> {
+        let count = graph.nodes.len();
+        if count == 0 {
+            return Vec::new();
+        }
+        let edge_length = self.edge_length(graph);
+        let neighbors = neighbors(count, &graph.edges);
+        let pivots = Pivots::new(&neighbors, self.pivots.clamp(1, count));
+
+        let mut positions = pivots.mds(edge_length);
+        let terms = pivots.term_weights();
+        for _ in 0..self.iterations {
+            let movement = majorize(&mut positions, &neighbors, &pivots, &terms, edge_length);
+            if movement < TOLERANCE * edge_length {
+                break;
+            }
+        }
+        positions
+    }
+
+    /// The desired length of an edge, the spacing plus the mean extent of the nodes.
+    fn edge_length(&self, graph: &DenseGraph) -> f64 {
+        let mean_extent = graph
+            .sizes
+            .iter()
+            .map(|(width, height)| (width + height) / 2.0)
+            .sum::<f64>()
+            / graph.sizes.len() as f64;
+        self.optimal_distance + mean_extent
+    }
+}
+
+/// The sorted, deduplicated undirected neighbors of every node, without self loops.
+fn neighbors(count: usize, edges: &[(usize, usize)]) -> Vec<Vec<usize>> {
+    let mut neighbors: Vec<Vec<usize>> = vec![Vec::new(); count];
+    for &(u, v) in edges {
+        if u != v {
+            neighbors[u].push(v);
+            neighbors[v].push(u);
+        }
+    }
+    for list in neighbors.iter_mut() {
+        list.sort_unstable();
+        list.dedup();
+    }
+    neighbors
+}
+
+/// Hop distances of all nodes from `source`, `u32::MAX` for unreachable nodes.
+fn breadth_first_distances(neighbors: &[Vec<usize>], source: usize) -> Vec<u32> {
+    let mut distances = vec![u32::MAX; neighbors.len()];
+    let mut queue = VecDeque::new();
+    distances[source] = 0;
+    queue.push_back(source);
+    while let Some(node) = queue.pop_front() {
+        for &neighbor in &neighbors[node] {
+            if distances[neighbor] == u32::MAX {
+                distances[neighbor] = distances[node] + 1;
+                queue.push_back(neighbor);
+            }
+        }
+    }
+    distances
+}
+
+/// Pivot nodes together with the hop distances of all nodes to them.
+struct Pivots {
+    nodes: Vec<usize>,
+    /// The distances of all nodes to each pivot, in the order of the pivots.
+    distances: Vec<Vec<u32>>,
+}
+
+impl Pivots {
+    /// Select `count` pivots by max-min sampling.
+    ///
+    /// The first pivot is the node with the highest degree, every following pivot is the node
+    /// farthest away from all pivots selected so far, ties going to the lowest index. Nodes that
+    /// no pivot reaches are the farthest, so every component gets a pivot before any component
+    /// gets a second one. Hops between components are counted as one more than the largest
+    /// distance within a component.
+    fn new(neighbors: &[Vec<usize>], count: usize) -> Self {
+        let node_count = neighbors.len();
+        let mut next = (0..node_count)
+            .max_by_key(|node| (neighbors[*node].len(), std::cmp::Reverse(*node)))
+            .unwrap_or(0);
+        let mut nodes = Vec::with_capacity(count);
+        let mut distances: Vec<Vec<u32>> = Vec::with_capacity(count);
+        let mut min_distances = vec![u32::MAX; node_count];
+        while nodes.len() < count {
+            let pivot_distances = breadth_first_distances(neighbors, next);
+            for (min_distance, distance) in min_distances.iter_mut().zip(&pivot_distances) {
+                *min_distance = (*min_distance).min(*distance);
+            }
+            nodes.push(next);
+            distances.push(pivot_distances);
+
+            let (farthest, distance) =
+                min_distances
+                    .iter()
+                    .enumerate()
+                    .fold((0, 0), |best, (node, distance)| {
+                        if *distance > best.1 {
+                            (node, *distance)
+                        } else {
+                            best
+                        }
+                    });
+            if distance == 0 {
+                break;
+            }
+            next = farthest;
+        }
+
+        let diameter = distances
+            .iter()
+            .flatten()
+            .filter(|distance| **distance != u32::MAX)
+            .max()
+            .copied()
+            .unwrap_or(0);
+        for distance in distances.iter_mut().flatten() {
+            if *distance == u32::MAX {
+                *distance = diameter + 1;
+            }
+        }
+        Pivots { nodes, distances }
+    }
+
+    /// Initial positions by Pivot-MDS.
+    ///
+    /// The squared distances to the pivots are double centered, and the nodes are projected onto
+    /// the two dominant eigenvectors of the resulting matrix multiplied with its transpose. The
+    /// projection is then scaled to best match the distances to the pivots.
+    fn mds(&self, edge_length: f64) -> Vec<(f64, f64)> {
+        let pivot_count = self.nodes.len();
+        let node_count = self.distances[0].len();
+        let squared: Vec<Vec<f64>> = self
+            .distances
+            .iter()
+            .map(|distances| {
+                distances
+                    .iter()
+                    .map(|distance| (*distance as f64).powi(2))
+                    .collect()
+            })
+            .collect();
+        let pivot_means: Vec<f64> = squared
+            .iter()
+            .map(|column| column.iter().sum::<f64>() / node_count as f64)
+            .collect();
+        let mut node_means = vec![0.0; node_count];
+        for column in &squared {
+            for (mean, value) in node_means.iter_mut().zip(column) {
+                *mean += value / pivot_count as f64;
+            }
+        }
+        let mean = pivot_means.iter().sum::<f64>() / pivot_count as f64;
+        let centered: Vec<Vec<f64>> = squared
+            .iter()
+            .zip(&pivot_means)
+            .map(|(column, pivot_mean)| {
+                column
+                    .iter()
+                    .zip(&node_means)
+                    .map(|(value, node_mean)| -0.5 * (value - node_mean - pivot_mean + mean))
+                    .collect()
+            })
+            .collect();
+
+        let product: Vec<Vec<f64>> = centered
+            .iter()
+            .map(|a| {
+                centered
+                    .iter()
+                    .map(|b| a.iter().zip(b).map(|(a, b)| a * b).sum())
+                    .collect()
+            })
+            .collect();
+        let first = dominant_eigenvector(&product, None);
+        let second = dominant_eigenvector(&product, Some(&first));
+
+        let mut positions = vec![(0.0, 0.0); node_count];
+        for (column, (x, y)) in centered.iter().zip(first.iter().zip(&second)) {
+            for (position, value) in positions.iter_mut().zip(column) {
+                position.0 += value * x;
+                position.1 += value * y;
+            }
+        }
+        self.scale_to_distances(&mut positions, edge_length);
+        positions
+    }
+
+    /// Scale positions by the factor minimizing the stress of the distances to the pivots.
+    fn scale_to_distances(&self, positions: &mut [(f64, f64)], edge_length: f64) {
+        let (mut numerator, mut denominator) = (0.0, 0.0);
+        for (pivot, distances) in self.nodes.iter().zip(&self.distances) {
+            let (pivot_x, pivot_y) = positions[*pivot];
+            for (&(x, y), &distance) in positions.iter().zip(distances) {
+                if distance == 0 {
+                    continue;
+                }
+                let target = distance as f64 * edge_length;
+                let actual = ((x - pivot_x).powi(2) + (y - pivot_y).powi(2)).sqrt();
+                numerator += actual / target;
+                denominator += (actual / target).powi(2);
+            }
+        }
+        let scale = if denominator > 0.0 {
+            numerator / denominator
+        } else {
+            1.0
+        };
+        for (x, y) in positions.iter_mut() {
+            *x *= scale;
+            *y *= scale;
+        }
+    }
+
+    /// The weights of the stress terms between every node and the pivots.
+    ///
+    /// As in the sparse stress model, a pivot stands in for the nodes of its region, the nodes
+    /// closer to it than to any other pivot. The term of a node at distance `d` is weighted by the
+    /// number of nodes of the region within `d / 2` of the pivot, divided by `d²`.
+    fn term_weights(&self) -> Vec<Vec<f64>> {
+        let node_count = self.distances[0].len();
+        let mut regions: Vec<Vec<u32>> = vec![Vec::new(); self.nodes.len()];
+        for node in 0..node_count {
+            let closest = (0..self.nodes.len())
+                .min_by_key(|pivot| self.distances[*pivot][node])
+                .unwrap();
+            regions[closest].push(self.distances[closest][node]);
+        }
+        for region in regions.iter_mut() {
+            region.sort_unstable();
+        }
+
+        self.distances
+            .iter()
+            .zip(&regions)
+            .map(|(distances, region)| {
+                distances
+                    .iter()
+                    .map(|&distance| {
+                        if distance == 0 {
+                            return 0.0;
+                        }
+                        let represented = region.partition_point(|d| 2 * d <= distance).max(1);
+                        represented as f64 / (distance as f64).powi(2)
+                    })
+                    .collect()
+            })
+            .collect()
+    }
+}
+
+/// The normalized dominant eigenvector of a symmetric matrix by power iteration, orthogonal to
+/// `orthogonal_to` if given. Returns a zero vector if the matrix has no such eigenvector.
+fn dominant_eigenvector(matrix: &[Vec<f64>], orthogonal_to: Option<&[f64]>) -> Vec<f64> {
+    let size = matrix.len();
+    let project = |vector: &mut Vec<f64>| {
+        if let Some(other) = orthogonal_to {
+            let dot: f64 = vector.iter().zip(other).map(|(a, b)| a * b).sum();
+            for (value, other) in vector.iter_mut().zip(other) {
+                *value -= dot * other;
+            }
+        }
+        let norm = vector.iter().map(|value| value * value).sum::<f64>().sqrt();
+        if norm > f64::EPSILON {
+            vector.iter_mut().for_each(|value| *value /= norm);
+            true
+        } else {
+            false
+        }
+    };
+
+    // A fixed start vector keeps the layout deterministic.
+    let mut vector: Vec<f64> = (0..size).map(|index| 1.0 + index as f64).collect();
+    if !project(&mut vector) {
+        return vec![0.0; size];
+    }
+    for _ in 0..POWER_ITERATIONS {
+        let mut next: Vec<f64> = matrix
+            .iter()
+            .map(|row| row.iter().zip(&vector).map(|(a, b)| a * b).sum())
+            .collect();
+        if !project(&mut next) {
+            return vec![0.0; size];
+        }
+        vector = next;
+    }
+    vector
+}
+
+/// One sweep of localized stress majorization over all nodes, returning the largest movement.
+///
+/// Every node is moved to the weighted mean of the positions its terms would like it to have,
+/// using the already updated positions of nodes earlier in the sweep.
+fn majorize(
+    positions: &mut [(f64, f64)],
+    neighbors: &[Vec<usize>],
+    pivots: &Pivots,
+    terms: &[Vec<f64>],
+    edge_length: f64,
+) -> f64 {
+    let mut max_movement: f64 = 0.0;
+    for node in 0..positions.len() {
+        let (x, y) = positions[node];
+        let (mut sum_x, mut sum_y, mut sum_weight) = (0.0, 0.0, 0.0);
+        let mut add_term = |(other_x, other_y): (f64, f64), distance: f64, weight: f64| {
+            let (dx, dy) = (x - other_x, y - other_y);
+            let actual = (dx * dx + dy * dy).sqrt();
+            let (ux, uy) = if actual > 0.0 {
+                (dx / actual, dy / actual)
+            } else {
+                (0.0, 0.0)
+            };
+            sum_x += weight * (other_x + distance * ux);
+            sum_y += weight * (other_y + distance * uy);
+            sum_weight += weight;
+        };
+
+        let neighbor_weight = 1.0 / (edge_length * edge_length);
+        for &neighbor in &neighbors[node] {
+            add_term(positions[neighbor], edge_length, neighbor_weight);
+        }
+        for ((&pivot, distances), weights) in pivots.nodes.iter().zip(&pivots.distances).zip(terms)
+        {
+            if distances[node] > 1 {
+                let distance = distances[node] as f64 * edge_length;
+                add_term(
+                    positions[pivot],
+                    distance,
+                    weights[node] / (edge_length * edge_length),
+                );
+            }
+        }
+
+        if sum_weight > 0.0 {
+            let next = (sum_x / sum_weight, sum_y / sum_weight);
+            max_movement = max_movement.max(((next.0 - x).powi(2) + (next.1 - y).powi(2)).sqrt());
+            positions[node] = next;
+        }
+    }
+    max_movement
+}
+
+#[cfg(test)]
+mod tests {
+    use petgraph::graph::NodeIndex;
+
+    use super::*;
+
+    fn graph(count: usize, edges: Vec<(usize, usize)>) -> DenseGraph {
+        DenseGraph {
+            nodes: (0..count).map(NodeIndex::new).collect(),
+            sizes: vec![(1.0, 1.0); count],
+            edges,
+        }
+    }
+
+    fn grid(side: usize) -> DenseGraph {
+        let mut edges = Vec::new();
+        for row in 0..side {
+            for column in 0..side {
+                let node = row * side + column;
+                if column + 1 < side {
+                    edges.push((node, node + 1));
+                }
+                if row + 1 < side {
+                    edges.push((node, node + side));
+                }
+            }
+        }
+        graph(side * side, edges)
+    }
+
+    fn distance((x1, y1): (f64, f64), (x2, y2): (f64, f64)) -> f64 {
+        ((x1 - x2).powi(2) + (y1 - y2).powi(2)).sqrt()
+    }
+
+    #[test]
+    fn test_pivots_are_spread_out() {
+        let path = (1..10).map(|i| (i - 1, i)).collect::<Vec<_>>();
+        let pivots = Pivots::new(&neighbors(10, &path), 3);
+        assert_eq!(pivots.nodes, vec![1, 9, 5]);
+        assert_eq!(pivots.distances[1][0], 9);
+    }
+
+    #[test]
+    fn test_components_are_kept_apart() {
+        let pivots = Pivots::new(&neighbors(5, &[(0, 1), (1, 2), (3, 4)]), 2);
+        assert_eq!(pivots.nodes, vec![1, 3]);
+        assert_eq!(pivots.distances[0], vec![1, 0, 1, 2, 2]);
+    }
+
+    #[test]
+    fn test_grid_is_unfolded() {
+        let (layout, _) = StressLayout::new(20, 30, false);
+        let grid = grid(15);
+        let positions = layout.layout_dense(&grid);
+        let edge_length = layout.edge_length(&grid);
+        // Hop distances overestimate distances across a grid, which stretches the edges somewhat.
+        for &(u, v) in &grid.edges {
+            let length = distance(positions[u], positions[v]);
+            assert!((0.8 * edge_length..1.6 * edge_length).contains(&length));
+        }
+        for u in 0..positions.len() {
+            for v in 0..u {
+                assert!(distance(positions[u], positions[v]) > 0.8 * edge_length);
+            }
+        }
+    }
+
+    #[test]
+    fn test_layout_is_deterministic() {
+        let (layout, _) = StressLayout::new(10, 10, false);
+        let grid = grid(10);
+        assert_eq!(layout.layout_dense(&grid), layout.layout_dense(&grid));
+    }
+
+    #[test]
+    fn test_degenerate_graphs() {
+        let (layout, _) = StressLayout::new(50, 30, false);
+        assert!(layout.layout_dense(&graph(0, vec![])).is_empty());
+        assert_eq!(layout.layout_dense(&graph(1, vec![])).len(), 1);
+        let positions = layout.layout_dense(&graph(4, vec![(0, 0), (1, 2)]));
+        assert!(positions
+            .iter()
+            .all(|(x, y)| x.is_finite() && y.is_finite()));
+        assert!(distance(positions[1], positions[2]) > 0.0);
+    }
+}
@@ -4,9 +4,9 @@
 //!
 //!   1. **Cycle removal** (`remove_cycles`): reverse a feedback arc set so the
 //!      remaining graph is a DAG.
-//!   2. **Layering** (`layer_disconnected_components` → `longest_path_layering`):
-//!      assign each node an integer layer, processing each weakly-connected
-//!      component independently.
+//!   2. **Layering** (`layer_disconnected_components` → `longest_path_layering`
+//!      or `network_simplex_layering`): assign each node an integer layer,
+//!      processing each weakly-connected component independently.
 //!   3. **Dummy node insertion** (`insert_dummy_nodes`): replace every edge
 //!      that spans more than one layer with a chain through intermediate
 //!      layers. After this step every edge is between adjacent layers.
@@ -17,14 +17,28 @@
 //!      positions using the Brandes–Köpf algorithm — see the function
 //!      header for a detailed description.
 //!
-//! The final coordinates are returned across the PyO3 boundary as
-//! `(PyObject, Point)` pairs. Dummy nodes are filtered out at this boundary
-//! since they have no Python representation.
+//! The pipeline runs on a `LayoutGraph` copied out of the `CoreGraph` with
+//! the GIL released. The final coordinates are returned across the PyO3
+//! boundary as `(PyObject, Point)` pairs. Dummy nodes are filtered out at
+//! this boundary since they have no Python representation.
+//!
+//! With `pack_components` the whole pipeline instead runs once per
+//! weakly-connected component, concurrently, and the component layouts are
+//! packed next to each other afterwards (see `components.rs`).
+//!
+//! `SugiyamaLayout::layout_incremental` instead warm-starts steps 2 and 4
+//! from the positions of a previous layout, so that relayouts after small
+//! edits keep the picture stable (see the "Warm start" section). With
+//! `warm_start` the engine remembers the layering and order of each layout,
+//! dummy nodes included, and warm-starts the next `layout` from them.
 //!
 //! Reference: Brandes & Köpf, *"Fast and Simple Horizontal Coordinate
 //! Assignment"*, Graph Drawing 2001, LNCS 2265.
 
 use std::collections::{HashMap, HashSet};
+use std::convert::Infallible;
+use std::sync::Mutex;
+use std::thread;
 
 use petgraph::algo::greedy_feedback_arc_set;
 use petgraph::graph::NodeIndex;
@@ -33,32 +47,91 @@ use petgraph::unionfind::UnionFind;
 use petgraph::visit::IntoEdgeReferences;
 use petgraph::visit::{NodeIndexable, Topo};
 use pyo3::prelude::*;
+use rand::rngs::StdRng;
+use rand::seq::SliceRandom;
+use rand::SeedableRng;
 
 use crate::geometry::Size;
 use crate::{geometry::Point, graph::CoreGraph};
 
-use super::{LayoutDirection, LayoutEngine};
+use super::components::layout_components_with;
+use super::network_simplex::network_simplex_ranks;
+use super::{
+    objects_to_positions, positions_to_objects, LayoutDirection, LayoutEngine, LayoutGraph,
+};
 
 /// Hard cap on barycenter sweep iterations. The algorithm stops earlier if
 /// a full down+up pair leaves every layer's permutation unchanged.
 const MAX_BARYCENTER_SWEEPS: usize = 24;
 
+/// Barycenter sweeps from a warm start stop after this many sweeps (one
+/// down+up pair) without finding fewer crossings. The previous order is
+/// usually a local optimum already, which further sweeps only wander from.
+const WARM_START_PATIENCE: usize = 2;
+
+/// Below this many nodes (including dummies) the four Brandes–Köpf passes
+/// are cheaper to run one after another than to spawn threads for.
+const PARALLEL_BRANDES_KOEPF_MIN_NODES: usize = 256;
+
 /// Dummy nodes have no real size — they're just bend points for long edges.
 /// We give them a 1×1 box so the spacing math (which assumes positive width)
 /// stays well-defined.
 const DUMMY_WIDTH: i32 = 1;
 const DUMMY_HEIGHT: i32 = 1;
 
+/// How `SugiyamaLayout` assigns nodes to layers.
+///
+/// `LongestPath` is linear time but lets edges from sources and to sinks
+/// span many layers. `NetworkSimplex` minimizes the total span of all edges
+/// and with it the number of dummy nodes, at the cost of a slower layering.
+#[pyclass(eq, eq_int)]
+#[derive(Clone, Copy, Eq, PartialEq, Hash, Debug)]
+pub enum LayeringMethod {
+    #[pyo3(name = "LONGEST_PATH")]
+    LongestPath = 0,
+    #[pyo3(name = "NETWORK_SIMPLEX")]
+    NetworkSimplex = 1,
+}
+
 #[pyclass(extends=LayoutEngine, subclass)]
 pub struct SugiyamaLayout {
     direction: LayoutDirection,
+    layering: LayeringMethod,
+    ordering_starts: usize,
+    pack_components: bool,
+    warm_start: bool,
+    /// The layering the next layout is warm-started from.
+    previous_layers: Mutex<Option<LayerOrder<PyObject>>>,
 }
 
 #[pymethods]
 impl SugiyamaLayout {
     #[new]
-    fn new(direction: LayoutDirection) -> (Self, LayoutEngine) {
-        (SugiyamaLayout { direction }, LayoutEngine {})
+    #[pyo3(signature = (
+        direction,
+        layering = LayeringMethod::LongestPath,
+        ordering_starts = 1,
+        pack_components = false,
+        warm_start = false
+    ))]
+    fn new(
+        direction: LayoutDirection,
+        layering: LayeringMethod,
+        ordering_starts: usize,
+        pack_components: bool,
+        warm_start: bool,
+    ) -> (Self, LayoutEngine) {
+        (
+            SugiyamaLayout {
+                direction,
+                layering,
+                ordering_starts: ordering_starts.max(1),
+                pack_components,
+                warm_start,
+                previous_layers: Mutex::new(None),
+            },
+            LayoutEngine {},
+        )
     }
 
     #[getter]
@@ -66,73 +139,144 @@ impl SugiyamaLayout {
         Some(self.direction)
     }
 
+    /// The layers of the layout the next layout is warm-started from, each
+    /// given by its nodes in order, or `None` to lay out from scratch.
+    ///
+    /// With `warm_start` every layout replaces them by its own layers.
+    /// Layers can also be set, e.g. to those of a layout of an earlier
+    /// session. Nodes no longer in the graph are ignored and nodes missing
+    /// from the layers are inserted next to their neighbors.
+    #[getter]
+    fn get_layers(&self, py: Python<'_>) -> Option<Vec<Vec<PyObject>>> {
+        let previous = self
+            .previous_layers
+            .lock()
+            .expect("Previous layers lock poisoned");
+        let mut layers: Vec<Vec<(i32, &PyObject)>> = Vec::new();
+        for (slot, layer, coordinate) in previous.as_ref()? {
+            if let LayerSlot::Node(node) = slot {
+                if layers.len() <= *layer {
+                    layers.resize_with(layer + 1, Vec::new);
+                }
+                layers[*layer].push((*coordinate, node));
+            }
+        }
+        Some(
+            layers
+                .into_iter()
+                .map(|mut layer| {
+                    layer.sort_by_key(|(coordinate, _)| *coordinate);
+                    layer
+                        .into_iter()
+                        .map(|(_, node)| node.clone_ref(py))
+                        .collect()
+                })
+                .collect(),
+        )
+    }
+
+    #[setter]
+    fn set_layers(&self, layers: Option<Vec<Vec<PyObject>>>) {
+        // Without a previous layout the position in a layer stands in for
+        // the coordinate along it.
+        let order = layers.map(|layers| {
+            layers
+                .into_iter()
+                .enumerate()
+                .flat_map(|(layer, nodes)| {
+                    nodes.into_iter().enumerate().map(move |(position, node)| {
+                        (LayerSlot::Node(node), layer, position as i32)
+                    })
+                })
+                .collect()
+        });
+        self.replace_previous_layers(order);
+    }
+
     /// Top-level entry point: drive the full Sugiyama pipeline and return
     /// `(PyObject, Point)` for every original node.
     ///
-    /// We work on a clone (`raw_graph`) so we can mutate it freely — reverse
-    /// edges in cycle removal, append dummy nodes for long edges — without
-    /// touching the caller's `CoreGraph`.
+    /// The pipeline only needs the structure of the graph and the node
+    /// sizes, so these are copied out of the `CoreGraph` first and the
+    /// layout is computed with the GIL released. Only the mapping back to
+    /// the node objects at the end needs the GIL again.
     ///
-    /// The internal layout is always computed in "top-down" coordinates
-    /// (layers stack along y, nodes in a layer spread along x). For
-    /// `LeftRight` layouts we swap x↔y once at the very end.
+    /// If previous layers are known, layering and ordering are warm-started
+    /// from them instead of computed from scratch (see `layers`).
     fn layout(&self, py: Python<'_>, graph: &CoreGraph) -> PyResult<Vec<(PyObject, Point)>> {
-        // Working copy: cycle removal reverses some edges, dummy insertion
-        // adds new nodes/edges. Neither change is visible to the caller.
-        let mut raw_graph = graph.graph.clone();
-        self.remove_cycles(&mut raw_graph, &graph.graph);
-
-        // After layering, `layer_map` maps each node id (== position in the
-        // graph's IndexMap) to its integer layer. Disconnected components
-        // are layered independently but share the same coordinate space.
-        let mut layer_map = self.layer_disconnected_components(&raw_graph);
-
-        // Replace edges spanning more than one layer with chains of dummy
-        // nodes (one per intermediate layer). Dummies participate in ordering
-        // and coordinate assignment so the long edge can be drawn through
-        // intermediate "anchor" points; without them the crossing-min and
-        // alignment passes are blind to long edges.
-        let dummy_ids = insert_dummy_nodes(&mut raw_graph, &mut layer_map);
-
-        // Group nodes into a `Vec<Vec<usize>>` (one inner vec per layer) so
-        // we can talk about positions-within-layer cleanly.
-        let layers = layers_from_layer_map(&layer_map);
-
-        // Reduce edge crossings with alternating barycenter sweeps.
-        let ordered_layers = self.barycenter_ordering(&raw_graph, layers);
-
-        // Compute final x/y coordinates with Brandes–Köpf.
-        let coordinates =
-            self.brandes_koepf_coordinates(&ordered_layers, &raw_graph, graph, &dummy_ids);
-
-        // For `LeftRight` layouts, reuse the top-down coordinate machinery
-        // and swap the axes here. `width_in_direction` / `height_in_direction`
-        // already account for the swap when measuring node sizes upstream.
-        let final_coordinates: HashMap<usize, Point> =
-            if self.direction == LayoutDirection::LeftRight {
-                coordinates
-                    .into_iter()
-                    .map(|(node, point)| (node, Point::new(point.y, point.x)))
-                    .collect()
-            } else {
-                coordinates
-            };
+        let previous = self.indexed_previous_layers(py, graph)?;
+        let layout_graph = graph.layout_graph();
+        let (coordinates, order) = py.allow_threads(|| {
+            if !self.pack_components {
+                let warm_start = previous.as_deref().map(WarmStart::Layers);
+                return self.compute_layout(&layout_graph, warm_start.as_ref());
+            }
+            let (coordinates, orders) =
+                layout_components_with(&layout_graph, |component, nodes| {
+                    let Some(nodes) = nodes else {
+                        let warm_start = previous.as_deref().map(WarmStart::Layers);
+                        return self.compute_layout(component, warm_start.as_ref());
+                    };
+                    // Warm-start every component from the layers of its own
+                    // nodes, renumbered to their indices in the component.
+                    let local: HashMap<usize, usize> = nodes
+                        .iter()
+                        .enumerate()
+                        .map(|(local, node)| (node.index(), local))
+                        .collect();
+                    let previous: Option<LayerOrder<usize>> = previous.as_ref().map(|previous| {
+                        previous
+                            .iter()
+                            .filter_map(|(slot, layer, coordinate)| {
+                                let slot = slot.map_nodes(|node| local.get(node).copied())?;
+                                Some((slot, *layer, *coordinate))
+                            })
+                            .collect()
+                    });
+                    let warm_start = previous.as_deref().map(WarmStart::Layers);
+                    let (coordinates, order) = self.compute_layout(component, warm_start.as_ref());
+                    let order = order
+                        .into_iter()
+                        .filter_map(|(slot, layer, coordinate)| {
+                            let slot = slot.map_nodes(|&node| Some(nodes[node].index()))?;
+                            Some((slot, layer, coordinate))
+                        })
+                        .collect();
+                    (coordinates, order)
+                });
+            (coordinates, orders.concat())
+        });
+        if self.warm_start {
+            self.remember_layers(py, graph, order);
+        }
+        Ok(positions_to_objects(py, graph, coordinates))
+    }
 
-        Ok(final_coordinates
-            .into_iter()
-            // Dummy nodes have indices past the original CoreGraph's node
-            // range. They have no associated PyObject — drop them here so
-            // they never leak across the FFI boundary.
-            .filter(|(node, _)| !dummy_ids.contains(node))
-            .filter_map(|(node, point)| {
-                // Real nodes have ID == position in the original
-                // object_map (CoreGraph inserts node objects in order),
-                // so we can look up directly without going through
-                // petgraph's NodeIndexable indirection.
-                let object = graph.object_map.get_index(node);
-                object.map(|object| (object.clone_ref(py), point))
-            })
-            .collect())
+    /// Lay out the graph again, starting from the `positions` of a
+    /// previous layout of it.
+    ///
+    /// Instead of layering and ordering from scratch, the layers and the
+    /// order within them are recovered from the previous positions (see
+    /// `warm_start_layering` and `warm_start_order`). Nodes without a
+    /// previous position are inserted next to their neighbors, and the
+    /// barycenter sweeps start from the previous order, which they only
+    /// leave for an order with fewer crossings. Components are not packed
+    /// again, the previous positions already keep them apart.
+    fn layout_incremental(
+        &self,
+        py: Python<'_>,
+        graph: &CoreGraph,
+        positions: Vec<(Bound<'_, PyAny>, Point)>,
+    ) -> PyResult<Vec<(PyObject, Point)>> {
+        let previous = objects_to_positions(graph, &positions)?;
+        let layout_graph = graph.layout_graph();
+        let (coordinates, order) = py.allow_threads(|| {
+            self.compute_layout(&layout_graph, Some(&WarmStart::Positions(&previous)))
+        });
+        if self.warm_start {
+            self.remember_layers(py, graph, order);
+        }
+        Ok(positions_to_objects(py, graph, coordinates))
     }
 }
 
@@ -412,6 +556,266 @@ fn reorder_by_barycenter(
     layers[layer_idx] = bc.into_iter().map(|(node, _, _)| node).collect();
 }
 
+/// Alternating barycenter sweeps starting from the given order, returning
+/// the best ordering seen together with its number of crossings.
+///
+/// Even sweeps go top→bottom (each layer ordered by its predecessors);
+/// odd sweeps go bottom→top (each layer ordered by its successors).
+/// Two passes per "round" lets information propagate in both
+/// directions, which matters on graphs where the ideal ordering of
+/// layer i depends on layers both above *and* below it.
+///
+/// We cap iterations at `MAX_BARYCENTER_SWEEPS` and stop early if a
+/// full round leaves the permutation unchanged, if the order has no
+/// crossings, or after `patience` sweeps without fewer crossings. We also
+/// remember the best-by-crossing-count permutation seen, since barycenter
+/// is a heuristic and can occasionally regress on later sweeps.
+fn barycenter_sweeps(
+    graph: &DiGraphMap<NodeIndex, ()>,
+    layers: Vec<Vec<usize>>,
+    patience: usize,
+) -> (Vec<Vec<usize>>, usize) {
+    let mut current = layers;
+    let mut best = current.clone();
+    let mut best_crossings = total_crossings(&current, graph);
+    let mut since_best = 0;
+
+    for sweep in 0..MAX_BARYCENTER_SWEEPS {
+        if best_crossings == 0 || since_best >= patience {
+            break;
+        }
+        let before = current.clone();
+        if sweep % 2 == 0 {
+            // Down sweep: each layer ordered by predecessor barycenter.
+            for i in 1..current.len() {
+                reorder_by_barycenter(&mut current, i, false, graph);
+            }
+        } else {
+            // Up sweep: each layer ordered by successor barycenter.
+            for i in (0..current.len() - 1).rev() {
+                reorder_by_barycenter(&mut current, i, true, graph);
+            }
+        }
+        let cr = total_crossings(&current, graph);
+        if cr < best_crossings {
+            best_crossings = cr;
+            best = current.clone();
+            since_best = 0;
+        } else {
+            since_best += 1;
+        }
+        // No change this sweep → no more progress to be made.
+        if current == before {
+            break;
+        }
+    }
+
+    (best, best_crossings)
+}
+
+// ---------------------------------------------------------------------------
+// Warm start
+//
+// Relayouts after small edits of the graph should change as little as
+// possible. Instead of layering and ordering from scratch, both are
+// recovered from the positions of a previous layout: nodes sharing a
+// coordinate across the layers share a layer, and nodes are ordered within
+// a layer by their coordinate along it. A previous layering can also be
+// given directly, which includes the dummy nodes and so pins down the
+// routes of long edges as well.
+// ---------------------------------------------------------------------------
+
+/// A node of a layering: a node of the graph, or the dummy node `step`
+/// layers below the source of a long edge between two nodes.
+#[derive(Clone, Copy, PartialEq, Eq, Hash, Debug)]
+enum LayerSlot<N> {
+    Node(N),
+    Dummy(N, N, usize),
+}
+
+impl<N> LayerSlot<N> {
+    /// Map the nodes of the slot with `f`, or return `None` if `f` does not
+    /// map all of them.
+    fn try_map_nodes<M, E>(
+        &self,
+        mut f: impl FnMut(&N) -> Result<Option<M>, E>,
+    ) -> Result<Option<LayerSlot<M>>, E> {
+        Ok(match self {
+            LayerSlot::Node(node) => f(node)?.map(LayerSlot::Node),
+            LayerSlot::Dummy(source, target, step) => match (f(source)?, f(target)?) {
+                (Some(source), Some(target)) => Some(LayerSlot::Dummy(source, target, *step)),
+                _ => None,
+            },
+        })
+    }
+
+    fn map_nodes<M>(&self, mut f: impl FnMut(&N) -> Option<M>) -> Option<LayerSlot<M>> {
+        match self.try_map_nodes(|node| Ok::<_, Infallible>(f(node))) {
+            Ok(slot) => slot,
+            Err(never) => match never {},
+        }
+    }
+}
+
+/// The layering of a layout: every node with its layer and its coordinate
+/// along the layer, dummy nodes included.
+type LayerOrder<N> = Vec<(LayerSlot<N>, usize, i32)>;
+
+/// What a layout is warm-started from.
+enum WarmStart<'a> {
+    /// The positions of the nodes in a previous layout, by node index.
+    Positions(&'a HashMap<usize, Point>),
+    /// The layering of a previous layout.
+    Layers(&'a [(LayerSlot<usize>, usize, i32)]),
+}
+
+/// Identify every dummy node by its long edge and its step along the
+/// edge's chain, so that dummy nodes can be matched between layouts.
+fn dummy_slots(
+    graph: &DiGraphMap<NodeIndex, ()>,
+    dummy_ids: &HashSet<usize>,
+) -> HashMap<usize, LayerSlot<usize>> {
+    let mut slots = HashMap::with_capacity(dummy_ids.len());
+    for source in graph.nodes() {
+        if dummy_ids.contains(&source.index()) {
+            continue;
+        }
+        for first in graph.neighbors_directed(source, petgraph::Outgoing) {
+            let mut chain = Vec::new();
+            let mut node = first;
+            while dummy_ids.contains(&node.index()) {
+                chain.push(node.index());
+                node = graph
+                    .neighbors_directed(node, petgraph::Outgoing)
+                    .next()
+                    .expect("Dummy chains end in a node");
+            }
+            for (step, dummy) in chain.into_iter().enumerate() {
+                slots.insert(
+                    dummy,
+                    LayerSlot::Dummy(source.index(), node.index(), step + 1),
+                );
+            }
+        }
+    }
+    slots
+}
+
+/// Recover a layering from the coordinates of nodes across the layers in a
+/// previous layout.
+///
+/// Nodes without a previous coordinate go right below their lowest
+/// predecessor, or else right above their highest successor. Walking the
+/// acyclic `graph` in topological order, nodes are pushed down below their
+/// predecessors wherever the previous layers (or reversed edges) would let
+/// an edge point upwards. Layers are renumbered to start at 0.
+fn warm_start_layering(
+    graph: &DiGraphMap<NodeIndex, ()>,
+    across: &HashMap<usize, i32>,
+) -> HashMap<usize, usize> {
+    let mut coordinates: Vec<i32> = graph
+        .nodes()
+        .filter_map(|node| across.get(&node.index()).copied())
+        .collect();
+    coordinates.sort_unstable();
+    coordinates.dedup();
+    let previous_layer = |node: NodeIndex| {
+        across
+            .get(&node.index())
+            .and_then(|coordinate| coordinates.binary_search(coordinate).ok())
+            .map(|layer| layer as i64)
+    };
+
+    let mut layers: HashMap<usize, i64> = HashMap::with_capacity(graph.node_count());
+    let mut topo = Topo::new(graph);
+    while let Some(node) = topo.next(graph) {
+        let below_predecessors = graph
+            .neighbors_directed(node, petgraph::Incoming)
+            .filter_map(|predecessor| layers.get(&predecessor.index()))
+            .map(|layer| layer + 1)
+            .max();
+        let layer = match (previous_layer(node), below_predecessors) {
+            (Some(layer), Some(lowest)) => layer.max(lowest),
+            (Some(layer), None) => layer,
+            (None, Some(lowest)) => lowest,
+            (None, None) => graph
+                .neighbors_directed(node, petgraph::Outgoing)
+                .filter_map(previous_layer)
+                .min()
+                .map_or(0, |layer| layer - 1),
+        };
+        layers.insert(node.index(), layer);
+    }
+
+    let top = layers.values().copied().min().unwrap_or(0);
+    layers
+        .into_iter()
+        .map(|(node, layer)| (node, (layer - top) as usize))
+        .collect()
+}
+
+/// Order the nodes of each layer by their coordinate along the layers in a
+/// previous layout.
+///
+/// Nodes without a previous coordinate, including all dummy nodes, are
+/// keyed by the mean key of their neighbors in the adjacent layers, filled
+/// in by a down sweep followed by an up sweep. Nodes that remain without a
+/// key go to the end of their layer, in their given order.
+fn warm_start_order(
+    layers: Vec<Vec<usize>>,
+    graph: &DiGraphMap<NodeIndex, ()>,
+    along: &HashMap<usize, i32>,
+) -> Vec<Vec<usize>> {
+    let mut keys: HashMap<usize, f32> = layers
+        .iter()
+        .flatten()
+        .filter_map(|node| {
+            along
+                .get(node)
+                .map(|&coordinate| (*node, coordinate as f32))
+        })
+        .collect();
+
+    let sweeps = [
+        (0..layers.len()).collect::<Vec<_>>(),
+        (0..layers.len()).rev().collect(),
+    ];
+    for sweep in sweeps {
+        for layer in sweep {
+            for &node in &layers[layer] {
+                if keys.contains_key(&node) {
+                    continue;
+                }
+                let neighbor_keys: Vec<f32> = graph
+                    .neighbors_directed(NodeIndex::new(node), petgraph::Incoming)
+                    .chain(graph.neighbors_directed(NodeIndex::new(node), petgraph::Outgoing))
+                    .filter_map(|neighbor| keys.get(&neighbor.index()).copied())
+                    .collect();
+                if !neighbor_keys.is_empty() {
+                    let key = neighbor_keys.iter().sum::<f32>() / neighbor_keys.len() as f32;
+                    keys.insert(node, key);
+                }
+            }
+        }
+    }
+
+    layers
+        .into_iter()
+        .map(|layer| {
+            let mut keyed: Vec<(f32, usize, usize)> = layer
+                .into_iter()
+                .enumerate()
+                .map(|(position, node)| {
+                    let key = keys.get(&node).copied().unwrap_or(f32::INFINITY);
+                    (key, position, node)
+                })
+                .collect();
+            keyed.sort_by(|a, b| a.0.total_cmp(&b.0).then(a.1.cmp(&b.1)));
+            keyed.into_iter().map(|(_, _, node)| node).collect()
+        })
+        .collect()
+}
+
 // ---------------------------------------------------------------------------
 // Brandes–Köpf coordinate assignment
 //
@@ -905,22 +1309,28 @@ fn brandes_koepf_with_dimensions(
     // Phases (b)+(c) for each of the four sweep directions.
     // Index convention: 0=down-left, 1=down-right, 2=up-left, 3=up-right.
     // `balance` relies on this layout.
-    let mut xs: [HashMap<usize, f32>; 4] = [
-        HashMap::new(),
-        HashMap::new(),
-        HashMap::new(),
-        HashMap::new(),
-    ];
+    // The four passes are independent, so on larger graphs each one runs on
+    // its own thread.
     let configs: [(bool, bool); 4] = [
         (true, false),  // down-left
         (true, true),   // down-right
         (false, false), // up-left
         (false, true),  // up-right
     ];
-    for (idx, &(vd, hr)) in configs.iter().enumerate() {
+    let pass = |(vd, hr): (bool, bool)| {
         let (root, align) = vertical_alignment(layers, graph, &marked, vd, hr, &pos_in_layer);
-        xs[idx] = horizontal_compaction(layers, &root, &align, &pos_in_layer, widths, hr);
-    }
+        horizontal_compaction(layers, &root, &align, &pos_in_layer, widths, hr)
+    };
+    let xs: [HashMap<usize, f32>; 4] = if pos_in_layer.len() < PARALLEL_BRANDES_KOEPF_MIN_NODES {
+        configs.map(pass)
+    } else {
+        let pass = &pass;
+        thread::scope(|scope| {
+            configs
+                .map(|config| scope.spawn(move || pass(config)))
+                .map(|handle| handle.join().expect("Brandes–Köpf thread panicked"))
+        })
+    };
 
     // Phase (d): align the four layouts and average median-of-four.
     let final_x = balance(&xs);
@@ -1028,7 +1438,219 @@ fn balance(xs: &[HashMap<usize, f32>; 4]) -> HashMap<usize, f32> {
 }
 
 impl SugiyamaLayout {
-    /// Bridge from the Sugiyama pipeline (which knows about `CoreGraph`
+    /// Run the full pipeline on a detached copy of the graph and return
+    /// the coordinates of every original node.
+    ///
+    /// We work on a clone (`raw_graph`) so we can mutate it freely — reverse
+    /// edges in cycle removal, append dummy nodes for long edges — without
+    /// touching the caller's graph.
+    ///
+    /// The internal layout is always computed in "top-down" coordinates
+    /// (layers stack along y, nodes in a layer spread along x). For
+    /// `LeftRight` layouts we swap x↔y once at the very end.
+    fn compute_coordinates(&self, graph: &LayoutGraph) -> Vec<(usize, Point)> {
+        self.compute_layout(graph, None).0
+    }
+
+    /// Run the pipeline, warm-started if `warm_start` is given, and return
+    /// the coordinates of every original node together with the layering.
+    fn compute_layout(
+        &self,
+        graph: &LayoutGraph,
+        warm_start: Option<&WarmStart>,
+    ) -> (Vec<(usize, Point)>, LayerOrder<usize>) {
+        // Working copy: cycle removal reverses some edges, dummy insertion
+        // adds new nodes/edges. Neither change is visible to the caller.
+        let mut raw_graph = graph.graph.clone();
+        self.remove_cycles(&mut raw_graph, &graph.graph);
+
+        // Split the warm start into the coordinates across the layers and
+        // along them, in the internal top-down frame. Layer indices serve as
+        // coordinates across the layers.
+        let previous = warm_start.map(|warm_start| match warm_start {
+            WarmStart::Positions(previous) => previous
+                .iter()
+                .map(|(&node, point)| {
+                    let (across, along) = match self.direction {
+                        LayoutDirection::TopDown => (point.y, point.x),
+                        LayoutDirection::LeftRight => (point.x, point.y),
+                    };
+                    ((node, across), (LayerSlot::Node(node), along))
+                })
+                .unzip(),
+            WarmStart::Layers(order) => {
+                let across: HashMap<usize, i32> = order
+                    .iter()
+                    .filter_map(|(slot, layer, _)| match slot {
+                        LayerSlot::Node(node) => Some((*node, *layer as i32)),
+                        LayerSlot::Dummy(..) => None,
+                    })
+                    .collect();
+                let along: HashMap<LayerSlot<usize>, i32> = order
+                    .iter()
+                    .map(|(slot, _, coordinate)| (*slot, *coordinate))
+                    .collect();
+                (across, along)
+            }
+        });
+
+        // After layering, `layer_map` maps each node id (== position in the
+        // graph's IndexMap) to its integer layer. Disconnected components
+        // are layered independently but share the same coordinate space.
+        let mut layer_map = match &previous {
+            Some((across, _)) => warm_start_layering(&raw_graph, across),
+            None => self.layer_disconnected_components(&raw_graph),
+        };
+
+        // Replace edges spanning more than one layer with chains of dummy
+        // nodes (one per intermediate layer). Dummies participate in ordering
+        // and coordinate assignment so the long edge can be drawn through
+        // intermediate "anchor" points; without them the crossing-min and
+        // alignment passes are blind to long edges.
+        let dummy_ids = insert_dummy_nodes(&mut raw_graph, &mut layer_map);
+        let dummy_slots = dummy_slots(&raw_graph, &dummy_ids);
+        let slot = |node: usize| {
+            dummy_slots
+                .get(&node)
+                .copied()
+                .unwrap_or(LayerSlot::Node(node))
+        };
+
+        // Group nodes into a `Vec<Vec<usize>>` (one inner vec per layer) so
+        // we can talk about positions-within-layer cleanly.
+        let layers = layers_from_layer_map(&layer_map);
+
+        // Reduce edge crossings with alternating barycenter sweeps. A warm
+        // start sweeps from the previous order only, and gives up as soon as
+        // the sweeps stop improving on it: random restarts would reshuffle
+        // layers whose order was fine before.
+        let ordered_layers = match &previous {
+            Some((_, along)) => {
+                let along: HashMap<usize, i32> = layer_map
+                    .keys()
+                    .filter_map(|&node| Some((node, *along.get(&slot(node))?)))
+                    .collect();
+                let ordered = warm_start_order(layers, &raw_graph, &along);
+                if ordered.len() > 1 {
+                    barycenter_sweeps(&raw_graph, ordered, WARM_START_PATIENCE).0
+                } else {
+                    ordered
+                }
+            }
+            None => self.barycenter_ordering(&raw_graph, layers),
+        };
+
+        // Compute final x/y coordinates with Brandes–Köpf.
+        let coordinates =
+            self.brandes_koepf_coordinates(&ordered_layers, &raw_graph, graph, &dummy_ids);
+
+        // Remember the coordinates along the layers, made strictly increasing
+        // within each layer: nodes can share a coordinate, and the order
+        // between them must not be lost.
+        let mut order = Vec::with_capacity(coordinates.len());
+        for (layer, nodes) in ordered_layers.iter().enumerate() {
+            let mut last = i32::MIN;
+            for &node in nodes {
+                let coordinate = coordinates[&node].x.max(last.saturating_add(1));
+                order.push((slot(node), layer, coordinate));
+                last = coordinate;
+            }
+        }
+        let coordinates = coordinates
+            .into_iter()
+            // Dummy nodes have indices past the original graph's node
+            // range. They have no associated PyObject — drop them here so
+            // they never leak across the FFI boundary.
+            .filter(|(node, _)| !dummy_ids.contains(node))
+            // For `LeftRight` layouts, reuse the top-down coordinate machinery
+            // and swap the axes here. `width_in_direction` / `height_in_direction`
+            // already account for the swap when measuring node sizes upstream.
+            .map(|(node, point)| {
+                if self.direction == LayoutDirection::LeftRight {
+                    (node, Point::new(point.y, point.x))
+                } else {
+                    (node, point)
+                }
+            })
+            .collect();
+        (coordinates, order)
+    }
+
+    /// The layers the next layout is warm-started from, with the nodes
+    /// mapped to their indices in `graph`. Nodes that are not in the graph
+    /// are dropped.
+    fn indexed_previous_layers(
+        &self,
+        py: Python<'_>,
+        graph: &CoreGraph,
+    ) -> PyResult<Option<LayerOrder<usize>>> {
+        // Hashing the nodes can run Python code, which must not happen
+        // while holding the lock.
+        let previous: Option<LayerOrder<PyObject>> = self
+            .previous_layers
+            .lock()
+            .expect("Previous layers lock poisoned")
+            .as_ref()
+            .map(|previous| {
+                previous
+                    .iter()
+                    .filter_map(|(slot, layer, coordinate)| {
+                        let slot = slot.map_nodes(|node| Some(node.clone_ref(py)))?;
+                        Some((slot, *layer, *coordinate))
+                    })
+                    .collect()
+            });
+        let Some(previous) = previous else {
+            return Ok(None);
+        };
+        let mut indexed = Vec::with_capacity(previous.len());
+        for (slot, layer, coordinate) in previous {
+            let slot = slot.try_map_nodes(|node| {
+                Ok::<_, PyErr>(
+                    graph
+                        .object_map
+                        .get_full(node.bind(py))?
+                        .map(|(index, _)| index),
+                )
+            })?;
+            if let Some(slot) = slot {
+                indexed.push((slot, layer, coordinate));
+            }
+        }
+        Ok(Some(indexed))
+    }
+
+    /// Remember the layering `order` of a layout of `graph` to warm-start
+    /// the next layout from.
+    fn remember_layers(&self, py: Python<'_>, graph: &CoreGraph, order: LayerOrder<usize>) {
+        let order = order
+            .into_iter()
+            .filter_map(|(slot, layer, coordinate)| {
+                let slot = slot.map_nodes(|&node| {
+                    graph
+                        .object_map
+                        .get_index(node)
+                        .map(|object| object.clone_ref(py))
+                })?;
+                Some((slot, layer, coordinate))
+            })
+            .collect();
+        self.replace_previous_layers(Some(order));
+    }
+
+    fn replace_previous_layers(&self, layers: Option<LayerOrder<PyObject>>) {
+        // Dropping the replaced nodes can run Python code, so they are only
+        // dropped once the lock is released.
+        let _replaced = std::mem::replace(
+            &mut *self
+                .previous_layers
+                .lock()
+                .expect("Previous layers lock poisoned"),
+            layers,
+        );
+    }
+
+    /// Bridge from the Sugiyama pipeline (which knows about node sizes
     /// and `LayoutDirection`) into the dimension-agnostic
     /// `brandes_koepf_with_dimensions`.
     ///
@@ -1041,7 +1663,7 @@ impl SugiyamaLayout {
         &self,
         layers: &Vec<Vec<usize>>,
         graph: &DiGraphMap<NodeIndex, ()>,
-        core_graph: &CoreGraph,
+        layout_graph: &LayoutGraph,
         dummy_ids: &HashSet<usize>,
     ) -> HashMap<usize, Point> {
         let widths: HashMap<usize, i32> = layers
@@ -1051,7 +1673,7 @@ impl SugiyamaLayout {
                 let w = if dummy_ids.contains(&n) {
                     DUMMY_WIDTH
                 } else {
-                    let size = core_graph
+                    let size = layout_graph
                         .size_by_index(NodeIndex::new(n))
                         .cloned()
                         .unwrap_or(Size::new(0, 0));
@@ -1068,7 +1690,7 @@ impl SugiyamaLayout {
                 let h = if dummy_ids.contains(&n) {
                     DUMMY_HEIGHT
                 } else {
-                    let size = core_graph
+                    let size = layout_graph
                         .size_by_index(NodeIndex::new(n))
                         .cloned()
                         .unwrap_or(Size::new(0, 0));
@@ -1081,18 +1703,16 @@ impl SugiyamaLayout {
         brandes_koepf_with_dimensions(layers, graph, &widths, &heights, dummy_ids)
     }
 
-    /// Phase 4: alternating barycenter sweeps to reduce edge crossings.
+    /// Phase 4: alternating barycenter sweeps to reduce edge crossings,
+    /// see `barycenter_sweeps`.
     ///
-    /// Even sweeps go top→bottom (each layer ordered by its predecessors);
-    /// odd sweeps go bottom→top (each layer ordered by its successors).
-    /// Two passes per "round" lets information propagate in both
-    /// directions, which matters on graphs where the ideal ordering of
-    /// layer i depends on layers both above *and* below it.
-    ///
-    /// We cap iterations at `MAX_BARYCENTER_SWEEPS` and stop early if a
-    /// full round leaves the permutation unchanged. We also remember the
-    /// best-by-crossing-count permutation seen, since barycenter is a
-    /// heuristic and can occasionally regress on later sweeps.
+    /// With `ordering_starts > 1` the sweeps are also run from randomly
+    /// shuffled initial orders, spread over the available cores, and the
+    /// ordering with the fewest crossings wins. Barycenter sweeps get stuck
+    /// in local optima, which different starts escape. The first start
+    /// always uses the given order, so more starts never give more
+    /// crossings, and each shuffle is seeded by its start index, so the
+    /// result does not depend on the number of cores.
     fn barycenter_ordering(
         &self,
         graph: &DiGraphMap<NodeIndex, ()>,
@@ -1101,36 +1721,48 @@ impl SugiyamaLayout {
         if layers.len() < 2 {
             return layers;
         }
+        let starts = self.ordering_starts;
+        if starts <= 1 {
+            return barycenter_sweeps(graph, layers, MAX_BARYCENTER_SWEEPS).0;
+        }
 
-        let mut current = layers;
-        let mut best = current.clone();
-        let mut best_crossings = total_crossings(&current, graph);
-
-        for sweep in 0..MAX_BARYCENTER_SWEEPS {
-            let before = current.clone();
-            if sweep % 2 == 0 {
-                // Down sweep: each layer ordered by predecessor barycenter.
-                for i in 1..current.len() {
-                    reorder_by_barycenter(&mut current, i, false, graph);
-                }
-            } else {
-                // Up sweep: each layer ordered by successor barycenter.
-                for i in (0..current.len() - 1).rev() {
-                    reorder_by_barycenter(&mut current, i, true, graph);
+        let run = |start: usize| {
+            let mut initial = layers.clone();
+            if start > 0 {
+                let mut rng = StdRng::seed_from_u64(start as u64);
+                for layer in &mut initial {
+                    layer.shuffle(&mut rng);
                 }
             }
-            let cr = total_crossings(&current, graph);
-            if cr < best_crossings {
-                best_crossings = cr;
-                best = current.clone();
-            }
-            // No change this sweep → no more progress to be made.
-            if current == before {
-                break;
-            }
-        }
+            let (ordering, crossings) = barycenter_sweeps(graph, initial, MAX_BARYCENTER_SWEEPS);
+            (crossings, start, ordering)
+        };
+        let threads = thread::available_parallelism()
+            .map_or(1, |threads| threads.get())
+            .min(starts);
+        let results: Vec<(usize, usize, Vec<Vec<usize>>)> = thread::scope(|scope| {
+            let run = &run;
+            let handles: Vec<_> = (0..threads)
+                .map(|thread| {
+                    scope.spawn(move || {
+                        (thread..starts)
+                            .step_by(threads)
+                            .map(run)
+                            .collect::<Vec<_>>()
+                    })
+                })
+                .collect();
+            handles
+                .into_iter()
+                .flat_map(|handle| handle.join().expect("Barycenter ordering thread panicked"))
+                .collect()
+        });
 
-        best
+        results
+            .into_iter()
+            .min_by_key(|(crossings, start, _)| (*crossings, *start))
+            .map(|(_, _, ordering)| ordering)
+            .expect("At least one start is run")
     }
 
     /// Phase 1: break cycles by reversing a feedback arc set.
@@ -1206,7 +1838,10 @@ impl SugiyamaLayout {
         // The mapping `subgraph.from_index(node) → graph.to_index(...)`
         // translates the component-local index back to the global one.
         for (_, subgraph) in subgraphs {
-            let component_layers = self.longest_path_layering(&subgraph);
+            let component_layers = match self.layering {
+                LayeringMethod::LongestPath => self.longest_path_layering(&subgraph),
+                LayeringMethod::NetworkSimplex => self.network_simplex_layering(&subgraph),
+            };
             layers.extend(
                 component_layers
                     .into_iter()
@@ -1266,6 +1901,33 @@ impl SugiyamaLayout {
 
         layers
     }
+
+    /// Phase 2b (alternative): minimize the total span of all edges.
+    ///
+    /// Starts from the longest-path layering and improves it with the
+    /// network simplex method, see `network_simplex`. Compared to
+    /// longest-path, sources are pulled down next to their successors, so
+    /// fewer dummy nodes are inserted and the barycenter and Brandes–Köpf
+    /// passes have less to do. The graph has to be a connected DAG, which
+    /// holds for the components passed in by
+    /// `layer_disconnected_components`.
+    fn network_simplex_layering(&self, graph: &DiGraphMap<NodeIndex, ()>) -> HashMap<usize, usize> {
+        let initial_layers = self.longest_path_layering(graph);
+        let initial_ranks = (0..graph.node_count())
+            .map(|node| initial_layers[&node] as i64)
+            .collect();
+        let edges: Vec<(usize, usize)> = graph
+            .all_edges()
+            .filter(|(a, b, _)| a != b)
+            .map(|(a, b, _)| (graph.to_index(a), graph.to_index(b)))
+            .collect();
+
+        network_simplex_ranks(graph.node_count(), &edges, initial_ranks)
+            .into_iter()
+            .enumerate()
+            .map(|(node, rank)| (node, rank as usize))
+            .collect()
+    }
 }
 
 #[cfg(test)]
@@ -1299,6 +1961,35 @@ mod tests {
         assert!(g.contains_edge(NodeIndex::new(dummy_id), NodeIndex::new(2)));
     }
 
+    #[test]
+    fn network_simplex_layering_avoids_dummy_nodes() {
+        // A chain with a second source pointing at its end, plus a separate component.
+        let g = build_graph(&[(0, 1), (1, 2), (2, 3), (4, 3), (5, 6)], &[]);
+        for (layering, expected_dummies) in [
+            (LayeringMethod::LongestPath, 2),
+            (LayeringMethod::NetworkSimplex, 0),
+        ] {
+            let layout = SugiyamaLayout {
+                direction: LayoutDirection::TopDown,
+                layering,
+                ordering_starts: 1,
+                pack_components: false,
+                warm_start: false,
+                previous_layers: Mutex::new(None),
+            };
+            let mut raw = g.clone();
+            let mut layer_map = layout.layer_disconnected_components(&raw);
+            assert_eq!(layer_map[&0], 0);
+            assert_eq!(layer_map[&5], 0);
+
+            let dummies = insert_dummy_nodes(&mut raw, &mut layer_map);
+            assert_eq!(dummies.len(), expected_dummies);
+            assert!(raw
+                .all_edges()
+                .all(|(a, b, _)| layer_map[&a.index()] + 1 == layer_map[&b.index()]));
+        }
+    }
+
     #[test]
     fn dummy_nodes_not_inserted_for_adjacent_edges() {
         let mut g = build_graph(&[(0, 1), (1, 2)], &[]);
@@ -1321,6 +2012,11 @@ mod tests {
 
         let layout = SugiyamaLayout {
             direction: LayoutDirection::TopDown,
+            layering: LayeringMethod::LongestPath,
+            ordering_starts: 1,
+            pack_components: false,
+            warm_start: false,
+            previous_layers: Mutex::new(None),
         };
         let result = layout.barycenter_ordering(&g, layers);
         let cross_after = total_crossings(&result, &g);
@@ -1334,11 +2030,53 @@ mod tests {
         let layers = vec![vec![0usize], vec![1usize], vec![2usize]];
         let layout = SugiyamaLayout {
             direction: LayoutDirection::TopDown,
+            layering: LayeringMethod::LongestPath,
+            ordering_starts: 1,
+            pack_components: false,
+            warm_start: false,
+            previous_layers: Mutex::new(None),
         };
         let result = layout.barycenter_ordering(&g, layers.clone());
         assert_eq!(result, layers);
     }
 
+    #[test]
+    fn multi_start_ordering_never_has_more_crossings() {
+        let g = build_graph(
+            &[
+                (0, 4),
+                (0, 5),
+                (1, 3),
+                (1, 5),
+                (2, 3),
+                (2, 4),
+                (3, 8),
+                (4, 6),
+                (5, 7),
+            ],
+            &[],
+        );
+        let layers = vec![vec![0, 1, 2], vec![3, 4, 5], vec![6, 7, 8]];
+        let layout = |ordering_starts| SugiyamaLayout {
+            direction: LayoutDirection::TopDown,
+            layering: LayeringMethod::LongestPath,
+            ordering_starts,
+            pack_components: false,
+            warm_start: false,
+            previous_layers: Mutex::new(None),
+        };
+
+        let single = layout(1).barycenter_ordering(&g, layers.clone());
+        let multi = layout(8).barycenter_ordering(&g, layers.clone());
+        assert!(total_crossings(&multi, &g) <= total_crossings(&single, &g));
+        assert_eq!(multi, layout(8).barycenter_ordering(&g, layers.clone()));
+        for (ordered, original) in multi.iter().zip(&layers) {
+            let mut ordered = ordered.clone();
+            ordered.sort();
+            assert_eq!(&ordered, original);
+        }
+    }
+
     fn unit_dimensions(layers: &[Vec<usize>]) -> (HashMap<usize, i32>, HashMap<usize, i32>) {
         let mut widths = HashMap::new();
         let mut heights = HashMap::new();
@@ -1422,6 +2160,11 @@ mod tests {
 
         let layout = SugiyamaLayout {
             direction: LayoutDirection::TopDown,
+            layering: LayeringMethod::LongestPath,
+            ordering_starts: 1,
+            pack_components: false,
+            warm_start: false,
+            previous_layers: Mutex::new(None),
         };
         let ordered = layout.barycenter_ordering(&g, layers);
         let positions = brandes_koepf_with_dimensions(&ordered, &g, &widths, &heights, &dummies);
@@ -1430,4 +2173,200 @@ mod tests {
             assert!(positions.contains_key(&n), "missing real node {}", n);
         }
     }
+
+    #[test]
+    fn warm_start_layering_recovers_and_extends_layers() {
+        // 3 is new below 0, 4 is a new source above 2, and the previous
+        // coordinates of 5 put it above its predecessor 2.
+        let g = build_graph(&[(0, 1), (1, 2), (0, 3), (4, 2), (2, 5)], &[]);
+        let across: HashMap<usize, i32> = [(0, 0), (1, 4), (2, 9), (5, 4)].into_iter().collect();
+        let layers = warm_start_layering(&g, &across);
+        assert_eq!(layers[&0], 0);
+        assert_eq!(layers[&1], 1);
+        assert_eq!(layers[&2], 2);
+        assert_eq!(layers[&3], 1);
+        assert_eq!(layers[&4], 1);
+        assert_eq!(layers[&5], 3);
+    }
+
+    #[test]
+    fn warm_start_layering_starts_at_zero() {
+        // The new source 1 goes above the previous top layer.
+        let g = build_graph(&[(1, 0)], &[]);
+        let across: HashMap<usize, i32> = [(0, 0)].into_iter().collect();
+        let layers = warm_start_layering(&g, &across);
+        assert_eq!(layers[&1], 0);
+        assert_eq!(layers[&0], 1);
+    }
+
+    #[test]
+    fn warm_start_order_follows_previous_coordinates() {
+        // 3 is new and goes next to its predecessor 1, 4 has no neighbors.
+        let g = build_graph(&[(0, 1), (0, 2), (1, 3)], &[4]);
+        let layers = vec![vec![0], vec![1, 2, 4], vec![3]];
+        let along: HashMap<usize, i32> = [(0, 5), (1, 10), (2, 0)].into_iter().collect();
+        let ordered = warm_start_order(layers, &g, &along);
+        assert_eq!(ordered, vec![vec![0], vec![2, 1, 4], vec![3]]);
+    }
+
+    #[test]
+    fn warm_start_keeps_layout_of_unchanged_graph() {
+        // Without long edges, whose dummy nodes have no previous positions,
+        // the previous layers and order are recovered exactly.
+        let edges = [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (5, 6)];
+        let g = build_graph(&edges, &[7]);
+        let sizes = g
+            .nodes()
+            .map(|node| (node, Size::new(3, 1 + node.index() as i32 % 3)))
+            .collect();
+        let graph = LayoutGraph::new(g, sizes);
+        for direction in [LayoutDirection::TopDown, LayoutDirection::LeftRight] {
+            let layout = SugiyamaLayout {
+                direction,
+                layering: LayeringMethod::LongestPath,
+                ordering_starts: 1,
+                pack_components: false,
+                warm_start: false,
+                previous_layers: Mutex::new(None),
+            };
+            let mut first = layout.compute_coordinates(&graph);
+            let previous: HashMap<usize, Point> = first.iter().copied().collect();
+            let mut second = layout
+                .compute_layout(&graph, Some(&WarmStart::Positions(&previous)))
+                .0;
+            first.sort_by_key(|(node, _)| *node);
+            second.sort_by_key(|(node, _)| *node);
+            assert_eq!(first, second);
+        }
+    }
+
+    #[test]
+    fn warm_start_keeps_order_when_adding_a_node() {
+        let edges = [(0, 1), (0, 2), (0, 3), (1, 4), (2, 5), (3, 6)];
+        let mut g = build_graph(&edges, &[]);
+        let sizes =
+            |g: &DiGraphMap<NodeIndex, ()>| g.nodes().map(|node| (node, Size::new(3, 1))).collect();
+        let layout = SugiyamaLayout {
+            direction: LayoutDirection::TopDown,
+            layering: LayeringMethod::LongestPath,
+            ordering_starts: 1,
+            pack_components: false,
+            warm_start: false,
+            previous_layers: Mutex::new(None),
+        };
+        let previous: HashMap<usize, Point> = layout
+            .compute_coordinates(&LayoutGraph::new(g.clone(), sizes(&g)))
+            .into_iter()
+            .collect();
+
+        g.add_edge(NodeIndex::new(3), NodeIndex::new(7), ());
+        let positions: HashMap<usize, Point> = layout
+            .compute_layout(
+                &LayoutGraph::new(g.clone(), sizes(&g)),
+                Some(&WarmStart::Positions(&previous)),
+            )
+            .0
+            .into_iter()
+            .collect();
+        assert_eq!(positions[&7].y, positions[&6].y);
+        for (a, b) in [(1, 2), (2, 3), (4, 5), (5, 6)] {
+            assert!(positions[&a].x < positions[&b].x);
+            assert!(previous[&a].x < previous[&b].x);
+        }
+        // The new node goes next to its sibling, below their parent.
+        assert!(positions[&6].x < positions[&7].x);
+    }
+
+    #[test]
+    fn dummy_slots_follow_long_edges() {
+        let mut g = build_graph(&[(0, 1), (1, 2), (2, 3), (0, 3), (1, 3)], &[]);
+        let mut layer_map: HashMap<usize, usize> = (0..4).map(|node| (node, node)).collect();
+        let dummies = insert_dummy_nodes(&mut g, &mut layer_map);
+        let mut slots: Vec<(usize, LayerSlot<usize>)> =
+            dummy_slots(&g, &dummies).into_iter().collect();
+        slots.sort_by_key(|(dummy, _)| layer_map[dummy]);
+        let mut found: Vec<LayerSlot<usize>> = slots.into_iter().map(|(_, slot)| slot).collect();
+        found.sort_by_key(|slot| match slot {
+            LayerSlot::Dummy(source, _, step) => (*source, *step),
+            LayerSlot::Node(node) => (*node, 0),
+        });
+        assert_eq!(
+            found,
+            vec![
+                LayerSlot::Dummy(0, 3, 1),
+                LayerSlot::Dummy(0, 3, 2),
+                LayerSlot::Dummy(1, 3, 1),
+            ]
+        );
+    }
+
+    #[test]
+    fn layer_warm_start_keeps_layout_of_unchanged_graph() {
+        // Unlike previous positions, the layering also fixes the order of
+        // dummy nodes, so long edges are recovered exactly as well.
+        let edges = [(0, 1), (1, 2), (2, 3), (0, 3), (4, 3), (0, 5), (6, 7)];
+        let g = build_graph(&edges, &[8]);
+        let sizes = g
+            .nodes()
+            .map(|node| (node, Size::new(3, 1 + node.index() as i32 % 3)))
+            .collect();
+        let graph = LayoutGraph::new(g, sizes);
+        for direction in [LayoutDirection::TopDown, LayoutDirection::LeftRight] {
+            let layout = SugiyamaLayout {
+                direction,
+                layering: LayeringMethod::NetworkSimplex,
+                ordering_starts: 4,
+                pack_components: false,
+                warm_start: true,
+                previous_layers: Mutex::new(None),
+            };
+            let (mut first, order) = layout.compute_layout(&graph, None);
+            let (mut second, _) = layout.compute_layout(&graph, Some(&WarmStart::Layers(&order)));
+            first.sort_by_key(|(node, _)| *node);
+            second.sort_by_key(|(node, _)| *node);
+            assert_eq!(first, second);
+        }
+    }
+
+    #[test]
+    fn layer_warm_start_keeps_order_when_adding_nodes() {
+        let edges = [(0, 1), (0, 2), (0, 3), (1, 4), (2, 5), (3, 6), (1, 6)];
+        let mut g = build_graph(&edges, &[]);
+        let sizes =
+            |g: &DiGraphMap<NodeIndex, ()>| g.nodes().map(|node| (node, Size::new(3, 1))).collect();
+        let layout = SugiyamaLayout {
+            direction: LayoutDirection::TopDown,
+            layering: LayeringMethod::LongestPath,
+            ordering_starts: 1,
+            pack_components: false,
+            warm_start: true,
+            previous_layers: Mutex::new(None),
+        };
+        let (_, order) = layout.compute_layout(&LayoutGraph::new(g.clone(), sizes(&g)), None);
+        let layer_of = |order: &LayerOrder<usize>, node| {
+            order
+                .iter()
+                .find(|(slot, _, _)| *slot == LayerSlot::Node(node))
+                .map(|(_, layer, coordinate)| (*layer, *coordinate))
+                .unwrap()
+        };
+
+        // A new child of 2 and a new parent of 4 and 5.
+        g.add_edge(NodeIndex::new(2), NodeIndex::new(7), ());
+        g.add_edge(NodeIndex::new(8), NodeIndex::new(4), ());
+        g.add_edge(NodeIndex::new(8), NodeIndex::new(5), ());
+        let (_, next) = layout.compute_layout(
+            &LayoutGraph::new(g.clone(), sizes(&g)),
+            Some(&WarmStart::Layers(&order)),
+        );
+        for node in 0..7 {
+            assert_eq!(layer_of(&next, node).0, layer_of(&order, node).0);
+        }
+        for (a, b) in [(1, 2), (2, 3), (4, 5), (5, 6)] {
+            assert!(layer_of(&order, a).1 < layer_of(&order, b).1);
+            assert!(layer_of(&next, a).1 < layer_of(&next, b).1);
+        }
+        assert_eq!(layer_of(&next, 7).0, layer_of(&next, 5).0);
+        assert_eq!(layer_of(&next, 8).0, layer_of(&next, 1).0);
+    }
 }
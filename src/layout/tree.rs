@@ -0,0 +1,536 @@
+//! Layered layout of trees and forests.
+//!
+//! Nodes are placed in layers by their depth, and the x coordinates are
+//! computed with Walker's algorithm in the linear-time formulation of
+//! Buchheim, Jünger & Leipert: subtrees are placed bottom-up and pushed
+//! apart along their contours just enough to keep the minimum spacing, and
+//! parents are centered above their children. Unlike `SugiyamaLayout` this
+//! needs no cycle removal, dummy nodes or crossing minimization.
+//!
+//! Graphs that are not forests are laid out along a spanning forest: every
+//! node is claimed by the first node that reaches it in a breadth-first
+//! search from the sources of the graph. Edges outside of that forest are
+//! simply not taken into account.
+//!
+//! Reference: Buchheim, Jünger & Leipert, *"Improving Walker's Algorithm to
+//! Run in Linear Time"*, Graph Drawing 2002, LNCS 2528.
+
+use std::collections::VecDeque;
+
+use pyo3::prelude::*;
+
+use crate::{geometry::Point, graph::CoreGraph};
+
+use super::components::layout_components;
+use super::force_directed::DenseGraph;
+use super::{positions_to_objects, LayoutDirection, LayoutEngine, LayoutGraph};
+
+const NONE: usize = usize::MAX;
+
+#[pyclass(extends=LayoutEngine, subclass)]
+pub struct TreeLayout {
+    direction: LayoutDirection,
+    pack_components: bool,
+}
+
+#[pymethods]
+impl TreeLayout {
+    #[new]
+    #[pyo3(signature = (direction, pack_components = false))]
+    fn new(direction: LayoutDirection, pack_components: bool) -> (Self, LayoutEngine) {
+        (
+            TreeLayout {
+                direction,
+                pack_components,
+            },
+            LayoutEngine {},
+        )
+    }
+
+    #[getter]
+    fn get_layout_direction(&self) -> Option<LayoutDirection> {
+        Some(self.direction)
+    }
+
+    fn layout(&self, py: Python<'_>, graph: &CoreGraph) -> PyResult<Vec<(PyObject, Point)>> {
+        let layout_graph = graph.layout_graph();
+        let coordinates = py.allow_threads(|| {
+            if self.pack_components {
+                layout_components(&layout_graph, |component| {
+                    self.compute_coordinates(component)
+                })
+            } else {
+                self.compute_coordinates(&layout_graph)
+            }
+        });
+        Ok(positions_to_objects(py, graph, coordinates))
+    }
+}
+
+impl TreeLayout {
+    /// Compute the coordinates of every node, in the same frame as
+    /// `SugiyamaLayout`: the x coordinate is the center of a node within
+    /// its layer, starting at 0, and the y coordinate is the top of its
+    /// layer. For `LeftRight` layouts the axes are swapped at the end.
+    fn compute_coordinates(&self, graph: &LayoutGraph) -> Vec<(usize, Point)> {
+        let graph = DenseGraph::new(graph);
+        // Sizes along and across the layers, at least one cell each.
+        let sizes: Vec<(f64, f64)> = graph
+            .sizes
+            .iter()
+            .map(|&(width, height)| match self.direction {
+                LayoutDirection::TopDown => (width.max(1.0), height.max(1.0)),
+                LayoutDirection::LeftRight => (height.max(1.0), width.max(1.0)),
+            })
+            .collect();
+
+        let forest = SpanningForest::new(graph.nodes.len(), &graph.edges);
+        let xs = Walker::new(&forest, &sizes).layout();
+
+        // Layers stack with a 1-cell gap, each as high as its highest node. Nodes are not in
+        // breadth-first order, so all layers are allocated up front.
+        let layers = forest.depth[..sizes.len()]
+            .iter()
+            .copied()
+            .max()
+            .unwrap_or(0);
+        let mut layer_heights: Vec<f64> = vec![0.0; layers];
+        for (node, &(_, height)) in sizes.iter().enumerate() {
+            let layer = forest.depth[node] - 1;
+            layer_heights[layer] = layer_heights[layer].max(height);
+        }
+        let mut layer_y = Vec::with_capacity(layer_heights.len());
+        let mut y = 0.0;
+        for height in layer_heights {
+            layer_y.push(y);
+            y += height + 1.0;
+        }
+
+        let min_x = xs[..sizes.len()]
+            .iter()
+            .copied()
+            .fold(f64::INFINITY, f64::min);
+        let positions: Vec<(f64, f64)> = (0..sizes.len())
+            .map(|node| {
+                let (x, y) = (xs[node] - min_x, layer_y[forest.depth[node] - 1]);
+                match self.direction {
+                    LayoutDirection::TopDown => (x, y),
+                    LayoutDirection::LeftRight => (y, x),
+                }
+            })
+            .collect();
+        graph.points(&positions)
+    }
+}
+
+/// A spanning forest of a graph, hung below a virtual root.
+///
+/// The virtual root has index `node_count` and the roots of the trees as
+/// its children, so that the trees of a forest are packed next to each
+/// other like the subtrees of a single tree.
+struct SpanningForest {
+    parent: Vec<usize>,
+    children: Vec<Vec<usize>>,
+    depth: Vec<usize>,
+    /// Nodes in breadth-first order, starting with the virtual root.
+    order: Vec<usize>,
+}
+
+impl SpanningForest {
+    fn new(node_count: usize, edges: &[(usize, usize)]) -> Self {
+        let mut outgoing: Vec<Vec<usize>> = vec![Vec::new(); node_count];
+        let mut has_incoming = vec![false; node_count];
+        for &(u, v) in edges {
+            if u != v {
+                outgoing[u].push(v);
+                has_incoming[v] = true;
+            }
+        }
+
+        let root = node_count;
+        let mut parent = vec![NONE; node_count + 1];
+        let mut children: Vec<Vec<usize>> = vec![Vec::new(); node_count + 1];
+        let mut queue = VecDeque::new();
+        // Sources become the roots of the trees first. Nodes that are not
+        // reachable from any source, i.e. nodes on cycles, are then used as
+        // additional roots in order.
+        let sources = (0..node_count).filter(|node| !has_incoming[*node]);
+        for tree_root in sources.chain(0..node_count) {
+            if parent[tree_root] != NONE {
+                continue;
+            }
+            parent[tree_root] = root;
+            children[root].push(tree_root);
+            queue.push_back(tree_root);
+            while let Some(node) = queue.pop_front() {
+                for &child in &outgoing[node] {
+                    if parent[child] == NONE && child != tree_root {
+                        parent[child] = node;
+                        children[node].push(child);
+                        queue.push_back(child);
+                    }
+                }
+            }
+        }
+
+        let mut depth = vec![0; node_count + 1];
+        let mut order = Vec::with_capacity(node_count + 1);
+        order.push(root);
+        let mut index = 0;
+        while index < order.len() {
+            let node = order[index];
+            for &child in &children[node] {
+                depth[child] = depth[node] + 1;
+                order.push(child);
+            }
+            index += 1;
+        }
+
+        SpanningForest {
+            parent,
+            children,
+            depth,
+            order,
+        }
+    }
+}
+
+/// The state of Walker's algorithm, indexed by node.
+///
+/// `prelim` is the x coordinate of a node relative to its siblings and
+/// `modifier` the offset applied to its whole subtree below it. `thread`
+/// links the contour of a subtree across levels where the subtree itself
+/// has no node, and `ancestor`, `shift` and `change` defer the moves of
+/// intermediate subtrees so that every level is only touched once.
+struct Walker<'a> {
+    forest: &'a SpanningForest,
+    widths: Vec<f64>,
+    number: Vec<usize>,
+    prelim: Vec<f64>,
+    modifier: Vec<f64>,
+    midpoint: Vec<f64>,
+    shift: Vec<f64>,
+    change: Vec<f64>,
+    thread: Vec<usize>,
+    ancestor: Vec<usize>,
+}
+
+impl<'a> Walker<'a> {
+    fn new(forest: &'a SpanningForest, sizes: &[(f64, f64)]) -> Self {
+        let count = forest.parent.len();
+        let mut number = vec![0; count];
+        for children in &forest.children {
+            for (index, &child) in children.iter().enumerate() {
+                number[child] = index;
+            }
+        }
+        let mut widths: Vec<f64> = sizes.iter().map(|(width, _)| *width).collect();
+        widths.push(0.0);
+        Walker {
+            forest,
+            widths,
+            number,
+            prelim: vec![0.0; count],
+            modifier: vec![0.0; count],
+            midpoint: vec![0.0; count],
+            shift: vec![0.0; count],
+            change: vec![0.0; count],
+            thread: vec![NONE; count],
+            ancestor: (0..count).collect(),
+        }
+    }
+
+    /// Compute the x coordinate of the center of every node.
+    fn layout(mut self) -> Vec<f64> {
+        // Children come after their parents in breadth-first order, so in
+        // reverse the subtrees of all children are placed before a node.
+        for &node in self.forest.order.iter().rev() {
+            if !self.forest.children[node].is_empty() {
+                self.place_children(node);
+            }
+        }
+
+        let forest = self.forest;
+        let mut offset = vec![0.0; forest.parent.len()];
+        let mut xs = vec![0.0; forest.parent.len()];
+        for &node in &forest.order {
+            xs[node] = self.prelim[node] + offset[node];
+            for &child in &forest.children[node] {
+                offset[child] = offset[node] + self.modifier[node];
+            }
+        }
+        xs
+    }
+
+    /// Minimal distance between the centers of two neighbors in a layer.
+    fn separation(&self, left: usize, right: usize) -> f64 {
+        (self.widths[left] + self.widths[right]) / 2.0 + 1.0
+    }
+
+    fn next_left(&self, node: usize) -> usize {
+        self.forest.children[node]
+            .first()
+            .copied()
+            .unwrap_or(self.thread[node])
+    }
+
+    fn next_right(&self, node: usize) -> usize {
+        self.forest.children[node]
+            .last()
+            .copied()
+            .unwrap_or(self.thread[node])
+    }
+
+    /// Place the already laid out subtrees of the children of `node` next
+    /// to each other and center `node` above them.
+    fn place_children(&mut self, node: usize) {
+        let forest = self.forest;
+        let children = &forest.children[node];
+        let mut default_ancestor = children[0];
+        for (index, &child) in children.iter().enumerate() {
+            self.prelim[child] = if index == 0 {
+                self.midpoint[child]
+            } else {
+                let left = children[index - 1];
+                self.prelim[left] + self.separation(left, child)
+            };
+            if !forest.children[child].is_empty() {
+                self.modifier[child] = self.prelim[child] - self.midpoint[child];
+            }
+            default_ancestor = self.apportion(child, default_ancestor);
+        }
+        self.execute_shifts(node);
+        self.midpoint[node] =
+            (self.prelim[children[0]] + self.prelim[children[children.len() - 1]]) / 2.0;
+    }
+
+    /// Push the subtree of `node` right until it keeps the minimum spacing
+    /// to the subtrees of its left siblings, on every level.
+    fn apportion(&mut self, node: usize, default_ancestor: usize) -> usize {
+        let number = self.number[node];
+        if number == 0 {
+            return default_ancestor;
+        }
+        let siblings = &self.forest.children[self.forest.parent[node]];
+        let mut default_ancestor = default_ancestor;
+
+        // Inner and outer contours of the right (`node`) and left subtrees
+        // together with the accumulated modifiers along them.
+        let (mut inner_right, mut outer_right) = (node, node);
+        let (mut inner_left, mut outer_left) = (siblings[number - 1], siblings[0]);
+        let mut sum_inner_right = self.modifier[inner_right];
+        let mut sum_outer_right = self.modifier[outer_right];
+        let mut sum_inner_left = self.modifier[inner_left];
+        let mut sum_outer_left = self.modifier[outer_left];
+
+        while self.next_right(inner_left) != NONE && self.next_left(inner_right) != NONE {
+            inner_left = self.next_right(inner_left);
+            inner_right = self.next_left(inner_right);
+            outer_left = self.next_left(outer_left);
+            outer_right = self.next_right(outer_right);
+            self.ancestor[outer_right] = node;
+
+            let shift = (self.prelim[inner_left] + sum_inner_left)
+                - (self.prelim[inner_right] + sum_inner_right)
+                + self.separation(inner_left, inner_right);
+            if shift > 0.0 {
+                let ancestor = self.ancestor_sibling(inner_left, node, default_ancestor);
+                self.move_subtree(ancestor, node, shift);
+                sum_inner_right += shift;
+                sum_outer_right += shift;
+            }
+            sum_inner_left += self.modifier[inner_left];
+            sum_inner_right += self.modifier[inner_right];
+            sum_outer_left += self.modifier[outer_left];
+            sum_outer_right += self.modifier[outer_right];
+        }
+
+        if self.next_right(inner_left) != NONE && self.next_right(outer_right) == NONE {
+            self.thread[outer_right] = self.next_right(inner_left);
+            self.modifier[outer_right] += sum_inner_left - sum_outer_right;
+        }
+        if self.next_left(inner_right) != NONE && self.next_left(outer_left) == NONE {
+            self.thread[outer_left] = self.next_left(inner_right);
+            self.modifier[outer_left] += sum_inner_right - sum_outer_left;
+            default_ancestor = node;
+        }
+        default_ancestor
+    }
+
+    /// The left sibling of `node` whose subtree contains `inner_left`,
+    /// falling back to `default_ancestor`.
+    fn ancestor_sibling(&self, inner_left: usize, node: usize, default_ancestor: usize) -> usize {
+        let ancestor = self.ancestor[inner_left];
+        if self.forest.parent[ancestor] == self.forest.parent[node] {
+            ancestor
+        } else {
+            default_ancestor
+        }
+    }
+
+    /// Move the subtree of `right` by `shift` and record that the siblings
+    /// between `left` and `right` have to be spread out evenly.
+    fn move_subtree(&mut self, left: usize, right: usize, shift: f64) {
+        let subtrees = (self.number[right] - self.number[left]) as f64;
+        self.change[right] -= shift / subtrees;
+        self.shift[right] += shift;
+        self.change[left] += shift / subtrees;
+        self.prelim[right] += shift;
+        self.modifier[right] += shift;
+    }
+
+    /// Apply the moves recorded by `move_subtree` to the children of `node`.
+    fn execute_shifts(&mut self, node: usize) {
+        let (mut shift, mut change) = (0.0, 0.0);
+        for &child in self.forest.children[node].iter().rev() {
+            self.prelim[child] += shift;
+            self.modifier[child] += shift;
+            change += self.change[child];
+            shift += self.shift[child] + change;
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::collections::HashMap;
+
+    use petgraph::graph::NodeIndex;
+    use petgraph::graphmap::DiGraphMap;
+
+    use super::*;
+    use crate::geometry::Size;
+
+    fn layout(
+        direction: LayoutDirection,
+        edges: &[(usize, usize)],
+        sizes: &[(i32, i32)],
+    ) -> HashMap<usize, Point> {
+        let mut graph: DiGraphMap<NodeIndex, ()> = DiGraphMap::new();
+        let mut size_map = HashMap::new();
+        for (node, &(width, height)) in sizes.iter().enumerate() {
+            graph.add_node(NodeIndex::new(node));
+            size_map.insert(NodeIndex::new(node), Size::new(width, height));
+        }
+        for &(u, v) in edges {
+            graph.add_edge(NodeIndex::new(u), NodeIndex::new(v), ());
+        }
+        TreeLayout {
+            direction,
+            pack_components: false,
+        }
+        .compute_coordinates(&LayoutGraph::new(graph, size_map))
+        .into_iter()
+        .collect()
+    }
+
+    /// A deterministic random tree where node `i` hangs below an earlier node.
+    fn random_tree(count: usize, seed: u64) -> (Vec<(usize, usize)>, Vec<(i32, i32)>) {
+        let mut state = seed;
+        let mut random = |bound: usize| {
+            state = state
+                .wrapping_mul(6364136223846793005)
+                .wrapping_add(1442695040888963407);
+            (state >> 33) as usize % bound
+        };
+        let edges = (1..count).map(|node| (random(node), node)).collect();
+        let sizes = (0..count)
+            .map(|_| (1 + random(9) as i32, 1 + random(3) as i32))
+            .collect();
+        (edges, sizes)
+    }
+
+    #[test]
+    fn parents_are_centered_above_their_children() {
+        let edges = [(0, 1), (0, 2), (0, 3), (1, 4), (1, 5)];
+        let positions = layout(LayoutDirection::TopDown, &edges, &[(3, 1); 6]);
+        assert_eq!(positions[&0].x, (positions[&1].x + positions[&3].x) / 2);
+        assert_eq!(positions[&1].x, (positions[&4].x + positions[&5].x) / 2);
+        assert_eq!(positions[&0].y, 0);
+        assert_eq!(positions[&1].y, 2);
+        assert_eq!(positions[&4].y, 4);
+        assert!(positions[&1].x < positions[&2].x && positions[&2].x < positions[&3].x);
+    }
+
+    #[test]
+    fn children_may_come_before_their_parents() {
+        let edges = [(1, 0), (2, 1)];
+        let positions = layout(LayoutDirection::TopDown, &edges, &[(1, 1); 3]);
+        assert_eq!(positions[&2].y, 0);
+        assert_eq!(positions[&1].y, 2);
+        assert_eq!(positions[&0].y, 4);
+    }
+
+    #[test]
+    fn chains_are_straight() {
+        let edges = [(0, 1), (1, 2), (2, 3)];
+        let positions = layout(
+            LayoutDirection::TopDown,
+            &edges,
+            &[(5, 1), (1, 1), (3, 2), (1, 1)],
+        );
+        assert!(positions.values().all(|point| point.x == 0));
+        assert_eq!([0, 1, 2, 3].map(|node| positions[&node].y), [0, 2, 4, 7]);
+    }
+
+    #[test]
+    fn left_right_swaps_axes() {
+        let edges = [(0, 1), (0, 2)];
+        let top_down = layout(LayoutDirection::TopDown, &edges, &[(4, 2); 3]);
+        let left_right = layout(LayoutDirection::LeftRight, &edges, &[(2, 4); 3]);
+        for node in 0..3 {
+            assert_eq!(top_down[&node].x, left_right[&node].y);
+            assert_eq!(top_down[&node].y, left_right[&node].x);
+        }
+    }
+
+    #[test]
+    fn nodes_in_a_layer_keep_their_distance() {
+        for seed in 0..20 {
+            let (edges, sizes) = random_tree(300, seed);
+            // Add a second tree to check that trees of a forest do not overlap.
+            let mut edges = edges;
+            edges.extend([(300, 301), (300, 302)]);
+            let mut sizes = sizes;
+            sizes.extend([(2, 1); 3]);
+
+            let positions = layout(LayoutDirection::TopDown, &edges, &sizes);
+            let mut layers: HashMap<i32, Vec<usize>> = HashMap::new();
+            for (node, point) in &positions {
+                layers.entry(point.y).or_default().push(*node);
+            }
+            for layer in layers.values_mut() {
+                layer.sort_by_key(|node| positions[node].x);
+                for pair in layer.windows(2) {
+                    let gap = positions[&pair[1]].x - positions[&pair[0]].x;
+                    let min_gap = (sizes[pair[0]].0 + sizes[pair[1]].0) as f64 / 2.0 + 1.0;
+                    assert!(gap as f64 >= min_gap - 1.0);
+                }
+            }
+            for &(parent, child) in &edges {
+                assert!(positions[&parent].y < positions[&child].y);
+            }
+        }
+    }
+
+    #[test]
+    fn graphs_that_are_not_forests_use_a_spanning_forest() {
+        // A diamond, a cycle without a source and a self loop.
+        let edges = [
+            (0, 1),
+            (0, 2),
+            (1, 3),
+            (2, 3),
+            (4, 5),
+            (5, 6),
+            (6, 4),
+            (7, 7),
+        ];
+        let positions = layout(LayoutDirection::TopDown, &edges, &[(1, 1); 8]);
+        assert_eq!(positions.len(), 8);
+        assert_eq!(positions[&3].y, 4);
+        assert_eq!(positions[&4].y, 0);
+        assert_eq!(positions[&6].y, 4);
+        assert_eq!(positions[&7].y, 0);
+    }
+}
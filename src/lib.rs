@@ -1,5 +1,6 @@
 use pyo3::prelude::*;
 
+mod compositor;
 mod geometry;
 mod graph;
 mod layout;
@@ -12,14 +13,22 @@ use geometry::{
 use graph::CoreGraph;
 use routing::{EdgeRouter, RoutingConfig};
 
+#[cfg(feature = "bench")]
+#[doc(hidden)]
+pub use routing::bench as routing_bench;
+
 // A module to wrap the Python functions and structs
 #[pymodule]
 fn _core(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<layout::sugiyama::SugiyamaLayout>()?;
+    m.add_class::<layout::sugiyama::LayeringMethod>()?;
     m.add_class::<layout::LayoutEngine>()?;
     m.add_class::<layout::LayoutDirection>()?;
     m.add_class::<layout::static_::StaticLayout>()?;
     m.add_class::<layout::force_directed::ForceDirectedLayout>()?;
+    m.add_class::<layout::multilevel::MultilevelForceLayout>()?;
+    m.add_class::<layout::tree::TreeLayout>()?;
+    m.add_class::<layout::stress::StressLayout>()?;
 
     m.add_class::<CoreGraph>()?;
     m.add_class::<Point>()?;
@@ -32,5 +41,7 @@ fn _core(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<Neighborhood>()?;
     m.add_class::<EdgeRouter>()?;
 
+    m.add_function(wrap_pyfunction!(compositor::composite_buffers, m)?)?;
+
     Ok(())
 }
@@ -1,5 +1,5 @@
 use std::cmp::Reverse;
-use std::collections::{BinaryHeap, HashMap};
+use std::collections::BinaryHeap;
 
 use pyo3::prelude::*;
 use rand::seq::SliceRandom;
@@ -16,8 +16,209 @@ struct GridState {
     orientation: Orientation,
 }
 
+impl GridState {
+    /// Dense index of the state, every grid point has one state per orientation.
+    fn slot(&self) -> usize {
+        let orientation = match self.orientation {
+            Orientation::Horizontal => 0,
+            Orientation::Vertical => 1,
+        };
+        self.index.0 as usize * 2 + orientation
+    }
+
+    fn from_slot(slot: u32) -> Self {
+        GridState {
+            index: GridPoint(slot / 2),
+            orientation: if slot % 2 == 0 {
+                Orientation::Horizontal
+            } else {
+                Orientation::Vertical
+            },
+        }
+    }
+}
+
+/// An inclusive range of grid coordinates that a search is confined to.
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub(crate) struct SearchWindow {
+    pub min_x: usize,
+    pub max_x: usize,
+    pub min_y: usize,
+    pub max_y: usize,
+}
+
+impl SearchWindow {
+    pub fn contains(&self, (x, y): (usize, usize)) -> bool {
+        self.min_x <= x && x <= self.max_x && self.min_y <= y && y <= self.max_y
+    }
+}
+
+const NO_PREDECESSOR: u32 = u32::MAX;
+
+/// Priorities up to this value are kept in buckets, larger ones in a heap.
+const MAX_BUCKET_PRIORITY: usize = 1 << 16;
+
+/// A priority queue for small integer priorities.
+///
+/// Entries with the same priority are kept in a bucket and popped in reverse insertion order, which is
+/// the same order in which a binary heap of `(Reverse(priority), insertion counter, entry)` pops them.
+/// Negative priorities and priorities beyond the bucket range go to heaps with exactly this ordering, which
+/// are popped before and after the buckets. Step costs and the heuristic are non-negative for all cost
+/// functions of the router, so the heaps only hold the rare priorities outside the bucket range.
+struct BucketQueue {
+    buckets: Vec<Vec<u32>>,
+    underflow: BinaryHeap<(Reverse<i32>, u64, u32)>,
+    overflow: BinaryHeap<(Reverse<i32>, u64, u32)>,
+    heap_counter: u64,
+    // No bucket below this priority holds an entry.
+    cursor: usize,
+    // All buckets above this priority are empty.
+    high: usize,
+    len: usize,
+}
+
+impl BucketQueue {
+    fn new() -> Self {
+        BucketQueue {
+            buckets: Vec::new(),
+            underflow: BinaryHeap::new(),
+            overflow: BinaryHeap::new(),
+            heap_counter: 0,
+            cursor: 0,
+            high: 0,
+            len: 0,
+        }
+    }
+
+    fn clear(&mut self) {
+        if self.len > 0 {
+            for bucket in self.buckets.iter_mut().take(self.high + 1).skip(self.cursor) {
+                bucket.clear();
+            }
+            self.underflow.clear();
+            self.overflow.clear();
+        }
+        self.cursor = 0;
+        self.high = 0;
+        self.len = 0;
+    }
+
+    fn push(&mut self, priority: i32, slot: u32) {
+        self.len += 1;
+        if priority < 0 {
+            self.underflow.push((Reverse(priority), self.heap_counter, slot));
+            self.heap_counter += 1;
+            return;
+        }
+        let bucket = priority as usize;
+        if bucket >= MAX_BUCKET_PRIORITY {
+            self.overflow.push((Reverse(priority), self.heap_counter, slot));
+            self.heap_counter += 1;
+            return;
+        }
+        if bucket >= self.buckets.len() {
+            self.buckets.resize_with(bucket + 1, Vec::new);
+        }
+        self.buckets[bucket].push(slot);
+        // The heuristic is consistent for the usual cost functions, so priorities only fall below
+        // the cursor if it is not, in which case the queue still pops in priority order.
+        if self.len == 1 || bucket < self.cursor {
+            self.cursor = bucket;
+        }
+        self.high = self.high.max(bucket);
+    }
+
+    fn pop(&mut self) -> Option<u32> {
+        if self.len == 0 {
+            return None;
+        }
+        self.len -= 1;
+        if let Some((_, _, slot)) = self.underflow.pop() {
+            return Some(slot);
+        }
+        while self.cursor <= self.high && self.cursor < self.buckets.len() {
+            if let Some(slot) = self.buckets[self.cursor].pop() {
+                return Some(slot);
+            }
+            self.cursor += 1;
+        }
+        self.overflow.pop().map(|(_, _, slot)| slot)
+    }
+}
+
+/// Reusable memory for A* searches on a masked grid.
+///
+/// Scores and predecessors are kept in flat arrays indexed by grid state. Instead of clearing the arrays
+/// for every search, each search gets a new epoch and entries stamped with an older epoch count as unset.
+/// A workspace is meant to be shared by all searches of a routing call, the arrays grow with the largest
+/// grid searched.
+pub(crate) struct SearchWorkspace {
+    epoch: u32,
+    stamps: Vec<u32>,
+    g_score: Vec<i32>,
+    came_from: Vec<u32>,
+    open_set: BucketQueue,
+    neighbors: Vec<(GridPoint, Orientation)>,
+}
+
+impl SearchWorkspace {
+    pub fn new() -> Self {
+        SearchWorkspace {
+            epoch: 0,
+            stamps: Vec::new(),
+            g_score: Vec::new(),
+            came_from: Vec::new(),
+            open_set: BucketQueue::new(),
+            neighbors: Vec::with_capacity(3),
+        }
+    }
+
+    /// Start a new search over a grid with `num_states` states.
+    fn begin(&mut self, num_states: usize) {
+        if self.stamps.len() < num_states {
+            self.stamps.resize(num_states, 0);
+            self.g_score.resize(num_states, 0);
+            self.came_from.resize(num_states, NO_PREDECESSOR);
+        }
+        if self.epoch == u32::MAX {
+            self.stamps.fill(0);
+            self.epoch = 0;
+        }
+        self.epoch += 1;
+        self.open_set.clear();
+    }
+
+    fn g_score(&self, slot: usize) -> Option<i32> {
+        if self.stamps[slot] == self.epoch {
+            Some(self.g_score[slot])
+        } else {
+            None
+        }
+    }
+
+    fn set(&mut self, slot: usize, g_score: i32, came_from: u32) {
+        self.stamps[slot] = self.epoch;
+        self.g_score[slot] = g_score;
+        self.came_from[slot] = came_from;
+    }
+
+    fn path_to(&self, goal: GridState) -> Vec<(GridPoint, Orientation)> {
+        let mut path = vec![(goal.index, goal.orientation)];
+        let mut cursor = goal.slot();
+        while self.stamps[cursor] == self.epoch && self.came_from[cursor] != NO_PREDECESSOR {
+            cursor = self.came_from[cursor] as usize;
+            let state = GridState::from_slot(cursor as u32);
+            path.push((state.index, state.orientation));
+        }
+        path.reverse();
+        path
+    }
+}
+
 pub(crate) fn route_visibility_astar<CostFn, R>(
     masked_grid: &MaskedGrid,
+    workspace: &mut SearchWorkspace,
+    window: Option<SearchWindow>,
     start_grid_point: GridPoint,
     end_grid_point: GridPoint,
     start_orientation: Orientation,
@@ -71,34 +272,23 @@ where
         (sx as i32 - goal_coords.0 as i32).abs() + (sy as i32 - goal_coords.1 as i32).abs()
     };
 
-    let mut open_set: BinaryHeap<(Reverse<i32>, u64, GridState)> = BinaryHeap::new();
-    let mut came_from: HashMap<GridState, GridState> = HashMap::new();
-    let mut g_score: HashMap<GridState, i32> = HashMap::new();
-
     const MAX_SCORE: i32 = i32::MAX / 4;
-    let mut insert_counter: u64 = 0;
 
-    g_score.insert(start_state, 0);
-    let start_f = heuristic(start_state);
-    open_set.push((Reverse(start_f), insert_counter, start_state));
-    insert_counter += 1;
+    workspace.begin(masked_grid.grid.size * 2);
+    let start_slot = start_state.slot();
+    workspace.set(start_slot, 0, NO_PREDECESSOR);
+    workspace.open_set.push(heuristic(start_state), start_slot as u32);
 
-    let mut neighbors_buf: Vec<(GridPoint, Orientation)> = Vec::with_capacity(3);
+    let mut neighbors_buf = std::mem::take(&mut workspace.neighbors);
 
-    while let Some((Reverse(_f_score), _order, current_state)) = open_set.pop() {
+    while let Some(current_slot) = workspace.open_set.pop() {
+        let current_state = GridState::from_slot(current_slot);
         if current_state == goal_state {
-            let mut path = Vec::new();
-            let mut cursor = current_state;
-            path.push((cursor.index, cursor.orientation));
-            while let Some(prev) = came_from.get(&cursor).copied() {
-                cursor = prev;
-                path.push((cursor.index, cursor.orientation));
-            }
-            path.reverse();
-            return Ok(path);
+            workspace.neighbors = neighbors_buf;
+            return Ok(workspace.path_to(current_state));
         }
 
-        let current_g = *g_score.get(&current_state).unwrap_or(&MAX_SCORE);
+        let current_g = workspace.g_score(current_slot as usize).unwrap_or(MAX_SCORE);
 
         masked_grid.fill_neighbors(
             current_state.index,
@@ -118,6 +308,13 @@ where
                 continue;
             }
 
+            if let Some(window) = &window {
+                match masked_grid.grid.grid_point_to_grid_coords(neighbor_index) {
+                    Some(coords) if window.contains(coords) => {}
+                    _ => continue,
+                }
+            }
+
             let neighbor_state = GridState {
                 index: neighbor_index,
                 orientation: neighbor_orientation,
@@ -139,23 +336,148 @@ where
                 None => continue,
             };
 
-            if tentative_g >= *g_score.get(&neighbor_state).unwrap_or(&MAX_SCORE) {
+            let neighbor_slot = neighbor_state.slot();
+            if tentative_g >= workspace.g_score(neighbor_slot).unwrap_or(MAX_SCORE) {
                 continue;
             }
 
-            came_from.insert(neighbor_state, current_state);
-            g_score.insert(neighbor_state, tentative_g);
+            workspace.set(neighbor_slot, tentative_g, current_slot);
             let heuristic_cost = heuristic(neighbor_state);
             let f_score = match tentative_g.checked_add(heuristic_cost) {
                 Some(value) => value,
                 None => continue,
             };
-            open_set.push((Reverse(f_score), insert_counter, neighbor_state));
-            insert_counter += 1;
+            workspace.open_set.push(f_score, neighbor_slot as u32);
         }
     }
 
+    workspace.neighbors = neighbors_buf;
     Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
         "Goal not found.",
     ))
 }
+
+#[cfg(test)]
+mod tests {
+    use rand::rngs::StdRng;
+    use rand::SeedableRng;
+
+    use super::*;
+    use crate::routing::grid::Grid;
+
+    #[test]
+    fn test_bucket_queue_pops_like_binary_heap() {
+        let priorities = [5, 3, 3, 9, 0, 3, 70000, -4, 5, 1, 70000, -1, 2, 90000, -4];
+        let mut queue = BucketQueue::new();
+        let mut heap = BinaryHeap::new();
+        for (counter, priority) in priorities.iter().enumerate() {
+            queue.push(*priority, counter as u32);
+            heap.push((Reverse(*priority), counter, counter as u32));
+        }
+        // Priorities below the smallest popped one are still popped first.
+        for _ in 0..4 {
+            assert_eq!(queue.pop(), heap.pop().map(|(_, _, slot)| slot));
+        }
+        queue.push(1, 100);
+        heap.push((Reverse(1), 100, 100));
+        while let Some((_, _, slot)) = heap.pop() {
+            assert_eq!(queue.pop(), Some(slot));
+        }
+        assert_eq!(queue.pop(), None);
+    }
+
+    #[test]
+    fn test_bucket_queue_clear() {
+        let mut queue = BucketQueue::new();
+        queue.push(4, 1);
+        queue.push(80000, 2);
+        queue.pop();
+        queue.clear();
+        assert_eq!(queue.pop(), None);
+        queue.push(2, 3);
+        assert_eq!(queue.pop(), Some(3));
+    }
+
+    #[test]
+    fn test_reused_workspace_finds_same_paths() {
+        let grid = Grid::new(12, 8, (0..12).map(|x| x * 3).collect(), (0..8).map(|y| y * 2).collect());
+        let placed_nodes = Vec::new();
+        let unremovable_points = Vec::new();
+        let masked_grid = MaskedGrid::from_nodes(&grid, &placed_nodes, &unremovable_points);
+        let cost = |from: GridPoint, to: GridPoint, from_orientation: Orientation, to_orientation: Orientation| {
+            1 + ((from.0 * 7 + to.0) % 3) as i32 + if from_orientation != to_orientation { 3 } else { 0 }
+        };
+
+        let mut workspace = SearchWorkspace::new();
+        for (start, end) in [(0, 95), (13, 50), (95, 0), (40, 41), (13, 50)] {
+            let reused = route_visibility_astar(
+                &masked_grid,
+                &mut workspace,
+                None,
+                GridPoint(start),
+                GridPoint(end),
+                Orientation::Horizontal,
+                Orientation::Vertical,
+                &mut StdRng::seed_from_u64(7),
+                cost,
+            )
+            .unwrap();
+            let fresh = route_visibility_astar(
+                &masked_grid,
+                &mut SearchWorkspace::new(),
+                None,
+                GridPoint(start),
+                GridPoint(end),
+                Orientation::Horizontal,
+                Orientation::Vertical,
+                &mut StdRng::seed_from_u64(7),
+                cost,
+            )
+            .unwrap();
+            assert_eq!(reused, fresh);
+            assert_eq!(reused.first(), Some(&(GridPoint(start), Orientation::Horizontal)));
+            assert_eq!(reused.last(), Some(&(GridPoint(end), Orientation::Vertical)));
+        }
+    }
+
+    #[test]
+    fn test_search_stays_within_window() {
+        let grid = Grid::new(12, 8, (0..12).map(|x| x * 3).collect(), (0..8).map(|y| y * 2).collect());
+        let placed_nodes = Vec::new();
+        let unremovable_points = Vec::new();
+        let masked_grid = MaskedGrid::from_nodes(&grid, &placed_nodes, &unremovable_points);
+        // Leaving the row of the endpoints is cheaper than following it, but not possible within the window.
+        let cost = |from: GridPoint, to: GridPoint, _: Orientation, _: Orientation| {
+            let (_, from_y) = grid.grid_point_to_grid_coords(from).unwrap();
+            let (_, to_y) = grid.grid_point_to_grid_coords(to).unwrap();
+            if from_y == 2 && to_y == 2 {
+                10
+            } else {
+                1
+            }
+        };
+        let window = SearchWindow {
+            min_x: 1,
+            max_x: 6,
+            min_y: 2,
+            max_y: 2,
+        };
+
+        let path = route_visibility_astar(
+            &masked_grid,
+            &mut SearchWorkspace::new(),
+            Some(window),
+            grid.grid_coords_to_grid_point(1, 2).unwrap(),
+            grid.grid_coords_to_grid_point(6, 2).unwrap(),
+            Orientation::Horizontal,
+            Orientation::Horizontal,
+            &mut StdRng::seed_from_u64(7),
+            cost,
+        )
+        .unwrap();
+        assert_eq!(path.len(), 6);
+        assert!(path
+            .iter()
+            .all(|(point, _)| window.contains(grid.grid_point_to_grid_coords(*point).unwrap())));
+    }
+}
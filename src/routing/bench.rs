@@ -0,0 +1,96 @@
+//! Fixtures for the criterion benchmarks in `benches/`, only built with the `bench` feature.
+
+use rand::rngs::StdRng;
+use rand::SeedableRng;
+
+use crate::geometry::{Orientation, PlacedRectangularNode, Point, RectangularNode, Size};
+
+use super::astar::{route_visibility_astar, SearchWorkspace};
+use super::grid::{Grid, GridPoint};
+use super::masked_grid::MaskedGrid;
+
+/// A grid with a lattice of nodes and searches between points on its left and right border.
+pub struct AstarFixture {
+    grid: Grid,
+    placed_nodes: Vec<PlacedRectangularNode>,
+    searches: Vec<(GridPoint, GridPoint)>,
+}
+
+impl AstarFixture {
+    pub fn new(width: usize, height: usize, searches: usize) -> Self {
+        let grid = Grid::new(
+            width,
+            height,
+            (0..width as i32).map(|x| x * 3).collect(),
+            (0..height as i32).map(|y| y * 2).collect(),
+        );
+        let placed_nodes = (0..grid.max_x / 12)
+            .flat_map(|column| {
+                (0..grid.max_y / 8).map(move |row| PlacedRectangularNode {
+                    center: Point {
+                        x: 12 * column + 6,
+                        y: 8 * row + 4,
+                    },
+                    node: RectangularNode {
+                        size: Size { width: 5, height: 3 },
+                    },
+                })
+            })
+            .collect();
+        let searches = (0..searches)
+            .map(|search| {
+                let start = Point {
+                    x: 0,
+                    y: (search * 7 % height) as i32 * 2,
+                };
+                let end = Point {
+                    x: grid.max_x,
+                    y: (search * 13 % height) as i32 * 2,
+                };
+                (
+                    grid.point_to_grid_point(&start).unwrap(),
+                    grid.point_to_grid_point(&end).unwrap(),
+                )
+            })
+            .collect();
+        AstarFixture {
+            grid,
+            placed_nodes,
+            searches,
+        }
+    }
+
+    /// Run all searches and return the total length of the paths found.
+    ///
+    /// The searches either share one workspace, as the edge router does, or get a fresh workspace each.
+    pub fn route(&self, reuse_workspace: bool) -> usize {
+        let unremovable_points = Vec::new();
+        let masked_grid = MaskedGrid::from_nodes(&self.grid, &self.placed_nodes, &unremovable_points);
+        let cost = |from: GridPoint, to: GridPoint, from_orientation: Orientation, to_orientation: Orientation| {
+            1 + ((from.0 * 7 + to.0) % 3) as i32 + if from_orientation != to_orientation { 3 } else { 0 }
+        };
+        let mut rng = StdRng::seed_from_u64(0);
+        let mut workspace = SearchWorkspace::new();
+
+        self.searches
+            .iter()
+            .map(|&(start, end)| {
+                if !reuse_workspace {
+                    workspace = SearchWorkspace::new();
+                }
+                route_visibility_astar(
+                    &masked_grid,
+                    &mut workspace,
+                    None,
+                    start,
+                    end,
+                    Orientation::Horizontal,
+                    Orientation::Horizontal,
+                    &mut rng,
+                    cost,
+                )
+                .map_or(0, |path| path.len())
+            })
+            .sum()
+    }
+}
@@ -3,7 +3,7 @@ use std::fs;
 
 use pyo3::prelude::*;
 use rand::rngs::StdRng;
-use rand::SeedableRng;
+use rand::{Rng, SeedableRng};
 use serde_json::json;
 
 use rstar::RTreeObject;
@@ -11,15 +11,18 @@ use rstar::RTreeObject;
 use crate::geometry::{BoundingBox, DirectedPoint, Direction, Orientation, PlacedRectangularNode, Point, PointLike};
 use crate::pyindexset::PyIndexSet;
 
+use super::astar::SearchWorkspace;
 use super::grid::{Grid, GridPoint, RawPoint};
 use super::masked_grid::MaskedGrid;
 use super::ripup::{
     compute_overflow, order_edges_by_difficulty, rip_up_and_queue, routing_seed, select_edges_to_rip,
-    start_end_grid_points, update_corner_history_cost, update_edge_history_cost,
+    start_end_grid_points,
 };
-use super::route_single::route_single_edge;
+use super::parallel::{route_wave, schedule_waves, search_window};
+use super::route_single::{route_single_edge, RoutingCosts, RoutingUsage};
+use super::state::{PlacedNodes, RoutingState};
 use super::trace::{build_trace_layout_data, record_iteration_trace};
-use super::types::{EdgeRoutingResult, EdgeRoutingsResult, Path, RoutingConfig};
+use super::types::{EdgeRequest, EdgeRoutingResult, EdgeRoutingsResult, Path, RoutingConfig};
 
 impl RTreeObject for PlacedRectangularNode {
     type Envelope = rstar::AABB<Point>;
@@ -55,19 +58,33 @@ impl Direction {
 pub struct EdgeRouter {
     pub placed_nodes: HashMap<usize, PlacedRectangularNode>,
     pub object_map: PyIndexSet,
-    pub existing_edges: HashMap<(usize, usize), Vec<Point>>,
+    pub existing_edges: HashMap<(usize, usize), Path>,
     pub placed_node_tree: rstar::RTree<PlacedRectangularNode>,
+    // Derived from the placed nodes, rebuilt on the next routing call after nodes changed.
+    placed_nodes_cache: Option<PlacedNodes>,
+    // Usage of the existing edges on the raw grid, kept up to date as edges are added and removed.
+    routing_state: Option<RoutingState>,
+    /// Number of threads used to route edges with disjoint search windows concurrently.
+    #[pyo3(get, set)]
+    pub threads: usize,
+    // Memory of the path searches, one per thread, shared by all edges routed with this router.
+    search_workspaces: Vec<SearchWorkspace>,
 }
 
 #[pymethods]
 impl EdgeRouter {
     #[new]
-    pub fn new() -> Self {
+    #[pyo3(signature = (threads = 1))]
+    pub fn new(threads: usize) -> Self {
         EdgeRouter {
             placed_nodes: HashMap::default(),
             placed_node_tree: rstar::RTree::new(),
             object_map: PyIndexSet::default(),
             existing_edges: HashMap::default(),
+            placed_nodes_cache: None,
+            routing_state: None,
+            threads,
+            search_workspaces: vec![SearchWorkspace::new()],
         }
     }
 
@@ -76,6 +93,7 @@ impl EdgeRouter {
         let node_index = self.object_map.insert_full(node)?.0;
         self.placed_nodes.insert(node_index, placed_node);
         self.placed_node_tree.insert(placed_node);
+        self.placed_nodes_cache = None;
         Ok(())
     }
 
@@ -83,7 +101,15 @@ impl EdgeRouter {
         let start_index = self.object_map.insert_full(start)?.0;
         let end_index = self.object_map.insert_full(end)?.0;
 
-        self.existing_edges.insert((start_index, end_index), line.clone());
+        let path = Path::new(line);
+        if let Some(state) = self.routing_state.as_mut() {
+            state.apply_path(&path, 1);
+        }
+        if let Some(previous_path) = self.existing_edges.insert((start_index, end_index), path) {
+            if let Some(state) = self.routing_state.as_mut() {
+                state.apply_path(&previous_path, -1);
+            }
+        }
 
         Ok(())
     }
@@ -93,10 +119,19 @@ impl EdgeRouter {
         if let Some(index) = index {
             if let Some(placed_node) = self.placed_nodes.remove(&index) {
                 self.placed_node_tree.remove(&placed_node);
+                self.placed_nodes_cache = None;
             }
             // Clean up any edges referencing this node
-            self.existing_edges
-                .retain(|&(a, b), _| a != index && b != index);
+            let routing_state = &mut self.routing_state;
+            self.existing_edges.retain(|&(a, b), path| {
+                let keep = a != index && b != index;
+                if !keep {
+                    if let Some(state) = routing_state.as_mut() {
+                        state.apply_path(path, -1);
+                    }
+                }
+                keep
+            });
             self.object_map.remove(node)?;
         }
         Ok(())
@@ -107,7 +142,11 @@ impl EdgeRouter {
         let end_index = self.object_map.get_full(end)?.map(|(i, _)| i);
 
         if let (Some(start_index), Some(end_index)) = (start_index, end_index) {
-            self.existing_edges.remove(&(start_index, end_index));
+            if let Some(path) = self.existing_edges.remove(&(start_index, end_index)) {
+                if let Some(state) = self.routing_state.as_mut() {
+                    state.apply_path(&path, -1);
+                }
+            }
         }
 
         Ok(())
@@ -115,10 +154,40 @@ impl EdgeRouter {
 
     fn route_edges(
         &mut self,
+        py: Python<'_>,
         edges: Vec<(Bound<'_, PyAny>, Bound<'_, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)>,
     ) -> PyResult<EdgeRoutingsResult> {
+        // Routing only depends on the endpoints of the edges, so it can run while other threads use Python.
+        let requests: Vec<EdgeRequest> = edges
+            .into_iter()
+            .map(|(_, _, start, end, config)| (start, end, config))
+            .collect();
+        let paths = py.allow_threads(|| self.route_requests(&requests))?;
+        Ok(EdgeRoutingsResult::new(paths))
+    }
+
+    fn route_edge(
+        &mut self,
+        u: &Bound<'_, PyAny>,
+        v: &Bound<'_, PyAny>,
+        start: DirectedPoint,
+        end: DirectedPoint,
+        _global_start: DirectedPoint,
+        _global_end: DirectedPoint,
+        config: RoutingConfig,
+    ) -> PyResult<EdgeRoutingResult> {
+        let edges = vec![(u.clone(), v.clone(), start, end, config)];
+        let routed = self.route_edges(u.py(), edges)?;
+        let result_path = routed.paths.into_iter().next().unwrap_or_default();
+        Ok(EdgeRoutingResult::new(result_path))
+    }
+}
+
+impl EdgeRouter {
+    /// Route edges given by their endpoints, see `route_edges`. This does not touch any Python objects.
+    fn route_requests(&mut self, edges: &[EdgeRequest]) -> PyResult<Vec<Vec<DirectedPoint>>> {
         if edges.is_empty() {
-            return Ok(EdgeRoutingsResult::new(Vec::new()));
+            return Ok(Vec::new());
         }
 
         let max_iterations = 10;
@@ -128,28 +197,32 @@ impl EdgeRouter {
         let mut layout_nodes = Vec::new();
         let mut grid_points_trace = Vec::new();
 
+        if self.placed_nodes_cache.is_none() {
+            self.placed_nodes_cache = Some(PlacedNodes::new(self.placed_nodes.values().cloned().collect()));
+        }
+        let placed_nodes = self.placed_nodes_cache.as_ref().unwrap();
+
         // First we generate a grid from all start and end point projections and midpoints.
-        let grid = Grid::from_edges_and_nodes(
+        let grid = Grid::from_edges_and_node_bounds(
             &edges
                 .iter()
-                .map(|(_, _, start, end, _)| (start.as_point(), end.as_point()))
+                .map(|(start, end, _)| (start.as_point(), end.as_point()))
                 .collect(),
-            &self.placed_nodes.values().cloned().collect(),
+            placed_nodes.bounds,
         );
 
         let raw_area = grid.raw_area();
-        let raw_num_segments = raw_area.num_segments();
 
         // Convert all start and end points to grid points
-        let start_end_grid_points: HashSet<GridPoint> = start_end_grid_points(&grid, &edges);
+        let start_end_grid_points: HashSet<GridPoint> = start_end_grid_points(&grid, edges);
 
-        let placed_nodes_vector = self.placed_nodes.values().cloned().collect();
+        let placed_nodes_vector = &placed_nodes.nodes;
         let start_end_grid_points_vector: Vec<GridPoint> = start_end_grid_points.iter().cloned().collect();
 
-        let seed = routing_seed(&edges, &placed_nodes_vector);
+        let seed = routing_seed(edges, &placed_nodes.seed_keys);
         let mut rng: StdRng = StdRng::seed_from_u64(seed);
 
-        let masked_grid = MaskedGrid::from_nodes(&grid, &placed_nodes_vector, &start_end_grid_points_vector);
+        let masked_grid = MaskedGrid::from_nodes(&grid, placed_nodes_vector, &start_end_grid_points_vector);
 
         if trace_enabled {
             let (grid_points, nodes) = build_trace_layout_data(&grid, &masked_grid, &self.placed_nodes);
@@ -158,25 +231,17 @@ impl EdgeRouter {
         }
 
         // We also need to maintain usage and capacity on the raw grid, initialized with usage from
-        // existing edges. We could also use capacity to change how edges are routed here.
-        let mut raw_usage = vec![0; raw_num_segments as usize];
-        let mut raw_history_cost = vec![0.0; raw_num_segments as usize];
-        let mut raw_corner_usage = vec![0; raw_area.size()];
-        let mut raw_corner_history = vec![0.0; raw_area.size()];
-
-        let mut raw_history_cost_prefix_x = vec![0.0; ((raw_area.width()) * raw_area.height()) as usize];
-        let mut raw_history_cost_prefix_y = vec![0.0; (raw_area.width() * (raw_area.height())) as usize];
-
-        // Initialize usage with any edges that are already registered with the router.
-        for path in self.existing_edges.values() {
-            let path = Path::new(path.clone());
-            for segment_index in path.segments(&raw_area) {
-                raw_usage[segment_index] += 1;
-            }
-            for corner_index in path.corners(&raw_area) {
-                raw_corner_usage[corner_index] += 1;
-            }
+        // existing edges. The usage of the existing edges is kept between calls and only replayed
+        // if the raw area changed. We could also use capacity to change how edges are routed here.
+        if self.routing_state.as_ref().map_or(true, |state| state.raw_area != raw_area) {
+            self.routing_state = Some(RoutingState::new(raw_area.clone(), self.existing_edges.values()));
         }
+        let state = self.routing_state.as_mut().unwrap();
+        state.reset_history();
+
+        // All usage changes of this call are journaled, so that the state only contains the existing
+        // edges again once routing is done.
+        let mut usage_journal: Vec<(i32, Path)> = Vec::new();
 
         let mut result_paths: HashMap<(RawPoint, RawPoint), super::types::PathWithEndpoints> = HashMap::new();
 
@@ -187,68 +252,136 @@ impl EdgeRouter {
         let capacity = 1;
         let corner_lambda = 5.0;
         let corner_capacity = 1;
-        let mut op_edges = edges.clone();
+        let costs = RoutingCosts {
+            base_cost,
+            lambda,
+            capacity,
+            mu,
+            corner_lambda,
+            corner_capacity,
+        };
+        let mut op_edges = edges.to_vec();
+
+        let threads = self.threads.max(1);
+        self.search_workspaces.resize_with(threads, SearchWorkspace::new);
 
         for i in 0..max_iterations {
             // Update history prefix sums (history doesn't change within a pass).
-            raw_area.edge_prefix_sums(
-                &raw_history_cost,
-                &mut raw_history_cost_prefix_x,
-                &mut raw_history_cost_prefix_y,
-            );
+            state.refresh_history_prefix_sums();
 
-            let sorted_edges = order_edges_by_difficulty(&op_edges, &placed_nodes_vector, &mut rng);
+            let sorted_edges = order_edges_by_difficulty(&op_edges, placed_nodes_vector, &mut rng);
 
             let mut routed_edges_trace: Vec<((RawPoint, RawPoint), serde_json::Map<String, serde_json::Value>)> =
                 Vec::new();
             let mut overflow_map: HashMap<(RawPoint, RawPoint), bool> = HashMap::new();
-            for (_u, _v, start, end, _) in &sorted_edges {
+            // In parallel routing, edges are routed in waves of edges with disjoint search windows, each
+            // edge with its own random number generator. Otherwise every edge is routed on its own, in order.
+            let (mut waves, windowed_waves, mut parallel_edges, edge_seeds) = if threads > 1 {
+                let edge_seeds: Vec<u64> = sorted_edges.iter().map(|_| rng.gen()).collect();
+                let parallel_edges: Vec<_> = sorted_edges
+                    .iter()
+                    .zip(&edge_seeds)
+                    .map(|((start, end, _), seed)| {
+                        Some((
+                            *start,
+                            *end,
+                            search_window(&grid, start, end),
+                            StdRng::seed_from_u64(*seed),
+                        ))
+                    })
+                    .collect();
+                let windows: Vec<_> = parallel_edges.iter().map(|edge| edge.as_ref().unwrap().2).collect();
+                let waves = schedule_waves(&windows);
+                let windowed_waves = waves.len();
+                (waves, windowed_waves, parallel_edges, edge_seeds)
+            } else {
+                (
+                    (0..sorted_edges.len()).map(|edge| vec![edge]).collect(),
+                    0,
+                    Vec::new(),
+                    Vec::new(),
+                )
+            };
+
+            // Edges without a path within their search window are routed again without a window, one after
+            // another in waves after the windowed ones, so that the number of threads does not limit detours.
+            let mut wave_index = 0;
+            while wave_index < waves.len() {
+                let wave = std::mem::take(&mut waves[wave_index]);
+                let windowed = wave_index < windowed_waves;
+                wave_index += 1;
+
                 // Current congestion cost is computed directly from raw_usage
                 // inside route_single_edge — no prefix sums needed, so each
                 // edge immediately sees congestion from prior edges.
-                let (key, path_with_endpoints, trace_entry) = route_single_edge(
-                    &grid,
-                    &raw_area,
-                    &masked_grid,
-                    *start,
-                    *end,
-                    &mut rng,
-                    &raw_history_cost_prefix_x,
-                    &raw_history_cost_prefix_y,
-                    &mut raw_usage,
-                    &mut raw_corner_usage,
-                    &raw_corner_history,
-                    base_cost,
-                    lambda,
-                    capacity,
-                    mu,
-                    corner_lambda,
-                    corner_capacity,
-                    trace_enabled,
-                )?;
-
-                result_paths.insert(key, path_with_endpoints);
-                if let Some((trace_key, entry)) = trace_entry {
-                    routed_edges_trace.push((trace_key, entry));
-                    overflow_map.entry(trace_key).or_insert(false);
+                let usage = RoutingUsage {
+                    raw_usage: &state.raw_usage,
+                    raw_corner_usage: &state.raw_corner_usage,
+                    raw_corner_history: &state.raw_corner_history,
+                    raw_history_cost_prefix_x: &state.raw_history_cost_prefix_x,
+                    raw_history_cost_prefix_y: &state.raw_history_cost_prefix_y,
+                };
+                let routed_wave = if windowed {
+                    route_wave(
+                        &grid,
+                        &raw_area,
+                        &masked_grid,
+                        &mut self.search_workspaces,
+                        wave.iter().map(|edge| parallel_edges[*edge].take().unwrap()).collect(),
+                        usage,
+                        costs,
+                        trace_enabled,
+                    )
+                } else {
+                    let (start, end, _) = &sorted_edges[wave[0]];
+                    let mut edge_rng = edge_seeds.get(wave[0]).map(|seed| StdRng::seed_from_u64(*seed));
+                    vec![route_single_edge(
+                        &grid,
+                        &raw_area,
+                        &masked_grid,
+                        &mut self.search_workspaces[0],
+                        None,
+                        *start,
+                        *end,
+                        edge_rng.as_mut().unwrap_or(&mut rng),
+                        usage,
+                        costs,
+                        trace_enabled,
+                    )]
+                };
+
+                for (edge, routed) in wave.iter().zip(routed_wave) {
+                    let (key, path_with_endpoints, trace_entry) = match routed {
+                        Ok(Some(routed)) => routed,
+                        Ok(None) => {
+                            waves.push(vec![*edge]);
+                            continue;
+                        }
+                        Err(err) => {
+                            state.revert(&usage_journal);
+                            return Err(err);
+                        }
+                    };
+
+                    state.apply_path(&path_with_endpoints.path, 1);
+                    usage_journal.push((1, path_with_endpoints.path.clone()));
+                    result_paths.insert(key, path_with_endpoints);
+                    if let Some((trace_key, entry)) = trace_entry {
+                        routed_edges_trace.push((trace_key, entry));
+                        overflow_map.entry(trace_key).or_insert(false);
+                    }
                 }
             }
 
             // 4) Compute overflow
             let (total_overflow, edge_overflow, corner_overflow) =
-                compute_overflow(&raw_usage, &raw_corner_usage, capacity, corner_capacity);
+                compute_overflow(&state.raw_usage, &state.raw_corner_usage, capacity, corner_capacity);
             let finished = total_overflow == 0;
 
             if !finished {
                 // 5) Update history cost based on overflow (with decay to prevent runaway accumulation)
                 let history_decay = 0.85;
-                update_edge_history_cost(&raw_usage, &mut raw_history_cost, capacity, history_decay);
-                update_corner_history_cost(
-                    &raw_corner_usage,
-                    &mut raw_corner_history,
-                    corner_capacity,
-                    history_decay,
-                );
+                state.update_history_costs(capacity, corner_capacity, history_decay);
 
                 // 6) Select edges to rip up
                 op_edges.clear();
@@ -257,16 +390,31 @@ impl EdgeRouter {
                     &sorted_edges,
                     &result_paths,
                     &raw_area,
-                    &raw_usage,
-                    &raw_corner_usage,
+                    &state.raw_usage,
+                    &state.raw_corner_usage,
                     capacity,
                     corner_capacity,
                     trace_enabled,
                     &mut overflow_map,
                 );
 
-                op_edges =
-                    rip_up_and_queue(&to_rip, &result_paths, &raw_area, &mut raw_usage, &mut raw_corner_usage);
+                for (start, end, _) in &to_rip {
+                    let start_raw_point = raw_area.point_to_raw_point(&start.as_point());
+                    let end_raw_point = raw_area.point_to_raw_point(&end.as_point());
+                    if let (Some(start_raw_point), Some(end_raw_point)) = (start_raw_point, end_raw_point) {
+                        if let Some(routed_path) = result_paths.get(&(start_raw_point, end_raw_point)) {
+                            usage_journal.push((-1, routed_path.path.clone()));
+                        }
+                    }
+                }
+
+                op_edges = rip_up_and_queue(
+                    &to_rip,
+                    &result_paths,
+                    &raw_area,
+                    &mut state.raw_usage,
+                    &mut state.raw_corner_usage,
+                );
             } else {
                 op_edges.clear();
             }
@@ -280,8 +428,8 @@ impl EdgeRouter {
                     &result_paths,
                     &op_edges,
                     &raw_area,
-                    &raw_usage,
-                    &raw_corner_usage,
+                    &state.raw_usage,
+                    &state.raw_corner_usage,
                     total_overflow,
                     edge_overflow,
                     corner_overflow,
@@ -293,8 +441,10 @@ impl EdgeRouter {
             }
         }
 
+        state.revert(&usage_journal);
+
         let mut directed_paths: Vec<Vec<DirectedPoint>> = Vec::with_capacity(edges.len());
-        for (_u, _v, start, end, _config) in edges.iter() {
+        for (start, end, _config) in edges.iter() {
             let Some(start_raw_point) = raw_area.point_to_raw_point(&start.as_point()) else {
                 directed_paths.push(Vec::new());
                 continue;
@@ -337,22 +487,39 @@ impl EdgeRouter {
             })?;
         }
 
-        Ok(EdgeRoutingsResult::new(directed_paths))
+        Ok(directed_paths)
     }
+}
 
-    fn route_edge(
-        &mut self,
-        u: &Bound<'_, PyAny>,
-        v: &Bound<'_, PyAny>,
-        start: DirectedPoint,
-        end: DirectedPoint,
-        _global_start: DirectedPoint,
-        _global_end: DirectedPoint,
-        config: RoutingConfig,
-    ) -> PyResult<EdgeRoutingResult> {
-        let edges = vec![(u.clone(), v.clone(), start, end, config)];
-        let routed = self.route_edges(edges)?;
-        let result_path = routed.paths.into_iter().next().unwrap_or_default();
-        Ok(EdgeRoutingResult::new(result_path))
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::geometry::{RectangularNode, Size};
+
+    /// Route an edge between two points left and right of a node that reaches beyond the search window around
+    /// them, so that the edge has to detour around the node outside of the window.
+    fn route_around_wall(threads: usize) -> Vec<DirectedPoint> {
+        let mut router = EdgeRouter::new(threads);
+        router.placed_nodes.insert(
+            0,
+            PlacedRectangularNode {
+                center: Point { x: 0, y: 5 },
+                node: RectangularNode { size: Size::new(5, 81) },
+            },
+        );
+        let start = DirectedPoint::new(-4, 0, Direction::Up);
+        let end = DirectedPoint::new(4, 0, Direction::Up);
+        router
+            .route_requests(&[(start, end, RoutingConfig::default())])
+            .unwrap()
+            .remove(0)
+    }
+
+    #[test]
+    fn test_parallel_routing_detours_beyond_search_window() {
+        let sequential = route_around_wall(1);
+        // The wall starts at y = -35, so the edge has to pass above it.
+        assert!(sequential.iter().any(|point| point.y < -35));
+        assert_eq!(route_around_wall(4), sequential);
     }
 }
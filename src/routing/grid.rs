@@ -120,7 +120,26 @@ impl Grid {
         lines
     }
 
-    pub fn from_edges_and_nodes(edges: &Vec<(Point, Point)>, nodes: &Vec<PlacedRectangularNode>) -> Self {
+    /// The bounding box of all nodes as `(min_x, max_x, min_y, max_y)`.
+    pub(crate) fn node_bounds(nodes: &[PlacedRectangularNode]) -> (i32, i32, i32, i32) {
+        let mut min_nodes_x = i32::MAX;
+        let mut max_nodes_x = i32::MIN;
+        let mut min_nodes_y = i32::MAX;
+        let mut max_nodes_y = i32::MIN;
+
+        nodes.iter().for_each(|node| {
+            let tl = node.top_left();
+            let br = node.bottom_right();
+            min_nodes_x = min(min_nodes_x, tl.x);
+            max_nodes_x = max(max_nodes_x, br.x);
+            min_nodes_y = min(min_nodes_y, tl.y);
+            max_nodes_y = max(max_nodes_y, br.y);
+        });
+
+        (min_nodes_x, max_nodes_x, min_nodes_y, max_nodes_y)
+    }
+
+    pub fn from_edges_and_node_bounds(edges: &Vec<(Point, Point)>, node_bounds: (i32, i32, i32, i32)) -> Self {
         // First we generate a grid from all start and end point projections and midpoints.
 
         // Instead of pushing into BinaryHeap repeatedly,
@@ -135,20 +154,8 @@ impl Grid {
             y_set.insert(end.y);
         }
 
-        // Get the bounding box of all nodes
-        let mut min_nodes_x = i32::MAX;
-        let mut max_nodes_x = i32::MIN;
-        let mut min_nodes_y = i32::MAX;
-        let mut max_nodes_y = i32::MIN;
-
-        nodes.iter().for_each(|node| {
-            let tl = node.top_left();
-            let br = node.bottom_right();
-            min_nodes_x = min(min_nodes_x, tl.x);
-            max_nodes_x = max(max_nodes_x, br.x);
-            min_nodes_y = min(min_nodes_y, tl.y);
-            max_nodes_y = max(max_nodes_y, br.y);
-        });
+        // The bounding box of all nodes is computed once per node set by the caller.
+        let (min_nodes_x, max_nodes_x, min_nodes_y, max_nodes_y) = node_bounds;
 
         // Compute padded boundaries. Edges routing around the outside of the
         // graph need enough margin for multiple routing channels.
@@ -1,10 +1,14 @@
 mod astar;
+#[cfg(feature = "bench")]
+pub mod bench;
 mod edge_router;
 mod grid;
 mod masked_grid;
+mod parallel;
 mod raw_area;
 mod ripup;
 mod route_single;
+mod state;
 mod trace;
 mod types;
 
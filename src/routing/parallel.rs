@@ -0,0 +1,180 @@
+use std::collections::HashMap;
+use std::thread;
+
+use pyo3::prelude::*;
+use rand::rngs::StdRng;
+
+use crate::geometry::{DirectedPoint, PointLike};
+
+use super::astar::{SearchWindow, SearchWorkspace};
+use super::grid::Grid;
+use super::masked_grid::MaskedGrid;
+use super::raw_area::RawArea;
+use super::route_single::{route_single_edge, RoutedEdge, RoutingCosts, RoutingUsage};
+
+/// Grid lines around the bounding box of the endpoints of an edge that its search may use in parallel routing.
+pub(crate) const SEARCH_WINDOW_MARGIN: usize = 4;
+
+/// The search window of an edge, or None if an endpoint does not lie on the grid.
+pub(crate) fn search_window(grid: &Grid, start: &DirectedPoint, end: &DirectedPoint) -> Option<SearchWindow> {
+    let start_coords = grid.grid_point_to_grid_coords(grid.point_to_grid_point(&start.as_point())?)?;
+    let end_coords = grid.grid_point_to_grid_coords(grid.point_to_grid_point(&end.as_point())?)?;
+    Some(SearchWindow {
+        min_x: start_coords.0.min(end_coords.0).saturating_sub(SEARCH_WINDOW_MARGIN),
+        max_x: (start_coords.0.max(end_coords.0) + SEARCH_WINDOW_MARGIN).min(grid.width - 1),
+        min_y: start_coords.1.min(end_coords.1).saturating_sub(SEARCH_WINDOW_MARGIN),
+        max_y: (start_coords.1.max(end_coords.1) + SEARCH_WINDOW_MARGIN).min(grid.height - 1),
+    })
+}
+
+/// Side length in grid lines of the cells used to find overlapping search windows when scheduling waves.
+pub(crate) const WAVE_CELL_SIZE: usize = 8;
+
+/// Partition edges into waves of edges with pairwise disjoint search windows.
+///
+/// The windows are bucketed into coarse cells of `WAVE_CELL_SIZE` grid lines which remember the highest wave
+/// scheduled in them so far. Every edge is scheduled in the wave after the highest wave of the cells its
+/// window covers, so edges whose windows share a cell are routed in the given order. Edges without a window
+/// overlap all others and are scheduled in a wave of their own. The cost per edge depends on the size of its
+/// window, not on the number of earlier edges, and the result only depends on the windows, not on the number
+/// of threads used to route the waves.
+pub(crate) fn schedule_waves(windows: &[Option<SearchWindow>]) -> Vec<Vec<usize>> {
+    let mut cell_waves: HashMap<(usize, usize), usize> = HashMap::new();
+    let mut waves: Vec<Vec<usize>> = Vec::new();
+    // Edges scheduled after an edge without a window have to come after its wave.
+    let mut first_free_wave = 0;
+
+    for (edge, window) in windows.iter().enumerate() {
+        let wave = match window {
+            Some(window) => {
+                let cells_x = window.min_x / WAVE_CELL_SIZE..=window.max_x / WAVE_CELL_SIZE;
+                let cells_y = window.min_y / WAVE_CELL_SIZE..=window.max_y / WAVE_CELL_SIZE;
+                let wave = cells_x
+                    .clone()
+                    .flat_map(|x| cells_y.clone().map(move |y| (x, y)))
+                    .filter_map(|cell| cell_waves.get(&cell).map(|wave| wave + 1))
+                    .fold(first_free_wave, usize::max);
+                for x in cells_x {
+                    for y in cells_y.clone() {
+                        cell_waves.insert((x, y), wave);
+                    }
+                }
+                wave
+            }
+            None => {
+                let wave = waves.len();
+                first_free_wave = wave + 1;
+                wave
+            }
+        };
+        if wave == waves.len() {
+            waves.push(Vec::new());
+        }
+        waves[wave].push(edge);
+    }
+
+    waves
+}
+
+/// Route the edges of a wave concurrently against the same usage.
+///
+/// The results are returned in the order of the edges. As the search windows of a wave do not overlap, the
+/// edges do not see each other and the results are the same as if the edges were routed one after another.
+/// Edges without a search window cannot be routed and fail. Edges without a path within their search window
+/// get None and have to be routed again without a window.
+pub(crate) fn route_wave(
+    grid: &Grid,
+    raw_area: &RawArea,
+    masked_grid: &MaskedGrid,
+    workspaces: &mut [SearchWorkspace],
+    edges: Vec<(DirectedPoint, DirectedPoint, Option<SearchWindow>, StdRng)>,
+    usage: RoutingUsage<'_>,
+    costs: RoutingCosts,
+    trace_enabled: bool,
+) -> Vec<PyResult<Option<RoutedEdge>>> {
+    let route = |workspace: &mut SearchWorkspace, (start, end, window, mut rng): (_, _, _, StdRng)| {
+        route_single_edge(
+            grid,
+            raw_area,
+            masked_grid,
+            workspace,
+            window,
+            start,
+            end,
+            &mut rng,
+            usage,
+            costs,
+            trace_enabled,
+        )
+    };
+
+    let threads = workspaces.len().min(edges.len());
+    if threads <= 1 {
+        return edges.into_iter().map(|edge| route(&mut workspaces[0], edge)).collect();
+    }
+
+    let chunk_size = edges.len().div_ceil(threads);
+    let mut chunks: Vec<Vec<_>> = Vec::with_capacity(threads);
+    let mut edges = edges.into_iter().peekable();
+    while edges.peek().is_some() {
+        chunks.push(edges.by_ref().take(chunk_size).collect());
+    }
+
+    thread::scope(|scope| {
+        let handles: Vec<_> = chunks
+            .into_iter()
+            .zip(workspaces.iter_mut())
+            .map(|(chunk, workspace)| {
+                scope.spawn(move || chunk.into_iter().map(|edge| route(workspace, edge)).collect::<Vec<_>>())
+            })
+            .collect();
+        handles
+            .into_iter()
+            .flat_map(|handle| handle.join().expect("Routing thread panicked"))
+            .collect()
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn window(min_x: usize, max_x: usize, min_y: usize, max_y: usize) -> Option<SearchWindow> {
+        Some(SearchWindow {
+            min_x,
+            max_x,
+            min_y,
+            max_y,
+        })
+    }
+
+    #[test]
+    fn test_disjoint_windows_share_a_wave() {
+        let windows = [window(0, 7, 0, 7), window(8, 15, 0, 7), window(0, 7, 8, 15)];
+        assert_eq!(schedule_waves(&windows), vec![vec![0, 1, 2]]);
+    }
+
+    #[test]
+    fn test_overlapping_windows_keep_their_order() {
+        let windows = [
+            window(0, 7, 0, 7),
+            window(4, 12, 0, 7),
+            window(40, 48, 0, 7),
+            window(12, 20, 4, 12),
+            window(0, 2, 0, 2),
+        ];
+        assert_eq!(schedule_waves(&windows), vec![vec![0, 2], vec![1], vec![3, 4]]);
+    }
+
+    #[test]
+    fn test_edges_without_window_overlap_everything() {
+        let windows = [window(0, 4, 0, 4), None, window(10, 14, 10, 14)];
+        assert_eq!(schedule_waves(&windows), vec![vec![0], vec![1], vec![2]]);
+    }
+
+    #[test]
+    fn test_disjoint_windows_in_a_shared_cell_are_ordered() {
+        let windows = [window(0, 2, 0, 2), window(4, 6, 4, 6), window(16, 20, 16, 20)];
+        assert_eq!(schedule_waves(&windows), vec![vec![0, 2], vec![1]]);
+    }
+}
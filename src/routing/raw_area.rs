@@ -2,7 +2,7 @@ use crate::geometry::Point;
 
 use super::grid::RawPoint;
 
-#[derive(Clone, Hash)]
+#[derive(Clone, Hash, PartialEq, Eq, Debug)]
 pub(crate) struct RawArea {
     pub top_left: Point,
     pub bottom_right: Point,
@@ -3,24 +3,23 @@ use std::collections::hash_map::DefaultHasher;
 use std::collections::{HashMap, HashSet};
 use std::hash::{Hash, Hasher};
 
-use pyo3::prelude::*;
 use rand::Rng;
 
 use crate::geometry::{BoundingBox, DirectedPoint, PlacedRectangularNode, PointLike};
 
 use super::grid::{Grid, GridPoint, RawPoint};
 use super::raw_area::RawArea;
-use super::types::{PathWithEndpoints, RoutingConfig};
+use super::types::{EdgeRequest, PathWithEndpoints};
 
 pub(crate) fn routing_seed(
-    edges: &Vec<(Bound<'_, PyAny>, Bound<'_, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)>,
-    nodes: &Vec<PlacedRectangularNode>,
+    edges: &[EdgeRequest],
+    node_keys: &[(i32, i32, i32, i32)],
 ) -> u64 {
     let mut hasher = DefaultHasher::new();
     edges.len().hash(&mut hasher);
     let mut edge_keys: Vec<(i32, i32, i32, i32, i32, i32)> = edges
         .iter()
-        .map(|(_, _, start, end, _)| {
+        .map(|(start, end, _)| {
             (
                 start.x,
                 start.y,
@@ -41,12 +40,7 @@ pub(crate) fn routing_seed(
         ed.hash(&mut hasher);
     }
 
-    nodes.len().hash(&mut hasher);
-    let mut node_keys: Vec<(i32, i32, i32, i32)> = nodes
-        .iter()
-        .map(|node| (node.center.x, node.center.y, node.node.size.width, node.node.size.height))
-        .collect();
-    node_keys.sort();
+    node_keys.len().hash(&mut hasher);
     for (cx, cy, w, h) in node_keys {
         cx.hash(&mut hasher);
         cy.hash(&mut hasher);
@@ -56,12 +50,22 @@ pub(crate) fn routing_seed(
     hasher.finish()
 }
 
+/// The sorted keys of the nodes that enter the routing seed, see [routing_seed].
+pub(crate) fn node_seed_keys(nodes: &[PlacedRectangularNode]) -> Vec<(i32, i32, i32, i32)> {
+    let mut node_keys: Vec<(i32, i32, i32, i32)> = nodes
+        .iter()
+        .map(|node| (node.center.x, node.center.y, node.node.size.width, node.node.size.height))
+        .collect();
+    node_keys.sort();
+    node_keys
+}
+
 pub(crate) fn start_end_grid_points(
     grid: &Grid,
-    edges: &Vec<(Bound<'_, PyAny>, Bound<'_, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)>,
+    edges: &[EdgeRequest],
 ) -> HashSet<GridPoint> {
     let mut start_end_grid_points: HashSet<GridPoint> = HashSet::new();
-    for (_, _, start, end, _) in edges {
+    for (start, end, _) in edges {
         if let Some(start_index) = grid.point_to_grid_point(&start.as_point()) {
             start_end_grid_points.insert(start_index);
         }
@@ -72,21 +76,18 @@ pub(crate) fn start_end_grid_points(
     start_end_grid_points
 }
 
-pub(crate) fn order_edges_by_difficulty<'py, R: Rng + ?Sized>(
-    edges: &Vec<(Bound<'py, PyAny>, Bound<'py, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)>,
+pub(crate) fn order_edges_by_difficulty<R: Rng + ?Sized>(
+    edges: &[EdgeRequest],
     nodes: &Vec<PlacedRectangularNode>,
     rng: &mut R,
-) -> Vec<(Bound<'py, PyAny>, Bound<'py, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)> {
-    let mut edges_with_score: Vec<(
-        i32,
-        (Bound<'_, PyAny>, Bound<'_, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig),
-    )> = Vec::new();
+) -> Vec<EdgeRequest> {
+    let mut edges_with_score: Vec<(i32, EdgeRequest)> = Vec::new();
 
-    for (u, v, start, end, config) in edges {
+    for (start, end, config) in edges {
         // Add small reproducible noise to avoid fully deterministic ordering for similar edges.
         let noise: i32 = rng.gen_range(0..=10);
         let score = edge_difficulty(start, end, nodes) + noise;
-        edges_with_score.push((score, (u.clone(), v.clone(), *start, *end, config.clone())));
+        edges_with_score.push((score, (*start, *end, *config)));
     }
     edges_with_score.sort_by_key(|(score, _)| *score);
     edges_with_score.into_iter().map(|(_, edge)| edge).collect()
@@ -192,8 +193,8 @@ fn edge_path_has_overflow(
     false
 }
 
-pub(crate) fn select_edges_to_rip<'py>(
-    sorted_edges: &Vec<(Bound<'py, PyAny>, Bound<'py, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)>,
+pub(crate) fn select_edges_to_rip(
+    sorted_edges: &[EdgeRequest],
     result_paths: &HashMap<(RawPoint, RawPoint), PathWithEndpoints>,
     raw_area: &RawArea,
     raw_usage: &[i32],
@@ -202,10 +203,10 @@ pub(crate) fn select_edges_to_rip<'py>(
     corner_capacity: i32,
     trace_enabled: bool,
     overflow_map: &mut HashMap<(RawPoint, RawPoint), bool>,
-) -> Vec<(Bound<'py, PyAny>, Bound<'py, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)> {
+) -> Vec<EdgeRequest> {
     let mut to_rip = Vec::new();
 
-    for (u, v, start, end, config) in sorted_edges {
+    for (start, end, config) in sorted_edges {
         let start_raw_point = raw_area.point_to_raw_point(&start.as_point()).unwrap();
         let end_raw_point = raw_area.point_to_raw_point(&end.as_point()).unwrap();
 
@@ -218,23 +219,23 @@ pub(crate) fn select_edges_to_rip<'py>(
             if trace_enabled {
                 overflow_map.insert(key, true);
             }
-            to_rip.push((u.clone(), v.clone(), *start, *end, config.clone()));
+            to_rip.push((*start, *end, *config));
         }
     }
 
     to_rip
 }
 
-pub(crate) fn rip_up_and_queue<'py>(
-    to_rip: &Vec<(Bound<'py, PyAny>, Bound<'py, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)>,
+pub(crate) fn rip_up_and_queue(
+    to_rip: &[EdgeRequest],
     result_paths: &HashMap<(RawPoint, RawPoint), PathWithEndpoints>,
     raw_area: &RawArea,
     raw_usage: &mut [i32],
     raw_corner_usage: &mut [i32],
-) -> Vec<(Bound<'py, PyAny>, Bound<'py, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)> {
+) -> Vec<EdgeRequest> {
     let mut op_edges = Vec::new();
 
-    for (u, v, start, end, config) in to_rip {
+    for (start, end, config) in to_rip {
         let start_raw_point = raw_area.point_to_raw_point(&start.as_point()).unwrap();
         let end_raw_point = raw_area.point_to_raw_point(&end.as_point()).unwrap();
         if let Some(routed_path) = result_paths.get(&(start_raw_point, end_raw_point)) {
@@ -245,7 +246,7 @@ pub(crate) fn rip_up_and_queue<'py>(
                 raw_corner_usage[corner_index] -= 1;
             }
         }
-        op_edges.push((u.clone(), v.clone(), *start, *end, config.clone()));
+        op_edges.push((*start, *end, *config));
     }
 
     op_edges
@@ -6,36 +6,58 @@ use serde_json::json;
 
 use crate::geometry::{DirectedPoint, Orientation, Point, PointLike};
 
-use super::astar::route_visibility_astar;
+use super::astar::{route_visibility_astar, SearchWindow, SearchWorkspace};
 use super::grid::{Grid, GridPoint, RawPoint};
 use super::masked_grid::MaskedGrid;
 use super::raw_area::RawArea;
 use super::types::{Path, PathWithEndpoints};
 
+/// The endpoints of a routed edge on the raw grid, its path and its trace entry if tracing is enabled.
+pub(crate) type RoutedEdge = (
+    (RawPoint, RawPoint),
+    PathWithEndpoints,
+    Option<((RawPoint, RawPoint), serde_json::Map<String, serde_json::Value>)>,
+);
+
+/// The usage and history costs on the raw grid that the cost of a route is computed from.
+#[derive(Clone, Copy)]
+pub(crate) struct RoutingUsage<'a> {
+    pub raw_usage: &'a [i32],
+    pub raw_corner_usage: &'a [i32],
+    pub raw_corner_history: &'a [f64],
+    pub raw_history_cost_prefix_x: &'a [f64],
+    pub raw_history_cost_prefix_y: &'a [f64],
+}
+
+/// The weights of the cost of a route.
+#[derive(Clone, Copy)]
+pub(crate) struct RoutingCosts {
+    pub base_cost: f64,
+    pub lambda: f64,
+    pub capacity: i32,
+    pub mu: f64,
+    pub corner_lambda: f64,
+    pub corner_capacity: i32,
+}
+
+/// Route a single edge against the given usage.
+///
+/// The usage of the routed path is not added, so that the caller decides when other edges see it. If the
+/// search is limited to a `window` and finds no path within it, None is returned so that the caller can
+/// route the edge again without a window. Otherwise a failed search falls back to an L-shaped path.
 pub(crate) fn route_single_edge<R: Rng + ?Sized>(
     grid: &Grid,
     raw_area: &RawArea,
     masked_grid: &MaskedGrid,
+    workspace: &mut SearchWorkspace,
+    window: Option<SearchWindow>,
     start: DirectedPoint,
     end: DirectedPoint,
     rng: &mut R,
-    raw_history_cost_prefix_x: &[f64],
-    raw_history_cost_prefix_y: &[f64],
-    raw_usage: &mut [i32],
-    raw_corner_usage: &mut [i32],
-    raw_corner_history: &[f64],
-    base_cost: f64,
-    lambda: f64,
-    capacity: i32,
-    mu: f64,
-    corner_lambda: f64,
-    corner_capacity: i32,
+    usage: RoutingUsage<'_>,
+    costs: RoutingCosts,
     trace_enabled: bool,
-) -> PyResult<(
-    (RawPoint, RawPoint),
-    PathWithEndpoints,
-    Option<((RawPoint, RawPoint), serde_json::Map<String, serde_json::Value>)>,
-)> {
+) -> PyResult<Option<RoutedEdge>> {
     let start_raw_point = raw_area
         .point_to_raw_point(&start.as_point())
         .ok_or_else(|| PyErr::new::<pyo3::exceptions::PyValueError, _>("Start or end point is out of bounds"))?;
@@ -53,8 +75,26 @@ pub(crate) fn route_single_edge<R: Rng + ?Sized>(
     let start_orientation: Orientation = start.direction.to_orientation();
     let end_orientation: Orientation = end.direction.to_orientation();
 
+    let RoutingUsage {
+        raw_usage,
+        raw_corner_usage,
+        raw_corner_history,
+        raw_history_cost_prefix_x,
+        raw_history_cost_prefix_y,
+    } = usage;
+    let RoutingCosts {
+        base_cost,
+        lambda,
+        capacity,
+        mu,
+        corner_lambda,
+        corner_capacity,
+    } = costs;
+
     let grid_path = match route_visibility_astar(
         masked_grid,
+        workspace,
+        window,
         start_grid_point,
         end_grid_point,
         start_orientation,
@@ -113,6 +153,7 @@ pub(crate) fn route_single_edge<R: Rng + ?Sized>(
         },
     ) {
         Ok(path) => path,
+        Err(_) if window.is_some() => return Ok(None),
         Err(_) => {
             // Fallback: build a simple L-shaped Manhattan path. This keeps rendering stable
             // in cases where the visibility graph is fully disconnected due to masking.
@@ -187,13 +228,6 @@ pub(crate) fn route_single_edge<R: Rng + ?Sized>(
     let path = Path::new(grid_points);
     let path_with_endpoints = PathWithEndpoints::new(path, start, end);
 
-    for segment_index in path_with_endpoints.segments(raw_area) {
-        raw_usage[segment_index] += 1;
-    }
-    for corner_index in path_with_endpoints.corners(raw_area) {
-        raw_corner_usage[corner_index] += 1;
-    }
-
     let trace_entry = if trace_enabled {
         let grid_path_trace: Vec<serde_json::Value> = grid_path
             .iter()
@@ -240,7 +274,11 @@ pub(crate) fn route_single_edge<R: Rng + ?Sized>(
         None
     };
 
-    Ok(((start_raw_point, end_raw_point), path_with_endpoints, trace_entry))
+    Ok(Some((
+        (start_raw_point, end_raw_point),
+        path_with_endpoints,
+        trace_entry,
+    )))
 }
 
 /// Compute segment cost directly from raw_usage. O(segment_length) per call,
@@ -336,3 +374,71 @@ fn segment_cost_from_prefix_sums(
         raw_cost_prefix_x[right_raw_point.0 as usize] - raw_cost_prefix_x[left_raw_point.0 as usize]
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use rand::rngs::StdRng;
+    use rand::SeedableRng;
+
+    use super::*;
+    use crate::geometry::{Direction, PlacedRectangularNode, RectangularNode, Size};
+    use crate::routing::parallel::search_window;
+    use crate::routing::state::RoutingState;
+
+    #[test]
+    fn test_windowed_search_without_path_returns_none() {
+        // A node between the endpoints that reaches beyond the search window around them.
+        let nodes = vec![PlacedRectangularNode {
+            center: Point { x: 0, y: 5 },
+            node: RectangularNode { size: Size::new(5, 81) },
+        }];
+        let start = DirectedPoint::new(-4, 0, Direction::Up);
+        let end = DirectedPoint::new(4, 0, Direction::Up);
+        let grid =
+            Grid::from_edges_and_node_bounds(&vec![(start.as_point(), end.as_point())], Grid::node_bounds(&nodes));
+        let raw_area = grid.raw_area();
+        let endpoints = vec![
+            grid.point_to_grid_point(&start.as_point()).unwrap(),
+            grid.point_to_grid_point(&end.as_point()).unwrap(),
+        ];
+        let masked_grid = MaskedGrid::from_nodes(&grid, &nodes, &endpoints);
+        let mut state = RoutingState::new(raw_area.clone(), []);
+        state.refresh_history_prefix_sums();
+        let usage = RoutingUsage {
+            raw_usage: &state.raw_usage,
+            raw_corner_usage: &state.raw_corner_usage,
+            raw_corner_history: &state.raw_corner_history,
+            raw_history_cost_prefix_x: &state.raw_history_cost_prefix_x,
+            raw_history_cost_prefix_y: &state.raw_history_cost_prefix_y,
+        };
+        let costs = RoutingCosts {
+            base_cost: 1.0,
+            lambda: 2.0,
+            capacity: 1,
+            mu: 0.5,
+            corner_lambda: 5.0,
+            corner_capacity: 1,
+        };
+        let route = |window| {
+            route_single_edge(
+                &grid,
+                &raw_area,
+                &masked_grid,
+                &mut SearchWorkspace::new(),
+                window,
+                start,
+                end,
+                &mut StdRng::seed_from_u64(0),
+                usage,
+                costs,
+                false,
+            )
+            .unwrap()
+        };
+
+        assert!(route(search_window(&grid, &start, &end)).is_none());
+        let (_, path, _) = route(None).unwrap();
+        // The node starts at y = -35, so the edge has to pass above it.
+        assert!(path.to_directed_points().iter().any(|point| point.y < -35));
+    }
+}
@@ -0,0 +1,203 @@
+use crate::geometry::PlacedRectangularNode;
+
+use super::grid::Grid;
+use super::raw_area::RawArea;
+use super::ripup::{node_seed_keys, update_corner_history_cost, update_edge_history_cost};
+use super::types::Path;
+
+/// The placed nodes of a router together with the values derived from them that every routing call needs.
+///
+/// This is cached by the router and only rebuilt when nodes are added or removed.
+pub(crate) struct PlacedNodes {
+    pub nodes: Vec<PlacedRectangularNode>,
+    pub seed_keys: Vec<(i32, i32, i32, i32)>,
+    pub bounds: (i32, i32, i32, i32),
+}
+
+impl PlacedNodes {
+    pub fn new(nodes: Vec<PlacedRectangularNode>) -> Self {
+        let seed_keys = node_seed_keys(&nodes);
+        let bounds = Grid::node_bounds(&nodes);
+        PlacedNodes {
+            nodes,
+            seed_keys,
+            bounds,
+        }
+    }
+}
+
+/// Usage and history costs on the raw grid that are kept between routing calls.
+///
+/// The usage of the edges registered with the router is maintained incrementally as edges are added
+/// and removed, so routing a single edge does not have to replay all existing edges. The state is only
+/// valid for the raw area it was created for and has to be rebuilt if the routing area changes.
+pub(crate) struct RoutingState {
+    pub raw_area: RawArea,
+    pub raw_usage: Vec<i32>,
+    pub raw_corner_usage: Vec<i32>,
+    pub raw_history_cost: Vec<f64>,
+    pub raw_corner_history: Vec<f64>,
+    pub raw_history_cost_prefix_x: Vec<f64>,
+    pub raw_history_cost_prefix_y: Vec<f64>,
+    history_dirty: bool,
+    prefix_sums_stale: bool,
+}
+
+impl RoutingState {
+    pub fn new<'a>(raw_area: RawArea, existing_paths: impl IntoIterator<Item = &'a Path>) -> Self {
+        let raw_num_segments = raw_area.num_segments();
+        let raw_size = raw_area.size();
+        let mut state = RoutingState {
+            raw_usage: vec![0; raw_num_segments],
+            raw_corner_usage: vec![0; raw_size],
+            raw_history_cost: vec![0.0; raw_num_segments],
+            raw_corner_history: vec![0.0; raw_size],
+            raw_history_cost_prefix_x: vec![0.0; raw_size],
+            raw_history_cost_prefix_y: vec![0.0; raw_size],
+            raw_area,
+            history_dirty: false,
+            prefix_sums_stale: false,
+        };
+        for path in existing_paths {
+            state.apply_path(path, 1);
+        }
+        state
+    }
+
+    /// Add `delta` to the usage of all segments and corners of a path. Parts of the path that lie
+    /// outside of the raw area are ignored.
+    pub fn apply_path(&mut self, path: &Path, delta: i32) {
+        for segment_index in path.segments(&self.raw_area) {
+            if let Some(usage) = self.raw_usage.get_mut(segment_index) {
+                *usage += delta;
+            }
+        }
+        for corner_index in path.corners(&self.raw_area) {
+            if let Some(usage) = self.raw_corner_usage.get_mut(corner_index) {
+                *usage += delta;
+            }
+        }
+    }
+
+    /// Undo the usage changes recorded in a journal of `(delta, path)` entries.
+    pub fn revert(&mut self, journal: &[(i32, Path)]) {
+        for (delta, path) in journal.iter().rev() {
+            self.apply_path(path, -delta);
+        }
+    }
+
+    /// Reset the history costs, history only accumulates within a single routing call.
+    pub fn reset_history(&mut self) {
+        if !self.history_dirty {
+            return;
+        }
+        self.raw_history_cost.fill(0.0);
+        self.raw_corner_history.fill(0.0);
+        self.raw_history_cost_prefix_x.fill(0.0);
+        self.raw_history_cost_prefix_y.fill(0.0);
+        self.history_dirty = false;
+        self.prefix_sums_stale = false;
+    }
+
+    pub fn update_history_costs(&mut self, capacity: i32, corner_capacity: i32, decay: f64) {
+        update_edge_history_cost(&self.raw_usage, &mut self.raw_history_cost, capacity, decay);
+        update_corner_history_cost(
+            &self.raw_corner_usage,
+            &mut self.raw_corner_history,
+            corner_capacity,
+            decay,
+        );
+        self.history_dirty = true;
+        self.prefix_sums_stale = true;
+    }
+
+    /// Recompute the prefix sums of the history costs if the history changed since they were last computed.
+    pub fn refresh_history_prefix_sums(&mut self) {
+        if !self.prefix_sums_stale {
+            return;
+        }
+        self.raw_area.edge_prefix_sums(
+            &self.raw_history_cost,
+            &mut self.raw_history_cost_prefix_x,
+            &mut self.raw_history_cost_prefix_y,
+        );
+        self.prefix_sums_stale = false;
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::geometry::Point;
+
+    fn area() -> RawArea {
+        RawArea {
+            top_left: Point { x: 0, y: 0 },
+            bottom_right: Point { x: 9, y: 9 },
+        }
+    }
+
+    fn l_path() -> Path {
+        Path::new(vec![Point { x: 1, y: 1 }, Point { x: 5, y: 1 }, Point { x: 5, y: 4 }])
+    }
+
+    #[test]
+    fn test_incremental_usage_matches_replay() {
+        let first = l_path();
+        let second = Path::new(vec![Point { x: 0, y: 1 }, Point { x: 8, y: 1 }]);
+
+        let mut state = RoutingState::new(area(), [&first]);
+        state.apply_path(&second, 1);
+        let replayed = RoutingState::new(area(), [&first, &second]);
+        assert_eq!(state.raw_usage, replayed.raw_usage);
+        assert_eq!(state.raw_corner_usage, replayed.raw_corner_usage);
+
+        state.apply_path(&first, -1);
+        let replayed = RoutingState::new(area(), [&second]);
+        assert_eq!(state.raw_usage, replayed.raw_usage);
+        assert_eq!(state.raw_corner_usage, replayed.raw_corner_usage);
+    }
+
+    #[test]
+    fn test_revert_restores_usage() {
+        let existing = l_path();
+        let mut state = RoutingState::new(area(), [&existing]);
+        let usage = state.raw_usage.clone();
+        let corner_usage = state.raw_corner_usage.clone();
+
+        let journal = vec![
+            (1, l_path()),
+            (-1, existing.clone()),
+            (1, Path::new(vec![Point { x: 2, y: 0 }, Point { x: 2, y: 9 }])),
+        ];
+        for (delta, path) in &journal {
+            state.apply_path(path, *delta);
+        }
+        state.revert(&journal);
+
+        assert_eq!(state.raw_usage, usage);
+        assert_eq!(state.raw_corner_usage, corner_usage);
+    }
+
+    #[test]
+    fn test_paths_outside_of_area_are_ignored() {
+        let outside = Path::new(vec![Point { x: 20, y: 20 }, Point { x: 20, y: 30 }]);
+        let state = RoutingState::new(area(), [&outside]);
+        assert!(state.raw_corner_usage.iter().all(|usage| *usage == 0));
+    }
+
+    #[test]
+    fn test_reset_history() {
+        let existing = Path::new(vec![Point { x: 0, y: 0 }, Point { x: 3, y: 0 }]);
+        let mut state = RoutingState::new(area(), [&existing, &existing]);
+
+        state.update_history_costs(1, 1, 0.85);
+        state.refresh_history_prefix_sums();
+        assert!(state.raw_history_cost.iter().any(|cost| *cost > 0.0));
+        assert!(state.raw_history_cost_prefix_x.iter().any(|cost| *cost > 0.0));
+
+        state.reset_history();
+        assert!(state.raw_history_cost.iter().all(|cost| *cost == 0.0));
+        assert!(state.raw_history_cost_prefix_x.iter().all(|cost| *cost == 0.0));
+    }
+}
@@ -1,14 +1,13 @@
 use std::collections::HashMap;
 
-use pyo3::prelude::*;
 use serde_json::json;
 
-use crate::geometry::{BoundingBox, DirectedPoint, PlacedRectangularNode};
+use crate::geometry::{BoundingBox, PlacedRectangularNode};
 
 use super::grid::{Grid, GridPoint, RawPoint};
 use super::masked_grid::MaskedGrid;
 use super::raw_area::RawArea;
-use super::types::{PathWithEndpoints, RoutingConfig};
+use super::types::{EdgeRequest, PathWithEndpoints};
 
 pub(crate) fn build_trace_layout_data(
     grid: &Grid,
@@ -78,13 +77,13 @@ pub(crate) fn build_trace_layout_data(
     (grid_points_trace, layout_nodes)
 }
 
-pub(crate) fn record_iteration_trace<'py>(
+pub(crate) fn record_iteration_trace(
     iteration_logs: &mut Vec<serde_json::Value>,
     iteration: usize,
     routed_edges_trace: Vec<((RawPoint, RawPoint), serde_json::Map<String, serde_json::Value>)>,
     overflow_map: &HashMap<(RawPoint, RawPoint), bool>,
     result_paths: &HashMap<(RawPoint, RawPoint), PathWithEndpoints>,
-    op_edges: &Vec<(Bound<'py, PyAny>, Bound<'py, PyAny>, DirectedPoint, DirectedPoint, RoutingConfig)>,
+    op_edges: &[EdgeRequest],
     raw_area: &RawArea,
     raw_usage: &[i32],
     raw_corner_usage: &[i32],
@@ -121,7 +120,7 @@ pub(crate) fn record_iteration_trace<'py>(
 
     let ripped_up_next: Vec<serde_json::Value> = op_edges
         .iter()
-        .map(|(_, _, start, end, _)| {
+        .map(|(start, end, _)| {
             json!({
                 "start": { "x": start.x, "y": start.y, "direction": format!("{:?}", start.direction) },
                 "end": { "x": end.x, "y": end.y, "direction": format!("{:?}", end.direction) }
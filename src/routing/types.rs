@@ -66,6 +66,11 @@ impl EdgeRoutingsResult {
     }
 }
 
+/// An edge to route given by its start and end point and routing configuration.
+///
+/// Routing does not need the nodes of an edge, only these plain values, so it can run without the GIL.
+pub(crate) type EdgeRequest = (DirectedPoint, DirectedPoint, RoutingConfig);
+
 /// Wrapper around a routed path of grid points that provides helper iteration methods.
 #[allow(dead_code)]
 #[derive(Clone, PartialEq, Debug)]
@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+
+from rich.segment import Segment
+
+from netext.rendering.buffer_index import BufferGroup, MinMaxCounter, StripBufferIndex
+from netext.rendering.segment_buffer import Layer, Spacer, Strip, StripBuffer, ZIndex
+
+
+@dataclass
+class BoxBuffer(StripBuffer):
+    x: int
+    y: int
+    box_height: int
+
+    @property
+    def left_x(self):
+        return self.x
+
+    @property
+    def right_x(self):
+        return self.x
+
+    @property
+    def top_y(self):
+        return self.y
+
+    @property
+    def bottom_y(self):
+        return self.y + self.box_height - 1
+
+    @property
+    def height(self):
+        return self.box_height
+
+    @property
+    def width(self):
+        return 1
+
+
+def box(y: int, height: int = 1) -> BoxBuffer:
+    return BoxBuffer(
+        z_index=ZIndex(layer=Layer.BACKGROUND),
+        x=0,
+        y=y,
+        box_height=height,
+        strips=[Strip(segments=[Segment("X")]) for _ in range(height)],
+    )
+
+
+def test_query_rows_returns_intersecting_buffers():
+    index = StripBufferIndex(block_height=4)
+    top, middle, tall = box(0), box(10), box(-20, height=50)
+    index.set(BufferGroup.NODES, 1, [top])
+    index.set(BufferGroup.NODES, 2, [middle])
+    index.set(BufferGroup.EDGES, (1, 2), [tall])
+
+    assert index.query_rows(5, 9) == [tall]
+    assert index.query_rows(0, 10) == [top, middle, tall]
+    assert index.query_rows(100, 200) == []
+    assert len(index) == 3
+
+
+def test_query_rows_orders_by_group_and_insertion():
+    index = StripBufferIndex()
+    first, second, port = box(0), box(0), box(0)
+    index.set(BufferGroup.PORTS, 1, [port])
+    index.set(BufferGroup.NODES, 2, [first])
+    index.set(BufferGroup.NODES, 1, [second])
+
+    assert index.query_rows(0, 0) == [first, second, port]
+
+    # Replacing keeps the position, removing and setting again moves to the end.
+    replaced = box(0)
+    index.set(BufferGroup.NODES, 2, [replaced])
+    assert index.query_rows(0, 0) == [replaced, second, port]
+
+    index.remove(BufferGroup.NODES, 2)
+    index.set(BufferGroup.NODES, 2, [replaced])
+    assert index.query_rows(0, 0) == [second, replaced, port]
+
+
+def test_set_moves_buffers_between_rows():
+    index = StripBufferIndex(block_height=2)
+    buffer = box(0)
+    index.set(BufferGroup.NODES, 1, [buffer])
+
+    moved = box(30)
+    index.set(BufferGroup.NODES, 1, [moved])
+    assert index.query_rows(0, 5) == []
+    assert index.query_rows(30, 30) == [moved]
+
+    index.set(BufferGroup.NODES, 1, [])
+    assert (BufferGroup.NODES, 1) not in index
+    assert index.query_rows(30, 30) == []
+
+
+def test_take_dirty_rows_reports_old_and_new_rows():
+    index = StripBufferIndex()
+    assert index.take_dirty_rows() is None
+
+    buffer = box(0, height=2)
+    index.set(BufferGroup.NODES, 1, [buffer])
+    assert index.take_dirty_rows() == [(0, 1)]
+
+    buffer.y = 10
+    index.set(BufferGroup.NODES, 1, [buffer])
+    assert index.take_dirty_rows() == [(0, 1), (10, 11)]
+
+    index.remove(BufferGroup.NODES, 1)
+    assert index.take_dirty_rows() == [(10, 11)]
+    assert index.take_dirty_rows() == []
+
+    index.clear()
+    assert index.take_dirty_rows() is None
+
+
+def test_buffer_at_resolves_z_order_and_spacers():
+    index = StripBufferIndex()
+    edge = BoxBuffer(z_index=ZIndex(layer=Layer.EDGES), x=0, y=0, box_height=2, strips=[])
+    edge.strips = [Strip(segments=[Segment("X")]), Strip(segments=[Segment("X")])]
+    node = BoxBuffer(z_index=ZIndex(layer=Layer.NODES), x=0, y=0, box_height=2, strips=[])
+    node.strips = [Strip(segments=[Spacer(width=1)]), Strip(segments=[Segment("N")])]
+    index.set(BufferGroup.EDGES, (1, 2), [edge])
+    index.set(BufferGroup.NODES, 1, [node])
+
+    assert index.buffer_at(0, 0) is edge
+    assert index.buffer_at(0, 1) is node
+    assert index.buffer_at(1, 1) is None
+    assert index.buffer_at(0, 2) is None
+
+
+def test_bounding_box_follows_updates_and_removals():
+    index = StripBufferIndex(block_height=4)
+    assert index.bounding_box() is None
+
+    index.set(BufferGroup.NODES, 1, [box(0)])
+    index.set(BufferGroup.NODES, 2, [box(10, height=3)])
+    index.set(BufferGroup.EDGES, (1, 2), [box(-5)])
+    assert index.bounding_box() == (0, -5, 0, 12)
+
+    index.set(BufferGroup.NODES, 2, [box(4)])
+    assert index.bounding_box() == (0, -5, 0, 4)
+
+    index.remove(BufferGroup.EDGES, (1, 2))
+    assert index.bounding_box() == (0, 0, 0, 4)
+
+    index.clear()
+    assert index.bounding_box() is None
+
+
+def test_min_max_counter_with_duplicates():
+    counter = MinMaxCounter()
+    for value in [3, 1, 4, 1, 5]:
+        counter.add(value)
+    assert (counter.min(), counter.max()) == (1, 5)
+
+    counter.remove(1)
+    assert counter.min() == 1
+    counter.remove(1)
+    counter.remove(5)
+    assert (counter.min(), counter.max()) == (3, 4)
+
+    for _ in range(100):
+        counter.add(0)
+        counter.remove(0)
+    assert (counter.min(), counter.max(), len(counter)) == (3, 4, 2)
@@ -4,8 +4,9 @@ from typing import cast
 import pytest
 from rich.console import Console
 from rich.segment import Segment, Segments
+from rich.style import Style
 
-from netext.buffer_renderer import flatten_strips, render_buffers
+from netext.buffer_renderer import flatten_strips, render_buffers, render_buffers_native
 from netext.geometry import Point
 from netext.geometry.region import Region
 from netext.node_rasterizer import NodeBuffer
@@ -895,6 +896,26 @@ def test_render_node_buffer_with_empty_line_and_no_buffer(console):
     assert capture.get() == " X \n   \n X \n   \n"
 
 
+def test_render_node_buffer_with_offset_and_no_buffer(console):
+    test_buffer = NodeBuffer(
+        node=0,
+        z_index=ZIndex(layer=Layer.BACKGROUND),
+        center=Point(x=1, y=1),
+        shape_width=3,
+        shape_height=3,
+        strips=[
+            Strip(segments=[Spacer(width=1), Segment("X")]),
+            Strip(segments=[Segment("")]),
+            Strip(segments=[Spacer(width=1), Segment("X")]),
+        ],
+    )
+
+    with console.capture() as capture:
+        console.print(Segments(flatten_strips(*render_buffers([test_buffer], Region(1, 0, 2, 4)))))
+
+    assert capture.get() == "X \n  \nX \n  \n"
+
+
 def test_render_buffer_with_overflow_segment_fails(console):
     test_buffers = [
         LineBuffer(
@@ -909,3 +930,48 @@ def test_render_buffer_with_overflow_segment_fails(console):
 
     with pytest.raises(RuntimeError, match="Segment overflow"):
         list(render_buffers(test_buffers, Region(0, 0, 3, 1))[0])
+
+
+@pytest.mark.parametrize("viewport", [Region(0, 0, 10, 1), Region(2, 0, 5, 1), Region(-3, 0, 8, 1)])
+def test_render_buffers_native_matches_render_buffers(viewport):
+    test_buffers = [
+        LineBuffer(
+            z_index=ZIndex(layer=Layer.EDGES),
+            x=0,
+            line_width=9,
+            strips=[
+                Strip(
+                    segments=[Segment("AB", Style(color="red")), Spacer(width=3), Segment("CDEF", Style(bold=True))],
+                )
+            ],
+        ),
+        LineBuffer(
+            z_index=ZIndex(layer=Layer.NODES),
+            x=1,
+            line_width=5,
+            strips=[Strip(segments=[Spacer(width=2), Segment("XYZ")])],
+        ),
+        LineBuffer(
+            z_index=ZIndex(layer=Layer.BACKGROUND),
+            x=4,
+            line_width=4,
+            strips=[Strip(segments=[Segment("1234", Style(color="red"))])],
+        ),
+    ]
+
+    assert render_buffers_native(test_buffers, viewport, build_reverse_map=True) == render_buffers(
+        test_buffers, viewport, build_reverse_map=True
+    )
+
+
+def test_render_buffers_native_falls_back_for_wide_characters(console):
+    test_buffers = [
+        LineBuffer(
+            z_index=ZIndex(layer=Layer.BACKGROUND),
+            x=1,
+            line_width=4,
+            strips=[Strip(segments=[Segment("😀😀")])],
+        ),
+    ]
+
+    assert render_buffers_native(test_buffers, Region(0, 0, 6, 1)) == render_buffers(test_buffers, Region(0, 0, 6, 1))
@@ -1,14 +1,28 @@
+from typing import Any, cast
+
 import pytest
 from networkx import binomial_tree
 from networkx import DiGraph
 from rich.console import Console
+from rich.style import Style
 
-from netext import ConsoleGraph
-from netext.console_graph import AutoZoom
+from netext import AddEdge, AddNode, ConsoleGraph, RemoveEdge, RemoveNode, UpdateEdge, UpdateNode
+from netext.console_graph import AutoZoom, RenderState
 from netext.geometry.point import FloatPoint
 from netext.geometry.region import Region
-from netext.layout_engines import StaticLayout
+from netext._core import Point
+from netext.buffer_renderer import iter_render_buffers, render_buffers
+from netext.edge_routing.route import route_edges
+from netext.graph_transitions import compute_incremental_node_layout
+from netext.layout_engines import (
+    ForceDirectedLayout,
+    LayoutDirection,
+    MultilevelForceLayout,
+    StaticLayout,
+    SugiyamaLayout,
+)
 from netext.testing.assertions import assert_output_equal
+from netext.testing.buffers import all_buffers
 
 
 @pytest.fixture
@@ -25,6 +39,17 @@ def test_render_binomial_tree(console):
         console.print(console_graph)
 
 
+def test_render_with_multilevel_force_layout(console):
+    """Smoke test of the multilevel force layout on a graph large enough to be coarsened."""
+    graph = binomial_tree(6)
+    console_graph = ConsoleGraph(graph, layout_engine=MultilevelForceLayout())
+
+    with console.capture():
+        console.print(console_graph)
+
+    assert set(console_graph.node_positions) == set(graph.nodes)
+
+
 @pytest.mark.parametrize("zoom", [AutoZoom.FIT, AutoZoom.FIT_PROPORTIONAL, 2, (2, 3)])
 def test_zoom(console, zoom: AutoZoom | float | tuple[float, float]):
     graph = binomial_tree(4)
@@ -43,6 +68,18 @@ def test_zoom(console, zoom: AutoZoom | float | tuple[float, float]):
     assert original == expected
 
 
+def test_native_compositor_renders_the_same(console):
+    graph = binomial_tree(4)
+
+    outputs = []
+    for native_compositor in (False, True):
+        with console.capture() as capture:
+            console.print(ConsoleGraph(graph, native_compositor=native_compositor))
+        outputs.append(capture.get())
+
+    assert_output_equal(outputs[0], outputs[1])
+
+
 def test_get_viewport_when_set_previously():
     # Set up
     graph = binomial_tree(4)
@@ -218,3 +255,439 @@ def test_render_graph_with_mutations_update_positions_and_data(console):
 
     assert original != mutated
     assert_output_equal(expected, mutated)
+
+
+def test_viewport_change_only_recomposites(console):
+    graph = binomial_tree(4)
+    console_graph = ConsoleGraph(graph)
+
+    with console.capture():
+        console.print(console_graph)
+
+    edge_router = console_graph._edge_router
+    edge_buffers = dict(console_graph.edge_buffers)
+    node_buffers = dict(console_graph.node_buffers)
+
+    viewport = Region(x=0, y=0, width=20, height=10)
+    console_graph.viewport = viewport
+
+    with console.capture() as capture:
+        console.print(console_graph)
+    moved = capture.get()
+
+    assert console_graph._edge_router is edge_router
+    assert all(console_graph.edge_buffers[edge] is buffer for edge, buffer in edge_buffers.items())
+    assert all(console_graph.node_buffers[node] is buffer for node, buffer in node_buffers.items())
+
+    with console.capture() as capture:
+        console.print(ConsoleGraph(graph, viewport=viewport))
+    assert moved == capture.get()
+
+
+def _assert_index_matches(console_graph: ConsoleGraph) -> None:
+    viewport = console_graph.full_viewport
+    indexed = console_graph._buffer_index.query_rows(viewport.y, viewport.y + viewport.height - 1)
+    buffers = list(all_buffers(console_graph))
+    assert len(indexed) == len(buffers)
+    assert all(any(buffer is other for other in buffers) for buffer in indexed)
+
+
+def test_buffer_index_tracks_mutations(console):
+    graph = binomial_tree(3)
+    console_graph = ConsoleGraph(graph, layout_engine=StaticLayout())
+
+    with console.capture():
+        console.print(console_graph)
+    _assert_index_matches(console_graph)
+
+    console_graph.add_node(10, FloatPoint(20, 20))
+    console_graph.add_edge(0, 10)
+    _assert_index_matches(console_graph)
+
+    console_graph.update_node(1, FloatPoint(-10, 5))
+    console_graph.update_edge(0, 10, {"$style": Style(color="red")})
+    _assert_index_matches(console_graph)
+
+    console_graph.remove_edge(*next(iter(console_graph.edge_buffers)))
+    console_graph.remove_node(10)
+    _assert_index_matches(console_graph)
+
+
+def test_mutations_only_recomposite_dirty_rows(console):
+    graph = binomial_tree(4)
+    viewport = Region(x=-30, y=-20, width=60, height=40)
+    console_graph = ConsoleGraph(graph, viewport=viewport)
+
+    def assert_matches_full_composition():
+        expected_strips, _ = render_buffers(list(all_buffers(console_graph)), viewport)
+        assert console_graph._composited_viewport() == expected_strips
+
+    with console.capture():
+        console.print(console_graph)
+    assert_matches_full_composition()
+
+    rows_before = list(console_graph._composited_viewport())
+    console_graph.add_node("new", FloatPoint(0, 0), data={"$content": "x"})
+    assert_matches_full_composition()
+    rows_after = console_graph._composited_viewport()
+    assert any(before is after for before, after in zip(rows_before, rows_after))
+
+    console_graph.update_node("new", FloatPoint(5, 2))
+    assert_matches_full_composition()
+
+    u, v = next(iter(console_graph.edge_buffers))
+    console_graph.update_edge(u, v, {"$style": Style(color="red")})
+    assert_matches_full_composition()
+
+    console_graph.remove_node("new")
+    assert_matches_full_composition()
+
+    console_graph.viewport = Region(x=-30, y=-10, width=60, height=40)
+    viewport = console_graph.viewport
+    assert_matches_full_composition()
+
+
+def test_element_at_resolves_visible_element(console):
+    graph = binomial_tree(4)
+    console_graph = ConsoleGraph(graph)
+    console_graph.add_node("new", FloatPoint(0, 0), data={"$content": "x"})
+    console_graph.add_edge(0, "new")
+
+    viewport = console_graph.full_viewport
+    _, reverse_map = render_buffers(list(all_buffers(console_graph)), viewport, build_reverse_map=True)
+
+    for x in range(viewport.x, viewport.x + viewport.width):
+        for y in range(viewport.y, viewport.y + viewport.height):
+            assert console_graph.element_at(Point(x, y)) == reverse_map.get((x, y))
+
+
+def test_rendered_state_lookups_do_not_walk_the_transition_graph(console, monkeypatch):
+    console_graph = ConsoleGraph(binomial_tree(3))
+    with console.capture():
+        console.print(console_graph)
+
+    def failing_descendants(*args, **kwargs):
+        raise AssertionError("The transition graph must not be walked once the state is reached")
+
+    monkeypatch.setattr("netext.console_graph.nx.descendants", failing_descendants)
+    viewport = console_graph.full_viewport
+    console_graph.element_at(Point(viewport.x, viewport.y))
+
+
+def test_rows_are_streamed(console, monkeypatch):
+    graph = binomial_tree(4)
+    console_graph = ConsoleGraph(graph)
+
+    with console.capture() as capture:
+        console.print(console_graph)
+    expected = capture.get()
+
+    composited_rows = []
+
+    def counting_iter_render_buffers(*args, **kwargs):
+        for strip in iter_render_buffers(*args, **kwargs):
+            composited_rows.append(strip)
+            yield strip
+
+    monkeypatch.setattr("netext.console_graph.iter_render_buffers", counting_iter_render_buffers)
+    monkeypatch.setattr("netext.console_graph.MAX_CACHED_VIEWPORT_ROWS", 1)
+    console_graph.viewport = console_graph.full_viewport
+
+    rows = console_graph._iter_viewport_rows()
+    assert next(rows) is composited_rows[0]
+    assert len(composited_rows) == 1
+
+    with console.capture() as capture:
+        console.print(console_graph)
+    assert capture.get() == expected
+    # Viewports taller than the limit are not cached.
+    assert console_graph._row_cache == dict()
+
+
+def _static_graph() -> DiGraph:
+    graph = DiGraph()
+    for node, (x, y) in enumerate([(0, 0), (20, 0), (0, 15), (20, 15), (40, 8)]):
+        graph.add_node(node, **{"$x": x, "$y": y})
+    return graph
+
+
+def test_batched_mutations_route_edges_at_once(console, monkeypatch):
+    expected_graph = _static_graph()
+    expected_graph.add_edges_from([(0, 1), (0, 2), (1, 3), (2, 3), (3, 4)])
+    with console.capture() as capture:
+        console.print(ConsoleGraph(expected_graph, layout_engine=StaticLayout()))
+    expected = capture.get()
+
+    console_graph = ConsoleGraph(_static_graph(), layout_engine=StaticLayout())
+    with console.capture():
+        console.print(console_graph)
+
+    route_edges_calls = []
+
+    def counting_route_edges(edge_router, edge_anchors):
+        route_edges_calls.append(len(edge_anchors))
+        return route_edges(edge_router, edge_anchors)
+
+    def failing_route_edge(*args, **kwargs):
+        raise AssertionError("Edges of a batch must not be routed one by one")
+
+    monkeypatch.setattr("netext.edge_rasterizer.route_edges", counting_route_edges)
+    monkeypatch.setattr("netext.edge_rasterizer.route_edge", failing_route_edge)
+
+    with console_graph.batch():
+        for u, v in expected_graph.edges:
+            console_graph.add_edge(u, v)
+        assert console_graph.edge_buffers == dict()
+
+    assert route_edges_calls == [5]
+    with console.capture() as capture:
+        console.print(console_graph)
+    assert capture.get() == expected
+
+
+def test_parallel_routing_renders_the_same(console):
+    graph = _static_graph()
+    graph.add_edges_from([(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (0, 4)])
+
+    outputs = []
+    for routing_threads in (1, 4):
+        with console.capture() as capture:
+            console.print(ConsoleGraph(graph, layout_engine=StaticLayout(), routing_threads=routing_threads))
+        outputs.append(capture.get())
+
+    assert_output_equal(outputs[0], outputs[1])
+
+
+def test_apply_mutations_matches_sequential_mutations(console):
+    def mutate(console_graph: ConsoleGraph) -> None:
+        console_graph.add_node(5, FloatPoint(40, 20), data={"$content": "new"})
+        console_graph.add_edge(0, 1)
+        console_graph.add_edge(1, 5)
+        console_graph.add_edge(0, 4)
+        console_graph.update_node(1, position=FloatPoint(20, 3))
+        console_graph.update_edge(0, 1, {"$style": Style(color="red")})
+        console_graph.remove_edge(0, 4)
+        console_graph.remove_node(2)
+
+    sequential = ConsoleGraph(_static_graph(), layout_engine=StaticLayout())
+    mutate(sequential)
+
+    batched = ConsoleGraph(_static_graph(), layout_engine=StaticLayout())
+    with batched.batch():
+        mutate(batched)
+
+    applied = ConsoleGraph(_static_graph(), layout_engine=StaticLayout())
+    applied.apply_mutations(
+        [
+            AddNode(5, FloatPoint(40, 20), data={"$content": "new"}),
+            AddEdge(0, 1),
+            AddEdge(1, 5),
+            AddEdge(0, 4),
+            UpdateNode(1, position=FloatPoint(20, 3)),
+            UpdateEdge(0, 1, {"$style": Style(color="red")}),
+            RemoveEdge(0, 4),
+            RemoveNode(2),
+        ]
+    )
+
+    for console_graph in (batched, applied):
+        assert console_graph.node_buffers.keys() == sequential.node_buffers.keys()
+        assert console_graph.edge_buffers.keys() == sequential.edge_buffers.keys()
+        _assert_index_matches(console_graph)
+
+
+def _count_layouts(monkeypatch) -> list[ConsoleGraph]:
+    layouts = []
+    transition = ConsoleGraph._transition_compute_node_layout
+
+    def counting_transition(self):
+        layouts.append(self)
+        transition(self)
+
+    monkeypatch.setattr(ConsoleGraph, "_transition_compute_node_layout", counting_transition)
+    return layouts
+
+
+def test_batch_computes_layout_once(console, monkeypatch):
+    graph = binomial_tree(3)
+
+    sequential = ConsoleGraph(graph)
+    with console.capture():
+        console.print(sequential)
+    sequential.add_node("a")
+    sequential.add_edge(0, "a")
+    sequential.add_node("b")
+    sequential.add_edge("a", "b")
+    # Sequential mutations compute a layout before adding each edge, the batch only once at the end.
+    sequential.layout()
+    with console.capture() as capture:
+        console.print(sequential)
+    expected = capture.get()
+
+    console_graph = ConsoleGraph(graph)
+    with console.capture():
+        console.print(console_graph)
+
+    layouts = _count_layouts(monkeypatch)
+
+    with console_graph.batch():
+        console_graph.add_node("a")
+        console_graph.add_edge(0, "a")
+        console_graph.add_node("b")
+        console_graph.add_edge("a", "b")
+
+    with console.capture() as capture:
+        console.print(console_graph)
+    assert capture.get() == expected
+    assert len(layouts) == 1
+
+
+def test_batch_discards_mutations_on_error(console):
+    console_graph = ConsoleGraph(_static_graph(), layout_engine=StaticLayout())
+    with console.capture():
+        console.print(console_graph)
+
+    with pytest.raises(RuntimeError), console_graph.batch():
+        console_graph.add_edge(0, 1)
+        raise RuntimeError()
+
+    assert not console_graph._core_graph.contains_edge(0, 1)
+
+
+def test_cancelled_rendering_resumes_from_last_state():
+    graph = binomial_tree(3, create_using=DiGraph)
+    console_graph = ConsoleGraph(graph, console=Console(width=80))
+
+    transitions = iter([False, True])
+    console_graph._require(RenderState.EDGES_RENDERED, cancelled=lambda: next(transitions))
+    assert console_graph._render_state == RenderState.NODE_BUFFERS_RENDERED_FOR_LAYOUT
+    assert not console_graph._is_rendered(RenderState.EDGES_RENDERED)
+
+    console_graph._require(RenderState.EDGES_RENDERED)
+    assert console_graph._is_rendered(RenderState.EDGES_RENDERED)
+    assert console_graph._render_state == RenderState.EDGES_RENDERED
+
+
+def test_incremental_layout_only_moves_neighborhood_of_added_nodes(console, monkeypatch):
+    graph = binomial_tree(4, create_using=DiGraph)
+    console_graph = ConsoleGraph(graph, layout_engine=ForceDirectedLayout(), incremental_layout=True)
+    with console.capture():
+        console.print(console_graph)
+    positions = dict(console_graph.node_positions)
+    edge_buffers = dict(console_graph.edge_buffers)
+    layouts = _count_layouts(monkeypatch)
+
+    console_graph.add_node("a")
+    console_graph.add_edge(3, "a")
+    with console.capture():
+        console.print(console_graph)
+
+    assert not layouts
+    assert "a" in console_graph.node_positions
+    assert (3, "a") in console_graph.edge_buffers
+    # Only the added node and its neighbor move, other edges are not routed again.
+    for node in graph.nodes:
+        if node != 3:
+            assert console_graph.node_positions[node] == positions[node]
+    for (u, v), edge_buffer in edge_buffers.items():
+        if 3 not in (u, v):
+            assert console_graph.edge_buffers[(u, v)] is edge_buffer
+
+
+def test_incremental_layout_keeps_fractional_positions(console, monkeypatch):
+    graph = binomial_tree(4, create_using=DiGraph)
+    console_graph = ConsoleGraph(graph, layout_engine=ForceDirectedLayout(), incremental_layout=True)
+    with console.capture():
+        console.print(console_graph)
+    console_graph.update_node(1, FloatPoint(20.5, 3))
+    with console.capture():
+        console.print(console_graph)
+    position = console_graph.node_positions[1]
+    node_buffer = console_graph.node_buffers[1]
+    edge_buffer = console_graph.edge_buffers[(0, 1)]
+    layouts = _count_layouts(monkeypatch)
+
+    console_graph.add_node("a")
+    console_graph.add_edge(3, "a")
+    with console.capture():
+        console.print(console_graph)
+
+    assert not layouts
+    assert console_graph.node_positions[1] == position
+    assert console_graph.node_buffers[1] is node_buffer
+    assert console_graph.edge_buffers[(0, 1)] is edge_buffer
+
+
+def test_incremental_layout_translates_by_the_shift_of_rounded_positions():
+    class ShiftingLayout:
+        def layout_incremental(self, graph, positions):
+            # Returns the layout moved by (3, -2), moves node 3 and places a new node.
+            placed = {node: Point(p.x + 3, p.y - 2) for node, p in positions}
+            placed[3] = Point(placed[3].x + 3, placed[3].y)
+            placed["new"] = Point(0, 0)
+            return placed.items()
+
+    node_positions = {
+        1: FloatPoint(10.3, 4.1),
+        2: FloatPoint(20.6, 4.4),
+        3: FloatPoint(30.2, 8.3),
+        4: FloatPoint(5.1, 5.2),
+    }
+    positions = compute_incremental_node_layout(cast(Any, ShiftingLayout()), cast(Any, None), node_positions)
+
+    assert {node: positions[node] for node in (1, 2, 4)} == {node: node_positions[node] for node in (1, 2, 4)}
+    assert positions[3] == FloatPoint(33, 8)
+    assert positions["new"] == FloatPoint(-3, 2)
+
+
+def test_incremental_layout_inserts_nodes_into_layers(console, monkeypatch):
+    graph = binomial_tree(3, create_using=DiGraph)
+    console_graph = ConsoleGraph(graph, layout_engine=SugiyamaLayout(LayoutDirection.TOP_DOWN), incremental_layout=True)
+    with console.capture():
+        console.print(console_graph)
+    layouts = _count_layouts(monkeypatch)
+
+    with console_graph.batch():
+        console_graph.add_node("a")
+        console_graph.add_edge(1, "a")
+    with console.capture():
+        console.print(console_graph)
+
+    assert not layouts
+    assert console_graph.node_positions["a"].y == console_graph.node_positions[3].y
+    assert console_graph.node_positions["a"].y > console_graph.node_positions[1].y
+
+
+def test_incremental_layout_handles_mutations_of_unplaced_nodes(console, monkeypatch):
+    graph = binomial_tree(3, create_using=DiGraph)
+    console_graph = ConsoleGraph(graph, layout_engine=ForceDirectedLayout(), incremental_layout=True)
+    with console.capture():
+        console.print(console_graph)
+    layouts = _count_layouts(monkeypatch)
+
+    console_graph.add_node("a")
+    console_graph.add_edge(0, "a")
+    console_graph.update_node("a", data={"$content-renderer": lambda *_: "updated"})
+    console_graph.add_node("b")
+    console_graph.add_edge("a", "b")
+    console_graph.remove_node("b")
+    with console.capture() as capture:
+        console.print(console_graph)
+
+    assert not layouts
+    assert "updated" in capture.get()
+    assert "b" not in console_graph.node_positions
+    assert set(console_graph.edge_buffers) == set(graph.edges) | {(0, "a")}
+
+
+def test_incremental_layout_falls_back_to_full_layout(console, monkeypatch):
+    console_graph = ConsoleGraph(_static_graph(), layout_engine=StaticLayout(), incremental_layout=True)
+    with console.capture():
+        console.print(console_graph)
+    layouts = _count_layouts(monkeypatch)
+
+    console_graph.add_node("a", data={"$x": 10, "$y": 10})
+    with console.capture():
+        console.print(console_graph)
+
+    assert len(layouts) == 1
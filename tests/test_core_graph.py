@@ -1,5 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import pytest
-from netext._core import CoreGraph
+from networkx import binomial_tree
+from netext._core import (
+    CoreGraph,
+    ForceDirectedLayout,
+    LayeringMethod,
+    LayoutDirection,
+    MultilevelForceLayout,
+    Size,
+    StressLayout,
+    SugiyamaLayout,
+    TreeLayout,
+)
 
 
 @pytest.fixture
@@ -24,3 +38,184 @@ def test_adding_and_mutating_original_data(simple_graph: CoreGraph):
     data["bar"] = "baz"
     assert simple_graph.node_data(1) == data
     assert simple_graph.node_data_or_default(1, None) == data
+
+
+def test_layouts_from_multiple_threads():
+    graphs = [CoreGraph.from_edges([(i, i + 1) for i in range(n)] + [(0, n), (1, n // 2)]) for n in range(4, 24)]
+    layout = SugiyamaLayout(LayoutDirection.TOP_DOWN)
+
+    def positions(graph: CoreGraph) -> dict[int, tuple[int, int]]:
+        return {node: (point.x, point.y) for node, point in layout.layout(graph)}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        concurrent = list(executor.map(positions, graphs))
+
+    assert concurrent == [positions(graph) for graph in graphs]
+
+
+def test_tree_layout_places_children_below_parents():
+    graph = CoreGraph.from_edges([(1, 2), (1, 3), (2, 4), (2, 5), (3, 6)])
+    positions = {node: (point.x, point.y) for node, point in TreeLayout(LayoutDirection.TOP_DOWN).layout(graph)}
+
+    assert set(positions) == {1, 2, 3, 4, 5, 6}
+    assert positions[2][1] == positions[3][1] > positions[1][1]
+    assert positions[4][1] == positions[5][1] == positions[6][1] > positions[2][1]
+    assert len(set(positions.values())) == len(positions)
+
+
+@pytest.mark.parametrize(
+    "edges",
+    [
+        [(1, 2), (2, 3), (3, 1), (1, 4)],
+        [(1, 2), (1, 3), (2, 4), (3, 4)],
+        [(1, 2), (1, 3), (4, 5), (6, 7), (6, 8)],
+    ],
+    ids=["cycle", "shared_child", "forest"],
+)
+@pytest.mark.parametrize("direction", [LayoutDirection.TOP_DOWN, LayoutDirection.LEFT_RIGHT])
+def test_tree_layout_non_trees(edges, direction):
+    graph = CoreGraph.from_edges(edges)
+    positions = {node: (point.x, point.y) for node, point in TreeLayout(direction).layout(graph)}
+
+    assert set(positions) == {node for edge in edges for node in edge}
+    assert len(set(positions.values())) == len(positions)
+
+
+def test_tree_layout_children_inserted_before_parents():
+    graph = CoreGraph.from_edges([(2, 3), (1, 2)])
+    positions = {node: (point.x, point.y) for node, point in TreeLayout(LayoutDirection.TOP_DOWN).layout(graph)}
+
+    assert positions[1][1] < positions[2][1] < positions[3][1]
+
+
+@pytest.mark.parametrize(
+    "edges, pivots",
+    [
+        ([(1, 2), (2, 3), (3, 4), (4, 1), (1, 3)], 2),
+        ([(1, 2), (2, 3), (3, 1), (4, 5), (5, 6), (6, 4), (7, 8)], 4),
+        ([(1, 2), (2, 3), (3, 4)], 10),
+    ],
+    ids=["small", "disconnected", "more_pivots_than_nodes"],
+)
+def test_stress_layout(edges, pivots):
+    graph = CoreGraph.from_edges(edges)
+    positions = {node: (point.x, point.y) for node, point in StressLayout(pivots=pivots).layout(graph)}
+
+    assert set(positions) == {node for edge in edges for node in edge}
+    assert len(set(positions.values())) == len(positions)
+
+
+@pytest.mark.parametrize("theta", [0.0, 0.8], ids=["exact", "barnes_hut"])
+def test_force_directed_layout_separates_nodes(theta):
+    tree = binomial_tree(6)
+    graph = CoreGraph.from_edges(list(tree.edges))
+    positions = {node: (point.x, point.y) for node, point in ForceDirectedLayout(theta=theta).layout(graph)}
+
+    assert set(positions) == set(tree.nodes)
+    assert len(set(positions.values())) == len(positions)
+
+
+def bounding_box(
+    positions: dict[int, tuple[int, int]], sizes: dict[int, tuple[int, int]], nodes: tuple[int, ...]
+) -> tuple[int, int, int, int]:
+    boxes = []
+    for node in nodes:
+        (x, y), (width, height) = positions[node], sizes[node]
+        left, top = x - width // 2, y - height // 2
+        boxes.append((left, top, left + width, top + height))
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [
+        pytest.param(partial(SugiyamaLayout, LayoutDirection.TOP_DOWN), id="sugiyama"),
+        pytest.param(ForceDirectedLayout, id="force_directed"),
+        pytest.param(MultilevelForceLayout, id="multilevel_force"),
+        pytest.param(partial(TreeLayout, LayoutDirection.TOP_DOWN), id="tree"),
+        pytest.param(StressLayout, id="stress"),
+    ],
+)
+def test_packed_components_do_not_overlap(engine):
+    components = {
+        (1, 2, 3): [(1, 2), (2, 3), (3, 1)],
+        (4, 5): [(4, 5)],
+        (6,): [],
+        (7, 8, 9, 10): [(7, 8), (7, 9), (7, 10)],
+    }
+    sizes = {node: (3 + node % 3, 1 + node % 2) for nodes in components for node in nodes}
+    graph = CoreGraph()
+    for node, (width, height) in sizes.items():
+        graph.add_node(node, {}, Size(width, height))
+    for edges in components.values():
+        for u, v in edges:
+            graph.add_edge(u, v, {})
+    positions = {node: (point.x, point.y) for node, point in engine(pack_components=True).layout(graph)}
+
+    boxes = [bounding_box(positions, sizes, nodes) for nodes in components]
+    for index, (left, top, right, bottom) in enumerate(boxes):
+        for other_left, other_top, other_right, other_bottom in boxes[:index]:
+            assert right <= other_left or other_right <= left or bottom <= other_top or other_bottom <= top
+
+
+def layer_indices(positions: dict[int, tuple[int, int]]) -> dict[int, int]:
+    layer_ys = sorted({y for _, y in positions.values()})
+    return {node: layer_ys.index(y) for node, (_, y) in positions.items()}
+
+
+def test_sugiyama_network_simplex_layering():
+    # A chain with a second source pointing at its end.
+    graph = CoreGraph.from_edges([(1, 2), (2, 3), (3, 4), (5, 4)])
+
+    def layering(method: LayeringMethod) -> dict[int, int]:
+        layout = SugiyamaLayout(LayoutDirection.TOP_DOWN, layering=method)
+        return layer_indices({node: (point.x, point.y) for node, point in layout.layout(graph)})
+
+    network_simplex = layering(LayeringMethod.NETWORK_SIMPLEX)
+    assert network_simplex[5] == network_simplex[4] - 1
+    assert layering(LayeringMethod.LONGEST_PATH) != network_simplex
+
+
+def test_sugiyama_multi_start_ordering_is_deterministic():
+    edges = [(i, j) for i in range(4) for j in range(4, 9) if (i + j) % 3] + [(j, 9 + j % 3) for j in range(4, 9)]
+    graph = CoreGraph.from_edges(edges)
+
+    def positions() -> dict[int, tuple[int, int]]:
+        layout = SugiyamaLayout(LayoutDirection.TOP_DOWN, ordering_starts=8)
+        return {node: (point.x, point.y) for node, point in layout.layout(graph)}
+
+    first = positions()
+    assert set(first) == {node for edge in edges for node in edge}
+    assert all(positions() == first for _ in range(5))
+
+
+def test_sugiyama_warm_start_keeps_layers():
+    edges = [(1, 2), (1, 3), (2, 4), (3, 4), (1, 4)]
+    graph = CoreGraph.from_edges(edges)
+    layout = SugiyamaLayout(LayoutDirection.TOP_DOWN, warm_start=True)
+    positions = {node: (point.x, point.y) for node, point in layout.layout(graph)}
+    layers = layout.layers
+
+    assert layers is not None
+    assert sorted(node for layer in layers for node in layer) == [1, 2, 3, 4]
+    assert {node: index for index, layer in enumerate(layers) for node in layer} == layer_indices(positions)
+
+    warm_started = SugiyamaLayout(LayoutDirection.TOP_DOWN, warm_start=True)
+    warm_started.layers = layers
+    extended_graph = CoreGraph.from_edges(edges + [(4, 5)])
+    relayout = layer_indices({node: (point.x, point.y) for node, point in warm_started.layout(extended_graph)})
+
+    assert {node: relayout[node] for node in positions} == layer_indices(positions)
+    assert relayout[5] == relayout[4] + 1
+
+
+@pytest.mark.parametrize("layers", [1, [1, 2], "layers"])
+def test_sugiyama_malformed_layers_raise(layers):
+    layout = SugiyamaLayout(LayoutDirection.TOP_DOWN, warm_start=True)
+    with pytest.raises(TypeError):
+        layout.layers = layers
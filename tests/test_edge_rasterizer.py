@@ -1,10 +1,13 @@
 import pytest
 from rich.console import Console
+from rich.segment import Segment
+from rich.style import Style
 
-from netext.edge_rasterizer import rasterize_edge
+from netext.edge_rasterizer import EdgeRoutingRequest, rasterize_edge, rasterize_edges
 from netext._core import Point
 from netext.node_rasterizer import rasterize_node
 from netext.properties.edge import EdgeProperties
+from netext.rendering.segment_buffer import Spacer, coalesce_segments, intern_style
 
 import netext._core as core
 
@@ -36,3 +39,64 @@ def test_trivial_edge(console: Console) -> None:
 
     assert edge.width == 3
     assert edge.height == 9
+
+
+def test_edge_strips_are_coalesced(console: Console) -> None:
+    node_buffer_u = rasterize_node(console, node="A", data=dict())
+    node_buffer_v = rasterize_node(console, node="B", data=dict())
+
+    node_buffer_u.center = Point(1, 1)
+    node_buffer_v.center = Point(20, 1)
+
+    result = rasterize_edge(
+        console,
+        core.EdgeRouter(),
+        node_buffer_u,
+        node_buffer_v,
+        properties=EdgeProperties(style=Style(color="red")),
+    )
+    assert result is not None
+    edge, _ = result
+
+    assert edge.height == 1
+    [segment] = edge.strips[0].segments
+    assert isinstance(segment, Segment)
+    assert segment.cell_length == edge.width
+    assert segment.style is intern_style(Style(color="red"))
+
+
+def test_hidden_edges_do_not_shift_routed_paths(console: Console) -> None:
+    node_buffers = {}
+    for node, center in {"A": Point(1, 1), "B": Point(20, 1), "C": Point(1, 12), "D": Point(20, 12)}.items():
+        node_buffers[node] = rasterize_node(console, node=node, data=dict())
+        node_buffers[node].center = center
+
+    requests = [
+        EdgeRoutingRequest("A", "B", node_buffers["A"], node_buffers["B"], EdgeProperties(show=False)),
+        EdgeRoutingRequest("C", "D", node_buffers["C"], node_buffers["D"], EdgeProperties()),
+    ]
+    edge_buffers, _ = rasterize_edges(console, core.EdgeRouter(), requests)
+
+    assert list(edge_buffers) == [("C", "D")]
+    edge_buffer = edge_buffers[("C", "D")]
+    assert edge_buffer.top_y == edge_buffer.bottom_y == 12
+    assert edge_buffer.z_index.layer_index == 0
+
+
+def test_coalesce_segments() -> None:
+    style = Style(color="red")
+    segments = coalesce_segments(
+        [
+            Spacer(1),
+            Spacer(2),
+            Segment("a", Style(color="red")),
+            Segment("b", Style(color="red")),
+            Segment("", style),
+            Segment("c", Style(color="blue")),
+            Spacer(0),
+            Segment("d", Style(color="blue")),
+        ]
+    )
+
+    assert segments == [Spacer(3), Segment("ab", style), Segment("cd", Style(color="blue"))]
+    assert segments[1].style is intern_style(style)
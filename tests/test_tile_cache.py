@@ -0,0 +1,87 @@
+from networkx import binomial_tree
+from rich.console import Console
+from rich.segment import Segment
+
+from netext import ConsoleGraph
+from netext.buffer_renderer import render_buffers
+from netext.geometry.region import Region
+from netext.rendering.tile_cache import TileCache
+from netext.testing.buffers import all_buffers
+
+
+def text(strip: list[Segment]) -> str:
+    return "".join(segment.text for segment in strip)
+
+
+def test_assembled_region_matches_render_buffers():
+    console_graph = ConsoleGraph(binomial_tree(5), console=Console())
+    full_viewport = console_graph.full_viewport
+    buffers = list(all_buffers(console_graph))
+
+    for region in [
+        full_viewport,
+        Region(full_viewport.x + 7, full_viewport.y + 3, 70, 20),
+        Region(full_viewport.x - 5, full_viewport.y + 10, 30, 5),
+    ]:
+        strips = console_graph._composited_region(region)
+        expected_strips, _ = render_buffers(buffers, region)
+
+        assert len(strips) == region.height
+        assert [text(strip) for strip in strips] == [text(strip).ljust(region.width) for strip in expected_strips]
+
+
+def test_tiles_are_reused_until_invalidated():
+    composited: list[Region] = []
+
+    def composite(region: Region):
+        composited.append(region)
+        return [[Segment("x" * region.width)] for _ in range(region.height)]
+
+    tile_cache = TileCache(tile_width=4, tile_height=2, max_tiles=8)
+
+    strips = tile_cache.render(Region(1, 1, 6, 2), composite)
+    assert [text(strip) for strip in strips] == ["xxxxxx", "xxxxxx"]
+    assert len(composited) == 4
+
+    tile_cache.render(Region(0, 0, 8, 4), composite)
+    assert len(composited) == 4
+
+    # Only the tiles of the second tile row intersect the changed rows.
+    tile_cache.invalidate_rows([(2, 2)])
+    tile_cache.render(Region(0, 0, 8, 4), composite)
+    assert len(composited) == 6
+    assert {region.y for region in composited[4:]} == {2}
+
+
+def test_tile_budget_bounds_the_cache():
+    tile_cache = TileCache(tile_width=4, tile_height=2, max_tiles=3)
+    tile_cache.render(Region(0, 0, 40, 20), lambda region: [])
+    assert len(tile_cache) == 3
+
+
+def test_mutations_only_invalidate_intersecting_tiles(monkeypatch):
+    console_graph = ConsoleGraph(binomial_tree(5), console=Console())
+    console_graph._tile_cache = TileCache(tile_width=16, tile_height=4)
+    full_viewport = console_graph.full_viewport
+
+    composited: list[Region] = []
+    composite_region = console_graph._composite_region
+
+    def counting_composite_region(region: Region):
+        composited.append(region)
+        return composite_region(region)
+
+    monkeypatch.setattr(console_graph, "_composite_region", counting_composite_region)
+
+    console_graph._composited_region(full_viewport)
+    all_tiles = len(composited)
+    composited.clear()
+
+    # A leaf at the bottom of the graph, far away from the top rows.
+    leaf = max(console_graph.node_buffers, key=lambda node: console_graph.node_buffers[node].top_y)
+    console_graph.update_node(leaf, data={"$content": "changed"})
+    strips = console_graph._composited_region(full_viewport)
+
+    assert 0 < len(composited) < all_tiles
+    expected_strips, _ = render_buffers(list(all_buffers(console_graph)), full_viewport)
+    assert [text(strip) for strip in strips] == [text(strip).ljust(full_viewport.width) for strip in expected_strips]
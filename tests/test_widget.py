@@ -5,7 +5,10 @@ from netext.edge_routing.modes import EdgeRoutingMode
 from netext.edge_rendering.modes import EdgeSegmentDrawingMode
 from netext.properties.arrow_tips import ArrowTip
 from netext.properties.edge import EdgeProperties
+from netext.console_graph import ConsoleGraph
+from netext.geometry.region import Region as NetextRegion
 from rich.style import Style
+from textual.strip import Strip
 
 import networkx as nx
 import pytest
@@ -15,6 +18,7 @@ class DummyApp(App):
     def __init__(self, *args, **kwargs):
         self._graph = kwargs.pop("graph")
         self._scroll_via_viewport = kwargs.pop("scroll_via_viewport", False)
+        self._background_rendering = kwargs.pop("background_rendering", False)
         self.clicked = 0
         super().__init__(*args, **kwargs)
 
@@ -23,6 +27,7 @@ class DummyApp(App):
             self._graph,
             zoom=1,
             scroll_via_viewport=self._scroll_via_viewport,
+            background_rendering=self._background_rendering,
             id="graph",
         )
 
@@ -149,3 +154,101 @@ async def test_graph_setter_rebuilds_console_graph():
         gv.graph = new_graph
         assert gv.node_properties(1).style == Style(color="red")
         assert gv.node_properties(2).style == Style(color="red")
+
+
+@pytest.mark.asyncio
+async def test_render_line_composites_only_requested_lines(monkeypatch):
+    graph = nx.path_graph(100, create_using=nx.DiGraph)
+
+    composited: list[NetextRegion] = []
+    composite_region = ConsoleGraph._composite_region
+
+    def counting_composite_region(self, region: NetextRegion):
+        composited.append(region)
+        return composite_region(self, region)
+
+    monkeypatch.setattr(ConsoleGraph, "_composite_region", counting_composite_region)
+
+    app = DummyApp(graph=graph)
+    async with app.run_test(size=(80, 24)) as pilot:
+        await pilot.pause()
+        view = app.query_one(GraphView)
+        console_graph = view._console_graph
+        viewport = console_graph.viewport
+        assert viewport.height > 10 * view.size.height
+
+        assert 0 < len(view._lines) <= view.size.height
+        # All visible lines lie in the first row of tiles.
+        assert len({region.y for region in composited}) == 1
+
+        full_strips = console_graph._composited_region(viewport)
+        for y, line in view._lines.items():
+            assert line == Strip(full_strips[y]).crop(0, view.size.width)
+
+
+@pytest.mark.asyncio
+async def test_render_line_keeps_lines_of_unchanged_rows():
+    graph = nx.path_graph(10, create_using=nx.DiGraph)
+
+    app = DummyApp(graph=graph)
+    async with app.run_test(size=(80, 24)) as pilot:
+        await pilot.pause()
+        view = app.query_one(GraphView)
+        lines = [view.render_line(y) for y in range(view.size.height)]
+
+        view.update_node(0, data={"$content": "X"})
+        await pilot.pause()
+        console_graph = view._console_graph
+        viewport = console_graph.viewport
+        # The node is rendered again along with its edge.
+        changed = {
+            y - viewport.y
+            for buffer in (console_graph.node_buffers[0], console_graph.edge_buffers[(0, 1)])
+            for y in range(buffer.top_y, buffer.bottom_y + 1)
+        }
+        updated = [view.render_line(y) for y in range(view.size.height)]
+
+        assert any(line is not updated[y] for y, line in enumerate(lines) if y in changed)
+        assert all(line is updated[y] for y, line in enumerate(lines) if y not in changed)
+
+
+async def _wait_for_background_rendering(app: App, pilot) -> GraphView:
+    view = app.query_one(GraphView)
+    while view._render_worker is not None or view._pending_updates:
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+    return view
+
+
+@pytest.mark.asyncio
+async def test_background_rendering_matches_foreground_rendering():
+    graph = nx.binomial_tree(4, create_using=nx.DiGraph)
+
+    lines = []
+    for background_rendering in (False, True):
+        app = DummyApp(graph=graph, background_rendering=background_rendering)
+        async with app.run_test(size=(80, 24)) as pilot:
+            view = await _wait_for_background_rendering(app, pilot)
+            assert view._console_graph_ready()
+            lines.append([view.render_line(y).text for y in range(view.size.height)])
+
+    assert lines[0] == lines[1]
+    assert any(line.strip() for line in lines[1])
+
+
+@pytest.mark.asyncio
+async def test_background_rendering_applies_updates_made_while_rendering():
+    graph = _make_styled_graph()
+
+    app = DummyApp(graph=graph, background_rendering=True)
+    async with app.run_test(size=(80, 24)) as pilot:
+        view = app.query_one(GraphView)
+        view.add_node(3, position=FloatPoint(10, 5))
+        view.add_edge(2, 3)
+        view.remove_node(1)
+        # The console graph is only changed by the render worker.
+        assert view._pending_updates or view._render_worker is not None
+
+        view = await _wait_for_background_rendering(app, pilot)
+        assert set(view._console_graph._core_graph.all_nodes()) == {2, 3}
+        assert set(view._console_graph.edge_buffers) == {(2, 3)}